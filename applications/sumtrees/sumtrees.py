@@ -54,6 +54,7 @@ from dendropy.utility import messaging
 from dendropy.utility import timeprocessing
 from dendropy.utility import bitprocessing
 from dendropy.utility import textprocessing
+from dendropy.dataio import treeindex
 
 ##############################################################################
 ## Preamble
@@ -89,8 +90,10 @@ def _read_into_tree_array(
         error_message_func,
         log_frequency,
         debug_mode,
+        split_store=None,
+        tree_counted_func=None,
         ):
-    if not log_frequency:
+    if not log_frequency and split_store is None and tree_counted_func is None:
         tree_array.read_from_files(
             files=tree_sources,
             schema=schema,
@@ -110,10 +113,12 @@ def _read_into_tree_array(
                         or (current_tree_offset >= 0 and log_frequency > 0 and (current_tree_offset % log_frequency) == 0)
                         )
                     ):
-                if current_tree_offset >= tree_offset:
-                    coda = " (analyzing)"
-                else:
+                if current_tree_offset < tree_offset:
                     coda = " (burning-in)"
+                elif current_tree_offset < resume_tree_offset:
+                    coda = " (previously counted)"
+                else:
+                    coda = " (analyzing)"
                 info_message_func("'{source_name}': tree at offset {current_tree_offset}{coda}".format(
                     source_name=source_name,
                     current_tree_offset=current_tree_offset,
@@ -130,6 +135,8 @@ def _read_into_tree_array(
                 )
         current_source_index = None
         current_tree_offset = None
+        source_key = None
+        resume_tree_offset = 0
         try:
             for aggregate_tree_idx, tree in enumerate(tree_yielder):
                 current_yielder_index = tree_yielder.current_file_index
@@ -143,9 +150,24 @@ def _read_into_tree_array(
                         info_message_func("Analyzing {} of {}: '{}'".format(current_source_index+1, len(tree_sources), source_name), wrap=False)
                     else:
                         info_message_func("Analyzing: '{}'".format(source_name), wrap=False)
-                if current_tree_offset >= tree_offset:
+                    if split_store is not None and tree_yielder.current_file_name is not None:
+                        source_key = os.path.abspath(tree_yielder.current_file_name)
+                        resume_tree_offset = split_store.source_tree_offsets.get(source_key, 0)
+                        if resume_tree_offset > tree_offset:
+                            info_message_func("Skipping {} trees counted in previous runs".format(resume_tree_offset - tree_offset), wrap=False)
+                    else:
+                        source_key = None
+                        resume_tree_offset = 0
+                if current_tree_offset >= tree_offset and current_tree_offset >= resume_tree_offset:
+                    if source_key is not None:
+                        # recorded before counting, so that the offset is
+                        # consistent with the counts whenever the store is
+                        # flushed
+                        split_store.source_tree_offsets[source_key] = current_tree_offset + 1
                     tree_array.add_tree(tree=tree, is_bipartitions_updated=False)
                     _log_progress(source_name, current_tree_offset)
+                    if tree_counted_func is not None:
+                        tree_counted_func(tree_array)
                 else:
                     _log_progress(source_name, current_tree_offset)
                 current_tree_offset += 1
@@ -156,15 +178,127 @@ def _read_into_tree_array(
             e.exception_tree_offset = current_tree_offset
             raise e
 
+class TreeSourceTask(object):
+    """
+    A unit of work for a |TreeAnalysisWorker|: either all the trees of a
+    source (after skipping the first ``tree_offset`` trees), or, if
+    ``segments`` is given, a run of consecutive trees of a source, given by
+    the byte ranges of the source (as returned by
+    :meth:`TreeOffsetIndex.byte_segments`) that make up the source restricted
+    to these trees.
+    """
+
+    def __init__(self,
+            source,
+            schema,
+            tree_offset=0,
+            segments=None,
+            encoding=None,
+            tree_range=None):
+        self.source = source
+        self.schema = schema
+        self.tree_offset = tree_offset
+        self.segments = segments
+        self.encoding = encoding
+        self.tree_range = tree_range
+
+    def __str__(self):
+        return self._describe("'{}'".format(self.source))
+
+    def _describe(self, source_name):
+        if self.tree_range is None:
+            return source_name
+        return "{} (trees {} to {})".format(source_name, self.tree_range[0] + 1, self.tree_range[1] + 1)
+
+    def _get_num_trees(self):
+        if self.tree_range is None:
+            return None
+        return self.tree_range[1] - self.tree_range[0] + 1
+    num_trees = property(_get_num_trees)
+
+    def open_source(self):
+        """
+        Returns the source (path) or a stream of the trees of the task to be
+        read, and the number of leading trees to skip.
+        """
+        if self.segments is None:
+            return self.source, self.tree_offset
+        stream = textprocessing.StringIO(treeindex.read_byte_segments(
+            self.source,
+            self.segments,
+            self.encoding))
+        # quoted when logged
+        stream.name = self._describe(self.source)
+        return stream, 0
+
+def compose_tree_source_tasks(
+        tree_sources,
+        schema,
+        tree_offset,
+        num_processes,
+        trees_per_task=None):
+    """
+    Splits the trees of ``tree_sources`` into |TreeSourceTask| objects, to be
+    distributed over ``num_processes`` processes.
+
+    Sources in formats that can be indexed (NEXUS and NEWICK) are split into
+    runs of consecutive trees (after the burn-in of ``tree_offset`` trees of
+    each source), of ``trees_per_task`` trees or, if this is not given,
+    sized so that there are about four tasks for each process across all the
+    sources, allowing the work to be balanced across the processes even when
+    there are fewer sources than processes, or sources of very different
+    sizes. Other sources are handled as a single task each.
+    """
+    indexed_sources = []
+    tasks = []
+    for source in tree_sources:
+        if schema.lower() not in treeindex.INDEXABLE_SCHEMAS:
+            tasks.append(TreeSourceTask(source=source, schema=schema, tree_offset=tree_offset))
+            continue
+        with treeindex.TreeOffsetIndex.get(path=source, use_sidecar=False) as tree_index:
+            reader_schema = schema
+            if schema.lower() == "nexus/newick":
+                reader_schema = "nexus" if tree_index.is_nexus else "newick"
+            tree_indexes = tree_index.select()[tree_offset:]
+            indexed_sources.append((source, tree_index, reader_schema, tree_indexes))
+    if not indexed_sources:
+        return tasks
+    if trees_per_task is None:
+        total_trees = sum(len(s[3]) for s in indexed_sources)
+        trees_per_task = max(1, -(-total_trees // (num_processes * 4)))
+    for source, tree_index, reader_schema, tree_indexes in indexed_sources:
+        if not tree_indexes:
+            continue
+        for part in tree_index.partition(tree_indexes, part_size=trees_per_task):
+            tasks.append(TreeSourceTask(
+                source=source,
+                schema=reader_schema,
+                segments=tree_index.byte_segments(part),
+                encoding=tree_index.encoding,
+                tree_range=(part[0], part[-1])))
+    return tasks
+
 class TreeAnalysisWorker(multiprocessing.Process):
+    """
+    Counts the splits of the trees of the sources in the work queue.
+
+    Results are sent to the results queue as (worker name, result) pairs. If
+    ``retain_trees`` is |True|, the result is the |TreeArray| of all the trees
+    analyzed by the worker, sent when the work queue is exhausted. Otherwise,
+    the trees are not kept: instead, every ``results_flush_interval`` trees,
+    the split counts, edge lengths and node ages of the trees counted since
+    the last flush are sent as a |SplitDistribution|, so that the results can
+    be merged while the worker is running, and are never larger than the
+    number of unique splits in a batch. In either case, the worker signals
+    completion by sending |None| as a result, and failure by sending the
+    exception raised.
+    """
 
     def __init__(self,
             name,
             work_queue,
             results_queue,
-            source_schema,
             taxon_labels,
-            tree_offset,
             is_source_trees_rooted,
             preserve_underscores,
             ignore_edge_lengths,
@@ -176,15 +310,16 @@ class TreeAnalysisWorker(multiprocessing.Process):
             messenger,
             messenger_lock,
             debug_mode,
+            streaming_summaries=False,
+            retain_trees=True,
+            results_flush_interval=1000,
             ):
         multiprocessing.Process.__init__(self, name=name)
         self.work_queue = work_queue
         self.results_queue = results_queue
-        self.source_schema = source_schema
         self.taxon_labels = taxon_labels
         self.taxon_namespace = dendropy.TaxonNamespace(self.taxon_labels)
         self.taxon_namespace.is_mutable = False
-        self.tree_offset = tree_offset
         self.is_source_trees_rooted = is_source_trees_rooted
         self.rooting_interpretation = dendropy.get_rooting_argument(is_rooted=self.is_source_trees_rooted)
         self.preserve_underscores = preserve_underscores
@@ -205,10 +340,13 @@ class TreeAnalysisWorker(multiprocessing.Process):
                 use_tree_weights=self.use_tree_weights,
                 ultrametricity_precision=self.ultrametricity_precision,
                 taxon_label_age_map=self.taxon_label_age_map,
+                streaming_summaries=streaming_summaries,
                 )
-        self.tree_array.worker_name = self.name
+        self.retain_trees = retain_trees
+        self.results_flush_interval = results_flush_interval
         self.num_tasks_received = 0
         self.num_tasks_completed = 0
+        self.num_trees_sent = 0
         self.debug_mode = debug_mode
 
     def send_message(self, msg, level, wrap=True):
@@ -232,17 +370,29 @@ class TreeAnalysisWorker(multiprocessing.Process):
     def send_error(self, msg, wrap=True):
         self.send_message(msg, messaging.ConsoleMessenger.ERROR_MESSAGING_LEVEL, wrap=wrap)
 
+    def send_split_counts(self, tree_array):
+        if tree_array.split_distribution.total_trees_counted == 0:
+            return
+        self.num_trees_sent += tree_array.split_distribution.total_trees_counted
+        split_counts = tree_array.split_distribution.take_counts()
+        tree_array.clear()
+        self.results_queue.put((self.name, split_counts))
+
+    def _tree_counted(self, tree_array):
+        if tree_array.split_distribution.total_trees_counted >= self.results_flush_interval:
+            self.send_split_counts(tree_array)
+
     def run(self):
         while not self.kill_received:
             try:
-                tree_source = self.work_queue.get_nowait()
+                task = self.work_queue.get_nowait()
             except queue.Empty:
                 break
             self.num_tasks_received += 1
             # self.send_info("Received task {task_count}: '{task_name}'".format(
-            self.send_info("Received task: '{task_name}'".format(
+            self.send_info("Received task: {task_name}".format(
                 task_count=self.num_tasks_received,
-                task_name=tree_source), wrap=False)
+                task_name=task), wrap=False)
             # self.tree_array.read_from_files(
             #     files=[tree_source],
             #     schema=self.source_schema,
@@ -252,36 +402,48 @@ class TreeAnalysisWorker(multiprocessing.Process):
             #     store_tree_weights=self.use_tree_weights,
             #     ignore_unrecognized_keyword_arguments=True,
             #     )
+            task_start = datetime.datetime.now()
+            num_trees_before_task = self.num_trees_sent + self.tree_array.split_distribution.total_trees_counted
             try:
+                tree_source, tree_offset = task.open_source()
                 _read_into_tree_array(
                         tree_array=self.tree_array,
                         tree_sources=[tree_source],
-                        schema=self.source_schema,
+                        schema=task.schema,
                         taxon_namespace=self.taxon_namespace,
                         rooting=self.rooting_interpretation,
-                        tree_offset=self.tree_offset,
+                        tree_offset=tree_offset,
                         use_tree_weights=self.use_tree_weights,
                         preserve_underscores=self.preserve_underscores,
                         info_message_func=self.send_info,
                         error_message_func=self.send_error,
                         log_frequency=self.log_frequency,
                         debug_mode=self.debug_mode,
+                        tree_counted_func=None if self.retain_trees else self._tree_counted,
                         )
             except (KeyboardInterrupt, Exception) as e:
-                e.worker_name = self.name
-                self.results_queue.put(e)
+                self.results_queue.put((self.name, e))
                 break
             if self.kill_received:
                 break
             self.num_tasks_completed += 1
+            num_trees = self.num_trees_sent + self.tree_array.split_distribution.total_trees_counted - num_trees_before_task
+            task_seconds = (datetime.datetime.now() - task_start).total_seconds()
             # self.send_info("Completed task {task_count}: '{task_name}'".format(
-            self.send_info("Completed task: '{task_name}'".format(
+            self.send_info("Completed task: {task_name}: {num_trees} trees in {seconds:.2f} seconds ({rate:.1f} trees per second)".format(
                 task_count=self.num_tasks_received,
-                task_name=tree_source), wrap=False)
+                task_name=task,
+                num_trees=num_trees,
+                seconds=task_seconds,
+                rate=num_trees / task_seconds if task_seconds > 0 else float("inf")), wrap=False)
         if self.kill_received:
             self.send_warning("Terminating in response to kill request")
         else:
-            self.results_queue.put(self.tree_array)
+            if self.retain_trees:
+                self.results_queue.put((self.name, self.tree_array))
+            else:
+                self.send_split_counts(self.tree_array)
+            self.results_queue.put((self.name, None))
 
 class TreeProcessor(object):
 
@@ -296,6 +458,10 @@ class TreeProcessor(object):
             log_frequency,
             messenger,
             debug_mode,
+            split_store=None,
+            streaming_summaries=False,
+            retain_trees=True,
+            trees_per_task=None,
             ):
         self.is_source_trees_rooted = is_source_trees_rooted
         self.rooting_interpretation = dendropy.get_rooting_argument(is_rooted=self.is_source_trees_rooted)
@@ -308,6 +474,10 @@ class TreeProcessor(object):
         self.log_frequency = log_frequency
         self.messenger = messenger
         self.debug_mode = debug_mode
+        self.split_store = split_store
+        self.streaming_summaries = streaming_summaries
+        self.retain_trees = retain_trees
+        self.trees_per_task = trees_per_task
 
     def info_message(self, msg, wrap=True, prefix=""):
         if self.messenger:
@@ -364,7 +534,11 @@ class TreeProcessor(object):
                 use_tree_weights=self.use_tree_weights,
                 ultrametricity_precision=self.ultrametricity_precision,
                 taxon_label_age_map=self.taxon_label_age_map,
+                streaming_summaries=self.streaming_summaries,
                 )
+        if self.split_store is not None:
+            self.info_message("Accumulating splits in split store '{}'".format(self.split_store.path))
+            tree_array.attach_split_store(self.split_store)
         _read_into_tree_array(
                 tree_array=tree_array,
                 tree_sources=tree_sources,
@@ -378,7 +552,10 @@ class TreeProcessor(object):
                 error_message_func=self.error_message,
                 log_frequency=self.log_frequency,
                 debug_mode=self.debug_mode,
+                split_store=self.split_store,
                 )
+        if self.split_store is not None:
+            tree_array.split_distribution.flush_split_store()
         return tree_array
 
     def parallel_analyze_trees(self,
@@ -409,26 +586,34 @@ class TreeProcessor(object):
         #     self.info_message(taxon_label, prefix=index_col)
 
 
-        # load up queue
+        # load up queue: sources are split into runs of trees, which idle
+        # workers take from the shared queue as they finish their previous
+        # ones, so that the load is balanced dynamically
         self.info_message("Creating work queue")
+        tasks = compose_tree_source_tasks(
+                tree_sources=tree_sources,
+                schema=schema,
+                tree_offset=tree_offset,
+                num_processes=self.num_processes,
+                trees_per_task=self.trees_per_task)
         work_queue = multiprocessing.Queue()
-        for f in tree_sources:
-            work_queue.put(f)
+        for task in tasks:
+            work_queue.put(task)
+        num_workers = max(1, min(self.num_processes, len(tasks)))
+        self.info_message("{} tasks created from {} sources".format(len(tasks), len(tree_sources)))
 
         # launch processes
-        self.info_message("Launching {} worker processes".format(self.num_processes))
+        self.info_message("Launching {} worker processes".format(num_workers))
         results_queue = multiprocessing.Queue()
         messenger_lock = multiprocessing.Lock()
         workers = []
-        for idx in range(self.num_processes):
+        for idx in range(num_workers):
             # self.info_message("Launching {} of {} worker processes".format(idx+1, self.num_processes))
             tree_analysis_worker = TreeAnalysisWorker(
                     name="Process-{}".format(idx+1),
                     work_queue=work_queue,
                     results_queue=results_queue,
-                    source_schema=schema,
                     taxon_labels=taxon_labels,
-                    tree_offset=tree_offset,
                     is_source_trees_rooted=self.is_source_trees_rooted,
                     preserve_underscores=preserve_underscores,
                     ignore_edge_lengths=self.ignore_edge_lengths,
@@ -439,7 +624,9 @@ class TreeProcessor(object):
                     messenger=self.messenger,
                     messenger_lock=messenger_lock,
                     log_frequency=self.log_frequency,
-                    debug_mode=self.debug_mode)
+                    debug_mode=self.debug_mode,
+                    streaming_summaries=self.streaming_summaries,
+                    retain_trees=self.retain_trees)
             tree_analysis_worker.start()
             workers.append(tree_analysis_worker)
 
@@ -452,22 +639,29 @@ class TreeProcessor(object):
                 ignore_node_ages=self.ignore_node_ages,
                 use_tree_weights=self.use_tree_weights,
                 ultrametricity_precision=self.ultrametricity_precision,
+                streaming_summaries=self.streaming_summaries,
                 )
         try:
-            while result_count < self.num_processes:
-                result = results_queue.get()
+            while result_count < num_workers:
+                worker_name, result = results_queue.get()
                 if isinstance(result, Exception) or isinstance(result, KeyboardInterrupt):
-                    self.info_message("Exception raised in worker process '{}'".format(result.worker_name))
+                    self.info_message("Exception raised in worker process '{}'".format(worker_name))
                     raise result
-                master_tree_array.update(result)
-                self.info_message("Recovered results from worker process '{}'".format(result.worker_name))
-                result_count += 1
+                if result is None:
+                    self.info_message("Recovered results from worker process '{}'".format(worker_name))
+                    result_count += 1
+                elif isinstance(result, dendropy.TreeArray):
+                    master_tree_array.update(result)
+                else:
+                    # batch of split counts: merged as it arrives, while
+                    # the workers continue
+                    master_tree_array.update_split_distribution(result)
                 # self.info_message("Recovered results from {} of {} worker processes".format(result_count, self.num_processes))
         except (Exception, KeyboardInterrupt) as e:
             for worker in workers:
                 worker.terminate()
             raise
-        self.info_message("All {} worker processes terminated".format(self.num_processes))
+        self.info_message("All {} worker processes terminated".format(num_workers))
         return master_tree_array
 
     def discover_taxa(self,
@@ -609,6 +803,15 @@ and saving the result to "``result.tre``"::
 def print_description(dest=None):
     return dendropy.description(dest=dest)
 
+def positive_int(value):
+    try:
+        value = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid int value: '{}'".format(value))
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be at least 1: {}".format(value))
+    return value
+
 def main():
 
     ######################################################################
@@ -651,6 +854,21 @@ def main():
                  "Number of trees to skip from the beginning of *each* tree "
                  "file when counting support (default: %(default)s)."
                  ))
+    source_options.add_argument("--split-store",
+            dest="split_store_filepath",
+            default=None,
+            metavar="FILEPATH",
+            help=(
+                "Accumulate split counts, edge lengths and node ages in a "
+                "persistent database at FILEPATH (created if it does not "
+                "exist). Trees counted in previous runs using the same "
+                "database are not counted again: for each source, only the "
+                "trees following those already counted are read into the "
+                "database, so that an ongoing analysis can be summarized "
+                "incrementally as new trees are appended to its output files. "
+                "Requires a consensus or user-specified target tree, does not "
+                "support extended output, and runs in serial mode."
+                ))
     source_options.add_argument("--force-rooted", "--rooted",
             dest="is_source_trees_rooted",
             action="store_true",
@@ -984,6 +1202,19 @@ def main():
                 "Do NOT annotate nodes and edges with any summarization information metadata such as."
                 "support values, edge length and/or node age summary statistcs, etc."
                 ))
+    node_summarization_options.add_argument("--streaming-summaries",
+            action="store_true",
+            default=False,
+            help=(
+                "Summarize edge lengths and node ages in bounded memory, "
+                "instead of keeping the edge lengths and node ages of all "
+                "the source trees in memory. Means, standard deviations and "
+                "ranges are exact, but medians, quantiles and HPD intervals "
+                "are approximated from a random sample of 1000 values per "
+                "split (with a rank error of at most 0.043 with 95% "
+                "confidence) for splits found on more than 1000 trees. Cannot "
+                "be used with extended output ('-x') or '--split-store'."
+                ))
 
     support_expression_options = parser.add_argument_group("Support Expression Options")
     support_expression_options.add_argument("-p", "--percentages",
@@ -1103,7 +1334,7 @@ def main():
             const="max",
             dest="multiprocess",
             help=(
-                 "Run in parallel mode using as many processors as available, up to the number of sources."
+                 "Run in parallel mode using as many processors as available, up to the number of sources (or, for NEXUS and NEWICK files, up to the number of tasks into which these are split)."
                  ))
     multiprocessing_options.add_argument("-m", "--multiprocessing",
             dest="multiprocess",
@@ -1113,6 +1344,17 @@ def main():
                  "('max' or '#' means to run in as many processes as there are cores on the "
                  "local machine; i.e., same as specifying '-M' or '--maximum-multiprocessing')."
                  ))
+    multiprocessing_options.add_argument("--trees-per-task",
+            type=positive_int,
+            metavar="NUM-TREES",
+            default=None,
+            help=(
+                 "In parallel mode, split NEXUS and NEWICK sources into tasks of "
+                 "NUM-TREES consecutive trees (after the burn-in), which are "
+                 "distributed dynamically across the processes. By default, "
+                 "the trees of all the sources are split into about four "
+                 "tasks per process."
+                 ))
 
     logging_options = parser.add_argument_group("Program Logging Options")
     logging_options.add_argument("-g", "--log-frequency",
@@ -1299,6 +1541,31 @@ def main():
         if args.summary_target is None:
             args.summary_target = "consensus"
 
+    ######################################################################
+    ## Split Store
+
+    if args.split_store_filepath is not None:
+        if args.streaming_summaries:
+            messenger.error("'--streaming-summaries' cannot be used with '--split-store'")
+            sys.exit(1)
+        if args.summary_target in ("mcct", "msct"):
+            messenger.error("Summary target '{}' requires all source trees, and cannot be used with '--split-store'".format(args.summary_target))
+            sys.exit(1)
+        if args.extended_output_prefix is not None:
+            messenger.error("Extended output ('-x'/'--extended-output') cannot be used with '--split-store'")
+            sys.exit(1)
+        split_store_filepath = os.path.expanduser(os.path.expandvars(args.split_store_filepath))
+        try:
+            split_store = dendropy.SplitStore(split_store_filepath)
+        except Exception as e:
+            messenger.error("Unable to open split store '{}': {}".format(split_store_filepath, e))
+            sys.exit(1)
+        processing_report_lines.append("Splits accumulated in split store: '{}'".format(split_store_filepath))
+        if tree_sources[0] is sys.stdin:
+            messenger.warning("Trees read from standard input are not tracked by the split store, and will be counted again if re-read in a later run")
+    else:
+        split_store = None
+
     ######################################################################
     ## Tree Rooting
 
@@ -1433,6 +1700,9 @@ def main():
     # extended output
     extended_output_paths = {}
     if args.extended_output_prefix is not None:
+        if args.streaming_summaries:
+            messenger.error("Extended output ('-x'/'--extended-output') requires all edge lengths and node ages, and cannot be used with '--streaming-summaries'")
+            sys.exit(1)
         if not args.extended_output_prefix.endswith("."):
             args.extended_output_prefix += "."
         for results_key, suffix in (
@@ -1457,13 +1727,24 @@ def main():
     ## Multiprocessing Setup
 
     num_cpus = multiprocessing.cpu_count()
-    if len(tree_sources) > 1 and args.multiprocess is not None:
+    if split_store is not None and args.multiprocess is not None:
+        messenger.info("Split store specified: forcing serial processing")
+        args.multiprocess = None
+    # NEXUS and NEWICK files can be split into runs of trees to be processed
+    # in parallel, so that the number of processes is not limited by the
+    # number of sources
+    is_splittable_sources = (tree_sources[0] is not sys.stdin
+            and args.input_format in treeindex.INDEXABLE_SCHEMAS)
+    if (len(tree_sources) > 1 or is_splittable_sources) and args.multiprocess is not None:
         if (
                 args.multiprocess.lower() == "max"
                 or args.multiprocess == "#"
                 or args.multiprocess == "*"
             ):
-            num_processes = min(num_cpus, len(tree_sources))
+            if is_splittable_sources:
+                num_processes = num_cpus
+            else:
+                num_processes = min(num_cpus, len(tree_sources))
         # elif args.multiprocess == "@":
         #     num_processes = len(tree_sources)
         else:
@@ -1478,7 +1759,7 @@ def main():
             messenger.error("Maximum number of processes set to {}: cannot run SumTrees with less than 1 process".format(num_processes))
             sys.exit(1)
     else:
-        if args.multiprocess is not None and args.multiprocess > 1:
+        if args.multiprocess is not None:
             messenger.info("Number of valid sources is less than 2: forcing serial processing")
         if len(tree_sources) > 1 and num_cpus > 1:
             messenger.info(
@@ -1513,6 +1794,10 @@ def main():
             log_frequency=args.log_frequency if not args.quiet else 0,
             messenger=messenger,
             debug_mode=args.debug_mode,
+            split_store=split_store,
+            streaming_summaries=args.streaming_summaries,
+            retain_trees=(args.summary_target in ("mcct", "msct") or bool(extended_output_paths)),
+            trees_per_task=args.trees_per_task,
             )
     analysis_time_start = datetime.datetime.now()
     # messenger.info("Processing of source trees starting at {}".format(
@@ -1584,11 +1869,15 @@ def main():
 
     ### post-analysis reports
 
-    if len(tree_array) == 0:
+    num_trees_analyzed = tree_array.split_distribution.total_trees_counted
+    if num_trees_analyzed == 0:
         messenger.error("No trees retained for processing (is the burn-in too high?)")
         sys.exit(1)
 
-    _message_and_log("Total of {} trees analyzed for summarization:".format(len(tree_array)))
+    if split_store is None:
+        _message_and_log("Total of {} trees analyzed for summarization:".format(num_trees_analyzed))
+    else:
+        _message_and_log("Total of {} trees analyzed for summarization ({} in this run):".format(num_trees_analyzed, len(tree_array)))
     if args.weighted_trees:
         _bulleted_message_and_log("All trees were treated as weighted (default weight = 1.0).")
     else:
@@ -2185,6 +2474,8 @@ def main():
     ###################################################
     #  WRAP UP
 
+    if split_store is not None:
+        split_store.close()
     messenger.info("Summarization completed")
     messenger.info_lines(final_run_report)
     messenger.silent = True
@@ -30,10 +30,16 @@ from dendropy.datamodel.taxonmodel import TaxonSet # Legacy
 from dendropy.datamodel.treemodel import Bipartition
 from dendropy.datamodel.treemodel import Edge
 from dendropy.datamodel.treemodel import Node
+from dendropy.datamodel.treemodel import SlottedBipartition
+from dendropy.datamodel.treemodel import SlottedEdge
+from dendropy.datamodel.treemodel import SlottedNode
 from dendropy.datamodel.treemodel import Tree
+from dendropy.datamodel.treemodel import TreeStructureIndex
+from dendropy.datamodel.flattreemodel import FlatTree
 from dendropy.datamodel.treecollectionmodel import TreeList
 from dendropy.datamodel.treecollectionmodel import SplitDistribution
 from dendropy.datamodel.treecollectionmodel import TreeArray
+from dendropy.datamodel.splitstoremodel import SplitStore
 from dendropy.datamodel.charstatemodel import StateAlphabet
 from dendropy.datamodel.charstatemodel import DNA_STATE_ALPHABET
 from dendropy.datamodel.charstatemodel import RNA_STATE_ALPHABET
@@ -20,6 +20,7 @@
 Taxon-to-taxon phylogenetic distances.
 """
 
+import array
 import math
 import collections
 import csv
@@ -29,13 +30,116 @@ from dendropy.utility import container
 from dendropy.utility import error
 import dendropy
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("NumPy is required for dense distance matrices, but could not be imported")
+
+def _nj_min_q_value(dmatrix, xsub, n, rows, max_block_size=1<<22):
+    """
+    Returns the minimum neighbor-joining Q-value over the given rows of
+    ``dmatrix``, along with its row and column indexes (the first, in
+    row-major order, if tied), calculating the Q-values of at most
+    ``max_block_size`` cells at a time.
+    """
+    num_columns = dmatrix.shape[1]
+    num_block_rows = max(1, max_block_size // num_columns)
+    result = None
+    for start in range(0, len(rows), num_block_rows):
+        block_rows = rows[start:start+num_block_rows]
+        q = dmatrix[block_rows] * (n - 2)
+        q -= xsub[block_rows, None] + xsub[None, :]
+        pos = q.argmin()
+        value = q.flat[pos]
+        if result is None or value < result[0]:
+            result = (value, int(block_rows[pos // num_columns]), int(pos % num_columns))
+    return result
+
+class _RapidNJBounds(object):
+    """
+    Bookkeeping for finding the minimum neighbor-joining Q-value without
+    calculating the whole Q-matrix, as in RapidNJ (Simonsen et al. 2008).
+
+    Each row of the distance matrix is kept sorted. As
+    ``Q(i, j) >= (n-2) d(i, j) - xsub(i) - max_k xsub(k)``, the scan of a
+    row can stop as soon as this bound exceeds the smallest Q-value found,
+    and rows whose minimum distance gives a bound above it need not be
+    scanned at all. Rows are scanned together, in slices of sorted columns
+    of doubling width.
+
+    When a new node takes over the row/column of a joined node, its row is
+    sorted afresh, but the (now stale) entries for that column in the rows
+    of the other nodes are left alone: Q-values are always calculated from
+    the current distances, and the distance between the new node and any
+    other node is also reached by the scan of the row of the new node.
+    """
+
+    def __init__(self, dmatrix):
+        self.sorted_columns = numpy.argsort(dmatrix, axis=1)
+        self.sorted_values = numpy.take_along_axis(dmatrix, self.sorted_columns, axis=1)
+        self.row_min = self.sorted_values[:, 0].copy()
+        self.row_argmin = self.sorted_columns[:, 0].copy()
+
+    def min_q_pair(self, dmatrix, xsub, n, active, initial_width=8):
+        num_columns = dmatrix.shape[1]
+        xsub_max = xsub[active].max()
+        lower_bounds = (n - 2) * self.row_min[active] - (xsub[active] + xsub_max)
+        # start with the full Q-values of the most promising row
+        seed_row = active[lower_bounds.argmin()]
+        min_q, idx1, idx2 = _nj_min_q_value(dmatrix, xsub, n, numpy.array([seed_row]))
+        min_pairs = [(min(idx1, idx2), max(idx1, idx2))]
+        rows = active[lower_bounds <= min_q]
+        start = 0
+        width = initial_width
+        while len(rows) and start < num_columns:
+            columns = self.sorted_columns[rows, start:start+width]
+            q = dmatrix[rows[:, None], columns] * (n - 2)
+            q -= xsub[rows, None] + xsub[columns]
+            block_min_q = q.min()
+            if block_min_q <= min_q:
+                if block_min_q < min_q:
+                    min_q = block_min_q
+                    min_pairs = []
+                for r, c in zip(*numpy.nonzero(q == min_q)):
+                    idx1 = int(rows[r])
+                    idx2 = int(columns[r, c])
+                    min_pairs.append((min(idx1, idx2), max(idx1, idx2)))
+            last_values = self.sorted_values[rows, min(start+width, num_columns)-1]
+            rows = rows[(n - 2) * last_values - (xsub[rows] + xsub_max) <= min_q]
+            start += width
+            width *= 2
+        # ties are resolved as with the full Q-matrix
+        return min(min_pairs)
+
+    def update(self, dmatrix, idx1, idx2, others, new_distances):
+        row_min = self.row_min
+        row_argmin = self.row_argmin
+        is_closer = new_distances < row_min[others]
+        row_min[others[is_closer]] = new_distances[is_closer]
+        row_argmin[others[is_closer]] = idx1
+        stale = others[(row_argmin[others] == idx1) & ~is_closer]
+        stale = numpy.concatenate((stale, others[row_argmin[others] == idx2]))
+        row_min[stale] = dmatrix[stale].min(axis=1)
+        row_argmin[stale] = dmatrix[stale].argmin(axis=1)
+        row_min[idx2] = numpy.inf
+        self.sorted_values[idx2, :] = numpy.inf
+        columns = numpy.argsort(dmatrix[idx1])
+        self.sorted_columns[idx1] = columns
+        self.sorted_values[idx1] = dmatrix[idx1, columns]
+        row_min[idx1] = self.sorted_values[idx1, 0]
+        row_argmin[idx1] = columns[0]
+
 class PhylogeneticDistanceMatrix(object):
     """
     Calculates and maintains patristic distance information of taxa on a tree.
     """
 
     @classmethod
-    def from_tree(cls, tree):
+    def from_tree(cls, tree, is_lazy=False):
         """
         Creates and returns a |PhylogeneticDistanceMatrix| based
         on the given tree.
@@ -56,6 +160,11 @@ class PhylogeneticDistanceMatrix(object):
         ----------
         tree : a |Tree| instance
             The |Tree| from which to get the phylogenetic distances.
+        is_lazy : bool
+            If |True|, then distances are not precalculated for every pair
+            of taxa, but are looked up on demand using a
+            |PatristicDistanceIndex| (see
+            :meth:`PhylogeneticDistanceMatrix.compile_from_tree()`).
 
         Returns
         -------
@@ -76,7 +185,7 @@ class PhylogeneticDistanceMatrix(object):
 
         """
         pdm = cls()
-        pdm.compile_from_tree(tree=tree)
+        pdm.compile_from_tree(tree=tree, is_lazy=is_lazy)
         return pdm
 
     @classmethod
@@ -230,6 +339,86 @@ class PhylogeneticDistanceMatrix(object):
                 taxon_namespace=taxon_namespace)
         return pdm
 
+    @classmethod
+    def from_numpy(cls, matrix, taxon_namespace, taxa=None):
+        """
+        Instantiates a new PhylogeneticDistanceMatrix instance with data
+        from a square NumPy array (or anything that can be converted to one).
+
+        The array is copied, and distances are then looked up directly from
+        it instead of being transferred to a dictionary of dictionaries, so
+        the matrix can be used for the ecological statistics and for
+        building trees (e.g.,
+        :meth:`PhylogeneticDistanceMatrix.nj_tree()`) without any per-entry
+        processing. Only the upper right section of the array is
+        considered: the lower diagonal is filled in as its mirror. As with
+        :meth:`PhylogeneticDistanceMatrix.from_csv()`, path edge counts,
+        MRCA's and tree size normalization are not available for such a
+        matrix.
+
+        Requires NumPy.
+
+        Parameters
+        ----------
+        matrix : :py:class:`numpy.ndarray`
+            Square array of distances between taxa. Floating point arrays
+            keep their type (e.g., ``numpy.float32``); other arrays are
+            converted to ``numpy.float64``.
+        taxon_namespace : |TaxonNamespace| instance
+            The taxon namespace to which the taxa belong.
+        taxa : iterable of |Taxon| objects
+            The taxa corresponding to the rows (and columns) of ``matrix``,
+            in order. If not given, the taxa of ``taxon_namespace`` are used,
+            ordered by accession index, i.e., the order returned by
+            :meth:`PhylogeneticDistanceMatrix.sorted_taxa()` and used by
+            :meth:`PhylogeneticDistanceMatrix.as_numpy()`.
+
+        Returns
+        -------
+        pdm : A |PhylogeneticDistanceMatrix| instance
+
+        Examples
+        --------
+
+        ::
+
+            import numpy
+            import dendropy
+            tree = dendropy.Tree.get(path="tree.nex",
+                    schema="nexus")
+            pdm1 = tree.phylogenetic_distance_matrix()
+            m = pdm1.as_numpy(dtype=numpy.float32)
+            pdm2 = dendropy.PhylogeneticDistanceMatrix.from_numpy(
+                    m,
+                    taxon_namespace=tree.taxon_namespace,
+                    taxa=pdm1.sorted_taxa())
+
+        """
+        _require_numpy()
+        if taxa is None:
+            taxa = sorted(taxon_namespace, key=taxon_namespace.accession_index)
+        else:
+            taxa = list(taxa)
+        matrix = numpy.array(matrix)
+        if matrix.dtype.kind != "f":
+            matrix = matrix.astype(numpy.float64)
+        if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+            raise ValueError("Expecting a square matrix, but received one of shape {}".format(matrix.shape))
+        if matrix.shape[0] != len(taxa):
+            raise ValueError("Matrix has {} rows, but {} taxa were given".format(matrix.shape[0], len(taxa)))
+        if len(set(taxa)) != len(taxa):
+            raise ValueError("Taxa are not unique")
+        upper = numpy.triu(matrix, 1)
+        matrix = upper + upper.T
+        pdm = cls()
+        pdm.taxon_namespace = taxon_namespace
+        taxon_indexes = dict((taxon, idx) for idx, taxon in enumerate(taxa))
+        pdm._mapped_taxa = set(taxa)
+        pdm._all_distinct_mapped_taxa_pairs = _DistinctTaxonPairs(taxa)
+        pdm._taxon_phylogenetic_distances = _TaxonPairLookup(
+                _DenseDistances(matrix), taxon_indexes, "patristic_distance_by_index")
+        return pdm
+
     def __init__(self):
         self.clear()
 
@@ -242,14 +431,28 @@ class PhylogeneticDistanceMatrix(object):
         self._taxon_phylogenetic_distances = {}
         self._taxon_phylogenetic_path_steps = {}
         self._mrca = {}
+        self._distance_index = None
+        self._tree_distance_lookups = None
 
-    def compile_from_tree(self, tree):
+    def compile_from_tree(self, tree, is_lazy=False):
         """
         Calculates the distances. Note that the path length (in number of
         steps) between taxa that span the root will be off by one if
         the tree is unrooted.
+
+        If ``is_lazy`` is |True|, then, instead of precalculating the
+        distances, path lengths and MRCA's of every pair of taxa (which
+        requires storage quadratic in the number of taxa), a
+        |PatristicDistanceIndex| of the tree is built, which answers each
+        query in constant time, and the statistics (e.g.,
+        :meth:`PhylogeneticDistanceMatrix.mean_pairwise_distance()`) are
+        calculated from it. The results are otherwise the same. In either
+        case, all edges other than the root edge must have lengths.
         """
         self.clear()
+        if is_lazy:
+            self._compile_index_from_tree(tree)
+            return
         self.taxon_namespace = tree.taxon_namespace
         # for i1, t1 in enumerate(self.taxon_namespace):
         #     self._taxon_phylogenetic_distances[t1] = {}
@@ -291,8 +494,48 @@ class PhylogeneticDistanceMatrix(object):
                                 self._taxon_phylogenetic_path_steps[desc1.taxon][desc2.taxon] = path_steps
                     del(c1.desc_paths)
         self._mirror_lookups()
+        if numpy is not None:
+            # kept so that :meth:`as_numpy()` can fill arrays in a vectorized
+            # sweep over the tree instead of from the dictionaries
+            self._tree_distance_lookups = self._new_tree_distance_lookups(
+                    PatristicDistanceIndex(tree))
         # assert self._tree_length == tree.length()
 
+    def _compile_index_from_tree(self, tree):
+        self.taxon_namespace = tree.taxon_namespace
+        self._distance_index = PatristicDistanceIndex(tree)
+        self._tree_length = 0.0
+        self._num_edges = len(self._distance_index)
+        for node in tree.postorder_node_iter():
+            if node.edge.length is not None:
+                self._tree_length += node.edge.length
+            elif node.parent_node is not None:
+                # as when precalculating the distances; the index itself
+                # would treat this as 0
+                raise TypeError("Edge length of node {} is None".format(node))
+        taxon_node_indexes = _taxon_node_indexes(self._distance_index)
+        self._mapped_taxa = set(taxon_node_indexes)
+        self._all_distinct_mapped_taxa_pairs = _DistinctTaxonPairs(taxon_node_indexes)
+        self._taxon_phylogenetic_distances = _TaxonPairLookup(
+                self._distance_index, taxon_node_indexes, "patristic_distance_by_index")
+        self._taxon_phylogenetic_path_steps = _TaxonPairLookup(
+                self._distance_index, taxon_node_indexes, "path_edge_count_by_index")
+        self._mrca = _TaxonPairLookup(
+                self._distance_index, taxon_node_indexes, "mrca_node_by_index")
+
+    def _new_tree_distance_lookups(self, distance_index):
+        taxon_node_indexes = _taxon_node_indexes(distance_index)
+        return {
+            "_taxon_phylogenetic_distances": _TaxonPairLookup(
+                distance_index, taxon_node_indexes, "patristic_distance_by_index"),
+            "_taxon_phylogenetic_path_steps": _TaxonPairLookup(
+                distance_index, taxon_node_indexes, "path_edge_count_by_index"),
+            }
+
+    def _get_is_lazy(self):
+        return self._distance_index is not None
+    is_lazy = property(_get_is_lazy)
+
     def compile_from_dict(self, distances, taxon_namespace):
         self.clear()
         self.taxon_namespace = taxon_namespace
@@ -346,14 +589,22 @@ class PhylogeneticDistanceMatrix(object):
         o = self.__class__()
         o.taxon_namespace = self.taxon_namespace
         o._mapped_taxa = set(self._mapped_taxa)
-        o._all_distinct_mapped_taxa_pairs = set(self._all_distinct_mapped_taxa_pairs)
         o._tree_length = self._tree_length
         o._num_edges = self._num_edges
-        for src, dest in (
-                (self._taxon_phylogenetic_distances, o._taxon_phylogenetic_distances,),
-                (self._taxon_phylogenetic_path_steps, o._taxon_phylogenetic_path_steps,),
-                (self._mrca, o._mrca,),
-                ):
+        # the index itself is never modified, so it can be shared
+        o._distance_index = self._distance_index
+        if self._tree_distance_lookups is not None:
+            o._tree_distance_lookups = dict(self._tree_distance_lookups)
+        if isinstance(self._all_distinct_mapped_taxa_pairs, _DistinctTaxonPairs):
+            o._all_distinct_mapped_taxa_pairs = _DistinctTaxonPairs(self._all_distinct_mapped_taxa_pairs.taxa)
+        else:
+            o._all_distinct_mapped_taxa_pairs = set(self._all_distinct_mapped_taxa_pairs)
+        for attr_name in ("_taxon_phylogenetic_distances", "_taxon_phylogenetic_path_steps", "_mrca"):
+            src = getattr(self, attr_name)
+            if isinstance(src, _TaxonPairLookup):
+                setattr(o, attr_name, src.clone())
+                continue
+            dest = getattr(o, attr_name)
             for t1 in src:
                 dest[t1] = {}
                 for t2 in src[t1]:
@@ -534,6 +785,12 @@ class PhylogeneticDistanceMatrix(object):
 
 
         """
+        if self._distance_index is not None:
+            return self._calculate_indexed_mean_pairwise_distance(
+                    filter_fn=filter_fn,
+                    is_weighted_edge_distances=is_weighted_edge_distances,
+                    is_normalize_by_tree_size=is_normalize_by_tree_size,
+                    )
         comparison_regime = self.distinct_taxon_pair_iter(filter_fn=filter_fn)
         return self._calculate_mean_pairwise_distance(
                 comparison_regime=comparison_regime,
@@ -616,6 +873,12 @@ class PhylogeneticDistanceMatrix(object):
         [2] Swenson, N.G. Functional and Phylogenetic Ecology in R.
 
         """
+        if self._distance_index is not None:
+            return self._calculate_indexed_mean_nearest_taxon_distance(
+                    filter_fn=filter_fn,
+                    is_weighted_edge_distances=is_weighted_edge_distances,
+                    is_normalize_by_tree_size=is_normalize_by_tree_size,
+                    )
         comparison_regime = self._get_taxon_to_all_other_taxa_comparisons(filter_fn=filter_fn)
         return self._calculate_mean_nearest_taxon_distance(
                 comparison_regime=comparison_regime,
@@ -838,6 +1101,12 @@ class PhylogeneticDistanceMatrix(object):
             to_shuffle.append("_mrca")
         for attr_name in to_shuffle:
             src = getattr(self, attr_name)
+            if isinstance(src, _TaxonPairLookup):
+                setattr(self, attr_name, src.shuffled(current_to_shuffled_taxon_map))
+                continue
+            if self._tree_distance_lookups is not None and attr_name in self._tree_distance_lookups:
+                self._tree_distance_lookups[attr_name] = self._tree_distance_lookups[attr_name].shuffled(
+                        current_to_shuffled_taxon_map)
             dest = {}
 
             ## 5m8.076s
@@ -873,6 +1142,7 @@ class PhylogeneticDistanceMatrix(object):
     def nj_tree(self,
             is_weighted_edge_distances=True,
             tree_factory=None,
+            algorithm="classic",
             ):
         """
         Returns an Neighbor-Joining (NJ) tree based on the distances in the matrix.
@@ -885,6 +1155,22 @@ class PhylogeneticDistanceMatrix(object):
         is_weighted_edge_distances: bool
             If ``True`` then edge lengths will be considered for distances.
             Otherwise, just the number of edges.
+        algorithm: str
+            One of:
+
+                - "classic" [default]: pure Python implementation, which
+                  examines every pair of nodes on each join.
+                - "numpy": the Q-matrix of each join is calculated using
+                  vectorized operations on a dense array of the distances
+                  (see :meth:`PhylogeneticDistanceMatrix.as_numpy()`).
+                  Requires NumPy.
+                - "rapidnj": as "numpy", but, as in RapidNJ (Simonsen et al.
+                  2008), lower bounds on the Q-values of each row are used
+                  to only calculate the Q-values of rows that may hold the
+                  minimum. Requires NumPy.
+
+            All algorithms return the same tree, with the exception of the
+            resolution of ties (equal Q-values).
 
         Returns
         -------
@@ -923,8 +1209,18 @@ class PhylogeneticDistanceMatrix(object):
         for reconstructing phylogenetic trees. Molecular Biology and Evolution,
         4: 406-425.
 
+        Simonsen, M., Mailund, T. and Pedersen, C.N.S. (2008) Rapid
+        neighbour-joining. Algorithms in Bioinformatics, LNCS 5251: 113-122.
+
         """
 
+        if algorithm in ("numpy", "rapidnj"):
+            return self._vectorized_nj_tree(
+                    is_weighted_edge_distances=is_weighted_edge_distances,
+                    tree_factory=tree_factory,
+                    is_use_bounds=algorithm == "rapidnj")
+        elif algorithm != "classic":
+            raise ValueError("Unrecognized algorithm: '{}'".format(algorithm))
         if is_weighted_edge_distances:
             original_dmatrix = self._taxon_phylogenetic_distances
         else:
@@ -1027,6 +1323,7 @@ class PhylogeneticDistanceMatrix(object):
     def upgma_tree(self,
             is_weighted_edge_distances=True,
             tree_factory=None,
+            algorithm="classic",
             ):
         """
         Returns an Unweighted Pair Group Method with Arithmetic Mean (UPGMA) tree
@@ -1037,6 +1334,20 @@ class PhylogeneticDistanceMatrix(object):
         is_weighted_edge_distances: bool
             If ``True`` then edge lengths will be considered for distances.
             Otherwise, just the number of edges.
+        algorithm: str
+            One of:
+
+                - "classic" [default]: pure Python implementation, which
+                  examines every pair of clusters on each join.
+                - "nnchain": the distances are held in a dense array (see
+                  :meth:`PhylogeneticDistanceMatrix.as_numpy()`), and
+                  clusters are joined by following chains of nearest
+                  neighbors, so that the whole tree is built in O(n^2)
+                  time, with O(n) storage beyond the array. Requires NumPy.
+                  "heap" is accepted as an alias.
+
+            Both algorithms return the same tree, with the exception of the
+            resolution of ties (equal distances).
 
         Returns
         -------
@@ -1070,6 +1381,12 @@ class PhylogeneticDistanceMatrix(object):
 
         """
 
+        if algorithm == "nnchain" or algorithm == "heap":
+            return self._nnchain_upgma_tree(
+                    is_weighted_edge_distances=is_weighted_edge_distances,
+                    tree_factory=tree_factory)
+        elif algorithm != "classic":
+            raise ValueError("Unrecognized algorithm: '{}'".format(algorithm))
         if is_weighted_edge_distances:
             original_dmatrix = self._taxon_phylogenetic_distances
         else:
@@ -1135,19 +1452,94 @@ class PhylogeneticDistanceMatrix(object):
         """
         Returns this as a table.
         """
-        if is_weighted_edge_distances:
-            df = self.patristic_distance
-        else:
-            df = self.path_edge_count
+        dmatrix, normalization_factor = self._get_distance_matrix_and_normalization_factor(
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                is_normalize_by_tree_size=False)
         dt = container.DataTable()
         for t1 in self._mapped_taxa:
             dt.add_row(row_name=t1.label)
             dt.add_column(column_name=t1.label)
         for t1 in self._mapped_taxa:
+            row = dmatrix[t1]
             for t2 in self._mapped_taxa:
-                dt[t1.label, t2.label] = df(t1, t2)
+                if t1 is t2:
+                    dt[t1.label, t2.label] = 0.0 if is_weighted_edge_distances else 0
+                else:
+                    dt[t1.label, t2.label] = row[t2]
         return dt
 
+    def sorted_taxa(self):
+        """
+        Returns a list of the taxa in the matrix ordered by their accession
+        index in the taxon namespace. This is the order of the rows and
+        columns of the array returned by
+        :meth:`PhylogeneticDistanceMatrix.as_numpy()`.
+        """
+        return sorted(self._mapped_taxa, key=self.taxon_namespace.accession_index)
+
+    def as_numpy(self,
+            is_weighted_edge_distances=True,
+            is_normalize_by_tree_size=False,
+            dtype=None):
+        """
+        Returns the distances as a square NumPy array, with rows and columns
+        ordered as given by :meth:`PhylogeneticDistanceMatrix.sorted_taxa()`.
+
+        If the matrix has been compiled from a tree (see
+        :meth:`PhylogeneticDistanceMatrix.compile_from_tree()`), lazily or
+        not, the array is filled in a single postorder sweep over a
+        |PatristicDistanceIndex| of the tree, with whole blocks of distances
+        (between all the taxa descending from one child of a node and all the
+        taxa descending from another) assigned at once. If the matrix has been
+        created from an array (see
+        :meth:`PhylogeneticDistanceMatrix.from_numpy()`), that array is
+        reordered and returned. Otherwise, the array is filled from the
+        stored distances.
+
+        Requires NumPy.
+
+        Parameters
+        ----------
+        is_weighted_edge_distances: bool
+            If |True| then edge lengths will be considered for distances.
+            Otherwise, just the number of edges.
+        is_normalize_by_tree_size: bool
+            If |True| then distances will be normalized by the sum of edge
+            lengths of the tree (or the number of edges, if
+            ``is_weighted_edge_distances`` is |False|).
+        dtype : NumPy data type
+            Data type of the array: e.g., ``numpy.float32`` or
+            ``numpy.float64`` (default).
+
+        Returns
+        -------
+        m : :py:class:`numpy.ndarray`
+            Square array of distances.
+        """
+        _require_numpy()
+        if dtype is None:
+            dtype = numpy.float64
+        dmatrix, normalization_factor = self._get_distance_matrix_and_normalization_factor(
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                is_normalize_by_tree_size=is_normalize_by_tree_size)
+        taxa = self.sorted_taxa()
+        if self._tree_distance_lookups is not None:
+            if is_weighted_edge_distances:
+                dmatrix = self._tree_distance_lookups["_taxon_phylogenetic_distances"]
+            else:
+                dmatrix = self._tree_distance_lookups["_taxon_phylogenetic_path_steps"]
+        if isinstance(dmatrix, _TaxonPairLookup):
+            matrix = dmatrix.as_numpy(taxa, dtype=dtype)
+        else:
+            zero = 0.0 if is_weighted_edge_distances else 0
+            matrix = numpy.array(
+                    [[zero if t1 is t2 else dmatrix[t1][t2] for t2 in taxa] for t1 in taxa],
+                    dtype=dtype)
+            matrix.shape = (len(taxa), len(taxa))
+        if normalization_factor != 1.0:
+            matrix = matrix / normalization_factor
+        return matrix
+
     def write_csv(self,
             out,
             is_first_row_column_names=True,
@@ -1293,6 +1685,192 @@ class PhylogeneticDistanceMatrix(object):
         else:
             raise error.NullAssemblageException("No taxa in assemblage")
 
+    def _get_indexed_node_indexes(self, filter_fn, dmatrix):
+        return [dmatrix.taxon_node_indexes[taxon] for taxon in self._mapped_taxa
+                if not filter_fn or filter_fn(taxon)]
+
+    def _calculate_indexed_mean_pairwise_distance(self,
+            filter_fn,
+            is_weighted_edge_distances,
+            is_normalize_by_tree_size):
+        dmatrix, normalization_factor = self._get_distance_matrix_and_normalization_factor(
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                is_normalize_by_tree_size=is_normalize_by_tree_size,)
+        node_indexes = self._get_indexed_node_indexes(filter_fn, dmatrix)
+        num_pairs = len(node_indexes) * (len(node_indexes) - 1) // 2
+        if not num_pairs:
+            raise error.NullAssemblageException("No taxa in assemblage")
+        total = self._distance_index.sum_of_pairwise_distances(
+                node_indexes,
+                is_weighted_edge_distances=is_weighted_edge_distances)
+        return (total / normalization_factor) / (num_pairs * 1.0)
+
+    def _calculate_indexed_mean_nearest_taxon_distance(self,
+            filter_fn,
+            is_weighted_edge_distances,
+            is_normalize_by_tree_size):
+        dmatrix, normalization_factor = self._get_distance_matrix_and_normalization_factor(
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                is_normalize_by_tree_size=is_normalize_by_tree_size,)
+        node_indexes = self._get_indexed_node_indexes(filter_fn, dmatrix)
+        if len(node_indexes) < 2:
+            raise error.NullAssemblageException("No taxa in assemblage")
+        distances = self._distance_index.nearest_distances(
+                node_indexes,
+                is_weighted_edge_distances=is_weighted_edge_distances)
+        return (sum(distances) / normalization_factor) / (len(distances) * 1.0)
+
+    def _new_distance_tree_nodes(self, tree):
+        node_pool = []
+        for taxon in self.sorted_taxa():
+            nd = tree.node_factory()
+            nd.taxon = taxon
+            node_pool.append(nd)
+        return node_pool
+
+    def _vectorized_nj_tree(self,
+            is_weighted_edge_distances,
+            tree_factory,
+            is_use_bounds):
+        dmatrix = self.as_numpy(is_weighted_edge_distances=is_weighted_edge_distances)
+        if tree_factory is None:
+            tree_factory = dendropy.Tree
+        tree = tree_factory(taxon_namespace=self.taxon_namespace)
+        node_pool = self._new_distance_tree_nodes(tree)
+        n = len(node_pool)
+        if n == 0:
+            return tree
+        # Joined nodes are replaced by the new node in the row/column of the
+        # first, while the row/column of the second is retired by setting it
+        # to infinity (as is the diagonal), so that it is never selected.
+        xsub = dmatrix.sum(axis=1)
+        numpy.fill_diagonal(dmatrix, numpy.inf)
+        is_active = numpy.ones(n, dtype=bool)
+        while n > 2:
+            if 2 * n < len(node_pool) or (is_use_bounds and n == len(node_pool)):
+                # drop retired rows and columns
+                active = numpy.flatnonzero(is_active)
+                dmatrix = dmatrix[numpy.ix_(active, active)]
+                xsub = xsub[active]
+                node_pool = [node_pool[idx] for idx in active]
+                is_active = numpy.ones(n, dtype=bool)
+                if is_use_bounds:
+                    bounds = _RapidNJBounds(dmatrix)
+            active = numpy.flatnonzero(is_active)
+
+            # find the pair with the minimum Q-value
+            if is_use_bounds:
+                idx1, idx2 = bounds.min_q_pair(dmatrix, xsub, n, active)
+            else:
+                min_q, idx1, idx2 = _nj_min_q_value(dmatrix, xsub, n, active)
+
+            # create the new node
+            nd1 = node_pool[idx1]
+            nd2 = node_pool[idx2]
+            new_node = tree.node_factory()
+            new_node.add_child(nd1)
+            new_node.add_child(nd2)
+
+            # calculate the branch lengths
+            d12 = dmatrix[idx1, idx2]
+            delta_f = 0.5 * d12 + 1.0/(2*(n-2)) * (xsub[idx1] - xsub[idx2])
+            nd1.edge.length = float(delta_f)
+            nd2.edge.length = float(d12 - delta_f)
+
+            # calculate the distances for the new node and adjust the values
+            # needed for the Q-matrix calculations
+            others = active[(active != idx1) & (active != idx2)]
+            new_distances = 0.5 * ((dmatrix[idx1, others] + dmatrix[idx2, others]) - d12)
+            xsub[others] += new_distances
+            xsub[others] -= dmatrix[idx1, others]
+            xsub[others] -= dmatrix[idx2, others]
+            xsub[idx1] = new_distances.sum()
+            xsub[idx2] = 0.0
+            dmatrix[idx2, :] = numpy.inf
+            dmatrix[:, idx2] = numpy.inf
+            dmatrix[idx1, others] = new_distances
+            dmatrix[others, idx1] = new_distances
+            node_pool[idx1] = new_node
+            node_pool[idx2] = None
+            is_active[idx2] = False
+            if is_use_bounds:
+                bounds.update(dmatrix, idx1, idx2, others, new_distances)
+            n -= 1
+
+        active = numpy.flatnonzero(is_active)
+        if n == 2:
+            new_node = tree.node_factory()
+            d = float(dmatrix[active[0], active[1]])
+            for idx in active:
+                new_node.add_child(node_pool[idx])
+                node_pool[idx].edge.length = d / 2
+            tree.seed_node = new_node
+        else:
+            tree.seed_node = node_pool[active[0]]
+        return tree
+
+    def _nnchain_upgma_tree(self,
+            is_weighted_edge_distances,
+            tree_factory):
+        dmatrix = self.as_numpy(is_weighted_edge_distances=is_weighted_edge_distances)
+        if tree_factory is None:
+            tree_factory = dendropy.Tree
+        tree = tree_factory(taxon_namespace=self.taxon_namespace)
+        node_pool = self._new_distance_tree_nodes(tree)
+        n = len(node_pool)
+        if n == 0:
+            return tree
+        # As with NJ, a new cluster takes the row/column of the first of
+        # the clusters joined, and the other is retired; the rows and
+        # columns of retired clusters (and the diagonal) are set to infinity,
+        # so that the nearest neighbor of a cluster is found by a single
+        # ``argmin`` over its row.
+        numpy.fill_diagonal(dmatrix, numpy.inf)
+        is_active = numpy.ones(n, dtype=bool)
+        cluster_sizes = numpy.ones(n)
+        distances_from_tip = [0.0] * n
+        # Each cluster on the chain is the nearest neighbor of the one
+        # before it. When the last two are each other's nearest neighbors,
+        # they are joined: as average linkage is reducible, joins that are
+        # made out of order of distance still give the UPGMA tree.
+        chain = []
+        while n > 1:
+            if not chain:
+                chain.append(int(numpy.flatnonzero(is_active)[0]))
+            idx1 = chain[-1]
+            row = dmatrix[idx1]
+            idx2 = int(numpy.argmin(row))
+            # on ties, prefer the previous cluster, so that the chain ends
+            if len(chain) > 1 and row[chain[-2]] <= row[idx2]:
+                idx2 = chain[-2]
+            else:
+                chain.append(idx2)
+                continue
+            del chain[-2:]
+            if idx2 < idx1:
+                idx1, idx2 = idx2, idx1
+            min_distance = float(dmatrix[idx1, idx2])
+            new_node = tree.node_factory()
+            elen = min_distance / 2.0
+            for idx in (idx1, idx2):
+                new_node.add_child(node_pool[idx])
+                node_pool[idx].edge.length = elen - distances_from_tip[idx]
+            distances_from_tip[idx1] = node_pool[idx1].edge.length + distances_from_tip[idx1]
+            x1 = cluster_sizes[idx1]
+            x2 = cluster_sizes[idx2]
+            new_distances = (dmatrix[idx1] * x1 + dmatrix[idx2] * x2) / (x1 + x2)
+            cluster_sizes[idx1] = x1 + x2
+            node_pool[idx1] = new_node
+            node_pool[idx2] = None
+            is_active[idx2] = False
+            dmatrix[idx1, :] = new_distances
+            dmatrix[:, idx1] = new_distances
+            dmatrix[idx2, :] = numpy.inf
+            dmatrix[:, idx2] = numpy.inf
+            n -= 1
+        tree.seed_node = node_pool[int(numpy.flatnonzero(is_active)[0])]
+        return tree
+
     def _calculate_standardized_effect_size(self,
             statisticf_name,
             comparison_regimes,
@@ -1524,3 +2102,410 @@ class NodeDistanceMatrix(object):
             return d
 
 
+
+class PatristicDistanceIndex(object):
+    """
+    Answers patristic distance, path edge count and MRCA queries between the
+    nodes of a tree in constant time, using storage linear (O(n log n) for
+    the MRCA index) rather than quadratic in the number of nodes.
+
+    The distance of each node from the root and the number of edges between
+    each node and the root are precalculated. The MRCA of two nodes is found
+    by a range minimum query over an Euler tour of the tree, answered using
+    a sparse table. Patristic distances and path edge counts are then given
+    by, e.g.: ``d(a, b) = d(root, a) + d(root, b) - 2 d(root, mrca(a, b))``.
+
+    Note that this creates a "snapshot" of the current state of the tree.
+    Edges with lengths of |None| are treated as having lengths of 0.
+    """
+
+    def __init__(self, tree):
+        """
+        Parameters
+        ----------
+        tree : a |Tree| instance
+            The |Tree| to index.
+        """
+        self.nodes = []
+        self.node_indexes = {}
+        self.parent_indexes = array.array("l")
+        self.edge_lengths = array.array("d")
+        self.root_distances = array.array("d")
+        self.root_path_edge_counts = array.array("l")
+        self.leaf_indexes = array.array("l")
+        first_euler_positions = array.array("l")
+        euler_tour = array.array("l")
+        # Nodes are indexed in preorder, so the MRCA of a pair of nodes is the
+        # node with the lowest index on the Euler tour between them.
+        stack = [(tree.seed_node, -1)]
+        while stack:
+            node, parent_idx = stack.pop()
+            if parent_idx < -1:
+                euler_tour.append(-2 - parent_idx)
+                continue
+            idx = len(self.nodes)
+            self.nodes.append(node)
+            self.node_indexes[node] = idx
+            self.parent_indexes.append(parent_idx)
+            if parent_idx < 0:
+                edge_length = 0.0
+                self.root_distances.append(0.0)
+                self.root_path_edge_counts.append(0)
+            else:
+                edge_length = node.edge.length
+                if edge_length is None:
+                    edge_length = 0.0
+                self.root_distances.append(self.root_distances[parent_idx] + edge_length)
+                self.root_path_edge_counts.append(self.root_path_edge_counts[parent_idx] + 1)
+                # return to parent on the tour after this subtree
+                stack.append((None, -2 - parent_idx))
+            self.edge_lengths.append(edge_length)
+            first_euler_positions.append(len(euler_tour))
+            euler_tour.append(idx)
+            if not node._child_nodes:
+                self.leaf_indexes.append(idx)
+            for child in reversed(node._child_nodes):
+                stack.append((child, idx))
+        self.first_euler_positions = first_euler_positions
+        self._sparse_table = [euler_tour]
+        span = 1
+        while span * 2 <= len(euler_tour):
+            prev = self._sparse_table[-1]
+            self._sparse_table.append(array.array("l", map(min, prev[:len(prev)-span], prev[span:])))
+            span *= 2
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def mrca_index(self, idx1, idx2):
+        """
+        Returns the index of the MRCA of the nodes with indexes ``idx1`` and
+        ``idx2``.
+        """
+        pos1 = self.first_euler_positions[idx1]
+        pos2 = self.first_euler_positions[idx2]
+        if pos1 > pos2:
+            pos1, pos2 = pos2, pos1
+        level = (pos2 - pos1 + 1).bit_length() - 1
+        row = self._sparse_table[level]
+        a = row[pos1]
+        b = row[pos2 - (1 << level) + 1]
+        return a if a < b else b
+
+    def patristic_distance_by_index(self, idx1, idx2):
+        """
+        Returns the sum of edge lengths between the nodes with indexes
+        ``idx1`` and ``idx2``.
+        """
+        if idx1 == idx2:
+            return 0.0
+        rd = self.root_distances
+        return rd[idx1] + rd[idx2] - 2 * rd[self.mrca_index(idx1, idx2)]
+
+    def path_edge_count_by_index(self, idx1, idx2):
+        """
+        Returns the number of edges between the nodes with indexes ``idx1``
+        and ``idx2``.
+        """
+        if idx1 == idx2:
+            return 0
+        rc = self.root_path_edge_counts
+        return rc[idx1] + rc[idx2] - 2 * rc[self.mrca_index(idx1, idx2)]
+
+    def mrca_node_by_index(self, idx1, idx2):
+        """
+        Returns the MRCA of the nodes with indexes ``idx1`` and ``idx2``.
+        """
+        return self.nodes[self.mrca_index(idx1, idx2)]
+
+    def mrca(self, node1, node2):
+        """
+        Returns the MRCA of two nodes of the tree.
+        """
+        return self.mrca_node_by_index(self.node_indexes[node1], self.node_indexes[node2])
+
+    def patristic_distance(self, node1, node2):
+        """
+        Returns the sum of edge lengths between two nodes of the tree.
+        """
+        return self.patristic_distance_by_index(self.node_indexes[node1], self.node_indexes[node2])
+
+    def path_edge_count(self, node1, node2):
+        """
+        Returns the number of edges between two nodes of the tree.
+        """
+        return self.path_edge_count_by_index(self.node_indexes[node1], self.node_indexes[node2])
+
+    def sum_of_pairwise_distances(self, node_indexes, is_weighted_edge_distances=True):
+        """
+        Returns the sum of the distances between all distinct pairs of the
+        nodes with indexes given by ``node_indexes``, in a single pass over
+        the tree: each edge contributes its length (or 1) times the number
+        of pairs it separates.
+        """
+        num_nodes = len(self.nodes)
+        counts = [0] * num_nodes
+        for idx in node_indexes:
+            counts[idx] += 1
+        total = sum(counts)
+        result = 0.0
+        parent_indexes = self.parent_indexes
+        edge_lengths = self.edge_lengths
+        for idx in range(num_nodes-1, 0, -1):
+            count = counts[idx]
+            if count:
+                counts[parent_indexes[idx]] += count
+                if is_weighted_edge_distances:
+                    result += edge_lengths[idx] * count * (total - count)
+                else:
+                    result += count * (total - count)
+        return result
+
+    def nearest_distances(self, node_indexes, is_weighted_edge_distances=True):
+        """
+        Returns a list with, for each of the nodes with indexes given by
+        ``node_indexes``, the distance to the nearest other node in
+        ``node_indexes``, in two passes over the tree. Each of the nodes
+        should be a leaf.
+        """
+        num_nodes = len(self.nodes)
+        inf = float("inf")
+        if is_weighted_edge_distances:
+            edge_lengths = self.edge_lengths
+        else:
+            edge_lengths = [1] * num_nodes
+        parent_indexes = self.parent_indexes
+        # nearest selected node in the subtree of each node, and the best and
+        # second-best values over the children of each node
+        below = [inf] * num_nodes
+        for idx in node_indexes:
+            below[idx] = 0.0
+        best1 = [inf] * num_nodes
+        best1_child = [-1] * num_nodes
+        best2 = [inf] * num_nodes
+        for idx in range(num_nodes-1, 0, -1):
+            d = below[idx] + edge_lengths[idx]
+            parent_idx = parent_indexes[idx]
+            if d < best1[parent_idx]:
+                best2[parent_idx] = best1[parent_idx]
+                best1[parent_idx] = d
+                best1_child[parent_idx] = idx
+            elif d < best2[parent_idx]:
+                best2[parent_idx] = d
+            if d < below[parent_idx]:
+                below[parent_idx] = d
+        # nearest selected node outside the subtree of each node
+        above = [inf] * num_nodes
+        for idx in range(1, num_nodes):
+            parent_idx = parent_indexes[idx]
+            if best1_child[parent_idx] == idx:
+                sibling_best = best2[parent_idx]
+            else:
+                sibling_best = best1[parent_idx]
+            above[idx] = edge_lengths[idx] + min(above[parent_idx], sibling_best)
+        return [above[idx] for idx in node_indexes]
+
+    def distance_matrix(self, node_indexes, is_weighted_edge_distances=True, dtype=None):
+        """
+        Returns a square NumPy array of the distances between the (distinct)
+        nodes with indexes given by ``node_indexes``, in the order given.
+
+        The array is filled in a single postorder sweep: at each node, the
+        distances between all the given nodes in the subtree of one child
+        and all those in the subtree of another are the sums of their
+        distances from the node, and are assigned as one block. Requires
+        NumPy.
+        """
+        _require_numpy()
+        if dtype is None:
+            dtype = numpy.float64
+        num_nodes = len(self.nodes)
+        result = numpy.zeros((len(node_indexes), len(node_indexes)), dtype=dtype)
+        if is_weighted_edge_distances:
+            edge_lengths = self.edge_lengths
+        else:
+            edge_lengths = [1] * num_nodes
+        parent_indexes = self.parent_indexes
+        # for each node: the matrix columns of the given nodes in its
+        # subtree, and their distances from it, as lists of array blocks
+        # (one per child subtree)
+        subtree_columns = {}
+        for column, idx in enumerate(node_indexes):
+            subtree_columns[idx] = [(numpy.array([column]), numpy.zeros(1))]
+        for idx in range(num_nodes-1, -1, -1):
+            blocks = subtree_columns.pop(idx, None)
+            if blocks is None:
+                continue
+            columns, distances = blocks[0]
+            for block_columns, block_distances in blocks[1:]:
+                d = distances[:, None] + block_distances[None, :]
+                result[numpy.ix_(columns, block_columns)] = d
+                result[numpy.ix_(block_columns, columns)] = d.T
+                columns = numpy.concatenate((columns, block_columns))
+                distances = numpy.concatenate((distances, block_distances))
+            if idx == 0:
+                break
+            block = (columns, distances + edge_lengths[idx])
+            try:
+                subtree_columns[parent_indexes[idx]].append(block)
+            except KeyError:
+                subtree_columns[parent_indexes[idx]] = [block]
+        return result
+
+def _taxon_node_indexes(distance_index):
+    taxon_node_indexes = {}
+    for idx in distance_index.leaf_indexes:
+        taxon = distance_index.nodes[idx].taxon
+        assert taxon is not None
+        taxon_node_indexes[taxon] = idx
+    return taxon_node_indexes
+
+class _TaxonPairLookup(object):
+    """
+    Read-only, dictionary-of-dictionaries-like view of a
+    |PatristicDistanceIndex| (or of a dense array of distances), so that,
+    e.g., ``lookup[taxon1][taxon2]`` returns the (patristic) distance between
+    the leaves of ``taxon1`` and ``taxon2``.
+    """
+
+    def __init__(self, distance_index, taxon_node_indexes, value_fn_name):
+        self.distance_index = distance_index
+        self.taxon_node_indexes = taxon_node_indexes
+        self.value_fn_name = value_fn_name
+        self._value_fn = getattr(distance_index, value_fn_name)
+
+    def clone(self):
+        return self.__class__(
+                distance_index=self.distance_index,
+                taxon_node_indexes=self.taxon_node_indexes,
+                value_fn_name=self.value_fn_name)
+
+    def shuffled(self, current_to_shuffled_taxon_map):
+        taxon_node_indexes = {}
+        for taxon, shuffled_taxon in current_to_shuffled_taxon_map.items():
+            taxon_node_indexes[shuffled_taxon] = self.taxon_node_indexes[taxon]
+        return self.__class__(
+                distance_index=self.distance_index,
+                taxon_node_indexes=taxon_node_indexes,
+                value_fn_name=self.value_fn_name)
+
+    def value(self, taxon1, taxon2):
+        return self._value_fn(self.taxon_node_indexes[taxon1], self.taxon_node_indexes[taxon2])
+
+    def as_numpy(self, taxa, dtype=None):
+        return self.distance_index.distance_matrix(
+                [self.taxon_node_indexes[taxon] for taxon in taxa],
+                is_weighted_edge_distances=self.value_fn_name == "patristic_distance_by_index",
+                dtype=dtype)
+
+    def __getitem__(self, taxon1):
+        return _TaxonPairLookupRow(self, self.taxon_node_indexes[taxon1])
+
+    def __iter__(self):
+        return iter(self.taxon_node_indexes)
+
+    def __len__(self):
+        return len(self.taxon_node_indexes)
+
+    def __contains__(self, taxon):
+        return taxon in self.taxon_node_indexes
+
+    def __eq__(self, o):
+        if (isinstance(o, _TaxonPairLookup)
+                and self.distance_index is o.distance_index
+                and self.value_fn_name == o.value_fn_name
+                and self.taxon_node_indexes == o.taxon_node_indexes):
+            return True
+        if set(self) != set(o):
+            return False
+        for taxon1 in self:
+            row1 = self[taxon1]
+            row2 = o[taxon1]
+            for taxon2 in self:
+                if row1[taxon2] != row2[taxon2]:
+                    return False
+        return True
+
+    def __ne__(self, o):
+        return not self.__eq__(o)
+
+    def __hash__(self):
+        return id(self)
+
+class _TaxonPairLookupRow(object):
+
+    def __init__(self, lookup, node_index):
+        self._lookup = lookup
+        self._node_index = node_index
+
+    def __getitem__(self, taxon2):
+        return self._lookup._value_fn(self._node_index, self._lookup.taxon_node_indexes[taxon2])
+
+    def __iter__(self):
+        return iter(self._lookup.taxon_node_indexes)
+
+    def __len__(self):
+        return len(self._lookup.taxon_node_indexes)
+
+    def __contains__(self, taxon):
+        return taxon in self._lookup.taxon_node_indexes
+
+    def keys(self):
+        return list(self._lookup.taxon_node_indexes)
+
+class _DistinctTaxonPairs(object):
+    """
+    Iterable over all distinct pairs of a collection of taxa, generated on
+    demand rather than stored.
+    """
+
+    def __init__(self, taxa):
+        self.taxa = list(taxa)
+        self._taxa_set = set(self.taxa)
+
+    def __iter__(self):
+        taxa = self.taxa
+        for idx1, taxon1 in enumerate(taxa):
+            for taxon2 in taxa[idx1+1:]:
+                yield taxon1, taxon2
+
+    def __len__(self):
+        n = len(self.taxa)
+        return n * (n - 1) // 2
+
+    def __contains__(self, pair):
+        try:
+            taxon1, taxon2 = pair
+        except (TypeError, ValueError):
+            return False
+        return taxon1 is not taxon2 and taxon1 in self._taxa_set and taxon2 in self._taxa_set
+
+    def __eq__(self, o):
+        if isinstance(o, _DistinctTaxonPairs):
+            return self._taxa_set == o._taxa_set
+        return NotImplemented
+
+    def __ne__(self, o):
+        r = self.__eq__(o)
+        return r if r is NotImplemented else not r
+
+    def __hash__(self):
+        return id(self)
+
+class _DenseDistances(object):
+    """
+    Square array of distances, with the same interface as a
+    |PatristicDistanceIndex| for the purposes of a ``_TaxonPairLookup``.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def patristic_distance_by_index(self, idx1, idx2):
+        return self.matrix.item(idx1, idx2)
+
+    def distance_matrix(self, node_indexes, is_weighted_edge_distances=True, dtype=None):
+        if dtype is None:
+            dtype = numpy.float64
+        node_indexes = numpy.array(node_indexes, dtype=numpy.intp)
+        return self.matrix[numpy.ix_(node_indexes, node_indexes)].astype(dtype)
@@ -25,6 +25,15 @@ import dendropy
 from dendropy.calculate import probability
 from dendropy.calculate import combinatorics
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("NumPy is required for encoded character matrices, but could not be imported")
+
 ###############################################################################
 ## internal functions: generally taking lower-level data, such as sequences etc.
 ###############################################################################
@@ -326,6 +335,252 @@ class PopulationPairSummaryStatistics(object):
                 ss_diffs += (float(diffs - mean_diff) ** 2)
         return float(ss_diffs)/(len(self.pop1_seqs)*len(self.pop2_seqs))
 
+class _StateCodes(dict):
+    """
+    Maps states to the integer codes used by |EncodedCharacterMatrix|,
+    assigning codes to states as they are encountered.
+    """
+
+    def __init__(self, state_alphabet, ignore_uncertain):
+        dict.__init__(self)
+        if ignore_uncertain:
+            self.attr = "fundamental_indexes_with_gaps_as_missing"
+            self.states_to_ignore = set([state_alphabet.gap_state, state_alphabet.no_data_state])
+        else:
+            self.attr = "fundamental_indexes"
+            self.states_to_ignore = set()
+        self.fundamental_index_codes = {}
+
+    def __missing__(self, state):
+        if state in self.states_to_ignore:
+            code = -1
+        else:
+            key = getattr(state, self.attr)
+            try:
+                code = self.fundamental_index_codes[key]
+            except KeyError:
+                code = len(self.fundamental_index_codes)
+                self.fundamental_index_codes[key] = code
+        self[state] = code
+        return code
+
+class EncodedCharacterMatrix(object):
+    """
+    A set of character sequences encoded, once, as a two-dimensional NumPy
+    array of integer codes (one row per sequence, one column per site), so
+    that population genetic statistics can be calculated using array
+    operations instead of comparing states site-by-site and pair-by-pair.
+
+    The results are the same as those of the corresponding functions of
+    this module (e.g., :func:`tajimas_d()`). As with those, two states are
+    considered different if they map to different fundamental state
+    indexes, with gaps treated as missing data if ``ignore_uncertain`` is
+    |True|, in which case sites with gaps or missing data in either of a
+    pair of sequences are also ignored when comparing them (such sites are
+    given a code of -1).
+
+    Requires NumPy.
+
+    Examples
+    --------
+
+    ::
+
+        import dendropy
+        from dendropy.calculate import popgenstat
+        seqs = dendropy.DnaCharacterMatrix.get(
+                path="orti.nex",
+                schema="nexus")
+        ecm = popgenstat.EncodedCharacterMatrix.from_char_matrix(seqs)
+        print(ecm.nucleotide_diversity())
+        print(ecm.tajimas_d())
+        print(ecm.wattersons_theta())
+
+    """
+
+    @classmethod
+    def from_char_matrix(cls, char_matrix, ignore_uncertain=True):
+        """
+        Encodes the sequences of ``char_matrix``.
+        """
+        return cls(
+                char_sequences=char_matrix.sequences(),
+                state_alphabet=char_matrix.default_state_alphabet,
+                ignore_uncertain=ignore_uncertain)
+
+    def __init__(self, char_sequences, state_alphabet, ignore_uncertain=True):
+        """
+        Parameters
+        ----------
+        char_sequences : iterable of |CharacterDataSequence| objects
+            The sequences to encode, all of the same length.
+        state_alphabet : |StateAlphabet|
+            The state alphabet of the sequences.
+        ignore_uncertain : bool
+            Whether or not to ignore gaps and missing data.
+        """
+        _require_numpy()
+        self.ignore_uncertain = ignore_uncertain
+        self._state_codes = _StateCodes(state_alphabet, ignore_uncertain)
+        rows = [self.encode_sequence(seq) for seq in char_sequences]
+        if rows:
+            num_sites = len(rows[0])
+            for row in rows[1:]:
+                if len(row) != num_sites:
+                    raise Exception("sequences of unequal length")
+            self.codes = numpy.vstack(rows)
+        else:
+            self.codes = numpy.zeros((0, 0), dtype=numpy.int16)
+
+    def _get_num_sequences(self):
+        return self.codes.shape[0]
+    num_sequences = property(_get_num_sequences)
+
+    def _get_num_sites(self):
+        return self.codes.shape[1]
+    num_sites = property(_get_num_sites)
+
+    def encode_sequence(self, seq):
+        """
+        Returns a NumPy array of the codes of the states of ``seq``.
+        """
+        if hasattr(seq, "values"):
+            seq = seq.values()
+        return numpy.fromiter(
+                map(self._state_codes.__getitem__, seq),
+                dtype=numpy.int16,
+                count=len(seq))
+
+    def _site_blocks(self, max_block_size):
+        num_block_sites = max(1, max_block_size // max(1, self.num_sequences))
+        for start in range(0, self.num_sites, num_block_sites):
+            yield self.codes[:, start:start+num_block_sites]
+
+    def pairwise_differences(self, max_block_size=1<<24):
+        """
+        Returns two square NumPy arrays: the number of sites at which each
+        pair of sequences differ, and the number of sites compared (i.e., not
+        ignored) for each pair.
+
+        For each state, the counts of sites at which pairs of sequences share
+        that state are given by the product of a matrix of indicators of
+        that state with its transpose. These are calculated for blocks of
+        sites (of at most ``max_block_size`` cells, and at most 2^24 sites,
+        so that the single precision counts are exact).
+        """
+        num_sequences = self.num_sequences
+        num_codes = len(self._state_codes.fundamental_index_codes)
+        counted = numpy.zeros((num_sequences, num_sequences), dtype=numpy.float64)
+        shared = numpy.zeros((num_sequences, num_sequences), dtype=numpy.float64)
+        for block in self._site_blocks(min(max_block_size, num_sequences << 24)):
+            code_counts = numpy.bincount(block.ravel() + 1, minlength=num_codes + 1)
+            if code_counts[0]:
+                x = (block >= 0).astype(numpy.float32)
+                counted += numpy.dot(x, x.T)
+            else:
+                counted += block.shape[1]
+            for code in numpy.flatnonzero(code_counts[1:]):
+                x = (block == code).astype(numpy.float32)
+                shared += numpy.dot(x, x.T)
+        counted = counted.astype(numpy.int64)
+        return counted - shared.astype(numpy.int64), counted
+
+    def count_differences(self):
+        """
+        Returns a tuple of: the total number of pairwise differences
+        observed between all sequences, the mean number of pairwise
+        differences per (non-ignored) site, and the sum of the squares of
+        the number of pairwise differences.
+        """
+        differences, counted = self.pairwise_differences()
+        upper = numpy.triu_indices(self.num_sequences, 1)
+        differences = differences[upper]
+        counted = counted[upper]
+        sum_diff = float(differences.sum())
+        per_site_differences = numpy.where(
+                counted > 0,
+                differences / numpy.maximum(counted, 1).astype(numpy.float64),
+                differences)
+        # summed in the same order as by _count_differences()
+        mean_diff = sum(per_site_differences.tolist(), 0.0) / len(differences)
+        sq_diff = float((differences ** 2).sum())
+        return sum_diff, mean_diff, sq_diff
+
+    def num_segregating_sites(self, max_block_size=1<<24):
+        """
+        Returns the raw number of segregating sites (polymorphic sites).
+        """
+        s = 0
+        for block in self._site_blocks(max_block_size):
+            first = block[0]
+            others = block[1:]
+            is_segregating = ((others != first) & (others >= 0)).any(axis=0) & (first >= 0)
+            s += int(is_segregating.sum())
+        return s
+
+    def average_number_of_pairwise_differences(self):
+        """
+        Returns $k$ (Tajima 1983; Wakely 1996).
+        """
+        sum_diff, mean_diff, sq_diff = self.count_differences()
+        return sum_diff / combinatorics.choose(self.num_sequences, 2)
+
+    def nucleotide_diversity(self):
+        """
+        Returns $\pi$, the proportional nucleotide diversity.
+        """
+        return self.count_differences()[1]
+
+    def tajimas_d(self):
+        """
+        Returns Tajima's D.
+        """
+        return _tajimas_d(
+                self.num_sequences,
+                self.average_number_of_pairwise_differences(),
+                self.num_segregating_sites())
+
+    def wattersons_theta(self):
+        """
+        Returns Watterson's Theta (per sequence)
+        """
+        a1 = sum([1.0/i for i in range(1, self.num_sequences)])
+        return float(self.num_segregating_sites()) / a1
+
+    def unfolded_site_frequency_spectrum(self,
+            ancestral_sequence=None,
+            pad=True,
+            max_block_size=1<<24):
+        """
+        Returns the site frequency spectrum, with reference to the ancestral
+        sequence given by ``ancestral_sequence`` (or the first sequence, if
+        not given), as with :func:`unfolded_site_frequency_spectrum()`. Note
+        that, here, uncertain states are ignored (or not) as specified when
+        encoding the sequences.
+        """
+        if ancestral_sequence is None:
+            ancestral_codes = self.codes[0]
+        else:
+            ancestral_codes = self.encode_sequence(ancestral_sequence)
+        num_block_sites = max(1, max_block_size // max(1, self.num_sequences))
+        site_counts = []
+        for start in range(0, self.num_sites, num_block_sites):
+            block = self.codes[:, start:start+num_block_sites]
+            ancestral = ancestral_codes[start:start+num_block_sites]
+            is_derived = (block != ancestral) & (block >= 0) & (ancestral >= 0)
+            site_counts.append(is_derived.sum(axis=0))
+        freqs = {}
+        if pad:
+            for i in range(self.num_sequences+1):
+                freqs[i] = 0
+        if site_counts:
+            site_counts = numpy.concatenate(site_counts)
+            values, first_sites, counts = numpy.unique(site_counts, return_index=True, return_counts=True)
+            for idx in numpy.argsort(first_sites):
+                p = int(values[idx])
+                freqs[p] = freqs.get(p, 0) + int(counts[idx])
+        return freqs
+
 def derived_state_matrix(
         char_matrix,
         ancestral_sequence=None,
@@ -21,7 +21,9 @@ Functions to calculate some general statistics.
 """
 
 import math
+import copy
 from dendropy.calculate import probability
+from dendropy.utility import GLOBAL_RNG
 from operator import itemgetter
 
 def _mean_and_variance_pop_n(values):
@@ -510,3 +512,262 @@ def summarize(values):
     except (ValueError, OverflowError):
         summary['quant_5_95'] = None
     return summary
+
+class P2QuantileEstimator(object):
+    """
+    Estimates a quantile of a stream of values in constant space, using the
+    P-squared algorithm of Jain and Chlamtac (1985, *Communications of the
+    ACM* 28: 1076-1085).
+
+    Five markers are maintained, whose heights track the minimum, the
+    maximum, the target quantile and the quantiles midway between these,
+    and are adjusted by piecewise-parabolic interpolation as values are
+    added. The algorithm gives no formal error bound, but for continuous
+    distributions the estimate typically lies within a fraction of a percent
+    (in rank) of the true quantile once a few hundred values have been seen.
+    With five or fewer values, the quantile of the values seen is exact.
+    """
+
+    def __init__(self, q):
+        """
+        Parameters
+        ----------
+        q : float
+            The quantile to estimate, between 0 and 1 (e.g., 0.5 for the
+            median).
+        """
+        if not 0.0 < q < 1.0:
+            raise ValueError("Quantile must be between 0 and 1: {}".format(q))
+        self.q = q
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired_positions = [1.0, 1.0 + 2*q, 1.0 + 4*q, 3.0 + 2*q, 5.0]
+        self._desired_position_increments = [0.0, q/2.0, q, (1.0+q)/2.0, 1.0]
+
+    def add(self, value):
+        """
+        Adds ``value`` to the stream.
+        """
+        self.count += 1
+        heights = self._heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+        positions = self._positions
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k+1]:
+                k += 1
+        for i in range(k+1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired_positions[i] += self._desired_position_increments[i]
+        for i in range(1, 4):
+            d = self._desired_positions[i] - positions[i]
+            if ((d >= 1 and positions[i+1] - positions[i] > 1)
+                    or (d <= -1 and positions[i-1] - positions[i] < -1)):
+                d = 1 if d > 0 else -1
+                h = self._parabolic_height(i, d)
+                if not heights[i-1] < h < heights[i+1]:
+                    h = heights[i] + d * (heights[i+d] - heights[i]) / float(positions[i+d] - positions[i])
+                heights[i] = h
+                positions[i] += d
+
+    def _parabolic_height(self, i, d):
+        heights = self._heights
+        positions = self._positions
+        return heights[i] + float(d) / (positions[i+1] - positions[i-1]) * (
+                (positions[i] - positions[i-1] + d) * (heights[i+1] - heights[i]) / float(positions[i+1] - positions[i])
+                + (positions[i+1] - positions[i] - d) * (heights[i] - heights[i-1]) / float(positions[i] - positions[i-1]))
+
+    def _get_value(self):
+        if self.count == 0:
+            raise ValueError("No values in data")
+        if self.count <= 5:
+            return quantile(self._heights, self.q)
+        return self._heights[2]
+    value = property(_get_value)
+
+class StreamingSummary(object):
+    """
+    Summarizes a stream of values in bounded memory, as an alternative to
+    keeping all the values in a list to be passed to :func:`summarize()`.
+
+    The following are maintained as values are added:
+
+        - the count, mean and sum of squared deviations (using Welford's
+          online algorithm), from which the (sample) variance and standard
+          deviation are derived;
+        - the minimum and maximum values;
+        - a uniform random sample of at most ``sample_size`` values
+          (reservoir sampling);
+        - P-squared estimators of the median and of the 5% and 95% quantiles
+          (see :class:`P2QuantileEstimator`).
+
+    :meth:`summarize()` returns a dictionary with the same keys as
+    :func:`summarize()`. The mean, variance, standard deviation and range
+    are exact (up to floating point error). If no more than ``sample_size``
+    values have been added, the sample holds all the values, and *all* the
+    summaries are exact (i.e., identical to those given by
+    :func:`summarize()` on the list of values). Otherwise, the median and
+    5%-95% quantiles are given by the P-squared estimators, and the 95% HPD
+    interval is calculated from the sample. By the
+    Dvoretzky-Kiefer-Wolfowitz inequality, with probability at least 1 -
+    delta, every quantile of a uniform sample of size ``k`` lies within
+    ``epsilon = sqrt(ln(2/delta) / (2k))`` (in rank) of the corresponding
+    quantile of all the values: for the default sample size of 1000, and
+    delta = 0.05, this is within 0.043, so that, for example, the bounds of
+    the 95% HPD interval are (with 95% confidence) no further than the
+    0.7% and 4.3% quantiles (or the 95.7% and 99.3% quantiles) from their
+    true positions.
+
+    Summaries can be combined using :meth:`update()`. The mean, variance and
+    range remain exact, and the samples are merged, but the P-squared
+    estimators cannot be, so that after combining two non-empty summaries
+    the median and 5%-95% quantiles are also calculated from the sample,
+    with the bound given above.
+
+    Values of |None| are ignored.
+    """
+
+    DEFAULT_SAMPLE_SIZE = 1000
+    QUANTILES = (0.05, 0.5, 0.95)
+
+    def __init__(self, sample_size=None, rng=None):
+        """
+        Parameters
+        ----------
+        sample_size : int
+            Maximum number of values sampled for the calculation of HPD
+            intervals (and of quantiles after combining summaries). Defaults
+            to ``StreamingSummary.DEFAULT_SAMPLE_SIZE``.
+        rng : ``random.Random`` object
+            Source of randomness for the sampling. Defaults to the
+            library-wide random number generator.
+        """
+        if sample_size is None:
+            sample_size = self.DEFAULT_SAMPLE_SIZE
+        if sample_size < 1:
+            raise ValueError("Sample size must be positive: {}".format(sample_size))
+        self.sample_size = sample_size
+        if rng is None:
+            rng = GLOBAL_RNG
+        self.rng = rng
+        self.count = 0
+        self.mean = 0.0
+        self._sum_of_squared_deviations = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.sample = []
+        self._quantile_estimators = [P2QuantileEstimator(q) for q in self.QUANTILES]
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        """
+        Adds ``value`` to the summary.
+        """
+        if value is None:
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += float(delta) / self.count
+        self._sum_of_squared_deviations += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        if len(self.sample) < self.sample_size:
+            self.sample.append(value)
+        else:
+            idx = self.rng.randint(0, self.count - 1)
+            if idx < self.sample_size:
+                self.sample[idx] = value
+        if self._quantile_estimators is not None:
+            for estimator in self._quantile_estimators:
+                estimator.add(value)
+
+    def extend(self, values):
+        """
+        Adds each of ``values`` to the summary.
+        """
+        for value in values:
+            self.append(value)
+
+    def update(self, other):
+        """
+        Combines the summary ``other`` (which is unchanged) into this one.
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            sample_size = self.sample_size
+            self.__dict__.update(copy.deepcopy(dict((k, v) for k, v in other.__dict__.items() if k != "rng")))
+            self.sample_size = sample_size
+            if len(self.sample) > sample_size:
+                self.sample = self.rng.sample(self.sample, sample_size)
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._sum_of_squared_deviations += (other._sum_of_squared_deviations
+                + delta * delta * self.count * other.count / count)
+        self.mean += delta * other.count / count
+        if other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if other.maximum > self.maximum:
+            self.maximum = other.maximum
+        if count <= self.sample_size:
+            self.sample.extend(other.sample)
+        else:
+            # each value of a sample represents ``count/len(sample)``
+            # values of its stream, so draw from the two samples in
+            # proportion to the sizes of their streams
+            num_from_self = 0
+            p = float(self.count) / count
+            for i in range(self.sample_size):
+                if self.rng.random() < p:
+                    num_from_self += 1
+            num_from_self = min(num_from_self, len(self.sample))
+            num_from_other = min(self.sample_size - num_from_self, len(other.sample))
+            num_from_self = min(self.sample_size - num_from_other, len(self.sample))
+            self.sample = (self.rng.sample(self.sample, num_from_self)
+                    + self.rng.sample(other.sample, num_from_other))
+        self.count = count
+        self._quantile_estimators = None
+
+    def _get_variance(self):
+        if self.count == 0:
+            raise ValueError("No values in data")
+        if self.count == 1:
+            return float('inf')
+        return self._sum_of_squared_deviations / (self.count - 1)
+    variance = property(_get_variance)
+
+    def summarize(self):
+        """
+        Returns a dictionary of summary statistics with the same keys as
+        :func:`summarize()`.
+        """
+        if self.count == 0:
+            raise ValueError("No values in data")
+        summary = summarize(self.sample)
+        if self.count <= len(self.sample):
+            return summary
+        summary['range'] = (self.minimum, self.maximum)
+        summary['mean'] = self.mean
+        summary['var'] = self.variance
+        summary['sd'] = summary['var'] ** 0.5
+        if self._quantile_estimators is not None:
+            q5, q50, q95 = [e.value for e in self._quantile_estimators]
+            summary['median'] = q50
+            summary['quant_5_95'] = (q5, q95)
+        return summary
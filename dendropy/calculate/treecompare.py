@@ -86,11 +86,167 @@ def symmetric_difference(tree1, tree2, is_bipartitions_updated=False):
             is_bipartitions_updated=is_bipartitions_updated)
     return t[0] + t[1]
 
-def unweighted_robinson_foulds_distance(tree1, tree2, is_bipartitions_updated=False):
+def unweighted_robinson_foulds_distance(tree1, tree2, is_bipartitions_updated=False, algorithm="bipartitions"):
     """
-    Alias for ``symmetric_difference()``.
+    Returns *unweighted* Robinson-Foulds distance between two trees.
+
+    Parameters
+    ----------
+    tree1 : |Tree| object
+        The first tree of the two trees being compared.
+    tree2 : |Tree| object
+        The second tree of the two trees being compared.
+    is_bipartitions_updated : bool
+        See :func:`symmetric_difference()`. Ignored if ``algorithm`` is
+        "day".
+    algorithm : string
+        If "bipartitions" [default], then the distance is calculated by
+        comparing the bipartition encodings of the trees, as by
+        :func:`symmetric_difference()`. If "day", then the distance is
+        calculated in linear time without encoding bipartitions, as by
+        :func:`day_symmetric_difference()`.
+
+    Returns
+    -------
+    d : int
+        The symmetric difference (a.k.a. the unweighted Robinson-Foulds
+        distance) between ``tree1`` and ``tree2``.
+    """
+    if algorithm == "bipartitions":
+        return symmetric_difference(tree1, tree2, is_bipartitions_updated)
+    elif algorithm == "day":
+        return day_symmetric_difference(tree1, tree2)
+    else:
+        raise ValueError("Unrecognized algorithm: '{}'".format(algorithm))
+
+def day_symmetric_difference(tree1, tree2):
+    """
+    Returns *unweighted* Robinson-Foulds distance between two trees, using
+    Day's (1985) linear-time algorithm.
+
+    The leaves of ``tree1`` are ranked in depth-first order, so that each of
+    its clusters is an interval of ranks, and the clusters are stored in a
+    table indexed by rank. The clusters of ``tree2`` are then looked up in
+    the table in a single postorder traversal. Unlike
+    :func:`symmetric_difference()`, no |Bipartition| objects are created, and
+    the bipartitions of the trees are neither used nor updated.
+
+    Trees need to share the same |TaxonNamespace| reference, and must have
+    the same set of taxa on their leaves. The trees are compared as rooted
+    trees if both are rooted, and as unrooted trees otherwise. The result is
+    the same as that of :func:`symmetric_difference()` with default
+    bipartition encoding, i.e., with unifurcations suppressed and, for
+    unrooted trees, basal bifurcations collapsed.
+
+    Parameters
+    ----------
+    tree1 : |Tree| object
+        The first tree of the two trees being compared.
+    tree2 : |Tree| object
+        The second tree of the two trees being compared.
+
+    Returns
+    -------
+    d : int
+        The symmetric difference (a.k.a. the unweighted Robinson-Foulds
+        distance) between ``tree1`` and ``tree2``.
     """
-    return symmetric_difference(tree1, tree2, is_bipartitions_updated)
+    if tree1.taxon_namespace is not tree2.taxon_namespace:
+        raise error.TaxonNamespaceIdentityError(tree1, tree2)
+    if tree1.is_rooted and tree2.is_rooted:
+        start_node1 = tree1.seed_node
+        start_node2 = tree2.seed_node
+    else:
+        # root both trees at the same leaf, which is excluded from the ranks
+        start_node1 = _first_leaf_node(tree1.seed_node)
+        start_node2 = None
+        for nd in tree2.leaf_node_iter():
+            if nd.taxon is start_node1.taxon:
+                start_node2 = nd
+                break
+        if start_node2 is None:
+            raise ValueError("Trees do not have the same leaf taxa")
+
+    # cluster table of tree1
+    nodes, parent_indexes, num_children, is_first_child = _day_preorder(start_node1)
+    num_nodes = len(nodes)
+    taxon_ranks = {}
+    lefts = [num_nodes] * num_nodes
+    rights = [-1] * num_nodes
+    for idx in range(num_nodes):
+        if num_children[idx] == 0:
+            lefts[idx] = rights[idx] = len(taxon_ranks)
+            taxon_ranks[nodes[idx].taxon] = len(taxon_ranks)
+    num_leaves = len(taxon_ranks)
+    if num_leaves == 0 or None in taxon_ranks:
+        raise ValueError("Leaf nodes must have taxa")
+    # reverse preorder visits children before their parents
+    for idx in range(num_nodes-1, 0, -1):
+        parent_idx = parent_indexes[idx]
+        if lefts[idx] < lefts[parent_idx]:
+            lefts[parent_idx] = lefts[idx]
+        if rights[idx] > rights[parent_idx]:
+            rights[parent_idx] = rights[idx]
+    # Clusters are stored under their rightmost rank if their (non-unifurcating)
+    # ancestor chain begins with a first child, and under their leftmost rank
+    # otherwise: nested clusters sharing an end point can then never collide.
+    table_left = [-1] * num_leaves
+    table_right = [-1] * num_leaves
+    num_clusters1 = 0
+    for idx in range(1, num_nodes):
+        if num_children[idx] < 2:
+            continue
+        left = lefts[idx]
+        right = rights[idx]
+        if right - left + 1 >= num_leaves:
+            continue
+        parent_idx = parent_indexes[idx]
+        is_first = is_first_child[idx]
+        while num_children[parent_idx] == 1 and parent_indexes[parent_idx] >= 0:
+            is_first = is_first_child[parent_idx]
+            parent_idx = parent_indexes[parent_idx]
+        if is_first:
+            table_left[right] = left
+        else:
+            table_right[left] = right
+        num_clusters1 += 1
+
+    # clusters of tree2
+    nodes, parent_indexes, num_children, _ = _day_preorder(start_node2)
+    num_nodes = len(nodes)
+    mins = [num_leaves] * num_nodes
+    maxes = [-1] * num_nodes
+    sizes = [0] * num_nodes
+    tree2_num_leaves = 0
+    for idx in range(num_nodes):
+        if num_children[idx] == 0:
+            try:
+                rank = taxon_ranks[nodes[idx].taxon]
+            except KeyError:
+                raise ValueError("Trees do not have the same leaf taxa")
+            mins[idx] = maxes[idx] = rank
+            sizes[idx] = 1
+            tree2_num_leaves += 1
+    if tree2_num_leaves != num_leaves:
+        raise ValueError("Trees do not have the same leaf taxa")
+    num_clusters2 = 0
+    num_shared_clusters = 0
+    for idx in range(num_nodes-1, -1, -1):
+        size = sizes[idx]
+        if num_children[idx] >= 2 and size < num_leaves:
+            num_clusters2 += 1
+            left = mins[idx]
+            right = maxes[idx]
+            if right - left + 1 == size and (table_left[right] == left or table_right[left] == right):
+                num_shared_clusters += 1
+        parent_idx = parent_indexes[idx]
+        if parent_idx >= 0:
+            if mins[idx] < mins[parent_idx]:
+                mins[parent_idx] = mins[idx]
+            if maxes[idx] > maxes[parent_idx]:
+                maxes[parent_idx] = maxes[idx]
+            sizes[parent_idx] += size
+    return num_clusters1 + num_clusters2 - 2 * num_shared_clusters
 
 def weighted_robinson_foulds_distance(
         tree1,
@@ -670,6 +826,40 @@ def mason_gamer_kellogg_score(tree1, tree2, is_bipartitions_updated=False):
 ###############################################################################
 ## Supporting
 
+def _first_leaf_node(node):
+    while node._child_nodes:
+        node = node._child_nodes[0]
+    return node
+
+def _day_preorder(start_node):
+    """
+    Returns the nodes of a tree in preorder, as if the tree were rooted at
+    ``start_node`` (which may be a leaf node of an unrooted tree), together
+    with, for each node, the index of its parent (-1 for ``start_node``),
+    its number of children, and whether it is the first child of its parent.
+    """
+    nodes = []
+    parent_indexes = []
+    num_children = []
+    is_first_child = []
+    stack = [(start_node, -1, None, False)]
+    while stack:
+        node, parent_idx, came_from, is_first = stack.pop()
+        idx = len(nodes)
+        nodes.append(node)
+        parent_indexes.append(parent_idx)
+        is_first_child.append(is_first)
+        children = [ch for ch in node._child_nodes if ch is not came_from]
+        parent = node._parent_node
+        if parent is not None and parent is not came_from:
+            # a unifurcating seed node is a dead end when approached from below
+            if parent._parent_node is not None or len(parent._child_nodes) > 1:
+                children.append(parent)
+        num_children.append(len(children))
+        for ch_idx in range(len(children)-1, -1, -1):
+            stack.append((children[ch_idx], idx, node, ch_idx == 0))
+    return nodes, parent_indexes, num_children, is_first_child
+
 def _get_length_diffs(
         tree1,
         tree2,
@@ -21,10 +21,30 @@ Tree summarization and consensus tree building.
 """
 
 import math
+import heapq
+import hashlib
+import binascii
 import collections
 import dendropy
 from dendropy.datamodel import taxonmodel
 from dendropy.calculate.statistics import mean_and_sample_variance
+from dendropy.calculate.statistics import StreamingSummary
+
+def _mean_and_sample_variance(values):
+    # ``values`` is either a list or, for split distributions with
+    # ``streaming_summaries``, a |StreamingSummary|
+    if isinstance(values, StreamingSummary):
+        return values.mean, values.variance
+    return mean_and_sample_variance(values)
+
+def _summarize_values(values, summarization_fn):
+    if isinstance(values, StreamingSummary):
+        if summarization_fn is not None:
+            raise ValueError("Custom summarization functions cannot be applied to streaming summaries of values: use 'streaming_summaries=False' to keep the values")
+        return values.mean
+    if summarization_fn is None:
+        return float(sum(values))/len(values)
+    return summarization_fn(values)
 
 ##############################################################################
 ## TreeSummarizer
@@ -92,7 +112,7 @@ class TreeSummarizer(object):
             split_edge_lengths = {}
             for split, edges in split_distribution.split_edge_lengths.items():
                 if len(edges) > 0:
-                    mean, var = mean_and_sample_variance(edges)
+                    mean, var = _mean_and_sample_variance(edges)
                     elen = mean
                 else:
                     elen = None
@@ -107,7 +127,7 @@ class TreeSummarizer(object):
             if include_edge_lengths and split in split_distribution.split_edge_lengths:
                 edges = split_distribution.split_edge_lengths[split]
                 if len(edges) > 0:
-                    mean, var = mean_and_sample_variance(edges)
+                    mean, var = _mean_and_sample_variance(edges)
                     elen = mean
                 else:
                     elen = None
@@ -235,13 +255,14 @@ class TreeSummarizer(object):
         `SplitDistribution` object) being summarized.
         ``summarization_fn`` should take an iterable of floats, and return a float. If |None|, it
         defaults to calculating the mean (``lambda x: float(sum(x))/len(x)``).
+        If the split distribution keeps streaming summaries of the ages
+        instead of the ages themselves, then only the mean is available, and
+        ``summarization_fn`` must be |None|.
         If ``set_edge_lengths`` is |True|, then edge lengths will be set to so that the actual node ages
         correspond to the ``age`` attribute value.
         If ``collapse_negative_edges`` is True, then edge lengths with negative values will be set to 0.
         If ``allow_negative_edges`` is True, then no error will be raised if edges have negative lengths.
         """
-        if summarization_fn is None:
-            summarization_fn = lambda x: float(sum(x))/len(x)
         if is_bipartitions_updated:
             tree.encode_splits()
         #'height',
@@ -257,7 +278,7 @@ class TreeSummarizer(object):
             nd = edge.head_node
             if split in split_distribution.split_node_ages:
                 ages = split_distribution.split_node_ages[split]
-                nd.age = summarization_fn(ages)
+                nd.age = _summarize_values(ages, summarization_fn)
             else:
                 # default to age of parent if split not found
                 nd.age = nd.parent_node.age
@@ -282,9 +303,10 @@ class TreeSummarizer(object):
         summarized.
         ``summarization_fn`` should take an iterable of floats, and return a float. If |None|, it
         defaults to calculating the mean (``lambda x: float(sum(x))/len(x)``).
+        If the split distribution keeps streaming summaries of the lengths
+        instead of the lengths themselves, then only the mean is available,
+        and ``summarization_fn`` must be |None|.
         """
-        if summarization_fn is None:
-            summarization_fn = lambda x: float(sum(x))/len(x)
         if not is_bipartitions_updated:
             tree.encode_bipartitions()
         for edge in tree.postorder_edge_iter():
@@ -292,7 +314,7 @@ class TreeSummarizer(object):
             if (split in split_distribution.split_edge_lengths
                     and split_distribution.split_edge_lengths[split]):
                 lengths = split_distribution.split_edge_lengths[split]
-                edge.length = summarization_fn(lengths)
+                edge.length = _summarize_values(lengths, summarization_fn)
             elif (split in split_distribution.split_edge_lengths
                     and not split_distribution.split_edge_lengths[split]):
                 # no input trees had any edge lengths for this split
@@ -313,7 +335,7 @@ class TreeSummarizer(object):
             if include_edge_lengths:
                 elen = split_distribution.split_edge_lengths.get(split, [0.0])
                 if len(elen) > 0:
-                    mean, var = mean_and_sample_variance(elen)
+                    mean, var = _mean_and_sample_variance(elen)
                     node.edge.length = mean
                     if include_edge_length_var:
                         node.edge.length_var = var
@@ -379,30 +401,211 @@ def consensus_tree(trees, min_freq=0.5, is_bipartitions_updated=False, **kwargs)
 class TopologyCounter(object):
     """
     Tracks frequency of occurrences of topologies.
+
+    Each topology is identified by a compact, canonical hash: a 128-bit digest
+    of the sorted (normalized) split bitmasks of the tree, as given by
+    :meth:`hash_topology()`. The split bitmasks themselves are kept (packed
+    into a byte string) for each distinct topology, so that trees can be
+    reconstructed from the counts, and so that any (extremely unlikely) hash
+    collision between different topologies is detected rather than silently
+    merging their counts.
+
+    If ``max_topologies`` is given, then at most this number of distinct
+    topologies are tracked, using the "Space-Saving" algorithm (Metwally et
+    al. 2005): once the limit is reached, a newly-observed topology replaces
+    the least-frequent one tracked, inheriting its count. This bounds the
+    memory used when counting huge samples of trees from diffuse
+    distributions, while still reporting the most frequent topologies (e.g.,
+    those of the credible set). The counts reported are then upper bounds: the
+    count of any topology is overestimated by at most
+    :meth:`count_error()` (which is never more than the number of trees
+    counted divided by ``max_topologies``), and every topology with a true
+    count higher than this is guaranteed to be tracked.
     """
 
     def hash_topology(tree):
         """
-        Set of all splits on tree: default topology hash.
+        Returns the compact topology hash of ``tree``: a 128-bit (16-byte)
+        digest of its canonical topology encoding. The bipartitions of
+        ``tree`` must be encoded.
         """
-        return frozenset(tree.bipartition_encoding)
+        return TopologyCounter.hash_topology_encoding(TopologyCounter.encode_topology(tree))
     hash_topology = staticmethod(hash_topology)
 
-    def __init__(self):
+    def encode_topology(tree):
+        """
+        Returns the canonical topology encoding of ``tree``: its (normalized)
+        split bitmasks, sorted, and packed into a byte string. The
+        bipartitions of ``tree`` must be encoded.
+        """
+        return TopologyCounter.encode_split_bitmasks(b.split_bitmask for b in tree.bipartition_encoding)
+    encode_topology = staticmethod(encode_topology)
+
+    def encode_split_bitmasks(split_bitmasks):
+        """
+        Packs the split bitmasks in ``split_bitmasks`` into a canonical byte
+        string: a two-byte field width, followed by the sorted, distinct
+        bitmasks, each written as an unsigned (big-endian) integer of this
+        width.
+        """
+        split_bitmasks = sorted(set(split_bitmasks))
+        if not split_bitmasks:
+            return b"\x00\x00"
+        width = max(1, (split_bitmasks[-1].bit_length() + 7) // 8)
+        field_format = "%0{}x".format(width * 2)
+        return binascii.unhexlify("%04x" % width + "".join(field_format % s for s in split_bitmasks))
+    encode_split_bitmasks = staticmethod(encode_split_bitmasks)
+
+    def decode_split_bitmasks(topology_encoding):
+        """
+        Returns the list of split bitmasks packed in ``topology_encoding`` by
+        :meth:`encode_split_bitmasks()`.
+        """
+        hex_encoding = binascii.hexlify(topology_encoding)
+        width = int(hex_encoding[:4], 16) * 2
+        return [int(hex_encoding[idx:idx+width], 16) for idx in range(4, len(hex_encoding), width)]
+    decode_split_bitmasks = staticmethod(decode_split_bitmasks)
+
+    def hash_topology_encoding(topology_encoding):
+        """
+        Returns the 128-bit (16-byte) digest of ``topology_encoding``.
+        """
+        return hashlib.sha1(topology_encoding).digest()[:16]
+    hash_topology_encoding = staticmethod(hash_topology_encoding)
+
+    def __init__(self, max_topologies=None):
+        """
+        Parameters
+        ----------
+        max_topologies : int or |None|
+            If not |None|, then the maximum number of distinct topologies to
+            track, with the counts of the most frequent topologies estimated
+            using the "Space-Saving" algorithm. Otherwise, all topologies are
+            tracked, and counted exactly.
+        """
+        if max_topologies is not None and max_topologies < 1:
+            raise ValueError("Maximum number of topologies must be at least 1: {}".format(max_topologies))
+        self.max_topologies = max_topologies
         self.topology_hash_map = {}
+        self.topology_encodings = {}
+        self.topology_count_errors = {}
         self.total_trees_counted = 0
+        self._min_count_heap = []
+
+    def __len__(self):
+        return len(self.topology_hash_map)
+
+    def _add(self, topology_hash, topology_encoding, count, count_error=0):
+        if topology_hash in self.topology_hash_map:
+            if topology_encoding is not None:
+                existing_encoding = self.topology_encodings.get(topology_hash, None)
+                if existing_encoding is None:
+                    self.topology_encodings[topology_hash] = topology_encoding
+                elif existing_encoding != topology_encoding:
+                    raise ValueError("Topology hash collision: different topologies with hash '{}'".format(binascii.hexlify(topology_hash)))
+            count += self.topology_hash_map[topology_hash]
+            count_error += self.topology_count_errors.get(topology_hash, 0)
+        elif self.max_topologies is not None and len(self.topology_hash_map) >= self.max_topologies:
+            min_count, min_topology_hash = self._pop_min_count()
+            del self.topology_hash_map[min_topology_hash]
+            self.topology_encodings.pop(min_topology_hash, None)
+            self.topology_count_errors.pop(min_topology_hash, None)
+            count += min_count
+            count_error += min_count
+            if topology_encoding is not None:
+                self.topology_encodings[topology_hash] = topology_encoding
+        elif topology_encoding is not None:
+            self.topology_encodings[topology_hash] = topology_encoding
+        self.topology_hash_map[topology_hash] = count
+        if count_error:
+            self.topology_count_errors[topology_hash] = count_error
+        if self.max_topologies is not None:
+            self._push_count(topology_hash, count)
+
+    def _push_count(self, topology_hash, count):
+        # Heap entries are not removed when a count is incremented, but are
+        # skipped when popped if out of date; the heap is rebuilt when the
+        # stale entries start to dominate.
+        heapq.heappush(self._min_count_heap, (count, topology_hash))
+        if len(self._min_count_heap) > 4 * len(self.topology_hash_map) + 16:
+            self._min_count_heap = [(c, h) for h, c in self.topology_hash_map.items()]
+            heapq.heapify(self._min_count_heap)
+
+    def _pop_min_count(self):
+        while True:
+            count, topology_hash = heapq.heappop(self._min_count_heap)
+            if self.topology_hash_map.get(topology_hash, None) == count:
+                return count, topology_hash
+
+    def update(self, other):
+        """
+        Imports data from another |TopologyCounter|, ``other``.
+
+        If either counter is bounded (i.e., has ``max_topologies`` set) and
+        full, then a topology it does not track is taken to have been
+        observed as many times as its least-frequent tracked topology, so
+        that merged counts remain upper bounds, with their error bounds
+        adjusted accordingly.
+        """
+        self_floor = self._untracked_count_bound()
+        other_floor = other._untracked_count_bound()
+        merged_counts = {}
+        merged_errors = {}
+        for topology_hash in set(self.topology_hash_map).union(other.topology_hash_map):
+            count = 0
+            count_error = 0
+            for counter, floor in ((self, self_floor), (other, other_floor)):
+                if topology_hash in counter.topology_hash_map:
+                    count += counter.topology_hash_map[topology_hash]
+                    count_error += counter.topology_count_errors.get(topology_hash, 0)
+                else:
+                    count += floor
+                    count_error += floor
+            merged_counts[topology_hash] = count
+            if count_error:
+                merged_errors[topology_hash] = count_error
+        for topology_hash, topology_encoding in other.topology_encodings.items():
+            existing_encoding = self.topology_encodings.get(topology_hash, None)
+            if existing_encoding is None:
+                self.topology_encodings[topology_hash] = topology_encoding
+            elif existing_encoding != topology_encoding:
+                raise ValueError("Topology hash collision: different topologies with hash '{}'".format(binascii.hexlify(topology_hash)))
+        if self.max_topologies is not None and len(merged_counts) > self.max_topologies:
+            retained = heapq.nlargest(self.max_topologies, merged_counts, key=merged_counts.get)
+            merged_counts = dict((topology_hash, merged_counts[topology_hash]) for topology_hash in retained)
+            self.topology_encodings = dict((topology_hash, self.topology_encodings[topology_hash])
+                    for topology_hash in retained if topology_hash in self.topology_encodings)
+            merged_errors = dict((topology_hash, merged_errors[topology_hash])
+                    for topology_hash in retained if topology_hash in merged_errors)
+        self.topology_hash_map = merged_counts
+        self.topology_count_errors = merged_errors
+        self.total_trees_counted += other.total_trees_counted
+        if self.max_topologies is not None:
+            self._min_count_heap = [(c, h) for h, c in self.topology_hash_map.items()]
+            heapq.heapify(self._min_count_heap)
+
+    def _untracked_count_bound(self):
+        if self.max_topologies is None or len(self.topology_hash_map) < self.max_topologies:
+            return 0
+        return min(self.topology_hash_map.values())
 
     def update_topology_hash_map(self,
-            src_map):
+            src_map,
+            topology_encodings=None):
         """
-        Imports data from another counter.
+        Imports data from a dictionary mapping topology hashes to counts (such
+        as the :attr:`topology_hash_map` of another counter). If given,
+        ``topology_encodings`` is a dictionary mapping these topology hashes to
+        their encodings, which are needed to reconstruct the corresponding
+        trees in :meth:`calc_tree_freqs()`. Use :meth:`update()` to import
+        all the data of another counter.
         """
-        trees_counted = 0
+        if topology_encodings is None:
+            topology_encodings = {}
         for topology_hash in src_map:
-            if topology_hash not in self.topology_hash_map:
-                self.topology_hash_map[topology_hash] = src_map[topology_hash]
-            else:
-                self.topology_hash_map[topology_hash] = self.topology_hash_map[topology_hash] + src_map[topology_hash]
+            self._add(topology_hash,
+                    topology_encodings.get(topology_hash, None),
+                    src_map[topology_hash])
             self.total_trees_counted += src_map[topology_hash]
 
     def count(self,
@@ -413,13 +616,21 @@ class TopologyCounter(object):
         """
         if not is_bipartitions_updated:
             tree.encode_bipartitions()
-        topology = self.hash_topology(tree)
-        if topology not in self.topology_hash_map:
-            self.topology_hash_map[topology] = 1
-        else:
-            self.topology_hash_map[topology] = self.topology_hash_map[topology] + 1
+        topology_encoding = self.encode_topology(tree)
+        topology_hash = self.hash_topology_encoding(topology_encoding)
+        self._add(topology_hash, topology_encoding, 1)
         self.total_trees_counted += 1
 
+    def count_error(self, topology_hash):
+        """
+        Returns the maximum amount by which the count of the topology with
+        hash ``topology_hash`` may be overestimated. This is always 0 unless
+        the counter is bounded (i.e., ``max_topologies`` is set), in which
+        case the true count of the topology lies between the count reported
+        and the count reported less this value.
+        """
+        return self.topology_count_errors.get(topology_hash, 0)
+
     def calc_hash_freqs(self):
         """
         Returns an ordered dictionary (collections.OrderedDict) of topology hashes mapped
@@ -443,8 +654,10 @@ class TopologyCounter(object):
         hash_freqs = self.calc_hash_freqs()
         tree_freqs = collections.OrderedDict()
         for topology_hash, (count, freq) in hash_freqs.items():
-            tree = dendropy.Tree.from_bipartition_encoding(
-                bipartition_encoding=topology_hash,
+            if topology_hash not in self.topology_encodings:
+                raise ValueError("Topology encoding not available for topology hash '{}'".format(binascii.hexlify(topology_hash)))
+            tree = dendropy.Tree.from_split_bitmasks(
+                split_bitmasks=self.decode_split_bitmasks(self.topology_encodings[topology_hash]),
                 taxon_namespace=taxon_namespace,
                 is_rooted=is_rooted)
             tree_freqs[tree] = (count, freq)
@@ -36,7 +36,8 @@ from dendropy.datamodel import basemodel
 class NexusTokenizer(Tokenizer):
 
     def __init__(self, src,
-            preserve_unquoted_underscores=False):
+            preserve_unquoted_underscores=False,
+            buffer_size=None):
         Tokenizer.__init__(self,
             src=src,
             uncaptured_delimiters=list(" \t\n\r"),
@@ -47,7 +48,8 @@ class NexusTokenizer(Tokenizer):
             comment_begin="[",
             comment_end="]",
             capture_comments=True,
-            preserve_unquoted_underscores=preserve_unquoted_underscores)
+            preserve_unquoted_underscores=preserve_unquoted_underscores,
+            buffer_size=buffer_size)
         # self.preserve_unquoted_underscores = preserve_unquoted_underscores
 
     # def __next__(self):
@@ -84,6 +86,7 @@ class NexusTokenizer(Tokenizer):
                 self.uncaptured_delimiters.append("\n")
             if "\r" not in self.uncaptured_delimiters:
                 self.uncaptured_delimiters.append("\r")
+        self.invalidate_scan_patterns()
 
     def set_hyphens_as_captured_delimiters(self, hyphens_as_captured_delimiters):
         if hyphens_as_captured_delimiters:
@@ -94,6 +97,7 @@ class NexusTokenizer(Tokenizer):
                 self.captured_delimiters.remove("-")
             except ValueError:
                 pass
+        self.invalidate_scan_patterns()
 
     def require_next_token_ucase(self):
         t = self.require_next_token()
@@ -17,6 +17,7 @@
 ##############################################################################
 
 import sys
+import re
 from dendropy.utility import error
 
 ##############################################################################
@@ -25,8 +26,18 @@ from dendropy.utility import error
 class Tokenizer(object):
     """
     Stream tokenizer.
+
+    The source stream is read in blocks of ``buffer_size`` characters rather
+    than one character at a time, and runs of ordinary (unquoted), quoted and
+    comment characters are scanned from the buffer using precompiled regular
+    expressions and ``str.find``. Line and column tracking, comment capture and
+    quote-doubling semantics are identical to a character-by-character scan.
+    Note that, as a consequence of the block reads, the position of the
+    underlying stream may be ahead of the last token returned.
     """
 
+    DEFAULT_BUFFER_SIZE = 65536
+
     class TokenizerError(error.DataParseError):
 
         def __init__(self,
@@ -77,6 +88,7 @@ class Tokenizer(object):
             comment_end,                # string indicating end of comment
             capture_comments,           # are comments to be stored?
             preserve_unquoted_underscores,       # are unquoted underscores to be preserved
+            buffer_size=None,           # number of characters to read from source stream at a time
             ):
         # Tokenizer behavior customization
         self.uncaptured_delimiters = uncaptured_delimiters
@@ -88,10 +100,18 @@ class Tokenizer(object):
         self.comment_end = comment_end
         self.capture_comments = capture_comments
         self.preserve_unquoted_underscores = preserve_unquoted_underscores
+        if buffer_size is None:
+            buffer_size = Tokenizer.DEFAULT_BUFFER_SIZE
+        if buffer_size < 1:
+            raise ValueError("Buffer size must be a positive integer: {}".format(buffer_size))
+        self.buffer_size = buffer_size
+        self._scan_patterns = None
 
         # State (internals)
         self.src = src
         self._cur_char = None
+        self._buffer = ""
+        self._buffer_pos = 0
         self.current_token = None
         self.is_token_quoted = False
 
@@ -108,6 +128,8 @@ class Tokenizer(object):
     def set_stream(self, src=None):
         self.src = src
         self._cur_char = None
+        self._buffer = ""
+        self._buffer_pos = 0
         self.current_token = None
         self.is_token_quoted = False
         self.captured_comments = []
@@ -197,12 +219,11 @@ class Tokenizer(object):
                             quote_char=cur_quote_char,
                             line_num=self.current_line_num,
                             col_num=self.current_column_num,
-                            stream=src)
+                            stream=self.src)
                 if self._cur_char == cur_quote_char:
                     self._get_next_char()
                     if self.escape_quote_by_doubling:
                         if self._cur_char == cur_quote_char:
-                            # dest.write(cur_quote_char)
                             dest.append(cur_quote_char)
                             self._get_next_char()
                         else:
@@ -211,10 +232,10 @@ class Tokenizer(object):
                         self._get_next_char()
                         break
                 else:
-                    # dest.write(self._cur_char)
-                    dest.append(self._cur_char)
-                    self._get_next_char()
-            # self.current_token = dest.getvalue()
+                    end = self._buffer.find(cur_quote_char, self._buffer_pos)
+                    if end < 0:
+                        end = len(self._buffer)
+                    dest.append(self._consume_run(end))
             self.current_token = "".join(dest)
             return self.current_token
         else:
@@ -223,6 +244,7 @@ class Tokenizer(object):
             self.token_column_num = self.current_column_num
             dest = []
             self.is_token_quoted = False
+            unquoted_run_pattern = self._get_scan_patterns()[1]
             while self._cur_char != "":
                 if self._cur_char in self.uncaptured_delimiters:
                     self._get_next_char()
@@ -234,12 +256,11 @@ class Tokenizer(object):
                     if self._cur_char == "":
                         break
                 else:
-                    if self._cur_char == "_" and not self.preserve_unquoted_underscores:
-                        self._cur_char = " "
-                    dest.append(self._cur_char)
-                    self._get_next_char()
-            # self.current_token = dest.getvalue()
+                    m = unquoted_run_pattern.match(self._buffer, self._buffer_pos - 1)
+                    dest.append(self._consume_run(m.end()))
             self.current_token = "".join(dest)
+            if not self.preserve_unquoted_underscores:
+                self.current_token = self.current_token.replace("_", " ")
             if self.current_token == "":
                 if self._cur_char != "":
                     self.__next__()
@@ -248,6 +269,66 @@ class Tokenizer(object):
             return self.current_token
     next = __next__ # Python 2 legacy support
 
+    def invalidate_scan_patterns(self):
+        """
+        Discards the cached scanning patterns; must be called if the delimiter
+        or comment character specifications are modified after scanning has
+        begun.
+        """
+        self._scan_patterns = None
+
+    def _get_scan_patterns(self):
+        if self._scan_patterns is None:
+            unquoted_stops = set(self.uncaptured_delimiters)
+            unquoted_stops.update(self.captured_delimiters)
+            unquoted_stops.update(self.comment_begin)
+            comment_stops = set(self.comment_begin)
+            comment_stops.update(self.comment_end)
+            self._scan_patterns = (
+                    self._compile_char_run_pattern(self.uncaptured_delimiters, negate=False),
+                    self._compile_char_run_pattern(unquoted_stops, negate=True),
+                    self._compile_char_run_pattern(comment_stops, negate=True),
+                    )
+        return self._scan_patterns
+
+    def _compile_char_run_pattern(self, chars, negate):
+        chars = "".join(re.escape(c) for c in sorted(chars))
+        if not chars:
+            if negate:
+                return re.compile(r"[\s\S]+")
+            else:
+                return re.compile(r"(?!)")
+        if negate:
+            return re.compile("[^{}]+".format(chars))
+        else:
+            return re.compile("[{}]+".format(chars))
+
+    def _fill_buffer(self):
+        self._buffer = self.src.read(self.buffer_size)
+        self._buffer_pos = 0
+        return self._buffer != ""
+
+    def _consume_run(self, end):
+        # Consumes the current character and all following buffered
+        # characters up to (but not including) ``end``, advancing the
+        # current character to the one at ``end`` (refilling the buffer if
+        # needed). Returns the consumed characters.
+        start = self._buffer_pos - 1
+        if end <= start:
+            end = start + 1
+        run = self._buffer[start:end]
+        counted = run[1:]
+        if counted:
+            nlines = counted.count("\n")
+            if nlines:
+                self.current_line_num += nlines
+                self.current_column_num = len(counted) - counted.rfind("\n")
+            else:
+                self.current_column_num += len(counted)
+        self._buffer_pos = end
+        self._get_next_char()
+        return run
+
     def _skip_to_significant_char(self):
         if self._cur_char == "":
             return
@@ -255,25 +336,31 @@ class Tokenizer(object):
             self._get_next_char()
         if self._cur_char not in self.uncaptured_delimiters:
             return
+        skip_pattern = self._get_scan_patterns()[0]
         while self._cur_char != "" and self._cur_char in self.uncaptured_delimiters:
-            self._get_next_char()
+            m = skip_pattern.match(self._buffer, self._buffer_pos - 1)
+            self._consume_run(m.end())
         return
 
     def _get_next_char(self):
-        self._cur_char = self.src.read(1)
-        if self._cur_char != "":
-            if self._cur_char == "\n":
-                self.current_line_num += 1
-                self.current_column_num = 1
-            else:
-                # print("@@@ {}: {}".format(self.current_column_num, self._cur_char))
-                self.current_column_num += 1
+        if self._buffer_pos >= len(self._buffer):
+            if self.src is None or not self._fill_buffer():
+                self._cur_char = ""
+                return self._cur_char
+        self._cur_char = self._buffer[self._buffer_pos]
+        self._buffer_pos += 1
+        if self._cur_char == "\n":
+            self.current_line_num += 1
+            self.current_column_num = 1
+        else:
+            self.current_column_num += 1
         return self._cur_char
 
     def _handle_comment(self):
         dest = []
         nesting = 0
         comment_complete = False
+        comment_run_pattern = self._get_scan_patterns()[2]
         while self._cur_char != "":
             if self._cur_char in self.comment_end:
                 nesting -= 1
@@ -283,11 +370,13 @@ class Tokenizer(object):
                     break
             elif self._cur_char in self.comment_begin:
                 nesting += 1
-            elif self.capture_comments:
-                # dest.write(self._cur_char)
-                dest.append(self._cur_char)
+            else:
+                m = comment_run_pattern.match(self._buffer, self._buffer_pos - 1)
+                run = self._consume_run(m.end())
+                if self.capture_comments:
+                    dest.append(run)
+                continue
             self._get_next_char()
         if self.capture_comments:
-            # self.captured_comments.append(dest.getvalue())
             self.captured_comments.append("".join(dest))
 
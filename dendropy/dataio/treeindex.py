@@ -0,0 +1,620 @@
+#! /usr/bin/env python
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Byte-offset index of tree statements in NEXUS and NEWICK files, supporting
+random access to individual trees (or subsets of trees) without tokenizing
+the trees that are skipped.
+"""
+
+import os
+import re
+import json
+import mmap
+from dendropy.utility import textprocessing
+
+##############################################################################
+## Statement Scanning
+
+_SPECIAL_CHAR_PATTERN = re.compile(b"[;'\\[\\]]")
+_WHITESPACE_PATTERN = re.compile(b"\\s*")
+_WORD_PATTERN = re.compile(b"[^\\s;\\[\\]\\(\\)\\{\\},:=\"']+")
+_QUOTE_OPENING_PRECEDENTS = frozenset(b" \t\r\n(){},;:=\\\"[]")
+_SEMICOLON = ord(";")
+_QUOTE = ord("'")
+_COMMENT_BEGIN = ord("[")
+_COMMENT_END = ord("]")
+
+def scan_statements(buf, start=0, end=None):
+    """
+    Splits ``buf`` into NEXUS/NEWICK statements, i.e., on semicolons that are
+    outside of quotes and (possibly nested) comments.
+
+    Parameters
+    ----------
+    buf : bytes, bytearray or mmap.mmap
+        The data to scan.
+    start : integer
+        Offset at which to start scanning.
+    end : integer or None
+        Offset at which to stop scanning; if |None|, the end of ``buf``.
+
+    Returns
+    -------
+    s : iterator [tuple(integer, integer)]
+        Iterator over (start, end) offsets of each statement; ``end`` is the
+        offset immediately following the terminating semicolon. If there is
+        any trailing data not terminated by a semicolon, it will be returned
+        as the final statement.
+    """
+    if end is None:
+        end = len(buf)
+    stmt_start = start
+    comment_depth = 0
+    in_quote = False
+    for match in _SPECIAL_CHAR_PATTERN.finditer(buf, start, end):
+        idx = match.start()
+        c = buf[idx]
+        if not isinstance(c, int):
+            c = ord(c)
+        if in_quote:
+            if c == _QUOTE:
+                # quote doubling results in closing and immediately reopening
+                # the quote, which is equivalent
+                in_quote = False
+        elif comment_depth > 0:
+            if c == _COMMENT_BEGIN:
+                comment_depth += 1
+            elif c == _COMMENT_END:
+                comment_depth -= 1
+        elif c == _COMMENT_BEGIN:
+            comment_depth = 1
+        elif c == _QUOTE:
+            # as in the tokenizer, a quote only begins a quoted token if it is
+            # at the start of a token
+            if idx == start or _byte_at(buf, idx-1) in _QUOTE_OPENING_PRECEDENTS:
+                in_quote = True
+            elif idx > start and _byte_at(buf, idx-1) == _QUOTE:
+                in_quote = True
+        elif c == _SEMICOLON:
+            yield stmt_start, idx + 1
+            stmt_start = idx + 1
+    if stmt_start < end:
+        yield stmt_start, end
+
+def statement_words(buf, start, end, max_words=3):
+    """
+    Returns up to ``max_words`` leading words of the statement given by
+    ``buf[start:end]``, skipping whitespace and comments, as upper-cased
+    strings.
+    """
+    words = []
+    idx = start
+    while idx < end and len(words) < max_words:
+        idx = _WHITESPACE_PATTERN.match(buf, idx, end).end()
+        if idx >= end:
+            break
+        c = _byte_at(buf, idx)
+        if c == _COMMENT_BEGIN:
+            depth = 0
+            while idx < end:
+                c = _byte_at(buf, idx)
+                if c == _COMMENT_BEGIN:
+                    depth += 1
+                elif c == _COMMENT_END:
+                    depth -= 1
+                    if depth == 0:
+                        idx += 1
+                        break
+                idx += 1
+            continue
+        m = _WORD_PATTERN.match(buf, idx, end)
+        if m is None:
+            words.append(bytes(buf[idx:idx+1]).decode("latin-1"))
+            idx += 1
+        else:
+            words.append(bytes(m.group()).decode("latin-1").upper())
+            idx = m.end()
+    return words
+
+def _byte_at(buf, idx):
+    c = buf[idx]
+    if not isinstance(c, int):
+        c = ord(c)
+    return c
+
+##############################################################################
+## TreeOffsetIndex
+
+class TreeOffsetIndex(object):
+    """
+    An index of the byte offsets of the tree statements in a NEXUS or NEWICK
+    file.
+
+    Building the index requires a single pass through the file, but this
+    pass only locates statement boundaries (semicolons that are not in
+    quotes or comments) and classifies statements by their leading keyword:
+    no trees are tokenized or parsed. The index can be persisted to a
+    "sidecar" file next to the data file, keyed on the size and modification
+    time of the data file, so that subsequent accesses do not need to rescan
+    the file.
+
+    Given the index, any subset of the trees can be retrieved by assembling
+    a stream consisting of the "skeleton" of the original file (everything
+    that is not a tree statement: e.g., the "#NEXUS" header, TAXA blocks, and
+    the "BEGIN TREES", "TRANSLATE" and "END" statements) with only the
+    selected tree statements spliced in, read from a memory-mapped view of
+    the file. This stream can then be parsed by the regular readers, and so
+    all reader options (taxon handling, rooting, metadata extraction, etc.)
+    are supported exactly as if the file were being read normally. Note,
+    however, that in NEWICK files (or NEXUS files without a TAXA block), taxa
+    are only defined by the trees in which they occur, and so taxa that occur
+    only in trees that are skipped will not be accessioned.
+
+    Collections of trees (i.e., "TREES" blocks in NEXUS files) are indexed
+    separately, so that ``collection_offset``/``tree_offset`` semantics are
+    the same as for the |TreeList| and |Tree| ``get()`` methods.
+    """
+
+    SIDECAR_SUFFIX = ".dendropy-tree-index"
+    SIDECAR_FORMAT = "dendropy-tree-offset-index"
+    SIDECAR_FORMAT_VERSION = 1
+
+    @classmethod
+    def get(cls,
+            path,
+            use_sidecar=True,
+            sidecar_path=None,
+            encoding="utf-8"):
+        """
+        Returns an index for the NEXUS or NEWICK file at ``path``, loading it
+        from the sidecar file if one is available and up-to-date, or building
+        it (and, if possible, saving it to the sidecar file) otherwise.
+
+        Parameters
+        ----------
+        path : string
+            Path to the data file.
+        use_sidecar : bool
+            If |False|, then the index will be built from scratch and not saved.
+        sidecar_path : string or None
+            Path to the sidecar file. If |None|, then this will be ``path`` with
+            :attr:`TreeOffsetIndex.SIDECAR_SUFFIX` appended.
+        encoding : string
+            Encoding of the data file.
+
+        Returns
+        -------
+        t : |TreeOffsetIndex|
+            The index.
+        """
+        if sidecar_path is None:
+            sidecar_path = path + cls.SIDECAR_SUFFIX
+        if use_sidecar:
+            index = cls.load(path=path, sidecar_path=sidecar_path, encoding=encoding)
+            if index is not None:
+                return index
+        index = cls.build(path=path, encoding=encoding)
+        if use_sidecar:
+            try:
+                index.save(sidecar_path)
+            except (IOError, OSError):
+                # e.g., read-only location; the index is still usable
+                pass
+        return index
+
+    @classmethod
+    def build(cls, path, encoding="utf-8"):
+        """
+        Scans the file at ``path`` and returns a new index for it.
+        """
+        index = cls(path=path, encoding=encoding)
+        stat = os.stat(path)
+        index.file_size = stat.st_size
+        index.file_mtime = stat.st_mtime
+        buf = index._get_buffer()
+        is_nexus = None
+        in_trees_block = False
+        collection_index = None
+        for start, end in scan_statements(buf):
+            words = statement_words(buf, start, end)
+            if is_nexus is None:
+                if not words:
+                    index._add_skeleton(start, end, None)
+                    continue
+                is_nexus = words[0] == "#NEXUS"
+                index.is_nexus = is_nexus
+                if is_nexus:
+                    words = words[1:]
+                else:
+                    index._collection_tree_ranges.append([0, 0])
+                    collection_index = 0
+            if not is_nexus:
+                if words:
+                    index._add_tree(start, end, collection_index)
+                else:
+                    index._add_skeleton(start, end, None)
+            elif in_trees_block and words and words[0] == "TREE":
+                index._add_tree(start, end, collection_index)
+            elif words and words[0] == "BEGIN" and len(words) > 1 and words[1] == "TREES":
+                in_trees_block = True
+                collection_index = len(index._collection_tree_ranges)
+                index._collection_tree_ranges.append([len(index._tree_offsets)//2] * 2)
+                index._add_skeleton(start, end, collection_index)
+            elif in_trees_block and words and words[0] in ("END", "ENDBLOCK"):
+                index._add_skeleton(start, end, collection_index)
+                in_trees_block = False
+                collection_index = None
+            else:
+                index._add_skeleton(start, end, collection_index if in_trees_block else None)
+        return index
+
+    @classmethod
+    def load(cls, path, sidecar_path=None, encoding="utf-8"):
+        """
+        Loads the index for the file at ``path`` from the sidecar file,
+        returning |None| if the sidecar file does not exist, cannot be read,
+        or is out of date with respect to the size or modification time of
+        the data file.
+        """
+        if sidecar_path is None:
+            sidecar_path = path + cls.SIDECAR_SUFFIX
+        try:
+            with open(sidecar_path, "r") as src:
+                data = json.load(src)
+            stat = os.stat(path)
+        except (IOError, OSError, ValueError):
+            return None
+        if (data.get("format") != cls.SIDECAR_FORMAT
+                or data.get("version") != cls.SIDECAR_FORMAT_VERSION
+                or data.get("file_size") != stat.st_size
+                or data.get("file_mtime") != stat.st_mtime):
+            return None
+        index = cls(path=path, encoding=encoding)
+        index.file_size = data["file_size"]
+        index.file_mtime = data["file_mtime"]
+        index.is_nexus = data["is_nexus"]
+        index._tree_offsets = data["tree_offsets"]
+        index._skeleton_offsets = data["skeleton_offsets"]
+        index._skeleton_collections = data["skeleton_collections"]
+        index._collection_tree_ranges = data["collection_tree_ranges"]
+        return index
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.file_size = None
+        self.file_mtime = None
+        self.is_nexus = False
+        # flattened (start, end) pairs
+        self._tree_offsets = []
+        self._skeleton_offsets = []
+        # collection (TREES block) index of each skeleton segment, or None if
+        # the segment is outside a TREES block
+        self._skeleton_collections = []
+        # (first tree index, last tree index + 1) of each collection
+        self._collection_tree_ranges = []
+        self._src = None
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Releases the memory map and file handle, if open.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._src is not None:
+            self._src.close()
+            self._src = None
+
+    def save(self, sidecar_path=None):
+        """
+        Writes this index to ``sidecar_path`` (by default, the path of the
+        data file with :attr:`TreeOffsetIndex.SIDECAR_SUFFIX` appended).
+        """
+        if sidecar_path is None:
+            sidecar_path = self.path + self.SIDECAR_SUFFIX
+        data = {
+                "format": self.SIDECAR_FORMAT,
+                "version": self.SIDECAR_FORMAT_VERSION,
+                "file_size": self.file_size,
+                "file_mtime": self.file_mtime,
+                "is_nexus": self.is_nexus,
+                "tree_offsets": self._tree_offsets,
+                "skeleton_offsets": self._skeleton_offsets,
+                "skeleton_collections": self._skeleton_collections,
+                "collection_tree_ranges": self._collection_tree_ranges,
+                }
+        with open(sidecar_path, "w") as dest:
+            json.dump(data, dest, separators=(",", ":"))
+
+    def _get_num_trees(self):
+        return len(self._tree_offsets) // 2
+    num_trees = property(_get_num_trees)
+
+    def __len__(self):
+        return self.num_trees
+
+    def _get_num_collections(self):
+        return len(self._collection_tree_ranges)
+    num_collections = property(_get_num_collections)
+
+    def num_trees_in_collection(self, collection_offset):
+        """
+        Returns the number of trees in the collection (i.e., "TREES" block)
+        at index ``collection_offset``.
+        """
+        first, last = self._collection_tree_ranges[collection_offset]
+        return last - first
+
+    def tree_byte_range(self, tree_index):
+        """
+        Returns the (start, end) byte offsets of the tree statement at
+        (0-based, file-wide) index ``tree_index``.
+        """
+        if tree_index < 0:
+            tree_index += self.num_trees
+        if tree_index < 0 or tree_index >= self.num_trees:
+            raise IndexError("Tree index out of range: {}".format(tree_index))
+        return self._tree_offsets[tree_index*2], self._tree_offsets[tree_index*2+1]
+
+    def tree_statement(self, tree_index):
+        """
+        Returns the text of the tree statement at (0-based, file-wide) index
+        ``tree_index``.
+        """
+        start, end = self.tree_byte_range(tree_index)
+        return self._decode(self._get_buffer()[start:end])
+
+    def select(self,
+            collection_offset=None,
+            tree_offset=None,
+            tree_stride=None,
+            max_trees=None):
+        """
+        Returns a list of the (file-wide) indexes of the trees selected
+        by the given criteria, following the semantics of the
+        ``collection_offset`` and ``tree_offset`` keyword arguments of
+        |TreeList| ``get()``.
+
+        Parameters
+        ----------
+        collection_offset : integer or None
+            0-based index of the collection of trees to select from. If |None|
+            and ``tree_offset`` and ``tree_stride`` are also |None|, then trees
+            from all collections will be selected; otherwise the first
+            collection (offset 0) will be assumed. Negative values work like
+            negative list indexes.
+        tree_offset : integer or None
+            0-based index of the first tree in the collection to select (e.g.,
+            to skip a burn-in). Negative values work like negative list
+            indexes.
+        tree_stride : integer or None
+            If given, then only every ``tree_stride``-th tree will be
+            selected (e.g., for thinning).
+        max_trees : integer or None
+            If given, then at most this number of trees will be selected.
+
+        Returns
+        -------
+        s : list [integer]
+            Indexes of the selected trees, in order of occurrence in the file.
+        """
+        if collection_offset is None and (tree_offset is not None or tree_stride is not None):
+            collection_offset = 0
+        if collection_offset is None:
+            selected = range(self.num_trees)
+        else:
+            if collection_offset >= self.num_collections or collection_offset < -self.num_collections:
+                raise IndexError("Collection offset out of range: {} (number of collections = {}, maximum valid collection offset = {})".format(collection_offset, self.num_collections, self.num_collections-1))
+            first, last = self._collection_tree_ranges[collection_offset]
+            selected = range(first, last)
+            if tree_offset is not None:
+                if tree_offset >= len(selected):
+                    raise IndexError("Tree offset out of range: {} (number of trees in source = {}, maximum valid tree offset = {})".format(tree_offset, len(selected), len(selected)-1))
+                selected = selected[tree_offset:]
+            if tree_stride is not None:
+                if tree_stride < 1:
+                    raise ValueError("Tree stride must be a positive integer: {}".format(tree_stride))
+                selected = selected[::tree_stride]
+        if max_trees is not None:
+            selected = selected[:max_trees]
+        return list(selected)
+
+    def byte_segments(self, tree_indexes):
+        """
+        Returns the byte ranges of the data source that make up the data
+        source restricted to the trees given by ``tree_indexes``: i.e., the
+        "skeleton" of the data source, with only the selected tree statements
+        retained. Collections that do not have any selected trees are
+        omitted. Adjacent ranges are merged, so that a contiguous run of
+        selected trees results in a single range.
+
+        Parameters
+        ----------
+        tree_indexes : iterable [integer]
+            The (0-based, file-wide) indexes of the trees to retain.
+
+        Returns
+        -------
+        s : list [tuple(integer, integer)]
+            The (start, end) byte offsets of each range, in order.
+        """
+        tree_indexes = sorted(set(tree_indexes))
+        active_collections = set()
+        for tree_index in tree_indexes:
+            if tree_index < 0 or tree_index >= self.num_trees:
+                raise IndexError("Tree index out of range: {}".format(tree_index))
+            for cidx, (first, last) in enumerate(self._collection_tree_ranges):
+                if first <= tree_index < last:
+                    active_collections.add(cidx)
+                    break
+        segments = []
+        for sidx in range(len(self._skeleton_collections)):
+            cidx = self._skeleton_collections[sidx]
+            if cidx is None or cidx in active_collections:
+                segments.append((self._skeleton_offsets[sidx*2], self._skeleton_offsets[sidx*2+1]))
+        for tree_index in tree_indexes:
+            segments.append((self._tree_offsets[tree_index*2], self._tree_offsets[tree_index*2+1]))
+        segments.sort()
+        merged = []
+        for start, end in segments:
+            if merged and merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    def read_text(self, tree_indexes):
+        """
+        Returns the text of the data source restricted to the trees given by
+        ``tree_indexes`` (see :meth:`TreeOffsetIndex.byte_segments`).
+
+        Parameters
+        ----------
+        tree_indexes : iterable [integer]
+            The (0-based, file-wide) indexes of the trees to retain.
+
+        Returns
+        -------
+        s : string
+            The data.
+        """
+        buf = self._get_buffer()
+        return "".join(self._decode(buf[start:end]) for start, end in self.byte_segments(tree_indexes))
+
+    def partition(self, tree_indexes, num_parts=None, part_size=None):
+        """
+        Splits ``tree_indexes`` into runs of consecutive indexes, suitable for
+        reading in separate processes (e.g., using
+        :func:`read_byte_segments` on the result of
+        :meth:`TreeOffsetIndex.byte_segments` for each run).
+
+        Parameters
+        ----------
+        tree_indexes : iterable [integer]
+            The (0-based, file-wide) indexes of the trees to partition.
+        num_parts : integer or None
+            Number of (approximately equal-sized) partitions.
+        part_size : integer or None
+            Maximum number of trees in each partition. Exactly one of
+            ``num_parts`` or ``part_size`` must be specified.
+
+        Returns
+        -------
+        s : list [list [integer]]
+            The partitions, in order.
+        """
+        tree_indexes = sorted(set(tree_indexes))
+        if (num_parts is None) == (part_size is None):
+            raise TypeError("Exactly one of 'num_parts' or 'part_size' must be specified")
+        if part_size is None:
+            if num_parts < 1:
+                raise ValueError("Number of partitions must be a positive integer: {}".format(num_parts))
+            part_size = max(1, -(-len(tree_indexes) // num_parts))
+        elif part_size < 1:
+            raise ValueError("Partition size must be a positive integer: {}".format(part_size))
+        return [tree_indexes[i:i+part_size] for i in range(0, len(tree_indexes), part_size)]
+
+    def open_stream(self, tree_indexes):
+        """
+        Returns a file-like object (opened for reading) of the data
+        source restricted to the trees given by ``tree_indexes``. See
+        :meth:`TreeOffsetIndex.read_text`.
+        """
+        return textprocessing.StringIO(self.read_text(tree_indexes))
+
+    def _add_tree(self, start, end, collection_index):
+        self._tree_offsets.append(start)
+        self._tree_offsets.append(end)
+        self._collection_tree_ranges[collection_index][1] = len(self._tree_offsets) // 2
+
+    def _add_skeleton(self, start, end, collection_index):
+        if (self._skeleton_offsets
+                and self._skeleton_offsets[-1] == start
+                and self._skeleton_collections[-1] == collection_index):
+            self._skeleton_offsets[-1] = end
+        else:
+            self._skeleton_offsets.append(start)
+            self._skeleton_offsets.append(end)
+            self._skeleton_collections.append(collection_index)
+
+    def _decode(self, b):
+        return bytes(b).decode(self.encoding)
+
+    def _get_buffer(self):
+        if self._mmap is None:
+            self._src = open(self.path, "rb")
+            try:
+                self._mmap = mmap.mmap(self._src.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # cannot map an empty file
+                self._src.close()
+                self._src = None
+                return b""
+        return self._mmap
+
+##############################################################################
+## Support
+
+def read_byte_segments(path, segments, encoding="utf-8"):
+    """
+    Returns the text given by concatenating the byte ranges ``segments``
+    (e.g., as returned by :meth:`TreeOffsetIndex.byte_segments`) of the file
+    at ``path``, read from a memory-mapped view of the file.
+    """
+    if not segments:
+        return ""
+    with open(path, "rb") as src:
+        buf = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return "".join(bytes(buf[start:end]).decode(encoding) for start, end in segments)
+        finally:
+            buf.close()
+
+INDEXABLE_SCHEMAS = ("nexus", "newick", "nexus/newick")
+
+def open_indexed_tree_stream(path,
+        schema,
+        collection_offset=None,
+        tree_offset=None,
+        tree_stride=None,
+        max_trees=None):
+    """
+    Returns a file-like object with the data in the NEXUS or NEWICK file at
+    ``path`` restricted to the trees selected by ``collection_offset``,
+    ``tree_offset``, ``tree_stride`` and ``max_trees`` (see
+    :meth:`TreeOffsetIndex.select`), using the (sidecar-persisted) tree
+    offset index of the file.
+    """
+    if schema.lower() not in INDEXABLE_SCHEMAS:
+        raise ValueError("Indexed tree access is not supported for schema '{}' (supported schemas: {})".format(schema, ", ".join(INDEXABLE_SCHEMAS)))
+    with TreeOffsetIndex.get(path=path) as tree_index:
+        tree_indexes = tree_index.select(
+                collection_offset=collection_offset,
+                tree_offset=tree_offset,
+                tree_stride=tree_stride,
+                max_trees=max_trees)
+        return tree_index.open_stream(tree_indexes)
@@ -0,0 +1,612 @@
+#! /usr/bin/env python
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Compact, array-backed ("struct-of-arrays") representation of trees.
+"""
+
+import array
+import math
+from dendropy.datamodel import treemodel
+
+##############################################################################
+### FlatTree
+
+class FlatTree(object):
+    """
+    An immutable, compact representation of the topology, edge lengths,
+    taxon associations, and splits of a |Tree|.
+
+    Instead of a graph of |Node|, |Edge| and |Bipartition| objects (each
+    with its own annotations, comments, and attribute dictionary), a
+    |FlatTree| stores one entry per node in a small number of flat,
+    typed, parallel arrays (from the standard library :py:mod:`array`
+    module), with nodes identified by their index in pre-order sequence
+    (so that the seed node is always node 0, and every node has a higher
+    index than its parent):
+
+        ``parent_indices``
+            ``parent_indices[i]`` is the index of the parent of node ``i``,
+            or -1 for the seed node.
+        ``child_offsets``, ``child_indices``
+            The children of node ``i`` are given, in order, by
+            ``child_indices[child_offsets[i]:child_offsets[i+1]]``.
+        ``edge_lengths``
+            ``edge_lengths[i]`` is the length of the edge subtending node
+            ``i``, or NaN if the edge length is |None|.
+        ``taxon_indices``
+            ``taxon_indices[i]`` is the accession index (see
+            :meth:`TaxonNamespace.accession_index()`) of the taxon associated
+            with node ``i`` in ``taxon_namespace``, or -1 if there is no
+            taxon associated with the node.
+
+    The leafset and split bitmasks of the edge subtending each node are
+    available through ``leafset_bitmasks`` and ``split_bitmasks``. As
+    bitmasks for trees of more than 63 taxa do not fit into a machine word,
+    these are stored as tuples of (arbitrary-precision) integers rather than
+    arrays. They are calculated exactly as by |Tree.encode_bipartitions()|,
+    except that nodes of outdegree one are not suppressed.
+
+    As all the arrays support the buffer protocol, they can be wrapped
+    without copying by NumPy (e.g., ``numpy.frombuffer(flat_tree.edge_lengths)``)
+    if it is available. Note that the arrays are exposed directly, and
+    must *not* be modified by client code.
+
+    Traversals can be carried out in terms of node indexes (e.g.,
+    :meth:`FlatTree.preorder_index_iter()`), or in terms of light-weight
+    |FlatNode| views (e.g., :meth:`FlatTree.postorder_node_iter()`), which
+    provide a read-only subset of the |Node| interface that is sufficient
+    for many of the calculations in :mod:`dendropy.calculate.treemeasure`.
+    """
+
+    def from_tree(cls, tree):
+        """
+        Creates and returns a |FlatTree| representation of ``tree``.
+
+        Parameters
+        ----------
+        tree : |Tree|
+            The tree to represent.
+
+        Returns
+        -------
+        t : |FlatTree|
+            A new |FlatTree| object.
+        """
+        taxon_namespace = tree.taxon_namespace
+        nodes = list(tree.preorder_node_iter())
+        node_index_map = {}
+        for idx, nd in enumerate(nodes):
+            node_index_map[nd] = idx
+        parent_indices = array.array("l")
+        child_offsets = array.array("l")
+        child_indices = array.array("l")
+        edge_lengths = array.array("d")
+        taxon_indices = array.array("l")
+        labels = []
+        for nd in nodes:
+            if nd._parent_node is None:
+                parent_indices.append(-1)
+            else:
+                parent_indices.append(node_index_map[nd._parent_node])
+            child_offsets.append(len(child_indices))
+            child_indices.extend(node_index_map[ch] for ch in nd._child_nodes)
+            length = nd.edge.length
+            if length is None:
+                edge_lengths.append(float("nan"))
+            else:
+                edge_lengths.append(length)
+            if nd.taxon is None:
+                taxon_indices.append(-1)
+            else:
+                taxon_indices.append(taxon_namespace.accession_index(nd.taxon))
+            labels.append(nd.label)
+        child_offsets.append(len(child_indices))
+        return cls(
+                parent_indices=parent_indices,
+                child_offsets=child_offsets,
+                child_indices=child_indices,
+                edge_lengths=edge_lengths,
+                taxon_indices=taxon_indices,
+                taxon_namespace=taxon_namespace,
+                is_rooted=tree.is_rooted,
+                node_labels=labels,
+                label=tree.label)
+    from_tree = classmethod(from_tree)
+
+    def __init__(self,
+            parent_indices,
+            child_offsets,
+            child_indices,
+            edge_lengths,
+            taxon_indices,
+            taxon_namespace,
+            is_rooted=None,
+            node_labels=None,
+            label=None):
+        """
+        Instances are typically created using :meth:`FlatTree.from_tree()`.
+        If instantiated directly, the arrays must describe the nodes in
+        pre-order sequence as detailed in the class description.
+
+        Parameters
+        ----------
+        parent_indices : :py:class:`array.array`
+            Index of the parent of each node (-1 for the seed node).
+        child_offsets : :py:class:`array.array`
+            Offsets into ``child_indices`` for the children of each node;
+            this has one more element than there are nodes.
+        child_indices : :py:class:`array.array`
+            Indexes of the children of the nodes.
+        edge_lengths : :py:class:`array.array`
+            Length of the edge subtending each node (NaN for |None|).
+        taxon_indices : :py:class:`array.array`
+            Accession index of the taxon of each node (-1 for no taxon).
+        taxon_namespace : |TaxonNamespace|
+            The taxon namespace to which the taxon indexes refer.
+        is_rooted : bool or |None|
+            Rooting state of the tree.
+        node_labels : iterable[str], optional
+            Labels of the nodes.
+        label : str, optional
+            Label of the tree.
+        """
+        self._parent_indices = parent_indices
+        self._child_offsets = child_offsets
+        self._child_indices = child_indices
+        self._edge_lengths = edge_lengths
+        self._taxon_indices = taxon_indices
+        self._taxon_namespace = taxon_namespace
+        self._is_rooted = is_rooted
+        if node_labels is None:
+            self._node_labels = (None,) * len(parent_indices)
+        else:
+            self._node_labels = tuple(node_labels)
+        self._label = label
+        if len(child_offsets) != len(parent_indices) + 1:
+            raise ValueError("Expecting {} child offsets but found {}".format(len(parent_indices) + 1, len(child_offsets)))
+        for arr in (edge_lengths, taxon_indices, self._node_labels):
+            if len(arr) != len(parent_indices):
+                raise ValueError("Expecting {} values per node array but found {}".format(len(parent_indices), len(arr)))
+        self._leafset_bitmasks = None
+        self._split_bitmasks = None
+        self._accession_index_taxon_map = None
+        self._postorder_indices = None
+
+    def _get_parent_indices(self):
+        return self._parent_indices
+    parent_indices = property(_get_parent_indices)
+
+    def _get_child_offsets(self):
+        return self._child_offsets
+    child_offsets = property(_get_child_offsets)
+
+    def _get_child_indices(self):
+        return self._child_indices
+    child_indices = property(_get_child_indices)
+
+    def _get_edge_lengths(self):
+        return self._edge_lengths
+    edge_lengths = property(_get_edge_lengths)
+
+    def _get_taxon_indices(self):
+        return self._taxon_indices
+    taxon_indices = property(_get_taxon_indices)
+
+    def _get_taxon_namespace(self):
+        return self._taxon_namespace
+    taxon_namespace = property(_get_taxon_namespace)
+
+    def _get_is_rooted(self):
+        return self._is_rooted
+    is_rooted = property(_get_is_rooted)
+
+    def _get_node_labels(self):
+        return self._node_labels
+    node_labels = property(_get_node_labels)
+
+    def _get_label(self):
+        return self._label
+    label = property(_get_label)
+
+    def _get_num_nodes(self):
+        return len(self._parent_indices)
+    num_nodes = property(_get_num_nodes)
+
+    def _get_seed_node(self):
+        if not self._parent_indices:
+            return None
+        return FlatNode(self, 0)
+    seed_node = property(_get_seed_node)
+
+    ##############################################################################
+    ## Conversion
+
+    def to_tree(self, tree_factory=None):
+        """
+        Creates and returns a |Tree| with the same structure, edge lengths,
+        taxa, and labels as ``self``.
+
+        Parameters
+        ----------
+        tree_factory : function object, optional
+            A function that takes a ``taxon_namespace`` keyword argument and
+            returns a new, empty tree. Defaults to |Tree|.
+
+        Returns
+        -------
+        t : |Tree|
+            A new |Tree| object, referencing the same |TaxonNamespace| as
+            ``self``.
+        """
+        if tree_factory is None:
+            tree_factory = treemodel.Tree
+        tree = tree_factory(taxon_namespace=self._taxon_namespace)
+        tree.is_rooted = self._is_rooted
+        tree.label = self._label
+        num_nodes = len(self._parent_indices)
+        if num_nodes == 0:
+            return tree
+        nodes = [None] * num_nodes
+        nodes[0] = tree.seed_node
+        for idx in range(1, num_nodes):
+            nodes[idx] = tree.node_factory()
+        edge_lengths = self._edge_lengths
+        taxon_indices = self._taxon_indices
+        node_labels = self._node_labels
+        child_offsets = self._child_offsets
+        child_indices = self._child_indices
+        for idx, nd in enumerate(nodes):
+            length = edge_lengths[idx]
+            if not math.isnan(length):
+                nd.edge.length = length
+            if taxon_indices[idx] >= 0:
+                nd.taxon = self.taxon(idx)
+            nd.label = node_labels[idx]
+            for ch_idx in child_indices[child_offsets[idx]:child_offsets[idx+1]]:
+                nd.add_child(nodes[ch_idx])
+        return tree
+
+    ##############################################################################
+    ## Node Data Access
+
+    def parent_index(self, index):
+        """
+        Returns the index of the parent of node ``index``, or -1 if it is the
+        seed node.
+        """
+        return self._parent_indices[index]
+
+    def child_index_iter(self, index):
+        """
+        Iterates over the indexes of the children of node ``index``.
+        """
+        return iter(self._child_indices[self._child_offsets[index]:self._child_offsets[index+1]])
+
+    def num_child_nodes(self, index):
+        """
+        Returns the number of children of node ``index``.
+        """
+        return self._child_offsets[index+1] - self._child_offsets[index]
+
+    def is_leaf(self, index):
+        """
+        Returns |True| if node ``index`` has no children.
+        """
+        return self._child_offsets[index+1] == self._child_offsets[index]
+
+    def edge_length(self, index):
+        """
+        Returns the length of the edge subtending node ``index``, or |None|
+        if no length is defined.
+        """
+        length = self._edge_lengths[index]
+        if math.isnan(length):
+            return None
+        return length
+
+    def taxon(self, index):
+        """
+        Returns the |Taxon| associated with node ``index``, or |None|.
+        """
+        taxon_index = self._taxon_indices[index]
+        if taxon_index < 0:
+            return None
+        if self._accession_index_taxon_map is None:
+            tns = self._taxon_namespace
+            self._accession_index_taxon_map = dict((tns.accession_index(t), t) for t in tns)
+        return self._accession_index_taxon_map[taxon_index]
+
+    def leafset_bitmask(self, index):
+        """
+        Returns the leafset bitmask of the edge subtending node ``index``.
+        """
+        return self._get_leafset_bitmasks()[index]
+
+    def split_bitmask(self, index):
+        """
+        Returns the split bitmask of the edge subtending node ``index``.
+        """
+        return self._get_split_bitmasks()[index]
+
+    def _get_leafset_bitmasks(self):
+        if self._leafset_bitmasks is None:
+            num_nodes = len(self._parent_indices)
+            masks = [0] * num_nodes
+            taxon_indices = self._taxon_indices
+            parent_indices = self._parent_indices
+            for idx in range(num_nodes-1, -1, -1):
+                if taxon_indices[idx] >= 0 and self.is_leaf(idx):
+                    masks[idx] |= 1 << taxon_indices[idx]
+                parent_idx = parent_indices[idx]
+                if parent_idx >= 0:
+                    masks[parent_idx] |= masks[idx]
+            self._leafset_bitmasks = tuple(masks)
+        return self._leafset_bitmasks
+    leafset_bitmasks = property(_get_leafset_bitmasks)
+
+    def _get_split_bitmasks(self):
+        if self._split_bitmasks is None:
+            leafset_bitmasks = self._get_leafset_bitmasks()
+            if self._is_rooted or not leafset_bitmasks:
+                self._split_bitmasks = leafset_bitmasks
+            else:
+                tree_leafset_bitmask = leafset_bitmasks[0]
+                lowest_relevant_bit = tree_leafset_bitmask & -tree_leafset_bitmask
+                self._split_bitmasks = tuple(treemodel.Bipartition.normalize_bitmask(
+                        bitmask=m,
+                        fill_bitmask=tree_leafset_bitmask,
+                        lowest_relevant_bit=lowest_relevant_bit) for m in leafset_bitmasks)
+        return self._split_bitmasks
+    split_bitmasks = property(_get_split_bitmasks)
+
+    ##############################################################################
+    ## Traversal (Indexes)
+
+    def preorder_index_iter(self):
+        """
+        Iterates over node indexes in pre-order sequence.
+        """
+        return iter(range(len(self._parent_indices)))
+
+    def postorder_index_iter(self):
+        """
+        Iterates over node indexes in post-order sequence, i.e., each node
+        is visited after all its children, and children are visited in
+        order.
+        """
+        if self._postorder_indices is None:
+            postorder = array.array("l")
+            if self._parent_indices:
+                child_offsets = self._child_offsets
+                child_indices = self._child_indices
+                stack = [(0, child_offsets[0])]
+                while stack:
+                    idx, pos = stack[-1]
+                    if pos < child_offsets[idx+1]:
+                        stack[-1] = (idx, pos+1)
+                        ch_idx = child_indices[pos]
+                        stack.append((ch_idx, child_offsets[ch_idx]))
+                    else:
+                        stack.pop()
+                        postorder.append(idx)
+            self._postorder_indices = postorder
+        return iter(self._postorder_indices)
+
+    def leaf_index_iter(self):
+        """
+        Iterates over indexes of leaf nodes in pre-order sequence.
+        """
+        child_offsets = self._child_offsets
+        for idx in range(len(self._parent_indices)):
+            if child_offsets[idx+1] == child_offsets[idx]:
+                yield idx
+
+    ##############################################################################
+    ## Traversal (Nodes)
+
+    def node(self, index):
+        """
+        Returns a |FlatNode| view of node ``index``.
+        """
+        if index < 0:
+            index += len(self._parent_indices)
+        if index < 0 or index >= len(self._parent_indices):
+            raise IndexError("Node index out of range: {}".format(index))
+        return FlatNode(self, index)
+
+    def preorder_node_iter(self, filter_fn=None):
+        """
+        Pre-order iterator over |FlatNode| views of the nodes of ``self``.
+        """
+        return self._node_iter(self.preorder_index_iter(), filter_fn)
+
+    def postorder_node_iter(self, filter_fn=None):
+        """
+        Post-order iterator over |FlatNode| views of the nodes of ``self``.
+        """
+        return self._node_iter(self.postorder_index_iter(), filter_fn)
+
+    def leaf_node_iter(self, filter_fn=None):
+        """
+        Iterator over |FlatNode| views of the leaf nodes of ``self``.
+        """
+        return self._node_iter(self.leaf_index_iter(), filter_fn)
+
+    def _node_iter(self, index_iter, filter_fn):
+        for idx in index_iter:
+            nd = FlatNode(self, idx)
+            if filter_fn is None or filter_fn(nd):
+                yield nd
+
+    ##############################################################################
+    ## Metrics
+
+    def length(self):
+        """
+        Returns sum of edge lengths of self. Edges with no lengths defined
+        (None) will be considered to have a length of 0.
+        """
+        total = 0
+        for length in self._edge_lengths:
+            if not math.isnan(length):
+                total += length
+        return total
+
+##############################################################################
+### FlatNode
+
+class FlatNode(object):
+    """
+    A light-weight, read-only view of a node of a |FlatTree|, providing a
+    subset of the |Node| interface. Views are created on demand and hold
+    no data other than a reference to the tree and the index of the node;
+    two views are equal if they refer to the same node of the same tree.
+    """
+
+    __slots__ = ("_flat_tree", "_index")
+
+    def __init__(self, flat_tree, index):
+        self._flat_tree = flat_tree
+        self._index = index
+
+    def __eq__(self, other):
+        return (isinstance(other, FlatNode)
+                and self._flat_tree is other._flat_tree
+                and self._index == other._index)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((id(self._flat_tree), self._index))
+
+    def __repr__(self):
+        return "<FlatNode {} of {}>".format(self._index, repr(self._flat_tree))
+
+    def _get_index(self):
+        return self._index
+    index = property(_get_index)
+
+    def _get_flat_tree(self):
+        return self._flat_tree
+    flat_tree = property(_get_flat_tree)
+
+    def _get_parent_node(self):
+        parent_idx = self._flat_tree._parent_indices[self._index]
+        if parent_idx < 0:
+            return None
+        return FlatNode(self._flat_tree, parent_idx)
+    parent_node = property(_get_parent_node)
+    _parent_node = parent_node
+
+    def child_nodes(self):
+        """
+        Returns a list of views of the child nodes of this node.
+        """
+        flat_tree = self._flat_tree
+        return [FlatNode(flat_tree, idx) for idx in flat_tree.child_index_iter(self._index)]
+    _child_nodes = property(child_nodes)
+
+    def num_child_nodes(self):
+        return self._flat_tree.num_child_nodes(self._index)
+
+    def is_leaf(self):
+        return self._flat_tree.is_leaf(self._index)
+
+    def is_internal(self):
+        return not self._flat_tree.is_leaf(self._index)
+
+    def _get_edge(self):
+        return FlatEdge(self._flat_tree, self._index)
+    edge = property(_get_edge)
+
+    def _get_edge_length(self):
+        return self._flat_tree.edge_length(self._index)
+    edge_length = property(_get_edge_length)
+
+    def _get_taxon(self):
+        return self._flat_tree.taxon(self._index)
+    taxon = property(_get_taxon)
+
+    def _get_label(self):
+        return self._flat_tree._node_labels[self._index]
+    label = property(_get_label)
+
+    def ancestor_iter(self, filter_fn=None, inclusive=False):
+        """
+        Iterator over all ancestors of this node (and this node itself, if
+        ``inclusive`` is |True|).
+        """
+        flat_tree = self._flat_tree
+        parent_indices = flat_tree._parent_indices
+        idx = self._index if inclusive else parent_indices[self._index]
+        while idx >= 0:
+            nd = FlatNode(flat_tree, idx)
+            if filter_fn is None or filter_fn(nd):
+                yield nd
+            idx = parent_indices[idx]
+
+class FlatEdge(object):
+    """
+    A light-weight, read-only view of the edge subtending a node of a
+    |FlatTree|, providing a subset of the |Edge| interface.
+    """
+
+    __slots__ = ("_flat_tree", "_index")
+
+    def __init__(self, flat_tree, index):
+        self._flat_tree = flat_tree
+        self._index = index
+
+    def __eq__(self, other):
+        return (isinstance(other, FlatEdge)
+                and self._flat_tree is other._flat_tree
+                and self._index == other._index)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((id(self._flat_tree), self._index, "edge"))
+
+    def _get_length(self):
+        return self._flat_tree.edge_length(self._index)
+    length = property(_get_length)
+
+    def _get_head_node(self):
+        return FlatNode(self._flat_tree, self._index)
+    head_node = property(_get_head_node)
+
+    def _get_tail_node(self):
+        return FlatNode(self._flat_tree, self._index).parent_node
+    tail_node = property(_get_tail_node)
+
+    def _get_leafset_bitmask(self):
+        return self._flat_tree.leafset_bitmask(self._index)
+    leafset_bitmask = property(_get_leafset_bitmask)
+
+    def _get_split_bitmask(self):
+        return self._flat_tree.split_bitmask(self._index)
+    split_bitmask = property(_get_split_bitmask)
+
+    def is_leaf(self):
+        return self._flat_tree.is_leaf(self._index)
+
+    def is_internal(self):
+        return not self._flat_tree.is_leaf(self._index)
@@ -0,0 +1,498 @@
+#! /usr/bin/env python
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Fixed-width, packed representation of split bitmasks as rows of 64-bit
+words, allowing for batched (vectorized) operations on large numbers of
+splits. Requires NumPy.
+"""
+
+import binascii
+import multiprocessing
+from dendropy.utility import bitprocessing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+WORD_SIZE = 64
+
+def is_available():
+    """
+    Returns |True| if NumPy is available and packed split encoding can be
+    used.
+    """
+    return numpy is not None
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("NumPy is required for packed split encoding, but could not be imported")
+
+def num_words_for_bits(num_bits):
+    """
+    Returns the number of 64-bit words needed to hold a bitmask of
+    ``num_bits`` bits (at least 1).
+    """
+    return max(1, (num_bits + WORD_SIZE - 1) // WORD_SIZE)
+
+if hasattr(int, "to_bytes"):
+    def _bitmask_as_bytes(bitmask, num_bytes):
+        return bitmask.to_bytes(num_bytes, "little")
+    def _bytes_as_bitmask(b):
+        return int.from_bytes(b, "little")
+else:
+    def _bitmask_as_bytes(bitmask, num_bytes):
+        return binascii.unhexlify("%0*x" % (num_bytes * 2, bitmask))[::-1]
+    def _bytes_as_bitmask(b):
+        return int(binascii.hexlify(b[::-1]) or "0", 16)
+
+def pack_bitmasks(bitmasks, num_words=None):
+    """
+    Packs a sequence of (non-negative) integer bitmasks into a two-dimensional
+    NumPy array of unsigned 64-bit words, with one row per bitmask. The
+    first column holds the least-significant 64 bits of each bitmask, and so
+    on, so bit ``i`` of a bitmask is bit ``i % 64`` of column ``i // 64``.
+
+    Parameters
+    ----------
+    bitmasks : iterable[int]
+        The bitmasks to pack.
+    num_words : int
+        Number of 64-bit words (columns) per row. If |None|, then the
+        minimum number of words to hold the longest bitmask is used.
+
+    Returns
+    -------
+    m : :py:class:`numpy.ndarray`
+        Array of shape ``(len(bitmasks), num_words)`` and type ``uint64``.
+    """
+    _require_numpy()
+    bitmasks = list(bitmasks)
+    if num_words is None:
+        num_words = num_words_for_bits(max([bitprocessing.bit_length(b) for b in bitmasks] or [0]))
+    num_bytes = num_words * 8
+    buf = b"".join([_bitmask_as_bytes(b, num_bytes) for b in bitmasks])
+    return numpy.frombuffer(buf, dtype="<u8").reshape(len(bitmasks), num_words).astype(numpy.uint64)
+
+def unpack_bitmask(row):
+    """
+    Returns the integer bitmask represented by ``row``, a sequence of 64-bit
+    words as produced by :func:`pack_bitmasks()`.
+    """
+    return _bytes_as_bitmask(numpy.asarray(row, dtype="<u8").tobytes())
+
+def unpack_bitmasks(matrix):
+    """
+    Returns a list of the integer bitmasks represented by the rows of
+    ``matrix``.
+    """
+    return [unpack_bitmask(row) for row in matrix]
+
+def normalize_packed_bitmasks(matrix, fill_bitmask, lowest_relevant_bit):
+    """
+    Vectorized version of :meth:`Bipartition.normalize_bitmask()`, applied to
+    each row of ``matrix``.
+
+    Parameters
+    ----------
+    matrix : :py:class:`numpy.ndarray`
+        Packed bitmasks, as produced by :func:`pack_bitmasks()`.
+    fill_bitmask : int
+        Bitmask of all the relevant bits.
+    lowest_relevant_bit : int
+        Bitmask with only the bit that is to be unset in the normalized
+        bitmasks set.
+
+    Returns
+    -------
+    m : :py:class:`numpy.ndarray`
+        New array of normalized packed bitmasks.
+    """
+    num_words = matrix.shape[1]
+    fill = pack_bitmasks([fill_bitmask], num_words)[0]
+    lrb_index = bitprocessing.bit_length(lowest_relevant_bit) - 1
+    lrb_word = lrb_index // WORD_SIZE
+    lrb = numpy.uint64(1 << (lrb_index % WORD_SIZE))
+    to_flip = (matrix[:, lrb_word] & lrb) != 0
+    normalized = matrix & fill
+    normalized[to_flip] = (~matrix[to_flip]) & fill
+    return normalized
+
+class PackedSplitMatrix(object):
+    """
+    The splits of a collection of trees, stored as the rows of a packed
+    ``uint64`` matrix (see :func:`pack_bitmasks()`), together with the
+    weight of each tree and the edge length associated with each split.
+
+    The splits of tree ``i`` are rows
+    ``tree_offsets[i]:tree_offsets[i+1]`` of ``split_bitmasks``.
+    """
+
+    def from_split_bitmask_sets(cls,
+            split_bitmask_sets,
+            tree_weights=None,
+            edge_length_sets=None,
+            num_words=None):
+        """
+        Creates a |PackedSplitMatrix| from the split bitmasks of a
+        collection of trees.
+
+        Parameters
+        ----------
+        split_bitmask_sets : iterable[iterable[int]]
+            The split bitmasks of each tree.
+        tree_weights : iterable[float]
+            The weight of each tree. If |None|, all trees have a weight of 1.
+        edge_length_sets : iterable[iterable[float]]
+            The edge length associated with each split of each tree (|None|
+            will be stored as NaN). If |None|, all edge lengths are NaN.
+        num_words : int
+            Number of 64-bit words per split; if |None|, the minimum
+            required is used.
+
+        Returns
+        -------
+        m : |PackedSplitMatrix|
+            A new |PackedSplitMatrix| object.
+        """
+        _require_numpy()
+        split_bitmasks = []
+        tree_offsets = [0]
+        for splits in split_bitmask_sets:
+            split_bitmasks.extend(splits)
+            tree_offsets.append(len(split_bitmasks))
+        num_trees = len(tree_offsets) - 1
+        if tree_weights is None:
+            tree_weights = numpy.ones(num_trees, dtype=numpy.float64)
+        else:
+            tree_weights = numpy.array(list(tree_weights), dtype=numpy.float64)
+        if edge_length_sets is None:
+            edge_lengths = numpy.empty(len(split_bitmasks), dtype=numpy.float64)
+            edge_lengths.fill(numpy.nan)
+        else:
+            edge_lengths = []
+            for elens in edge_length_sets:
+                edge_lengths.extend(elens)
+            edge_lengths = numpy.array([numpy.nan if e is None else e for e in edge_lengths], dtype=numpy.float64)
+        return cls(
+                split_bitmasks=pack_bitmasks(split_bitmasks, num_words=num_words),
+                tree_offsets=numpy.array(tree_offsets, dtype=numpy.int64),
+                tree_weights=tree_weights,
+                edge_lengths=edge_lengths)
+    from_split_bitmask_sets = classmethod(from_split_bitmask_sets)
+
+    def __init__(self, split_bitmasks, tree_offsets, tree_weights, edge_lengths):
+        _require_numpy()
+        if len(tree_offsets) != len(tree_weights) + 1:
+            raise ValueError("Expecting {} tree offsets but found {}".format(len(tree_weights) + 1, len(tree_offsets)))
+        if len(edge_lengths) != len(split_bitmasks):
+            raise ValueError("Expecting {} edge lengths but found {}".format(len(split_bitmasks), len(edge_lengths)))
+        self.split_bitmasks = split_bitmasks
+        self.tree_offsets = tree_offsets
+        self.tree_weights = tree_weights
+        self.edge_lengths = edge_lengths
+
+    def _get_num_trees(self):
+        return len(self.tree_weights)
+    num_trees = property(_get_num_trees)
+
+    def _get_num_splits(self):
+        return self.split_bitmasks.shape[0]
+    num_splits = property(_get_num_splits)
+
+    def _get_num_words(self):
+        return self.split_bitmasks.shape[1]
+    num_words = property(_get_num_words)
+
+    def tree_split_bitmasks(self, tree_index):
+        """
+        Returns the rows of the packed split matrix corresponding to the
+        splits of tree ``tree_index``.
+        """
+        return self.split_bitmasks[self.tree_offsets[tree_index]:self.tree_offsets[tree_index+1]]
+
+    def split_tree_indexes(self):
+        """
+        Returns an array giving the index of the tree of each split.
+        """
+        return numpy.repeat(
+                numpy.arange(self.num_trees, dtype=numpy.int64),
+                numpy.diff(self.tree_offsets))
+
+    def split_weights(self):
+        """
+        Returns an array giving the weight of the tree of each split.
+        """
+        return numpy.repeat(self.tree_weights, numpy.diff(self.tree_offsets))
+
+    def unique_splits(self):
+        """
+        Identifies the distinct splits in the matrix.
+
+        Returns
+        -------
+        first_indexes : :py:class:`numpy.ndarray`
+            For each distinct split, the index of the row in which it first
+            occurs, with distinct splits ordered by first occurrence.
+        inverse : :py:class:`numpy.ndarray`
+            For each row, the index of its split in ``first_indexes``.
+        """
+        if self.num_splits == 0:
+            return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64)
+        _, first_indexes, inverse = numpy.unique(
+                self.split_bitmasks,
+                axis=0,
+                return_index=True,
+                return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = numpy.argsort(first_indexes, kind="mergesort")
+        rank = numpy.empty(len(order), dtype=numpy.int64)
+        rank[order] = numpy.arange(len(order), dtype=numpy.int64)
+        return first_indexes[order], rank[inverse]
+
+    def split_counts(self, use_tree_weights=True):
+        """
+        Counts the occurrences of each distinct split.
+
+        Parameters
+        ----------
+        use_tree_weights : bool
+            If |True| [default], then each occurrence of a split is weighted
+            by the weight of the tree in which it occurs.
+
+        Returns
+        -------
+        d : dict
+            Dictionary mapping (integer) split bitmasks to their (weighted)
+            counts, in order of first occurrence.
+        """
+        first_indexes, inverse = self.unique_splits()
+        if use_tree_weights:
+            weights = self.split_weights()
+        else:
+            weights = None
+        counts = numpy.bincount(inverse, weights=weights, minlength=len(first_indexes))
+        return dict(zip(
+            unpack_bitmasks(self.split_bitmasks[first_indexes]),
+            counts.tolist()))
+
+    def normalized(self, fill_bitmask, lowest_relevant_bit=1):
+        """
+        Returns a new |PackedSplitMatrix| with all split bitmasks normalized
+        as by :meth:`Bipartition.normalize_bitmask()`.
+        """
+        return self.__class__(
+                split_bitmasks=normalize_packed_bitmasks(
+                    self.split_bitmasks,
+                    fill_bitmask=fill_bitmask,
+                    lowest_relevant_bit=lowest_relevant_bit),
+                tree_offsets=self.tree_offsets,
+                tree_weights=self.tree_weights,
+                edge_lengths=self.edge_lengths)
+
+class SplitIncidenceMatrix(object):
+    """
+    Sparse tree-by-split incidence matrix of a collection of trees, for
+    calculating distances between all pairs of trees in bulk.
+
+    Each distinct split is assigned an integer ID (in order of first
+    occurrence) through a single global table, and each tree is stored as a
+    sorted array of the IDs of its splits, together with the value (e.g.,
+    edge length) associated with each split, in compressed sparse row form.
+    An inverted (compressed sparse column) index gives, for each split ID,
+    the trees in which it occurs. The splits shared by one tree and every
+    other tree can thus be found with a single gather over the inverted
+    index, and accumulated with ``numpy.bincount``, instead of one set
+    intersection per pair of trees.
+    """
+
+    def __init__(self, split_bitmask_sets, value_sets=None):
+        """
+        Parameters
+        ----------
+        split_bitmask_sets : iterable[iterable[int]]
+            The split bitmasks of each tree.
+        value_sets : iterable[iterable[float]]
+            The value associated with each split of each tree (|None| will be
+            stored as 0.0). If |None|, all values are 1.0.
+        """
+        _require_numpy()
+        self.split_id_map = {}
+        split_ids = []
+        values = []
+        tree_offsets = [0]
+        if value_sets is None:
+            value_sets = [None] * len(split_bitmask_sets)
+        for splits, split_values in zip(split_bitmask_sets, value_sets):
+            tree_split_values = {}
+            if split_values is None:
+                split_values = [1.0] * len(splits)
+            for split, value in zip(splits, split_values):
+                split_id = self.split_id_map.setdefault(split, len(self.split_id_map))
+                if split_id not in tree_split_values:
+                    tree_split_values[split_id] = 0.0 if value is None else value
+            for split_id in sorted(tree_split_values):
+                split_ids.append(split_id)
+                values.append(tree_split_values[split_id])
+            tree_offsets.append(len(split_ids))
+        self.tree_offsets = numpy.array(tree_offsets, dtype=numpy.int64)
+        self.split_ids = numpy.array(split_ids, dtype=numpy.int64)
+        self.values = numpy.array(values, dtype=numpy.float64)
+        entry_trees = numpy.repeat(
+                numpy.arange(self.num_trees, dtype=numpy.int64),
+                numpy.diff(self.tree_offsets))
+        order = numpy.argsort(self.split_ids, kind="mergesort")
+        self.split_offsets = numpy.zeros(self.num_splits + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(self.split_ids, minlength=self.num_splits), out=self.split_offsets[1:])
+        self.split_trees = entry_trees[order]
+        self.split_values = self.values[order]
+        self.tree_sizes = numpy.diff(self.tree_offsets).astype(numpy.float64)
+        self.tree_value_sums = numpy.bincount(entry_trees, weights=numpy.abs(self.values), minlength=self.num_trees)
+        self.tree_value_sums_of_squares = numpy.bincount(entry_trees, weights=self.values * self.values, minlength=self.num_trees)
+
+    def _get_num_trees(self):
+        return len(self.tree_offsets) - 1
+    num_trees = property(_get_num_trees)
+
+    def _get_num_splits(self):
+        return len(self.split_id_map)
+    num_splits = property(_get_num_splits)
+
+    def _shared_splits(self, tree_index):
+        # Returns, for each occurrence in any tree of a split of tree
+        # ``tree_index``, the index of the tree, the value of the split in
+        # tree ``tree_index`` and the value of the split in that tree.
+        start = self.tree_offsets[tree_index]
+        stop = self.tree_offsets[tree_index+1]
+        split_ids = self.split_ids[start:stop]
+        counts = self.split_offsets[split_ids+1] - self.split_offsets[split_ids]
+        run_starts = numpy.cumsum(counts) - counts
+        entries = (numpy.repeat(self.split_offsets[split_ids] - run_starts, counts)
+                + numpy.arange(counts.sum(), dtype=numpy.int64))
+        return (self.split_trees[entries],
+                numpy.repeat(self.values[start:stop], counts),
+                self.split_values[entries])
+
+    def distance_rows(self, metric, start=0, stop=None):
+        """
+        Calculates rows ``start:stop`` of the matrix of distances between all
+        pairs of trees.
+
+        Parameters
+        ----------
+        metric : string
+            One of: "symmetric_difference" (the unweighted Robinson-Foulds
+            distance: the number of splits found in one tree but not in the
+            other), "weighted_robinson_foulds" (the sum of absolute
+            differences of split values, with a value of 0.0 for splits
+            missing from a tree), or "euclidean" (the square root of the sum
+            of squared differences of split values).
+        start : int
+            Index of first tree (row).
+        stop : int
+            Index of last tree (row) plus 1. If |None|, the number of trees.
+
+        Returns
+        -------
+        m : :py:class:`numpy.ndarray`
+            Array of shape ``(stop - start, num_trees)``.
+        """
+        if stop is None:
+            stop = self.num_trees
+        rows = numpy.empty((max(stop - start, 0), self.num_trees), dtype=numpy.float64)
+        for row, tree_index in enumerate(range(start, stop)):
+            trees, own_values, other_values = self._shared_splits(tree_index)
+            if metric == "symmetric_difference":
+                shared = numpy.bincount(trees, minlength=self.num_trees)
+                rows[row] = self.tree_sizes[tree_index] + self.tree_sizes - 2 * shared
+            elif metric == "weighted_robinson_foulds":
+                # |a - b| replaces |a| + |b| for each shared split
+                correction = numpy.bincount(trees,
+                        weights=numpy.abs(own_values - other_values) - numpy.abs(own_values) - numpy.abs(other_values),
+                        minlength=self.num_trees)
+                rows[row] = self.tree_value_sums[tree_index] + self.tree_value_sums + correction
+            elif metric == "euclidean":
+                # (a - b)^2 replaces a^2 + b^2 for each shared split
+                correction = numpy.bincount(trees,
+                        weights=-2.0 * own_values * other_values,
+                        minlength=self.num_trees)
+                sq = self.tree_value_sums_of_squares[tree_index] + self.tree_value_sums_of_squares + correction
+                rows[row] = numpy.sqrt(numpy.maximum(sq, 0.0))
+            else:
+                raise ValueError("Unrecognized metric: '{}'".format(metric))
+            rows[row, tree_index] = 0.0
+        return rows
+
+    def distance_matrix(self, metric, num_processes=1, rows_per_task=None):
+        """
+        Calculates the matrix of distances between all pairs of trees.
+
+        Parameters
+        ----------
+        metric : string
+            See :meth:`SplitIncidenceMatrix.distance_rows()`.
+        num_processes : integer or None
+            Number of worker processes over which to spread blocks of rows.
+            If 1 [default], then the matrix is calculated in this process. If
+            |None|, the number of CPUs.
+        rows_per_task : integer or None
+            Number of rows in each block handed to a worker. If |None|, the
+            rows will be split into four blocks per worker process.
+
+        Returns
+        -------
+        m : :py:class:`numpy.ndarray`
+            Array of shape ``(num_trees, num_trees)``.
+        """
+        if num_processes is None:
+            num_processes = multiprocessing.cpu_count()
+        if num_processes <= 1 or self.num_trees < 2:
+            return self.distance_rows(metric)
+        if rows_per_task is None:
+            rows_per_task = max(1, -(-self.num_trees // (num_processes * 4)))
+        tasks = [(metric, start, min(start + rows_per_task, self.num_trees))
+                for start in range(0, self.num_trees, rows_per_task)]
+        matrix = numpy.empty((self.num_trees, self.num_trees), dtype=numpy.float64)
+        pool = multiprocessing.Pool(
+                processes=min(num_processes, len(tasks)),
+                initializer=_set_split_incidence_matrix_for_worker,
+                initargs=(self,))
+        try:
+            for (_, start, stop), rows in zip(tasks, pool.imap(_split_incidence_distance_rows_task, tasks)):
+                matrix[start:stop] = rows
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        return matrix
+
+_worker_split_incidence_matrix = None
+
+def _set_split_incidence_matrix_for_worker(split_incidence_matrix):
+    global _worker_split_incidence_matrix
+    _worker_split_incidence_matrix = split_incidence_matrix
+
+def _split_incidence_distance_rows_task(task):
+    """
+    Worker function for :meth:`SplitIncidenceMatrix.distance_matrix`.
+    """
+    metric, start, stop = task
+    return _worker_split_incidence_matrix.distance_rows(metric, start, stop)
@@ -0,0 +1,354 @@
+#! /usr/bin/env python
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Persistent, on-disk (SQLite) storage of split counts, edge lengths and node
+ages collected over trees, allowing a split distribution to be accumulated
+across sessions without keeping all the values in memory.
+"""
+
+import json
+import sqlite3
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+_SPLIT_VALUE_TABLES = {
+    "edge_length": "split_edge_lengths",
+    "node_age": "split_node_ages",
+}
+
+def _split_as_key(split):
+    return format(split, "x")
+
+def _key_as_split(key):
+    return int(key, 16)
+
+class SplitStore(object):
+    """
+    A persistent, append-only store of split counts, edge lengths and node
+    ages, backed by an SQLite database file.
+
+    A store is attached to a |SplitDistribution| (or |TreeArray|) using
+    :meth:`SplitDistribution.attach_split_store()`. The split counts and tree
+    totals already in the store are then loaded into the split distribution,
+    while the (potentially very large) lists of edge lengths and node ages
+    remain on disk. As further trees are counted, their values are
+    periodically flushed to the store, so that memory use is bounded, and the
+    counts can be extended by later sessions without re-reading the trees
+    counted in earlier ones. Note that only the edge lengths and node ages
+    are moved to disk: the split counts (one per distinct split) are held in
+    memory by the split distribution, and are written to the store on each
+    flush. Closing the store (e.g., on leaving a ``with`` block) flushes the
+    attached split distribution.
+
+    The store also records, for each tree source, the offset of the next
+    tree to be read (in :attr:`source_tree_offsets`), so that a source that
+    has since been appended to can be resumed from where it was left.
+
+    Split bitmasks are only meaningful with respect to a particular order of
+    taxa, so the store keeps the labels of the taxa of the namespace it was
+    first used with, and requires later namespaces to be consistent with
+    this order.
+
+    A store can be written to by only one split distribution at a time.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+            Path to the database file. It will be created if it does not
+            exist. Use ":memory:" for a transient, in-memory store.
+        """
+        self._path = path
+        self._split_distribution = None
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS split_counts (split TEXT PRIMARY KEY, count REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS split_edge_lengths (split TEXT NOT NULL, value);
+            CREATE INDEX IF NOT EXISTS split_edge_lengths_split ON split_edge_lengths (split);
+            CREATE TABLE IF NOT EXISTS split_node_ages (split TEXT NOT NULL, value);
+            CREATE INDEX IF NOT EXISTS split_node_ages_split ON split_node_ages (split);
+            CREATE TABLE IF NOT EXISTS source_tree_offsets (source TEXT PRIMARY KEY, tree_offset INTEGER NOT NULL);
+            """)
+        format_version = self.get_metadata("format_version")
+        if format_version is None:
+            self.set_metadata("format_version", self.FORMAT_VERSION)
+            self._connection.commit()
+        elif format_version != self.FORMAT_VERSION:
+            raise ValueError("Split store '{}' has format version {}, but expecting {}".format(path, format_version, self.FORMAT_VERSION))
+        self.source_tree_offsets = dict(self._connection.execute("SELECT source, tree_offset FROM source_tree_offsets"))
+
+    def _get_path(self):
+        return self._path
+    path = property(_get_path)
+
+    def close(self):
+        """
+        Flushes the attached split distribution (if any), commits any
+        outstanding changes and closes the database.
+        """
+        if self._connection is not None:
+            if (self._split_distribution is not None
+                    and self._split_distribution.split_store is self):
+                self._split_distribution.flush_split_store()
+            self._split_distribution = None
+            self.commit()
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def commit(self):
+        """
+        Writes the current :attr:`source_tree_offsets` to the store, and
+        commits all changes since the last commit in a single transaction.
+        """
+        self._connection.executemany(
+                "INSERT OR REPLACE INTO source_tree_offsets (source, tree_offset) VALUES (?, ?)",
+                self.source_tree_offsets.items())
+        self._connection.commit()
+
+    ###########################################################################
+    ### Metadata
+
+    def get_metadata(self, key, default=None):
+        """
+        Returns the (JSON-decoded) value stored under ``key``, or
+        ``default`` if there is no such value.
+        """
+        row = self._connection.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        return json.loads(row[0])
+
+    def set_metadata(self, key, value):
+        """
+        Stores (a JSON-encoding of) ``value`` under ``key``.
+        """
+        self._connection.execute("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)))
+
+    def _get_taxon_labels(self):
+        return self.get_metadata("taxon_labels", [])
+    taxon_labels = property(_get_taxon_labels)
+
+    def bind_taxon_namespace(self, taxon_namespace):
+        """
+        Reconciles ``taxon_namespace`` with the taxa of the store.
+
+        The taxa in the store must be (in the same order) the first taxa of
+        ``taxon_namespace``, or vice versa. In the latter case, the taxa
+        missing from ``taxon_namespace`` are added to it.
+        """
+        stored_labels = self.taxon_labels
+        for idx, (taxon, label) in enumerate(zip(taxon_namespace, stored_labels)):
+            if taxon.label != label:
+                raise ValueError("Taxon '{}' at index {} of the namespace does not match taxon '{}' of split store '{}'".format(
+                    taxon.label, idx, label, self._path))
+        for label in stored_labels[len(taxon_namespace):]:
+            taxon_namespace.new_taxon(label=label)
+        self.set_metadata("taxon_labels", [t.label for t in taxon_namespace])
+
+    def bind_split_distribution(self, split_distribution):
+        """
+        Records ``split_distribution`` as the split distribution writing to
+        this store, to be flushed when the store is closed.
+        """
+        if (self._split_distribution is not None
+                and self._split_distribution is not split_distribution
+                and self._split_distribution.split_store is self):
+            raise ValueError("Split store '{}' is already attached to a split distribution".format(self._path))
+        self._split_distribution = split_distribution
+
+    def bind_configuration(self, **kwargs):
+        """
+        Records the configuration values given as keyword arguments (e.g.,
+        ``ignore_edge_lengths=True``), or, if these have already been
+        recorded, checks that they are unchanged.
+        """
+        for key, value in kwargs.items():
+            stored_value = self.get_metadata(key)
+            if stored_value is None:
+                self.set_metadata(key, value)
+            elif stored_value != value:
+                raise ValueError("Split store '{}' was created with '{}={}', but '{}={}' requested".format(
+                    self._path, key, stored_value, key, value))
+
+    ###########################################################################
+    ### Split Counts
+
+    def split_counts(self):
+        """
+        Returns a dictionary mapping split bitmasks to (weighted) counts.
+        """
+        return dict((_key_as_split(key), count) for key, count in
+                self._connection.execute("SELECT split, count FROM split_counts"))
+
+    def write_split_counts(self, split_counts):
+        """
+        Sets the counts of the splits in ``split_counts``, a dictionary
+        mapping split bitmasks to (weighted) counts.
+        """
+        self._connection.executemany(
+                "INSERT OR REPLACE INTO split_counts (split, count) VALUES (?, ?)",
+                ((_split_as_key(split), count) for split, count in split_counts.items()))
+
+    ###########################################################################
+    ### Split Values
+
+    def append_split_values(self, value_type, split_values):
+        """
+        Appends values to the lists of values of splits.
+
+        Parameters
+        ----------
+        value_type : str
+            "edge_length" or "node_age".
+        split_values : dict
+            A dictionary mapping split bitmasks to lists of values.
+        """
+        table = _SPLIT_VALUE_TABLES[value_type]
+        rows = []
+        for split, values in split_values.items():
+            key = _split_as_key(split)
+            rows.extend((key, value) for value in values)
+        self._connection.executemany(
+                "INSERT INTO {} (split, value) VALUES (?, ?)".format(table),
+                rows)
+
+    def split_values(self, value_type, split):
+        """
+        Returns the list of ``value_type`` values ("edge_length" or
+        "node_age") of ``split``, in the order in which they were added.
+        """
+        table = _SPLIT_VALUE_TABLES[value_type]
+        return [row[0] for row in self._connection.execute(
+            "SELECT value FROM {} WHERE split = ? ORDER BY rowid".format(table),
+            (_split_as_key(split),))]
+
+    def replace_split_values(self, value_type, split, values):
+        """
+        Replaces the list of ``value_type`` values ("edge_length" or
+        "node_age") of ``split`` with ``values``.
+        """
+        self.delete_split_values(value_type, split)
+        self.append_split_values(value_type, {split: values})
+
+    def delete_split_values(self, value_type, split):
+        """
+        Removes all the ``value_type`` values ("edge_length" or "node_age")
+        of ``split``.
+        """
+        table = _SPLIT_VALUE_TABLES[value_type]
+        self._connection.execute("DELETE FROM {} WHERE split = ?".format(table),
+                (_split_as_key(split),))
+
+    def has_split_values(self, value_type, split):
+        """
+        Returns |True| if ``split`` has any ``value_type`` values
+        ("edge_length" or "node_age").
+        """
+        table = _SPLIT_VALUE_TABLES[value_type]
+        return self._connection.execute("SELECT 1 FROM {} WHERE split = ? LIMIT 1".format(table),
+                (_split_as_key(split),)).fetchone() is not None
+
+    def iter_splits_with_values(self, value_type):
+        """
+        Iterates over the split bitmasks that have ``value_type`` values
+        ("edge_length" or "node_age").
+        """
+        table = _SPLIT_VALUE_TABLES[value_type]
+        for row in self._connection.execute("SELECT DISTINCT split FROM {}".format(table)):
+            yield _key_as_split(row[0])
+
+    def num_splits_with_values(self, value_type):
+        """
+        Returns the number of splits that have ``value_type`` values
+        ("edge_length" or "node_age").
+        """
+        table = _SPLIT_VALUE_TABLES[value_type]
+        return self._connection.execute("SELECT COUNT(DISTINCT split) FROM {}".format(table)).fetchone()[0]
+
+    def iter_split_values(self, value_type):
+        """
+        Iterates over (split bitmask, list of values) pairs for all the splits
+        that have ``value_type`` values ("edge_length" or "node_age"), holding
+        the values of only one split in memory at a time.
+        """
+        table = _SPLIT_VALUE_TABLES[value_type]
+        current_key = None
+        values = []
+        for key, value in self._connection.execute(
+                "SELECT split, value FROM {} ORDER BY split, rowid".format(table)):
+            if key != current_key:
+                if current_key is not None:
+                    yield _key_as_split(current_key), values
+                current_key = key
+                values = []
+            values.append(value)
+        if current_key is not None:
+            yield _key_as_split(current_key), values
+
+class StoredSplitValues(MutableMapping):
+    """
+    A dictionary-like view of the lists of edge lengths or node ages of
+    splits in a |SplitStore|, as given by
+    :attr:`SplitDistribution.split_edge_lengths` and
+    :attr:`SplitDistribution.split_node_ages` when a store is attached.
+
+    As with a ``collections.defaultdict(list)``, looking up a split that has
+    no values returns an empty list. Lists returned are copies: changes to
+    them are only saved if they are assigned back to the view.
+    """
+
+    def __init__(self, split_store, value_type):
+        self._split_store = split_store
+        self._value_type = value_type
+
+    def __getitem__(self, split):
+        return self._split_store.split_values(self._value_type, split)
+
+    def __setitem__(self, split, values):
+        self._split_store.replace_split_values(self._value_type, split, values)
+
+    def __delitem__(self, split):
+        self._split_store.delete_split_values(self._value_type, split)
+
+    def __contains__(self, split):
+        return self._split_store.has_split_values(self._value_type, split)
+
+    def __iter__(self):
+        return self._split_store.iter_splits_with_values(self._value_type)
+
+    def __len__(self):
+        return self._split_store.num_splits_with_values(self._value_type)
+
+    def items(self):
+        return self._split_store.iter_split_values(self._value_type)
+    iteritems = items
@@ -78,6 +78,7 @@ be related through correct interpretation of their taxon labels.
 import warnings
 import collections
 import copy
+import weakref
 from dendropy.utility.textprocessing import StringIO
 from dendropy.datamodel import basemodel
 from dendropy.utility import bitprocessing
@@ -544,6 +545,7 @@ class TaxonNamespace(
         self._taxon_bitmask_map = {}
         # self._split_bitmask_taxon_map = {}
         self._current_accession_count = 0
+        self._invalidate_label_index()
         if len(args) > 1:
             raise TypeError("TaxonNamespace() takes at most 1 non-keyword argument ({} given)".format(len(args)))
         elif len(args) == 1:
@@ -559,7 +561,7 @@ class TaxonNamespace(
                 for t1, t2 in zip(self._taxa, other._taxa):
                     memo[id(t2)] = t1
                 for k in other.__dict__:
-                    if k == "_annotations" or k == "_taxa":
+                    if k == "_annotations" or k == "_taxa" or k in TaxonNamespace._LABEL_INDEX_ATTRIBUTES:
                         continue
                     self.__dict__[k] = copy.deepcopy(other.__dict__[k], memo)
                 self.deep_copy_annotations_from(other, memo=memo)
@@ -589,9 +591,10 @@ class TaxonNamespace(
         for t in self._taxa:
             o._taxa.append(copy.deepcopy(t, memo))
         for k in self.__dict__:
-            if k == "_annotations" or k == "_taxa":
+            if k == "_annotations" or k == "_taxa" or k in TaxonNamespace._LABEL_INDEX_ATTRIBUTES:
                 continue
             o.__dict__[k] = copy.deepcopy(self.__dict__[k], memo)
+        o._invalidate_label_index()
         o.deep_copy_annotations_from(self, memo=memo)
         # o.copy_annotations_from(self, attribute_object_mapper=memo)
         return o
@@ -707,28 +710,90 @@ class TaxonNamespace(
             `first_match_only==False`, a list of one or more |Taxon|
             instances with a ``label`` attribute matching the ``label`` argument.
         """
-        taxa = []
         if is_case_sensitive is True or (is_case_sensitive is None and self.is_case_sensitive):
-            for taxon in self._taxa:
-                if label == taxon.label:
-                    if first_match_only:
-                        return taxon
-                    else:
-                        taxa.append(taxon)
+            taxa = self._get_label_index(is_case_sensitive=True).get(label, None)
         else:
             label = str(label).lower()
-            for taxon in self._taxa:
-                if label == taxon.lower_cased_label:
-                    if first_match_only:
-                        return taxon
-                    else:
-                        taxa.append(taxon)
-        if len(taxa) == 0:
+            taxa = self._get_label_index(is_case_sensitive=False).get(label, None)
+        if not taxa:
             if error_if_not_found:
                 raise LookupError(label)
             else:
                 return None
-        return taxa
+        if first_match_only:
+            return taxa[0]
+        return list(taxa)
+
+    ### Label Index
+
+    # Maps of labels and lower-cased labels to the lists of taxa with these
+    # labels (in the order of the namespace), allowing taxa to be looked up by
+    # label in constant time. These are updated in place as taxa are added,
+    # removed or relabeled (each indexed taxon notifies the namespace of
+    # changes to its label), and discarded when the namespace is otherwise
+    # modified. The list of taxa should not be modified directly: only
+    # changes to its length are noticed (and cause the maps to be rebuilt).
+    _LABEL_INDEX_ATTRIBUTES = ("_label_taxa_map", "_lower_cased_label_taxa_map", "_label_index_state")
+
+    def _invalidate_label_index(self):
+        self._label_taxa_map = None
+        self._lower_cased_label_taxa_map = None
+        self._label_index_state = None
+
+    def _is_label_index_valid(self):
+        return (self._label_index_state is not None
+                and self._label_index_state[0] is self._taxa
+                and self._label_index_state[1] == len(self._taxa))
+
+    def _update_label_index_state(self):
+        self._label_index_state = (self._taxa, len(self._taxa))
+
+    def _get_label_index(self, is_case_sensitive):
+        if not self._is_label_index_valid():
+            self._label_taxa_map = {}
+            self._lower_cased_label_taxa_map = {}
+            for taxon in self._taxa:
+                self._add_to_label_index(taxon)
+            self._update_label_index_state()
+        if is_case_sensitive:
+            return self._label_taxa_map
+        else:
+            return self._lower_cased_label_taxa_map
+
+    def _add_to_label_index(self, taxon):
+        try:
+            self._label_taxa_map[taxon.label].append(taxon)
+        except KeyError:
+            self._label_taxa_map[taxon.label] = [taxon]
+        try:
+            self._lower_cased_label_taxa_map[taxon.lower_cased_label].append(taxon)
+        except KeyError:
+            self._lower_cased_label_taxa_map[taxon.lower_cased_label] = [taxon]
+        taxon._add_label_listener(self)
+
+    def _remove_from_label_index(self, taxon):
+        _remove_from_label_taxa_map(self._label_taxa_map, taxon.label, taxon)
+        _remove_from_label_taxa_map(self._lower_cased_label_taxa_map, taxon.lower_cased_label, taxon)
+
+    def _taxon_relabeled(self, taxon, old_label, old_lower_cased_label):
+        # Called by ``taxon`` after its label has been changed.
+        if not self._is_label_index_valid():
+            return
+        if not _remove_from_label_taxa_map(self._label_taxa_map, old_label, taxon):
+            # not (or no longer) indexed by this namespace
+            return
+        _remove_from_label_taxa_map(self._lower_cased_label_taxa_map, old_lower_cased_label, taxon)
+        for label_taxa_map, label in (
+                (self._label_taxa_map, taxon.label),
+                (self._lower_cased_label_taxa_map, taxon.lower_cased_label)):
+            taxa = label_taxa_map.get(label, None)
+            if taxa is None:
+                label_taxa_map[label] = [taxon]
+            else:
+                # keep taxa with the same label in the order of the namespace
+                member_taxa = set(taxa)
+                member_taxa.add(taxon)
+                taxa[:] = [t for t in self._taxa if t in member_taxa]
 
     ### Adding Taxa
 
@@ -766,7 +831,11 @@ class TaxonNamespace(
             return
         if not self.is_mutable:
             raise error.ImmutableTaxonNamespaceError("Taxon '{}' cannot be added to an immutable TaxonNamespace".format((taxon.label)))
+        is_label_index_valid = self._is_label_index_valid()
         self._taxa.append(taxon)
+        if is_label_index_valid:
+            self._add_to_label_index(taxon)
+            self._update_label_index_state()
         self._accession_index_taxon_map[self._current_accession_count] = taxon
         self._taxon_accession_index_map[taxon] = self._current_accession_count
         self._current_accession_count += 1
@@ -872,10 +941,15 @@ class TaxonNamespace(
         """
         if taxon not in self._taxa:
             raise ValueError(taxon)
+        is_label_index_valid = self._is_label_index_valid()
         self._taxa.remove(taxon)
         # assert taxon not in self._taxa
         while taxon in self._taxa:
             self._taxa.remove(taxon)
+        if is_label_index_valid:
+            self._remove_from_label_index(taxon)
+            self._update_label_index_state()
+        taxon._remove_label_listener(self)
         idx = self._taxon_accession_index_map.pop(taxon, None)
         if idx is not None:
             self._accession_index_taxon_map.pop(idx, None)
@@ -989,6 +1063,7 @@ class TaxonNamespace(
         """
         # self._taxa.clear() # Python 2 ``list`` class does not have `clear()` method
         del self._taxa[:]
+        self._invalidate_label_index()
         self._accession_index_taxon_map.clear()
         self._taxon_accession_index_map.clear()
         self._taxon_bitmask_map.clear()
@@ -1254,12 +1329,14 @@ class TaxonNamespace(
         if key is None:
             key = lambda x: x.label
         self._taxa.sort(key=key, reverse=reverse)
+        self._invalidate_label_index()
 
     def reverse(self):
         """
         Reverses order of |Taxon| objects in collection.
         """
         self._taxa.reverse()
+        self._invalidate_label_index()
 
     ### Summarization of Collection
 
@@ -1378,6 +1455,24 @@ class TaxonNamespace(
             # self._split_bitmask_taxon_map[m] = taxon
             return m
 
+    def taxon_bitmask_map(self):
+        """
+        Returns a dictionary mapping each |Taxon| object in the namespace to
+        its bitmask (as given by :meth:`taxon_bitmask()`).
+
+        This can be passed to :meth:`Tree.encode_bipartitions()` or
+        :meth:`Tree.encode_split_bitmasks()` when encoding many trees, so that
+        the bitmasks are calculated just once. Note that the dictionary is not
+        updated if taxa are subsequently added to the namespace.
+
+        Returns
+        -------
+        d : dict
+            A dictionary with |Taxon| objects as keys and their bitmasks as
+            values.
+        """
+        return dict((taxon, self.taxon_bitmask(taxon)) for taxon in self._taxa)
+
     def accession_index(self, taxon):
         """
         Returns the accession index of ``taxon``. Note that this may not be the
@@ -1627,6 +1722,23 @@ class TaxonSet(TaxonNamespace):
                 stacklevel=3)
         TaxonNamespace.__init__(self, *args, **kwargs)
 
+##############################################################################
+## Label Indexes
+
+def _remove_from_label_taxa_map(label_taxa_map, label, taxon):
+    """
+    Removes ``taxon`` from the list of taxa mapped to ``label`` in
+    ``label_taxa_map``, returning |True| if it was found there.
+    """
+    taxa = label_taxa_map.get(label, None)
+    if taxa is None:
+        return False
+    n = len(taxa)
+    taxa[:] = [t for t in taxa if t is not taxon]
+    if not taxa:
+        del label_taxa_map[label]
+    return len(taxa) != n
+
 ##############################################################################
 ## Taxon
 
@@ -1653,20 +1765,43 @@ class Taxon(
             label = other_taxon.label
             memo={id(other_taxon):self}
             for k in other_taxon.__dict__:
-                if k != "_annotations":
+                if k != "_annotations" and k != "_label_listeners":
                     self.__dict__[k] = copy.deepcopy(other_taxon.__dict__[k], memo=memo)
             self.deep_copy_annotations_from(other_taxon, memo=memo)
             # self.copy_annotations_from(other_taxon, attribute_object_mapper=memo)
         else:
-            basemodel.DataObject.__init__(self, label=label)
+            basemodel.DataObject.__init__(self)
+            self._label = label
             self._lower_cased_label = None
         self.comments = []
 
+    # Objects indexing this taxon by label (e.g., |TaxonNamespace| instances),
+    # held weakly and notified when the label is changed, through their
+    # ``_taxon_relabeled(taxon, old_label, old_lower_cased_label)`` method.
+    _label_listeners = None
+
+    def _add_label_listener(self, listener):
+        if self._label_listeners is None:
+            self._label_listeners = weakref.WeakSet()
+        self._label_listeners.add(listener)
+
+    def _remove_label_listener(self, listener):
+        if self._label_listeners is not None:
+            self._label_listeners.discard(listener)
+
     def _get_label(self):
         return self._label
     def _set_label(self, v):
-        self._label = v
-        self._lower_cased_label = None
+        if self._label_listeners:
+            old_label = self._label
+            old_lower_cased_label = self.lower_cased_label
+            self._label = v
+            self._lower_cased_label = None
+            for listener in list(self._label_listeners):
+                listener._taxon_relabeled(self, old_label, old_lower_cased_label)
+        else:
+            self._label = v
+            self._lower_cased_label = None
     label = property(_get_label, _set_label)
 
     def _get_lower_cased_label(self):
@@ -1696,12 +1831,17 @@ class Taxon(
             o = self.__class__.__new__(self.__class__)
             memo[id(self)] = o
         for k in self.__dict__:
-            if k != "_annotations":
+            if k != "_annotations" and k != "_label_listeners":
                 o.__dict__[k] = copy.deepcopy(self.__dict__[k], memo)
         o.deep_copy_annotations_from(self, memo)
         # o.copy_annotations_from(self, attribute_object_mapper=memo)
         return o
 
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("_label_listeners", None)
+        return state
+
     def __hash__(self):
         return id(self)
 
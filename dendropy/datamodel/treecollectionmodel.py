@@ -22,19 +22,25 @@ trees.
 """
 
 import collections
+import functools
 import math
 import copy
 import sys
+import multiprocessing
 from dendropy.utility import container
 from dendropy.utility import error
 from dendropy.utility import bitprocessing
 from dendropy.utility import deprecate
 from dendropy.utility import constants
+from dendropy.utility import textprocessing
 from dendropy.calculate import statistics
 from dendropy.datamodel import basemodel
 from dendropy.datamodel import taxonmodel
 from dendropy.datamodel import treemodel
+from dendropy.datamodel import packedsplitmodel
+from dendropy.datamodel import splitstoremodel
 from dendropy import dataio
+from dendropy.dataio import treeindex
 
 ##############################################################################
 ### TreeList
@@ -57,6 +63,7 @@ class TreeList(
             schema,
             collection_offset=None,
             tree_offset=None,
+            tree_stride=None,
             **kwargs):
         """
         Constructs a new |TreeList| object and populates it with trees from
@@ -106,6 +113,12 @@ class TreeList(
             identified using the ``tree_collection_offset`` parameter: if
             ``tree_collection_offset`` is not specified, a TypeError is raised.
 
+        tree_stride : integer or None
+            If specified, then only every ``tree_stride``-th tree (starting
+            from the tree given by ``tree_offset``) of the collection is
+            retained; e.g., a ``tree_stride`` of 100 thins the sample to every
+            100th tree.
+
         \*\*kwargs : keyword arguments
             Arguments to customize parsing, instantiation, processing, and
             accession of |Tree| objects read from the data source, including
@@ -141,6 +154,9 @@ class TreeList(
         source, there is no gain in efficiency. If you need multiple trees or
         subsets of trees from the same data source, it would be much more
         efficient to read the entire data source, and extract trees as needed.
+        The exception is when reading from a NEXUS or NEWICK file given by
+        path with ``use_tree_index=True`` (see :meth:`TreeList.get`), in which
+        case the trees that are skipped are not parsed at all.
 
         Returns
         -------
@@ -149,6 +165,9 @@ class TreeList(
         """
         # these must be pulled before passing the kwargs
         # down to the reader
+        if kwargs.pop("use_tree_index", False):
+            # only reached for sources not given by path
+            raise ValueError("'use_tree_index' requires the source to be given by 'path'")
         tree_list = kwargs.pop("tree_list", None)
         taxon_namespace = taxonmodel.process_kwargs_dict_for_taxon_namespace(kwargs, None)
         label = kwargs.pop("label", None)
@@ -160,7 +179,7 @@ class TreeList(
         if tree_list is None:
             tree_list = cls(label=label, taxon_namespace=taxon_namespace)
 
-        if collection_offset is None and tree_offset is not None:
+        if collection_offset is None and (tree_offset is not None or tree_stride is not None):
             collection_offset = 0
         if collection_offset is None:
             # if tree_offset is not None:
@@ -188,11 +207,10 @@ class TreeList(
                 #     raise IndexError("Tree offset out of range: {} (minimum offset = 0)".format(tree_offset))
                 if tree_offset >= len(target_tree_list):
                     raise IndexError("Tree offset out of range: {} (number of trees in source = {}, maximum valid tree offset = {})".format(tree_offset, len(target_tree_list), len(target_tree_list)-1))
-                for tree in target_tree_list[tree_offset:]:
-                    tree_list._trees.append(tree)
-            else:
-                for tree in target_tree_list:
-                    tree_list._trees.append(tree)
+            if tree_stride is not None and tree_stride < 1:
+                raise ValueError("Tree stride must be a positive integer: {}".format(tree_stride))
+            for tree in target_tree_list[tree_offset::tree_stride]:
+                tree_list._trees.append(tree)
         return tree_list
         # taxon_namespace = taxonmodel.process_kwargs_dict_for_taxon_namespace(kwargs, None)
         # label = kwargs.pop("label", None)
@@ -207,6 +225,32 @@ class TreeList(
         # return tree_list
     _parse_and_create_from_stream = classmethod(_parse_and_create_from_stream)
 
+    def get_from_path(cls, src, schema, **kwargs):
+        """
+        Factory method to return new |TreeList| object from file specified by
+        string ``src``.
+
+        If ``use_tree_index=True`` is passed as a keyword argument and
+        ``schema`` is "nexus", "newick" or "nexus/newick", then a
+        |TreeOffsetIndex| of the file (loaded from its sidecar file if
+        available and up-to-date, or built and saved otherwise) is used to
+        read only the tree statements selected by ``collection_offset``,
+        ``tree_offset`` and ``tree_stride``: the trees that are skipped are
+        not parsed. Otherwise, the entire file is parsed.
+        """
+        if kwargs.pop("use_tree_index", False):
+            stream = treeindex.open_indexed_tree_stream(
+                    path=src,
+                    schema=schema,
+                    collection_offset=kwargs.pop("collection_offset", None),
+                    tree_offset=kwargs.pop("tree_offset", None),
+                    tree_stride=kwargs.pop("tree_stride", None))
+            return cls._parse_and_create_from_stream(stream=stream,
+                    schema=schema,
+                    **kwargs)
+        return super(TreeList, cls).get_from_path(src=src, schema=schema, **kwargs)
+    get_from_path = classmethod(get_from_path)
+
     @classmethod
     def get(cls, **kwargs):
         """
@@ -244,6 +288,16 @@ class TreeList(
               specified, then the first tree (offset = 0) is assumed (i.e., no
               trees within the specified collection will be skipped). Use this
               to specify, e.g. a burn-in.
+            - **tree_stride** (*int*) -- If specified, only every
+              ``tree_stride``-th tree within the collection (starting from the
+              tree given by ``tree_offset``) is retained. Use this to thin a
+              sample.
+            - **use_tree_index** (*bool*) -- If |True| and the source is given
+              by **path** in the NEXUS or NEWICK schema, an index of tree
+              statement byte offsets (persisted to a sidecar file next to the
+              data file) is used to parse only the trees selected by
+              ``collection_offset``, ``tree_offset`` and ``tree_stride``. See
+              |TreeOffsetIndex| for details.
             - **ignore_unrecognized_keyword_arguments** (*bool*) -- If |True|,
               then unsupported or unrecognized keyword arguments will not
               result in an error. Default is |False|: unsupported keyword
@@ -268,6 +322,12 @@ class TreeList(
                     schema="nexus",
                     collection_offset=2,
                     tree_offset=100)
+            tlst2b = dendropy.TreeList.get(
+                    path='mcmc.trees',
+                    schema="nexus",
+                    tree_offset=1000,
+                    tree_stride=100,
+                    use_tree_index=True)
             tlst3 = dendropy.TreeList.get(
                     data="((A,B),(C,D));((A,C),(B,D));",
                     schema="newick")
@@ -1026,6 +1086,43 @@ class TreeList(
    ##############################################################################
    ## Special Calculations and Operations on Entire Collection
 
+    def encode_bipartitions(self, **kwargs):
+        """
+        Calculates the bipartitions of all the trees in the collection, using
+        a table of taxon bitmasks calculated just once for all the trees.
+
+        Keyword arguments are passed to :meth:`Tree.encode_bipartitions()`
+        for each tree.
+
+        Returns
+        -------
+        list[list[|Bipartition|]]
+            A list of the bipartition encodings of the trees (or of |None|
+            values, if ``suppress_storage`` is |True|).
+        """
+        if kwargs.get("taxon_bitmask_map", None) is None:
+            kwargs["taxon_bitmask_map"] = self.taxon_namespace.taxon_bitmask_map()
+        return [tree.encode_bipartitions(**kwargs) for tree in self._trees]
+
+    def encode_split_bitmasks(self, **kwargs):
+        """
+        Calculates the split bitmasks of all the trees in the collection,
+        without creating |Bipartition| objects, using a table of taxon
+        bitmasks calculated just once for all the trees.
+
+        Keyword arguments are passed to :meth:`Tree.encode_split_bitmasks()`
+        for each tree.
+
+        Returns
+        -------
+        list[list[int]]
+            A list of the split bitmasks of each tree, in the same order as
+            the bipartitions that :meth:`encode_bipartitions()` would encode.
+        """
+        if kwargs.get("taxon_bitmask_map", None) is None:
+            kwargs["taxon_bitmask_map"] = self.taxon_namespace.taxon_bitmask_map()
+        return [tree.encode_split_bitmasks(**kwargs)[0] for tree in self._trees]
+
     def _get_tree_array(self,
             kwargs_dict,
             ):
@@ -1120,6 +1217,9 @@ class TreeList(
                 include_external_splits=include_external_splits,
                 )
         tree = self[max_score_tree_idx]
+        # the splits of the trees are counted without encoding their
+        # bipartitions: encode those of the tree returned
+        tree.encode_bipartitions()
         if score_attr is not None:
             setattr(tree, score_attr, scores[max_score_tree_idx])
         return tree
@@ -1149,6 +1249,9 @@ class TreeList(
                 include_external_splits=include_external_splits,
                 )
         tree = self[max_score_tree_idx]
+        # the splits of the trees are counted without encoding their
+        # bipartitions: encode those of the tree returned
+        tree.encode_bipartitions()
         if score_attr is not None:
             setattr(tree, score_attr, scores[max_score_tree_idx])
         return tree
@@ -1226,6 +1329,7 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
     """
 
     SUMMARY_STATS_FIELDNAMES = ('mean', 'median', 'sd', 'hpd95', 'quant_5_95', 'range')
+    SPLIT_STORE_FLUSH_INTERVAL = 1000
 
     def __init__(self,
             taxon_namespace=None,
@@ -1234,7 +1338,37 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             use_tree_weights=True,
             ultrametricity_precision=constants.DEFAULT_ULTRAMETRICITY_PRECISION,
             is_force_max_age=False,
-            taxon_label_age_map=None):
+            taxon_label_age_map=None,
+            streaming_summaries=False,
+            streaming_summary_sample_size=None):
+        """
+        Parameters
+        ----------
+        taxon_namespace : |TaxonNamespace|
+            The operational taxonomic unit concept namespace to manage taxon
+            references.
+        ignore_edge_lengths : bool
+            If |True|, then edge lengths of splits will not be stored.
+        ignore_node_ages : bool
+            If |True|, then node ages of splits will not be stored.
+        use_tree_weights : bool
+            If |False|, then tree weights will not be used to weight splits.
+        streaming_summaries : bool
+            If |True|, then instead of keeping lists of all the edge lengths
+            and node ages of each split, only summaries of these are kept, in
+            bounded memory, as |StreamingSummary| objects (which are then
+            the values of ``split_edge_lengths`` and ``split_node_ages``).
+            The means, standard deviations and ranges of the summaries
+            given by ``split_edge_length_summaries`` and
+            ``split_node_age_summaries`` are exact, while the medians,
+            quantiles and HPD intervals are approximations (see
+            |StreamingSummary| for the bounds) for splits found on more than
+            ``streaming_summary_sample_size`` trees.
+        streaming_summary_sample_size : int
+            If ``streaming_summaries`` is |True|, the maximum number of edge
+            lengths and node ages sampled for each split. Defaults to
+            ``StreamingSummary.DEFAULT_SAMPLE_SIZE``.
+        """
 
         # Taxon Namespace
         taxonmodel.TaxonNamespaceAssociated.__init__(self,
@@ -1245,14 +1379,20 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
         self.ignore_node_ages = ignore_node_ages
         self.use_tree_weights = use_tree_weights
         self.ultrametricity_precision = ultrametricity_precision
+        self.streaming_summaries = streaming_summaries
+        self.streaming_summary_sample_size = streaming_summary_sample_size
 
         # storage/function
         self.total_trees_counted = 0
         self.sum_of_tree_weights = 0.0
         self.tree_rooting_types_counted = set()
-        self.split_counts = collections.defaultdict(float)
-        self.split_edge_lengths = collections.defaultdict(list)
-        self.split_node_ages = collections.defaultdict(list)
+        self._split_counts = collections.defaultdict(float)
+        self._split_edge_lengths = self._new_split_values_map()
+        self._split_node_ages = self._new_split_values_map()
+        self._split_store = None
+        self._stored_split_edge_lengths = None
+        self._stored_split_node_ages = None
+        self._trees_counted_at_split_store_flush = 0
         self.is_force_max_age = is_force_max_age
         self.is_force_min_age = False
         self.taxon_label_age_map = taxon_label_age_map
@@ -1315,9 +1455,41 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
         self._is_rooted = not val
     is_unrooted = property(_get_is_unrooted, _set_is_unrooted)
 
+    def _new_split_values_map(self):
+        if self.streaming_summaries:
+            return collections.defaultdict(functools.partial(
+                statistics.StreamingSummary,
+                sample_size=self.streaming_summary_sample_size))
+        else:
+            return collections.defaultdict(list)
+
     ###########################################################################
     ### Split Counting and Book-Keeping
 
+    def _get_split_counts(self):
+        return self._split_counts
+    def _set_split_counts(self, split_counts):
+        self._split_counts = split_counts
+    split_counts = property(_get_split_counts, _set_split_counts)
+
+    def _get_split_edge_lengths(self):
+        if self._split_store is not None:
+            self.flush_split_store()
+            return self._stored_split_edge_lengths
+        return self._split_edge_lengths
+    def _set_split_edge_lengths(self, split_edge_lengths):
+        self._split_edge_lengths = split_edge_lengths
+    split_edge_lengths = property(_get_split_edge_lengths, _set_split_edge_lengths)
+
+    def _get_split_node_ages(self):
+        if self._split_store is not None:
+            self.flush_split_store()
+            return self._stored_split_node_ages
+        return self._split_node_ages
+    def _set_split_node_ages(self, split_node_ages):
+        self._split_node_ages = split_node_ages
+    split_node_ages = property(_get_split_node_ages, _set_split_node_ages)
+
     def add_split_count(self, split, count=1):
         self.split_counts[split] += count
 
@@ -1338,6 +1510,50 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             updated. Otherwise, if |True|, then the tree is assumed to have its
             splits already encoded and updated.
 
+        Returns
+        --------
+        s : iterable of splits
+            A list of split bitmasks from ``tree``.
+        e :
+            A list of edge length values from ``tree``.
+        a :
+            A list of node age values from ``tree``.
+        """
+        assert tree.taxon_namespace is self.taxon_namespace
+        if not is_bipartitions_updated:
+            tree.encode_bipartitions()
+        bipartition_edge_map = tree.bipartition_edge_map
+        split_bitmasks = []
+        edges = []
+        for bipartition in tree.bipartition_encoding:
+            split_bitmasks.append(bipartition.split_bitmask)
+            edges.append(bipartition_edge_map[bipartition])
+        return self.count_split_bitmasks_on_tree(
+                tree=tree,
+                split_bitmasks=split_bitmasks,
+                edges=edges,
+                default_edge_length_value=default_edge_length_value)
+
+    def count_split_bitmasks_on_tree(self,
+            tree,
+            split_bitmasks,
+            edges,
+            default_edge_length_value=None):
+        """
+        Counts splits in this tree, given as split bitmasks and their
+        corresponding edges (as returned by :meth:`Tree.encode_split_bitmasks()`),
+        and add to totals. This avoids the creation of |Bipartition| objects
+        for the tree.
+
+        Parameters
+        ----------
+        tree : a |Tree| object.
+            The tree on which to count the splits.
+        split_bitmasks : list[int]
+            The split bitmasks of ``tree``.
+        edges : list[|Edge|]
+            The edges of ``tree`` corresponding to ``split_bitmasks``.
+
         Returns
         --------
         s : iterable of splits
@@ -1369,22 +1585,29 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             self.tree_rooting_types_counted.add(True)
         else:
             self.tree_rooting_types_counted.add(False)
-        if not is_bipartitions_updated:
-            tree.encode_bipartitions()
+        result = self._count_splits_on_tree(
+                split_bitmasks=split_bitmasks,
+                edges=edges,
+                weight_to_use=weight_to_use,
+                default_edge_length_value=default_edge_length_value)
+        if (self._split_store is not None
+                and self.total_trees_counted - self._trees_counted_at_split_store_flush >= self.SPLIT_STORE_FLUSH_INTERVAL):
+            self.flush_split_store()
+        return result
+
+    def _count_splits_on_tree(self,
+            split_bitmasks,
+            edges,
+            weight_to_use,
+            default_edge_length_value):
         splits = []
         edge_lengths = []
         node_ages = []
-        for bipartition in tree.bipartition_encoding:
-            split = bipartition.split_bitmask
-
-            ## if edge is stored as an attribute, might be faster to:
-            # edge = bipartition.edge
-            edge = tree.bipartition_edge_map[bipartition]
-
+        for split, edge in zip(split_bitmasks, edges):
             splits.append(split)
-            self.split_counts[split] += weight_to_use
+            self._split_counts[split] += weight_to_use
             if not self.ignore_edge_lengths:
-                sel = self.split_edge_lengths.setdefault(split,[])
+                sel = self._split_edge_lengths[split]
                 if edge.length is None:
                     elen = default_edge_length_value
                 else:
@@ -1394,7 +1617,7 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             else:
                 sel = None
             if not self.ignore_node_ages:
-                sna = self.split_node_ages.setdefault(split, [])
+                sna = self._split_node_ages[split]
                 if edge.head_node is not None:
                     nage = edge.head_node.age
                 else:
@@ -1405,6 +1628,120 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
                 sna = None
         return splits, edge_lengths, node_ages
 
+    def attach_split_store(self, split_store):
+        """
+        Attaches a persistent, on-disk store of split counts, edge lengths
+        and node ages to this (empty) split distribution.
+
+        The counts and tree totals already in the store are loaded, and the
+        taxa of the store are added to the taxon namespace if needed. The
+        edge lengths and node ages of the splits of trees counted
+        subsequently are periodically flushed to the store (every
+        ``SPLIT_STORE_FLUSH_INTERVAL`` trees, or when
+        :meth:`flush_split_store()` is called, or the store is closed), so
+        that they do not accumulate in memory; the split counts remain in
+        memory. While a store is attached,
+        ``split_edge_lengths`` and ``split_node_ages`` are dictionary-like
+        views of the values on disk (see |StoredSplitValues|).
+
+        Parameters
+        ----------
+        split_store : |SplitStore|
+            The store to attach.
+        """
+        if self._split_store is not None:
+            raise ValueError("A split store is already attached")
+        if self.streaming_summaries:
+            raise ValueError("A split store cannot be attached to a split distribution with streaming summaries")
+        if self.total_trees_counted or self._split_counts:
+            raise ValueError("A split store can only be attached to an empty split distribution")
+        split_store.bind_split_distribution(self)
+        split_store.bind_configuration(
+                ignore_edge_lengths=self.ignore_edge_lengths,
+                ignore_node_ages=self.ignore_node_ages,
+                use_tree_weights=self.use_tree_weights)
+        split_store.bind_taxon_namespace(self.taxon_namespace)
+        self._split_counts.update(split_store.split_counts())
+        self.total_trees_counted = split_store.get_metadata("total_trees_counted", 0)
+        self.sum_of_tree_weights = split_store.get_metadata("sum_of_tree_weights", 0.0)
+        self.tree_rooting_types_counted.update(split_store.get_metadata("tree_rooting_types_counted", []))
+        self._split_store = split_store
+        self._stored_split_edge_lengths = splitstoremodel.StoredSplitValues(split_store, "edge_length")
+        self._stored_split_node_ages = splitstoremodel.StoredSplitValues(split_store, "node_age")
+        self._trees_counted_at_split_store_flush = self.total_trees_counted
+        split_store.commit()
+
+    def _get_split_store(self):
+        return self._split_store
+    split_store = property(_get_split_store)
+
+    def flush_split_store(self):
+        """
+        Writes the split counts and tree totals to the attached split store,
+        moves the edge lengths and node ages of the splits of trees counted
+        since the last flush from memory to the store, and commits.
+        """
+        if self._split_store is None:
+            raise ValueError("No split store attached")
+        if (self.total_trees_counted == self._trees_counted_at_split_store_flush
+                and not self._split_edge_lengths
+                and not self._split_node_ages):
+            return
+        split_store = self._split_store
+        split_store.bind_taxon_namespace(self.taxon_namespace)
+        split_store.write_split_counts(self._split_counts)
+        split_store.append_split_values("edge_length", self._split_edge_lengths)
+        split_store.append_split_values("node_age", self._split_node_ages)
+        self._split_edge_lengths = collections.defaultdict(list)
+        self._split_node_ages = collections.defaultdict(list)
+        split_store.set_metadata("total_trees_counted", self.total_trees_counted)
+        split_store.set_metadata("sum_of_tree_weights", self.sum_of_tree_weights)
+        split_store.set_metadata("tree_rooting_types_counted", list(self.tree_rooting_types_counted))
+        split_store.commit()
+        self._trees_counted_at_split_store_flush = self.total_trees_counted
+
+    def clear(self):
+        """
+        Discards all the trees counted, with their split counts, edge lengths
+        and node ages.
+        """
+        if self._split_store is not None:
+            raise ValueError("Cannot clear a split distribution with an attached split store")
+        self.total_trees_counted = 0
+        self.sum_of_tree_weights = 0.0
+        self.tree_rooting_types_counted = set()
+        self._split_counts = collections.defaultdict(float)
+        self._split_edge_lengths = self._new_split_values_map()
+        self._split_node_ages = self._new_split_values_map()
+        self._split_freqs = None
+        self._trees_counted_for_freqs = 0
+        self._split_edge_length_summaries = None
+        self._split_node_age_summaries = None
+        self._trees_counted_for_summaries = 0
+
+    def take_counts(self):
+        """
+        Moves the trees counted so far, with their split counts, edge lengths
+        and node ages, to a new |SplitDistribution| (with the same
+        configuration and taxon namespace), which is returned, leaving this
+        one empty.
+
+        This allows counts collected in one place (e.g., a worker process) to
+        be passed on in batches, as they are collected, to be combined
+        elsewhere using :meth:`update()`. The returned split distribution
+        holds only what was counted since the last call, so its size is
+        bounded by the number of unique splits in the batch, and not by the
+        number of trees.
+
+        Returns
+        -------
+        s : |SplitDistribution|
+            A split distribution with the counts of this one.
+        """
+        taken = copy.copy(self)
+        self.clear()
+        return taken
+
     def splits_considered(self):
         """
         Returns 4 values:
@@ -1457,10 +1794,24 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
         self._split_node_age_summaries = None
         self._trees_counted_for_summaries = 0
         self.tree_rooting_types_counted.update(split_dist.tree_rooting_types_counted)
+        if split_dist.streaming_summaries and not self.streaming_summaries:
+            raise ValueError("Cannot update a split distribution from one with streaming summaries")
         for split in split_dist.split_counts:
             self.split_counts[split] += split_dist.split_counts[split]
-            self.split_edge_lengths[split] += split_dist.split_edge_lengths[split]
-            self.split_node_ages[split] += split_dist.split_node_ages[split]
+            if self.streaming_summaries:
+                for values, other_values in (
+                        (self.split_edge_lengths, split_dist.split_edge_lengths),
+                        (self.split_node_ages, split_dist.split_node_ages),
+                        ):
+                    if split not in other_values:
+                        continue
+                    if split_dist.streaming_summaries:
+                        values[split].update(other_values[split])
+                    else:
+                        values[split].extend(other_values[split])
+            else:
+                self.split_edge_lengths[split] += split_dist.split_edge_lengths[split]
+                self.split_node_ages[split] += split_dist.split_node_ages[split]
 
     ###########################################################################
     ### Basic Information Access
@@ -1563,7 +1914,10 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             if not elens:
                 continue
             try:
-                self._split_edge_length_summaries[split] = statistics.summarize(elens)
+                if self.streaming_summaries:
+                    self._split_edge_length_summaries[split] = elens.summarize()
+                else:
+                    self._split_edge_length_summaries[split] = statistics.summarize(elens)
             except ValueError:
                 pass
         return self._split_edge_length_summaries
@@ -1574,7 +1928,10 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             if not ages:
                 continue
             try:
-                self._split_node_age_summaries[split] = statistics.summarize(ages)
+                if self.streaming_summaries:
+                    self._split_node_age_summaries[split] = ages.summarize()
+                else:
+                    self._split_node_age_summaries[split] = statistics.summarize(ages)
             except ValueError:
                 pass
         return self._split_node_age_summaries
@@ -2098,6 +2455,20 @@ class SplitDistributionSummarizer(object):
 ###############################################################################
 ### TreeArray
 
+def _read_tree_array_task(task):
+    """
+    Worker function for :meth:`TreeArray.parallel_read_from_path`: reads the
+    trees in the given byte ranges of a file into a new |TreeArray| on a
+    (frozen) |TaxonNamespace| with the given taxon labels.
+    """
+    path, segments, encoding, schema, taxon_labels, tree_array_kwargs, reader_kwargs = task
+    taxon_namespace = taxonmodel.TaxonNamespace(taxon_labels)
+    taxon_namespace.is_mutable = False
+    tree_array = TreeArray(taxon_namespace=taxon_namespace, **tree_array_kwargs)
+    stream = textprocessing.StringIO(treeindex.read_byte_segments(path, segments, encoding))
+    tree_array.read_from_files(files=[stream], schema=schema, **reader_kwargs)
+    return tree_array
+
 class TreeArray(
         taxonmodel.TaxonNamespaceAssociated,
         basemodel.MultiReadable,
@@ -2139,6 +2510,8 @@ class TreeArray(
             is_force_max_age=None,
             taxon_label_age_map=None,
             is_bipartitions_updated=False,
+            streaming_summaries=False,
+            streaming_summary_sample_size=None,
             ):
         taxon_namespace = trees.taxon_namespace
         ta = cls(
@@ -2150,6 +2523,8 @@ class TreeArray(
             ultrametricity_precision=ultrametricity_precision,
             is_force_max_age=is_force_max_age,
             taxon_label_age_map=taxon_label_age_map,
+            streaming_summaries=streaming_summaries,
+            streaming_summary_sample_size=streaming_summary_sample_size,
             )
         ta.add_trees(
                 trees=trees,
@@ -2168,6 +2543,8 @@ class TreeArray(
             ultrametricity_precision=constants.DEFAULT_ULTRAMETRICITY_PRECISION,
             is_force_max_age=None,
             taxon_label_age_map=None,
+            streaming_summaries=False,
+            streaming_summary_sample_size=None,
             ):
         """
         Parameters
@@ -2188,6 +2565,14 @@ class TreeArray(
             |False|, then node ages will be stored.
         use_tree_weights : bool
             If |False|, then tree weights will not be used to weight splits.
+        streaming_summaries : bool
+            If |True|, then the split distribution keeps bounded-memory
+            summaries of the edge lengths and node ages of splits instead of
+            lists of all the values (see |SplitDistribution| and
+            |StreamingSummary|).
+        streaming_summary_sample_size : int
+            If ``streaming_summaries`` is |True|, the maximum number of edge
+            lengths and node ages sampled for each split.
         """
         taxonmodel.TaxonNamespaceAssociated.__init__(self,
                 taxon_namespace=taxon_namespace)
@@ -2213,6 +2598,8 @@ class TreeArray(
                 ultrametricity_precision=ultrametricity_precision,
                 is_force_max_age=is_force_max_age,
                 taxon_label_age_map=self.taxon_label_age_map,
+                streaming_summaries=streaming_summaries,
+                streaming_summary_sample_size=streaming_summary_sample_size,
                 )
 
     ##############################################################################
@@ -2240,6 +2627,23 @@ class TreeArray(
                 tree_rooting=t,
                 tree_array_rooting=ta))
 
+    def attach_split_store(self, split_store):
+        """
+        Attaches a persistent, on-disk store of split counts, edge lengths
+        and node ages to the (empty) split distribution of this collection
+        (see :meth:`SplitDistribution.attach_split_store()`). Note that only
+        the trees added subsequently are held in this collection, while the
+        split distribution covers all the trees counted into the store.
+
+        Parameters
+        ----------
+        split_store : |SplitStore|
+            The store to attach.
+        """
+        self._split_distribution.attach_split_store(split_store)
+        for is_rooted in self._split_distribution.tree_rooting_types_counted:
+            self.validate_rooting(is_rooted)
+
     ##############################################################################
     ## Updating from Another TreeArray
 
@@ -2265,6 +2669,23 @@ class TreeArray(
         self._tree_weights.extend(other._tree_weights)
         self._split_distribution.update(other._split_distribution)
 
+    def update_split_distribution(self, split_distribution):
+        """
+        Adds the split counts, edge lengths and node ages of
+        ``split_distribution`` (e.g., as given by
+        :meth:`SplitDistribution.take_counts()`) to the split distribution
+        of this collection, without adding any trees to it.
+
+        Parameters
+        ----------
+        split_distribution : |SplitDistribution|
+            Split distribution of trees with the same rooting as those of this
+            collection, counted on the same taxa.
+        """
+        for rooting in split_distribution.tree_rooting_types_counted:
+            self.validate_rooting(rooting)
+        self._split_distribution.update(split_distribution)
+
     ##############################################################################
     ## Fundamental Tree Accession
 
@@ -2305,6 +2726,39 @@ class TreeArray(
                 tree=tree,
                 is_bipartitions_updated=is_bipartitions_updated,
                 default_edge_length_value=self.default_edge_length_value)
+        return self._accession_tree_splits(
+                tree=tree,
+                splits=splits,
+                edge_lengths=edge_lengths,
+                tree_leafset_bitmask=tree.seed_node.edge.bipartition.leafset_bitmask,
+                index=index)
+
+    def _add_tree_split_bitmasks(self, tree, taxon_bitmask_map):
+        # Bulk path of `add_trees()`: counts the splits of ``tree`` without
+        # creating |Bipartition| objects.
+        if self.taxon_namespace is not tree.taxon_namespace:
+            raise error.TaxonNamespaceIdentityError(self, tree)
+        self.validate_rooting(tree.is_rooted)
+        split_bitmasks, edges, tree_leafset_bitmask = tree.encode_split_bitmasks(
+                taxon_bitmask_map=taxon_bitmask_map)
+        splits, edge_lengths, node_ages = self._split_distribution.count_split_bitmasks_on_tree(
+                tree=tree,
+                split_bitmasks=split_bitmasks,
+                edges=edges,
+                default_edge_length_value=self.default_edge_length_value)
+        return self._accession_tree_splits(
+                tree=tree,
+                splits=splits,
+                edge_lengths=edge_lengths,
+                tree_leafset_bitmask=tree_leafset_bitmask,
+                index=None)
+
+    def _accession_tree_splits(self,
+            tree,
+            splits,
+            edge_lengths,
+            tree_leafset_bitmask,
+            index):
 
         # pre-process splits
         splits = tuple(splits)
@@ -2327,13 +2781,12 @@ class TreeArray(
         if index is None:
             index = len(self._tree_split_bitmasks)
             self._tree_split_bitmasks.append(splits)
-            self._tree_leafset_bitmasks.append(tree.seed_node.edge.bipartition.leafset_bitmask)
+            self._tree_leafset_bitmasks.append(tree_leafset_bitmask)
             self._tree_edge_lengths.append(edge_lengths)
             self._tree_weights.append(weight_to_use)
         else:
             self._tree_split_bitmasks.insert(index, splits)
-            self._tree_leafset_bitmasks.insert(index,
-                    tree.seed_node.edge.bipartition.leafset_bitmask)
+            self._tree_leafset_bitmasks.insert(index, tree_leafset_bitmask)
             self._tree_edge_lengths.insert(index, edge_lengths)
             self._tree_weights.insert(index, weight_to_use)
         return index, splits, edge_lengths, weight_to_use
@@ -2351,14 +2804,23 @@ class TreeArray(
             have the same rooting state as all the other trees accessioned into
             this collection as well as that of ``self.is_rooted_trees``.
         is_bipartitions_updated : bool
-            If |False| [default], then the tree will have its splits encoded or
-            updated. Otherwise, if |True|, then the tree is assumed to have its
-            splits already encoded and updated.
-
-        """
-        for tree in trees:
-            self.add_tree(tree,
-                    is_bipartitions_updated=is_bipartitions_updated)
+            If |False| [default], then the split bitmasks of the trees will be
+            calculated, using a table of taxon bitmasks calculated just once
+            for all the trees, and without creating |Bipartition| objects
+            (see :meth:`Tree.encode_split_bitmasks()`): note that the
+            bipartitions of the trees are then *not* encoded. Otherwise, if
+            |True|, then the trees are assumed to have their bipartitions
+            already encoded and updated.
+
+        """
+        if is_bipartitions_updated:
+            for tree in trees:
+                self.add_tree(tree,
+                        is_bipartitions_updated=is_bipartitions_updated)
+        else:
+            taxon_bitmask_map = self.taxon_namespace.taxon_bitmask_map()
+            for tree in trees:
+                self._add_tree_split_bitmasks(tree, taxon_bitmask_map)
 
     ##############################################################################
     ## I/O
@@ -2396,15 +2858,122 @@ class TreeArray(
                 **kwargs)
         current_source_index = None
         current_tree_offset = None
+        taxon_bitmask_map = self.taxon_namespace.taxon_bitmask_map()
         for tree_idx, tree in enumerate(tree_yielder):
             current_yielder_index = tree_yielder.current_file_index
             if current_source_index != current_yielder_index:
                 current_source_index = current_yielder_index
                 current_tree_offset = 0
             if current_tree_offset >= target_tree_offset:
-                self.add_tree(tree=tree, is_bipartitions_updated=False)
+                self._add_tree_split_bitmasks(tree, taxon_bitmask_map)
             current_tree_offset += 1
 
+    def parallel_read_from_path(self,
+            path,
+            schema,
+            num_processes=None,
+            tree_offset=0,
+            trees_per_task=None,
+            **kwargs):
+        """
+        Adds structures from a single NEXUS or NEWICK file to the collection,
+        parsing the trees in multiple processes.
+
+        A |TreeOffsetIndex| of the file is used to split the trees into runs
+        of consecutive tree statements. Each run is read by a worker process
+        directly from (a memory-mapped view of) the corresponding byte ranges
+        of the file, together with the "skeleton" of the file (e.g., TAXA
+        blocks and TRANSLATE statements), and the resulting collections are
+        merged into this one in file order. The result is thus the same as
+        that of :meth:`TreeArray.read_from_files` on the same file, but the
+        parsing and split encoding scales with the number of processes.
+
+        The taxa are defined before the workers are launched, based on the
+        skeleton of the file and the first tree to be read (so, e.g., for
+        NEWICK sources, the first tree must reference all the taxa).
+
+        Parameters
+        ----------
+        path : string
+            Path to the source file.
+        schema : string
+            The data format of the source: "nexus", "newick", or
+            "nexus/newick".
+        num_processes : integer or None
+            Number of worker processes. If |None|, the number of CPUs.
+        tree_offset : integer
+            Number of trees at the beginning of the file to skip (e.g., as a
+            burn-in).
+        trees_per_task : integer or None
+            Number of trees to parse in each unit of work handed to a worker.
+            If |None|, the trees will be split into four tasks per worker
+            process.
+        \*\*kwargs : keyword arguments
+            These will be passed directly to the underlying schema-specific
+            reader implementation.
+
+        Returns
+        -------
+        n : integer
+            The number of trees added.
+        """
+        if "taxon_namespace" in kwargs:
+            if kwargs["taxon_namespace"] is not self.taxon_namespace:
+                raise ValueError("TaxonNamespace object passed as keyword argument is not the same as self's TaxonNamespace reference")
+            kwargs.pop("taxon_namespace")
+        reader_schema = schema
+        if schema.lower() == "nexus/newick":
+            reader_schema = "newick"
+        if num_processes is None:
+            num_processes = multiprocessing.cpu_count()
+        with treeindex.TreeOffsetIndex.get(path=path) as tree_index:
+            if schema.lower() == "nexus/newick" and tree_index.is_nexus:
+                reader_schema = "nexus"
+            tree_indexes = tree_index.select()[tree_offset:]
+            if not tree_indexes:
+                return 0
+            # define taxa
+            self.tree_type.get(
+                    file=tree_index.open_stream(tree_indexes[:1]),
+                    schema=reader_schema,
+                    taxon_namespace=self.taxon_namespace,
+                    **kwargs)
+            if trees_per_task is None:
+                parts = tree_index.partition(tree_indexes, num_parts=num_processes * 4)
+            else:
+                parts = tree_index.partition(tree_indexes, part_size=trees_per_task)
+            tree_array_kwargs = {
+                    "is_rooted_trees": self._is_rooted_trees,
+                    "ignore_edge_lengths": self.ignore_edge_lengths,
+                    "ignore_node_ages": self.ignore_node_ages,
+                    "use_tree_weights": self.use_tree_weights,
+                    "ultrametricity_precision": self._split_distribution.ultrametricity_precision,
+                    "is_force_max_age": self._split_distribution.is_force_max_age,
+                    "taxon_label_age_map": self.taxon_label_age_map,
+                    "streaming_summaries": self._split_distribution.streaming_summaries,
+                    "streaming_summary_sample_size": self._split_distribution.streaming_summary_sample_size,
+                    }
+            taxon_labels = [taxon.label for taxon in self.taxon_namespace]
+            tasks = [(path,
+                    tree_index.byte_segments(part),
+                    tree_index.encoding,
+                    reader_schema,
+                    taxon_labels,
+                    tree_array_kwargs,
+                    kwargs) for part in parts]
+        cur_size = len(self._tree_split_bitmasks)
+        pool = multiprocessing.Pool(processes=min(num_processes, len(tasks)))
+        try:
+            for result in pool.imap(_read_tree_array_task, tasks):
+                self.update(result)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        return len(self._tree_split_bitmasks) - cur_size
+
     def _parse_and_add_from_stream(self,
             stream,
             schema,
@@ -2589,6 +3158,8 @@ class TreeArray(
                 ignore_node_ages=self.ignore_node_ages,
                 use_tree_weights=self.use_tree_weights,
                 ultrametricity_precision=self._split_distribution.ultrametricity_precision,
+                streaming_summaries=self._split_distribution.streaming_summaries,
+                streaming_summary_sample_size=self._split_distribution.streaming_summary_sample_size,
                 )
         ta.default_edge_length_value = self.default_edge_length_value
         ta.tree_type = self.tree_type
@@ -2638,10 +3209,10 @@ class TreeArray(
         raise NotImplementedError
 
     def clear(self):
-        raise NotImplementedError
         self._tree_split_bitmasks = []
         self._tree_edge_lengths = []
         self._tree_leafset_bitmasks = []
+        self._tree_weights = []
         self._split_distribution.clear()
 
     def index(self, splits):
@@ -2670,6 +3241,31 @@ class TreeArray(
         """
         return self._tree_split_bitmasks[index], self._tree_edge_lengths[index]
 
+    def packed_split_matrix(self):
+        """
+        Returns the splits of all the trees in the collection as a
+        |PackedSplitMatrix|, i.e., as rows of a packed ``uint64`` matrix with
+        one row per split. Requires NumPy.
+
+        The matrix is a copy, built from the split bitmasks of the
+        collection, which are themselves kept (and counted, by the
+        |SplitDistribution| of the collection) as Python integers: the
+        trees produce their splits as integers, and converting each of
+        these to the packed form as it is counted costs more than it saves.
+
+        Returns
+        -------
+        m : |PackedSplitMatrix|
+            The splits, weights and edge lengths of the trees, packed into
+            fixed-width words sized to the taxon namespace.
+        """
+        num_bits = max(len(self.taxon_namespace), bitprocessing.bit_length(max(self._tree_leafset_bitmasks or [0])))
+        return packedsplitmodel.PackedSplitMatrix.from_split_bitmask_sets(
+                split_bitmask_sets=self._tree_split_bitmasks,
+                tree_weights=self._tree_weights,
+                edge_length_sets=self._tree_edge_lengths,
+                num_words=packedsplitmodel.num_words_for_bits(num_bits))
+
     ##############################################################################
     ## Calculations
 
@@ -2894,6 +3490,105 @@ class TreeArray(
             **kwargs
             )
 
+    ##############################################################################
+    ## Tree-to-Tree Distances
+
+    def split_incidence_matrix(self, use_edge_lengths=False):
+        """
+        Returns the splits of all the trees in the collection as a
+        |SplitIncidenceMatrix|, i.e., a sparse tree-by-split matrix based on
+        a single table of split IDs. Requires NumPy.
+
+        Parameters
+        ----------
+        use_edge_lengths : bool
+            If |True|, then the edge length of each split is stored as its
+            value. Otherwise, all values are 1.0.
+
+        Returns
+        -------
+        m : |SplitIncidenceMatrix|
+            The split incidence matrix of the trees in the collection.
+        """
+        if use_edge_lengths:
+            if self.ignore_edge_lengths:
+                raise ValueError("Edge lengths are not stored in this TreeArray ('ignore_edge_lengths' is True)")
+            value_sets = self._tree_edge_lengths
+        else:
+            value_sets = None
+        return packedsplitmodel.SplitIncidenceMatrix(
+                split_bitmask_sets=self._tree_split_bitmasks,
+                value_sets=value_sets)
+
+    def robinson_foulds_distance_matrix(self,
+            num_processes=1,
+            rows_per_task=None):
+        """
+        Returns the *unweighted* Robinson-Foulds distance (symmetric
+        difference) between every pair of trees in the collection.
+
+        The splits of each tree are encoded only once, when the tree is added
+        to the collection, and the distances are calculated in bulk using a
+        |SplitIncidenceMatrix|, rather than by comparing each pair of trees
+        as, e.g., :func:`treecompare.symmetric_difference()` does.
+        Requires NumPy.
+
+        Parameters
+        ----------
+        num_processes : integer or None
+            Number of worker processes over which to spread blocks of rows
+            of the matrix. If 1 [default], then no worker processes are used.
+            If |None|, the number of CPUs.
+        rows_per_task : integer or None
+            Number of rows in each block handed to a worker process. If
+            |None|, the rows will be split into four blocks per worker
+            process.
+
+        Returns
+        -------
+        m : :py:class:`numpy.ndarray`
+            Symmetric matrix of shape ``(len(self), len(self))``, with element
+            ``[i, j]`` being the distance between trees ``i`` and ``j``.
+        """
+        return self.split_incidence_matrix(use_edge_lengths=False).distance_matrix(
+                metric="symmetric_difference",
+                num_processes=num_processes,
+                rows_per_task=rows_per_task)
+
+    def weighted_robinson_foulds_distance_matrix(self,
+            num_processes=1,
+            rows_per_task=None):
+        """
+        Returns the *weighted* Robinson-Foulds distance (based on edge lengths)
+        between every pair of trees in the collection, as by
+        :func:`treecompare.weighted_robinson_foulds_distance()`. Edge lengths
+        must not be ignored by the collection. Requires NumPy.
+
+        See :meth:`TreeArray.robinson_foulds_distance_matrix()` for
+        parameters and return value.
+        """
+        return self.split_incidence_matrix(use_edge_lengths=True).distance_matrix(
+                metric="weighted_robinson_foulds",
+                num_processes=num_processes,
+                rows_per_task=rows_per_task)
+
+    def euclidean_distance_matrix(self,
+            num_processes=1,
+            rows_per_task=None):
+        """
+        Returns the Euclidean distance (a.k.a. Felsenstein's 2004 "branch
+        length distance") between every pair of trees in the collection, as
+        by :func:`treecompare.euclidean_distance()`. Edge lengths must not
+        be ignored by the collection. Requires NumPy.
+
+        See :meth:`TreeArray.robinson_foulds_distance_matrix()` for
+        parameters and return value.
+        """
+        return self.split_incidence_matrix(use_edge_lengths=True).distance_matrix(
+                metric="euclidean",
+                num_processes=num_processes,
+                rows_per_task=rows_per_task)
+
     ##############################################################################
     ## Tree Reconstructions
 
@@ -37,6 +37,7 @@ from dendropy.utility import textprocessing
 from dendropy.datamodel import basemodel
 from dendropy.datamodel import taxonmodel
 from dendropy import dataio
+from dendropy.dataio import treeindex
 
 ##############################################################################
 ### Bipartition
@@ -863,6 +864,7 @@ class Edge(
         new_head_node = old_tail_node
         grandparent = old_tail_node._parent_node
         if grandparent is not None:
+            grandparent._mark_structure_changed()
             for idx, ch in enumerate(grandparent._child_nodes):
                 if ch is old_tail_node:
                     grandparent._child_nodes[idx] = old_head_node
@@ -881,9 +883,31 @@ class Edge(
     ###########################################################################
     ### Bipartition Management
 
+    def bipartition_factory(cls, **kwargs):
+        """
+        Creates and returns a |Bipartition| object.
+
+        Derived classes can override this method to provide support for
+        specialized or different types of bipartitions on the edge.
+
+        Parameters
+        ----------
+
+        \*\*kwargs : keyword arguments
+            Passed directly to constructor of |Bipartition|.
+
+        Returns
+        -------
+        |Bipartition|
+            A new |Bipartition| object.
+
+        """
+        return Bipartition(**kwargs)
+    bipartition_factory = classmethod(bipartition_factory)
+
     def _get_bipartition(self):
         if self._bipartition is None:
-            self._bipartition = Bipartition(
+            self._bipartition = self.bipartition_factory(
                     edge=self,
                     is_mutable=True,
                     )
@@ -998,12 +1022,47 @@ class Node(
         self._edge = None
         self._child_nodes = []
         self._parent_node = None
-        self.edge = Edge(head_node=self,
+        self._structure_stamp = None
+        self.edge = self.edge_factory(head_node=self,
                 length=kwargs.pop("edge_length", None))
         if kwargs:
             raise TypeError("Unsupported keyword arguments: {}".format(kwargs))
         self.comments = []
 
+    def _mark_structure_changed(self):
+        # Called whenever the children of this node are changed, to clear
+        # the structure stamps (see `Tree._stamp_structure()`) of this node
+        # and its ancestors, so that the bipartition encodings and structure
+        # indexes of the trees containing them can be checked for
+        # staleness. Stops at the first node already cleared: its
+        # ancestors were cleared with it, and have not been stamped since.
+        node = self
+        while node is not None and node._structure_stamp is not None:
+            node._structure_stamp = None
+            node = node._parent_node
+
+    def edge_factory(cls, **kwargs):
+        """
+        Creates and returns an |Edge| object.
+
+        Derived classes can override this method to provide support for
+        specialized or different types of edges on the node.
+
+        Parameters
+        ----------
+
+        \*\*kwargs : keyword arguments
+            Passed directly to constructor of |Edge|.
+
+        Returns
+        -------
+        |Edge|
+            A new |Edge| object.
+
+        """
+        return Edge(**kwargs)
+    edge_factory = classmethod(edge_factory)
+
     def __copy__(self, memo=None):
         raise TypeError("Cannot directly copy Edge")
 
@@ -1612,6 +1671,7 @@ class Node(
         """
         assert node is not self, "Cannot add node as child of itself"
         assert self._parent_node is not node, "Cannot add a node's parent as its child: remove the node from its parent's child set first"
+        self._mark_structure_changed()
         node._parent_node = self
         if node not in self._child_nodes:
             self._child_nodes.append(node)
@@ -1638,6 +1698,7 @@ class Node(
         |Node|
             The node that was added.
         """
+        self._mark_structure_changed()
         node._parent_node = self
         try:
             cur_index = self._child_nodes.index(node)
@@ -1646,7 +1707,7 @@ class Node(
         else:
             if cur_index == index:
                 return
-            self._child_nodes.remove(node)
+            del self._child_nodes[cur_index]
         self._child_nodes.insert(index, node)
         return node
 
@@ -1721,11 +1782,14 @@ class Node(
         if not node:
             raise ValueError("Tried to remove an non-existing or null node")
         children = self._child_nodes
-        if node in children:
-            node._parent_node = None
-            node.edge.tail_node = None
+        try:
             index = children.index(node)
-            children.remove(node)
+        except ValueError:
+            index = None
+        if index is not None:
+            self._mark_structure_changed()
+            node._parent_node = None
+            del children[index]
             if suppress_unifurcations:
                 if self._parent_node:
                     if len(children) == 1:
@@ -1767,6 +1831,7 @@ class Node(
         """
         Removes all child nodes.
         """
+        self._mark_structure_changed()
         del self._child_nodes[:] # list.clear() is not in Python 2.7
 
     def reversible_remove_child(self, node, suppress_unifurcations=False):
@@ -1790,6 +1855,7 @@ class Node(
         except:
             raise ValueError("Tried to remove a node that is not listed as a child")
         removed = [(node, self, pos, [], None)]
+        self._mark_structure_changed()
         node._parent_node = None
         node.edge.tail_node = None
         children.remove(node)
@@ -1918,6 +1984,7 @@ class Node(
         if new_edge is self._edge:
             return
         if self._parent_node is not None:
+            self._parent_node._mark_structure_changed()
             try:
                 self._parent_node._child_nodes.remove(self)
             except ValueError:
@@ -1988,12 +2055,14 @@ class Node(
     def _set_parent_node(self, parent):
         """Sets the parent node of this node."""
         if self._parent_node is not None:
+            self._parent_node._mark_structure_changed()
             try:
                 self._parent_node._child_nodes.remove(self)
             except ValueError:
                 pass
         self._parent_node = parent
         if self._parent_node is not None:
+            self._parent_node._mark_structure_changed()
             if self not in self._parent_node._child_nodes:
                 self._parent_node._child_nodes.append(self)
     parent_node = property(_get_parent_node, _set_parent_node)
@@ -2187,12 +2256,19 @@ class Node(
             A node with descending subtree mirroring this one.
 
         """
+        if node_factory is None:
+            node_factory = self.__class__
+        if node_filter_fn is None:
+            start_node = self._extract_unfiltered_subtree(
+                    extraction_source_reference_attr_name=extraction_source_reference_attr_name,
+                    suppress_unifurcations=suppress_unifurcations,
+                    node_factory=node_factory)
+            if start_node is not None:
+                return start_node
         memo = {}
         is_excluded_nodes = False
         start_node = None
         start_node_to_match = self
-        if node_factory is None:
-            node_factory = self.__class__
         for nd0 in self.postorder_iter():
             if node_filter_fn is not None:
                 if nd0._child_nodes:
@@ -2256,6 +2332,39 @@ class Node(
             ## TODO: find a replacement node
             raise ValueError
 
+    def _extract_unfiltered_subtree(self,
+            extraction_source_reference_attr_name,
+            suppress_unifurcations,
+            node_factory):
+        """
+        Clones the entire structure descending from this node in a single
+        preorder pass, linking each new node directly to the (already
+        created) clone of its parent. Returns |None| if ``suppress_unifurcations``
+        is |True| and there are nodes of outdegree 1, which need to be handled
+        by the full (postorder) extraction.
+        """
+        start_node = None
+        to_visit = [(self, None)]
+        while to_visit:
+            nd0, parent_nd1 = to_visit.pop()
+            if suppress_unifurcations and len(nd0._child_nodes) == 1:
+                return None
+            nd1 = node_factory()
+            nd1.label = nd0.label
+            nd1.taxon = nd0.taxon
+            nd1.edge.length = nd0.edge.length
+            nd1.edge.label = nd0.edge.label
+            if parent_nd1 is None:
+                start_node = nd1
+            else:
+                nd1._parent_node = parent_nd1
+                parent_nd1._child_nodes.append(nd1)
+            if extraction_source_reference_attr_name:
+                setattr(nd1, extraction_source_reference_attr_name, nd0)
+            for ch_nd0 in reversed(nd0._child_nodes):
+                to_visit.append((ch_nd0, nd1))
+        return start_node
+
     ###########################################################################
     ### Metrics
 
@@ -2512,6 +2621,592 @@ class Node(
             cm = ""
         out.write("%s%s%s\n" % ( cm, indentation*level, label))
 
+##############################################################################
+### Slotted Bipartition, Edge and Node
+
+_SLOT_NAMES = {}
+
+def _get_slot_names(cls):
+    """
+    Returns the names of all the (data) slots declared by ``cls`` and its
+    base classes.
+    """
+    try:
+        return _SLOT_NAMES[cls]
+    except KeyError:
+        slot_names = []
+        for base in cls.__mro__:
+            slots = base.__dict__.get("__slots__", ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            for name in slots:
+                if name not in ("__dict__", "__weakref__") and name not in slot_names:
+                    slot_names.append(name)
+        _SLOT_NAMES[cls] = tuple(slot_names)
+        return _SLOT_NAMES[cls]
+
+def _deepcopy_slotted_annotable(obj, memo):
+    # |Annotable| deep-copying only handles the instance dictionary, so the
+    # slot values need to be copied separately.
+    other = basemodel.Annotable.__deepcopy__(obj, memo=memo)
+    for name in _get_slot_names(obj.__class__):
+        if name == "_annotations":
+            continue
+        try:
+            value = getattr(obj, name)
+        except AttributeError:
+            continue
+        if hasattr(other, name):
+            continue
+        setattr(other, name, copy.deepcopy(value, memo))
+        memo[id(value)] = getattr(other, name)
+    return other
+
+class SlottedBipartition(Bipartition):
+    """
+    A |Bipartition| that stores its data in slots rather than in an
+    instance dictionary, thus reducing its memory footprint.
+
+    Attributes other than those declared in ``__slots__`` can still be
+    set, and are stored in an instance dictionary that is only allocated
+    when the first such attribute is set.
+    """
+
+    __slots__ = (
+            "_split_bitmask",
+            "_leafset_bitmask",
+            "_tree_leafset_bitmask",
+            "_lowest_relevant_bit",
+            "_is_rooted",
+            "is_mutable",
+            )
+
+class SlottedEdge(Edge):
+    """
+    An |Edge| that stores its data in slots rather than in an instance
+    dictionary, and allocates its ``comments`` list and ``annotations`` set
+    on first access, thus reducing its memory footprint and construction
+    time.
+
+    Attributes other than those declared in ``__slots__`` can still be
+    set, and are stored in an instance dictionary that is only allocated
+    when the first such attribute is set. Derived classes can declare
+    further slots for any additional attributes that are frequently used.
+    """
+
+    __slots__ = (
+            "_label",
+            "_head_node",
+            "rootedge",
+            "length",
+            "_bipartition",
+            "_comments",
+            "_annotations",
+            )
+
+    def __init__(self, **kwargs):
+        """
+        Keyword Arguments
+        -----------------
+        head_node : |Node|, optional
+            Node from to which this edge links, i.e., the child node of this
+            node ``tail_node``.
+        length : numerical, optional
+            A value representing the weight of the edge.
+        rootedge : boolean, optional
+            Is the child node of this edge the root or seed node of the tree?
+        label : string, optional
+            Label for this edge.
+
+        """
+        self._label = kwargs.pop("label", None)
+        self._head_node = kwargs.pop("head_node", None)
+        if "tail_node" in kwargs:
+            raise TypeError("Setting the tail node directly is no longer supported: instead, set the parent node of the head node")
+        self.rootedge = kwargs.pop("rootedge", None)
+        self.length = kwargs.pop("length", None)
+        if kwargs:
+            raise TypeError("Unsupported keyword arguments: {}".format(kwargs))
+        self._bipartition = None
+
+    def __deepcopy__(self, memo=None):
+        if memo is None:
+            memo = {}
+        return _deepcopy_slotted_annotable(self, memo)
+
+    def bipartition_factory(cls, **kwargs):
+        """
+        Creates and returns a |SlottedBipartition| object.
+
+        Parameters
+        ----------
+
+        \*\*kwargs : keyword arguments
+            Passed directly to constructor of |SlottedBipartition|.
+
+        Returns
+        -------
+        |SlottedBipartition|
+            A new |SlottedBipartition| object.
+
+        """
+        return SlottedBipartition(**kwargs)
+    bipartition_factory = classmethod(bipartition_factory)
+
+    def _get_comments(self):
+        try:
+            return self._comments
+        except AttributeError:
+            self._comments = []
+            return self._comments
+    def _set_comments(self, comments):
+        self._comments = comments
+    comments = property(_get_comments, _set_comments)
+
+class SlottedNode(Node):
+    """
+    A |Node| that stores its data in slots rather than in an instance
+    dictionary, and allocates its ``comments`` list and ``annotations`` set
+    on first access, thus reducing its memory footprint and construction
+    time. The edge subtending the node is a |SlottedEdge|.
+
+    Attributes other than those declared in ``__slots__`` (e.g., the
+    ``root_distance`` attribute set by :meth:`Tree.calc_node_root_distances()`)
+    can still be set, and are stored in an instance dictionary that is only
+    allocated when the first such attribute is set. Derived classes can
+    declare further slots for any additional attributes that are frequently
+    used.
+
+    To use these nodes in trees, override :meth:`Tree.node_factory()` in a
+    derived class::
+
+        class SlottedTree(dendropy.Tree):
+            def node_factory(cls, **kwargs):
+                return dendropy.SlottedNode(**kwargs)
+            node_factory = classmethod(node_factory)
+
+        tree = SlottedTree.get(path="big.tre", schema="newick")
+
+    """
+
+    __slots__ = (
+            "_label",
+            "taxon",
+            "age",
+            "_edge",
+            "_child_nodes",
+            "_parent_node",
+            "_structure_stamp",
+            "_comments",
+            "_annotations",
+            )
+
+    def __init__(self, **kwargs):
+        """
+        Keyword Arguments
+        -----------------
+        taxon : |Taxon|, optional
+            The |Taxon| instance representing the operational taxonomic
+            unit concept associated with this Node.
+        label : string, optional
+            A label for this node.
+        edge_length : numeric, optional
+            Length or weight of the edge subtending this node.
+
+        """
+        self._label = kwargs.pop("label", None)
+        self.taxon = kwargs.pop("taxon", None)
+        self.age = None
+        self._edge = None
+        self._child_nodes = []
+        self._parent_node = None
+        self._structure_stamp = None
+        self.edge = self.edge_factory(head_node=self,
+                length=kwargs.pop("edge_length", None))
+        if kwargs:
+            raise TypeError("Unsupported keyword arguments: {}".format(kwargs))
+
+    def __deepcopy__(self, memo=None):
+        if memo is None:
+            memo = {}
+        return _deepcopy_slotted_annotable(self, memo)
+
+    def edge_factory(cls, **kwargs):
+        """
+        Creates and returns a |SlottedEdge| object.
+
+        Parameters
+        ----------
+
+        \*\*kwargs : keyword arguments
+            Passed directly to constructor of |SlottedEdge|.
+
+        Returns
+        -------
+        |SlottedEdge|
+            A new |SlottedEdge| object.
+
+        """
+        return SlottedEdge(**kwargs)
+    edge_factory = classmethod(edge_factory)
+
+    def _get_comments(self):
+        try:
+            return self._comments
+        except AttributeError:
+            self._comments = []
+            return self._comments
+    def _set_comments(self, comments):
+        self._comments = comments
+    comments = property(_get_comments, _set_comments)
+
+##############################################################################
+### Tree Copying
+
+_IMMUTABLE_ATTRIBUTE_VALUE_TYPES = set([type(None), bool, int, float, complex, str, bytes])
+if sys.version_info.major < 3:
+    _IMMUTABLE_ATTRIBUTE_VALUE_TYPES.update([long, unicode])
+
+def _deepcopy_attribute_value(value, memo):
+    value_type = type(value)
+    if value_type in _IMMUTABLE_ATTRIBUTE_VALUE_TYPES:
+        return value
+    try:
+        return memo[id(value)]
+    except KeyError:
+        pass
+    if value_type is list and not value:
+        # (typically) comments
+        value1 = []
+        memo[id(value)] = value1
+        return value1
+    return copy.deepcopy(value, memo)
+
+def _deepcopy_annotable_attributes(obj, other, memo, attribute_map=None):
+    """
+    Deep-copies the attributes (data slots and instance dictionary entries)
+    of ``obj`` to ``other``, taking the copies of any attributes named in
+    ``attribute_map`` from there instead. Annotations are copied only if
+    ``obj`` has any.
+    """
+    for name in _get_slot_names(obj.__class__):
+        if name == "_annotations":
+            continue
+        try:
+            value = getattr(obj, name)
+        except AttributeError:
+            continue
+        if attribute_map is not None and name in attribute_map:
+            setattr(other, name, attribute_map[name])
+        else:
+            setattr(other, name, _deepcopy_attribute_value(value, memo))
+    try:
+        attributes = obj.__dict__
+    except AttributeError:
+        attributes = None
+    if attributes:
+        other_attributes = other.__dict__
+        for name in attributes:
+            if name == "_annotations":
+                continue
+            if attribute_map is not None and name in attribute_map:
+                other_attributes[name] = attribute_map[name]
+            else:
+                other_attributes[name] = _deepcopy_attribute_value(attributes[name], memo)
+    if getattr(obj, "_annotations", None):
+        other.deep_copy_annotations_from(obj, memo)
+
+def _deepcopy_bipartition(bipartition, memo):
+    try:
+        return memo[id(bipartition)]
+    except KeyError:
+        pass
+    other = bipartition.__class__.__new__(bipartition.__class__)
+    memo[id(bipartition)] = other
+    _deepcopy_annotable_attributes(bipartition, other, memo)
+    return other
+
+def _deepcopy_tree(tree, memo=None):
+    """
+    Returns a deep copy of ``tree``, equivalent to
+    :meth:`Annotable.__deepcopy__()`, but building the nodes and edges in a
+    single preorder pass rather than by recursing through the generic
+    deep-copying machinery for every node, edge and list of child nodes.
+    """
+    if memo is None:
+        memo = {}
+    try:
+        other = memo[id(tree)]
+    except KeyError:
+        other = tree.__class__.__new__(tree.__class__)
+        memo[id(tree)] = other
+    tree_attributes = tree.__dict__
+    # the taxon namespace (and, through it, the taxa) are copied (or, if
+    # already in ``memo``, mapped) first, so that the node taxa can then
+    # simply be looked up
+    if "_taxon_namespace" in tree_attributes:
+        _deepcopy_attribute_value(tree_attributes["_taxon_namespace"], memo)
+    # preorder list of nodes, with the index of the parent of each
+    nodes = []
+    parent_indexes = []
+    seed_node = tree_attributes.get("_seed_node", None)
+    if seed_node is not None:
+        to_visit = [(seed_node, -1)]
+        while to_visit:
+            nd, parent_index = to_visit.pop()
+            node_index = len(nodes)
+            nodes.append(nd)
+            parent_indexes.append(parent_index)
+            for ch in reversed(nd._child_nodes):
+                to_visit.append((ch, node_index))
+    # create all the node and edge copies up front, so that all the
+    # references between them can be mapped directly
+    nodes1 = []
+    child_nodes1 = []
+    for nd0 in nodes:
+        try:
+            nd1 = memo[id(nd0)]
+        except KeyError:
+            nd1 = nd0.__class__.__new__(nd0.__class__)
+            memo[id(nd0)] = nd1
+        nodes1.append(nd1)
+        child_nodes1.append([])
+        edge0 = getattr(nd0, "_edge", None)
+        if edge0 is not None and id(edge0) not in memo:
+            memo[id(edge0)] = edge0.__class__.__new__(edge0.__class__)
+    for nd1, parent_index in zip(nodes1, parent_indexes):
+        if parent_index >= 0:
+            child_nodes1[parent_index].append(nd1)
+    for nd0, nd1, ch1, parent_index in zip(nodes, nodes1, child_nodes1, parent_indexes):
+        memo[id(nd0._child_nodes)] = ch1
+        attribute_map = {"_child_nodes": ch1}
+        if parent_index >= 0:
+            attribute_map["_parent_node"] = nodes1[parent_index]
+        _deepcopy_annotable_attributes(nd0, nd1, memo, attribute_map)
+        edge0 = getattr(nd0, "_edge", None)
+        if edge0 is not None:
+            bipartition = getattr(edge0, "_bipartition", None)
+            if bipartition is not None:
+                _deepcopy_bipartition(bipartition, memo)
+            _deepcopy_annotable_attributes(edge0, memo[id(edge0)], memo)
+    _deepcopy_annotable_attributes(tree, other, memo)
+    return other
+
+##############################################################################
+### Tree Structure Index
+
+class TreeStructureIndex(object):
+    """
+    An index of the structure of a |Tree|, giving constant-time look-ups of
+    the nodes associated with taxa, of the depths of nodes, and of the most
+    recent common ancestors of nodes.
+
+    An index is enabled on a tree by setting :attr:`Tree.is_structure_indexed`
+    to |True|, and is then used by :meth:`Tree.find_node_for_taxon()`,
+    :meth:`Tree.find_node_with_taxon_label()` and :meth:`Tree.mrca()`, and
+    available through :attr:`Tree.structure_index`. It is (re)built when
+    needed, after the tree has been restructured through the methods of
+    |Node|, |Edge| or |Tree|, while relabeling the taxa of the tree only
+    refreshes the look-up of nodes by taxon label. The (re)assignment of taxa
+    to nodes, however, is not tracked: nodes found for taxa are checked to
+    still be associated with them, but :meth:`invalidate()` should be called
+    after changing the ``taxon`` attributes of nodes directly, so that the
+    most recent common ancestors found by :meth:`Tree.mrca()` reflect the
+    change.
+
+    The most recent common ancestors are found by range-minimum queries over
+    an Euler tour of the tree, using a sparse table, which takes O(n log n)
+    time and space to build.
+    """
+
+    def __init__(self, tree):
+        """
+        Parameters
+        ----------
+        tree : |Tree|
+            The tree to index.
+        """
+        self.tree = tree
+        self._index_state = None
+        self._taxon_nodes = None
+        self._taxon_label_nodes = None
+        self._node_depths = None
+        self._node_tour_indexes = None
+        self._tour_nodes = None
+        self._tour_depths = None
+        self._sparse_table = None
+        self._leafset_sizes = None
+        self._leafset_top_nodes = None
+
+    def __deepcopy__(self, memo):
+        # copies of a tree get an index of their own, built when needed
+        other = self.__class__(copy.deepcopy(self.tree, memo))
+        memo[id(self)] = other
+        return other
+
+    def _is_current(self):
+        return (self._index_state is not None
+                and self._index_state[0] is self.tree.seed_node
+                and self._index_state[1] == self.tree._get_structure_stamp())
+
+    def _taxon_relabeled(self, taxon, old_label, old_lower_cased_label):
+        # Called by the taxa of the tree after their labels have been changed.
+        self._taxon_label_nodes = None
+
+    def invalidate(self):
+        """
+        Marks the index as stale, so that it is rebuilt when next needed.
+        """
+        self._index_state = None
+
+    def update(self):
+        """
+        Rebuilds the index if the tree may have changed since it was built.
+        """
+        if not self._is_current():
+            self._build()
+
+    def _build(self):
+        seed_node = self.tree.seed_node
+        taxon_nodes = {}
+        taxon_label_nodes = {}
+        node_depths = {}
+        node_tour_indexes = {}
+        tour_nodes = []
+        tour_depths = []
+        preorder_nodes = []
+        leafset_sizes = {}
+        if seed_node is not None:
+            node_depths[seed_node] = 0
+            to_visit = [(seed_node, iter(seed_node._child_nodes))]
+            node_tour_indexes[seed_node] = 0
+            tour_nodes.append(seed_node)
+            tour_depths.append(0)
+            preorder_nodes.append(seed_node)
+            while to_visit:
+                nd, children = to_visit[-1]
+                ch = next(children, None)
+                if ch is not None:
+                    depth = node_depths[nd] + 1
+                    node_depths[ch] = depth
+                    node_tour_indexes[ch] = len(tour_nodes)
+                    tour_nodes.append(ch)
+                    tour_depths.append(depth)
+                    preorder_nodes.append(ch)
+                    to_visit.append((ch, iter(ch._child_nodes)))
+                    continue
+                to_visit.pop()
+                # ``nd`` is finished: postorder
+                if nd.taxon is not None:
+                    taxon_nodes.setdefault(nd.taxon, nd)
+                if nd._child_nodes:
+                    leafset_sizes[nd] = sum(leafset_sizes[ch] for ch in nd._child_nodes)
+                else:
+                    leafset_sizes[nd] = 1 if nd.taxon is not None else 0
+                if to_visit:
+                    parent = to_visit[-1][0]
+                    tour_nodes.append(parent)
+                    tour_depths.append(node_depths[parent])
+        # earliest ancestor of each node with the same leafset
+        leafset_top_nodes = {}
+        for nd in preorder_nodes:
+            parent = nd._parent_node
+            if parent is not None and leafset_sizes[parent] == leafset_sizes[nd]:
+                leafset_top_nodes[nd] = leafset_top_nodes[parent]
+            else:
+                leafset_top_nodes[nd] = nd
+            if nd.taxon is not None:
+                taxon_label_nodes.setdefault(nd.taxon.label, nd)
+                nd.taxon._add_label_listener(self)
+        sparse_table = [list(range(len(tour_nodes)))]
+        span = 1
+        while 2 * span <= len(tour_nodes):
+            prev = sparse_table[-1]
+            sparse_table.append([a if tour_depths[a] <= tour_depths[b] else b
+                for a, b in zip(prev, prev[span:])])
+            span *= 2
+        self._taxon_nodes = taxon_nodes
+        self._taxon_label_nodes = taxon_label_nodes
+        self._node_depths = node_depths
+        self._node_tour_indexes = node_tour_indexes
+        self._tour_nodes = tour_nodes
+        self._tour_depths = tour_depths
+        self._sparse_table = sparse_table
+        self._leafset_sizes = leafset_sizes
+        self._leafset_top_nodes = leafset_top_nodes
+        self._index_state = (seed_node, self.tree._stamp_structure())
+
+    def _build_taxon_label_nodes(self):
+        taxon_label_nodes = {}
+        node_tour_indexes = self._node_tour_indexes
+        for idx, nd in enumerate(self._tour_nodes):
+            # first visits to nodes in the tour are in preorder
+            if nd.taxon is not None and node_tour_indexes[nd] == idx:
+                taxon_label_nodes.setdefault(nd.taxon.label, nd)
+        self._taxon_label_nodes = taxon_label_nodes
+
+    def node_for_taxon(self, taxon):
+        """
+        Returns the (first, in postorder) node associated with ``taxon``, or
+        |None| if no such node was found when the index was built.
+        """
+        self.update()
+        nd = self._taxon_nodes.get(taxon, None)
+        if nd is not None and nd.taxon is taxon:
+            return nd
+        return None
+
+    def node_for_taxon_label(self, label):
+        """
+        Returns the (first, in preorder) node associated with a taxon with
+        label ``label``, or |None| if no such node was found when the index
+        was built.
+        """
+        self.update()
+        if self._taxon_label_nodes is None:
+            self._build_taxon_label_nodes()
+        nd = self._taxon_label_nodes.get(label, None)
+        if nd is not None and nd.taxon is not None and nd.taxon.label == label:
+            return nd
+        return None
+
+    def node_depth(self, node):
+        """
+        Returns the number of edges between ``node`` and the seed node.
+        """
+        self.update()
+        return self._node_depths[node]
+
+    def mrca_node(self, nodes):
+        """
+        Returns the most recent common ancestor of ``nodes``, an iterable of
+        (one or more) nodes of the tree.
+        """
+        self.update()
+        node_tour_indexes = self._node_tour_indexes
+        tour_indexes = [node_tour_indexes[nd] for nd in nodes]
+        if not tour_indexes:
+            raise ValueError("No nodes given")
+        i = min(tour_indexes)
+        j = max(tour_indexes)
+        k = (j - i + 1).bit_length() - 1
+        row = self._sparse_table[k]
+        a = row[i]
+        b = row[j - (1 << k) + 1]
+        if self._tour_depths[a] <= self._tour_depths[b]:
+            return self._tour_nodes[a]
+        return self._tour_nodes[b]
+
+    def _leafset_mrca_node(self, leaf_nodes):
+        # As :meth:`Tree.mrca()` descends from the seed node, it returns
+        # the first node with a leafset that exactly matches the one
+        # given, i.e., the earliest ancestor of the most recent common
+        # ancestor with the same leafset, if there is such a match.
+        mrca_node = self.mrca_node(leaf_nodes)
+        if self._leafset_sizes[mrca_node] == len(set(leaf_nodes)):
+            return self._leafset_top_nodes[mrca_node]
+        return mrca_node
+
 ##############################################################################
 ### Tree
 
@@ -2530,6 +3225,9 @@ class Tree(
     semantically equivalent to the root.
     """
 
+    # Last structure stamp assigned by `_stamp_structure()`.
+    _structure_stamp_count = 0
+
     def _parse_and_create_from_stream(cls,
             stream,
             schema,
@@ -2610,6 +3308,9 @@ class Tree(
         """
         from dendropy.datamodel.treecollectionmodel import TreeList
 
+        if kwargs.pop("use_tree_index", False):
+            # only reached for sources not given by path
+            raise ValueError("'use_tree_index' requires the source to be given by 'path'")
         taxon_namespace = taxonmodel.process_kwargs_dict_for_taxon_namespace(kwargs, None)
         if taxon_namespace is None:
             taxon_namespace = taxonmodel.TaxonNamespace()
@@ -2643,6 +3344,31 @@ class Tree(
         return tree
     _parse_and_create_from_stream = classmethod(_parse_and_create_from_stream)
 
+    def get_from_path(cls, src, schema, **kwargs):
+        """
+        Factory method to return new |Tree| object from file specified by
+        string ``src``.
+
+        If ``use_tree_index=True`` is passed as a keyword argument and
+        ``schema`` is "nexus", "newick" or "nexus/newick", then a
+        |TreeOffsetIndex| of the file (loaded from its sidecar file if
+        available and up-to-date, or built and saved otherwise) is used to
+        parse only the tree statement selected by ``collection_offset`` and
+        ``tree_offset``. Otherwise, the entire file is parsed.
+        """
+        if kwargs.pop("use_tree_index", False):
+            stream = treeindex.open_indexed_tree_stream(
+                    path=src,
+                    schema=schema,
+                    collection_offset=kwargs.pop("collection_offset", None),
+                    tree_offset=kwargs.pop("tree_offset", None),
+                    max_trees=1)
+            return cls._parse_and_create_from_stream(stream=stream,
+                    schema=schema,
+                    **kwargs)
+        return super(Tree, cls).get_from_path(src=src, schema=schema, **kwargs)
+    get_from_path = classmethod(get_from_path)
+
     @classmethod
     def get(cls, **kwargs):
         """
@@ -2677,6 +3403,12 @@ class Tree(
             - **tree_offset** (*int*) -- 0-based index of tree within the
               collection specified by ``collection_offset`` to be parsed. If
               not specified, then the first tree (offset = 0) is assumed.
+            - **use_tree_index** (*bool*) -- If |True| and the source is given
+              by **path** in the NEXUS or NEWICK schema, an index of tree
+              statement byte offsets (persisted to a sidecar file next to the
+              data file) is used to seek directly to the requested tree,
+              without parsing the trees before it. See |TreeOffsetIndex| for
+              details.
             - **ignore_unrecognized_keyword_arguments** (*bool*) -- If |True|,
               then unsupported or unrecognized keyword arguments will not
               result in an error. Default is |False|: unsupported keyword
@@ -2709,6 +3441,12 @@ class Tree(
                     collection_offset=2,
                     tree_offset=1)
 
+            # From a path, seeking directly to the tree
+            t3b = Tree.get(path='mcmc.trees',
+                    schema="nexus",
+                    tree_offset=75000,
+                    use_tree_index=True)
+
             # From a string
             s = "((A,B),(C,D));((A,C),(B,D));"
             # tree will be '((A,B),(C,D))'
@@ -2956,7 +3694,7 @@ class Tree(
                     assert cecm != split_to_add
                     new_mask |= cecm
                     new_node_children.append(child)
-                    new_edge.bipartition = Bipartition(
+                    new_edge.bipartition = new_edge.bipartition_factory(
                             leafset_bitmask=new_mask,
                             tree_leafset_bitmask=all_taxa_bitmask,
                             is_mutable=False,
@@ -3159,6 +3897,8 @@ class Tree(
             self.bipartition_encoding = None
             self._split_bitmask_edge_map = None
             self._bipartition_edge_map = None
+            self._bipartition_encoding_state = None
+            self._structure_index = None
             seed_node = kwargs.pop("seed_node", None)
             if seed_node is None:
                 self.seed_node = self.node_factory()
@@ -3235,7 +3975,7 @@ class Tree(
 
     def __deepcopy__(self, memo=None):
         # ensure clone map
-        return basemodel.Annotable.__deepcopy__(self, memo=memo)
+        return _deepcopy_tree(self, memo=memo)
         # if memo is None:
         #     memo = {}
         # # get or create clone of self
@@ -3767,6 +4507,34 @@ class Tree(
         """
         return [nd.edge for nd in self.preorder_internal_node_iter(exclude_seed_node=exclude_seed_edge)]
 
+    ###########################################################################
+    ### Structure Index
+
+    def _get_is_structure_indexed(self):
+        """
+        If |True|, a |TreeStructureIndex| of this tree is maintained (and used
+        by :meth:`find_node_for_taxon()`, :meth:`find_node_with_taxon_label()`
+        and :meth:`mrca()`). Defaults to |False|.
+        """
+        return getattr(self, "_structure_index", None) is not None
+    def _set_is_structure_indexed(self, value):
+        if not value:
+            self._structure_index = None
+        elif getattr(self, "_structure_index", None) is None:
+            self._structure_index = TreeStructureIndex(self)
+    is_structure_indexed = property(_get_is_structure_indexed, _set_is_structure_indexed)
+
+    def _get_structure_index(self):
+        """
+        The (up-to-date) |TreeStructureIndex| of this tree, or |None| if
+        :attr:`is_structure_indexed` is |False|.
+        """
+        structure_index = getattr(self, "_structure_index", None)
+        if structure_index is not None:
+            structure_index.update()
+        return structure_index
+    structure_index = property(_get_structure_index)
+
     ###########################################################################
     ### Node Finders
 
@@ -3868,9 +4636,17 @@ class Tree(
             Returns first |Node| object with ``taxon`` attribute referencing same
             object as ``taxon`` argument, or |None| if no such node exists.
         """
+        structure_index = self.structure_index
+        if structure_index is not None:
+            node = structure_index.node_for_taxon(taxon)
+            if node is not None:
+                return node
         for node in self.postorder_node_iter():
             try:
                 if node.taxon is taxon:
+                    if structure_index is not None:
+                        # taxon was assigned after the index was built
+                        structure_index.invalidate()
                     return node
             except AttributeError:
                 pass
@@ -3916,7 +4692,16 @@ class Tree(
             ``label``, or|None| if no such node is found.
 
         """
-        return self.find_node_with_taxon(lambda x: x.label == label)
+        structure_index = self.structure_index
+        if structure_index is not None:
+            node = structure_index.node_for_taxon_label(label)
+            if node is not None:
+                return node
+        node = self.find_node_with_taxon(lambda x: x.label == label)
+        if node is not None and structure_index is not None:
+            # taxon was assigned after the index was built
+            structure_index.invalidate()
+        return node
         # taxon = self.taxon_namespace.get_taxon(label=label)
         # if taxon is None:
         #     return None
@@ -3974,6 +4759,7 @@ class Tree(
         """
         start_node = kwargs.get("start_node", self.seed_node)
         leafset_bitmask = None
+        taxa = None
         if "leafset_bitmask" in kwargs:
             leafset_bitmask = kwargs["leafset_bitmask"]
         else:
@@ -3992,6 +4778,15 @@ class Tree(
         if leafset_bitmask is None or leafset_bitmask == 0:
             raise ValueError("Null leafset bitmask (0)")
 
+        structure_index = self.structure_index
+        if structure_index is not None and start_node is self.seed_node:
+            if taxa is None:
+                taxa = self.taxon_namespace.bitmask_taxa_list(leafset_bitmask)
+            leaf_nodes = [structure_index.node_for_taxon(taxon) for taxon in taxa]
+            if leaf_nodes and all(nd is not None and not nd._child_nodes for nd in leaf_nodes):
+                return structure_index._leafset_mrca_node(leaf_nodes)
+            # otherwise, fall back on searching the bipartitions
+
         if start_node.edge.bipartition.leafset_bitmask == 0 or not kwargs.get("is_bipartitions_updated", True):
             self.encode_bipartitions(suppress_unifurcations=False)
 
@@ -4862,6 +5657,8 @@ class Tree(
         #     debug_children = ", ".join(debug_children)
         #     print("    Children (Node Parent, Edge Tail Node Parent): {}".format(debug_children))
 
+        if update_bipartitions:
+            path_nodes = self._encoded_ancestral_path_nodes(new_seed_node)
         if self.seed_node is new_seed_node:
             # do not just return: allow for updating of bipartitions,
             # collapsing of unifurcations, collapsing of unrooted basal
@@ -4900,7 +5697,7 @@ class Tree(
             self.seed_node = new_seed_node
 
         if update_bipartitions:
-            self.encode_bipartitions(
+            self._update_bipartitions_on_path(path_nodes,
                     suppress_unifurcations=suppress_unifurcations,
                     collapse_unrooted_basal_bifurcation=collapse_unrooted_basal_bifurcation)
         else:
@@ -4947,13 +5744,20 @@ class Tree(
         operation, it will have an outdegree of one. In this case, unless
         ``suppress_unifurcations`` is False, then it will be
         removed from the tree.
+        If the bipartitions of the tree are current (i.e., have been
+        calculated by :meth:`encode_bipartitions()` and the tree has not been
+        changed since), then only the bipartitions of the edges on the path
+        between the old and new root are recalculated.
         """
+        if update_bipartitions:
+            path_nodes = self._encoded_ancestral_path_nodes(new_root_node)
         self.reseed_at(new_seed_node=new_root_node,
                 update_bipartitions=False,
                 suppress_unifurcations=suppress_unifurcations)
         self.is_rooted = True
         if update_bipartitions:
-            self.update_bipartitions(suppress_unifurcations=suppress_unifurcations)
+            self._update_bipartitions_on_path(path_nodes,
+                    suppress_unifurcations=suppress_unifurcations)
         return self.seed_node
 
     def reroot_at_edge(self,
@@ -4974,19 +5778,53 @@ class Tree(
         operation, it will have an outdegree of one. In this case, unless
         ``suppress_unifurcations`` is False, then it will be
         removed from the tree.
+        As with :meth:`reroot_at_node()`, if the bipartitions of the tree are
+        current, then only those of the edges on the path between the old
+        and new root are recalculated.
         """
         old_tail = edge.tail_node
         old_head = edge.head_node
+        if update_bipartitions:
+            path_nodes = self._encoded_ancestral_path_nodes(old_tail)
         new_seed_node = old_tail.new_child(edge_length=length1)
         old_tail.remove_child(old_head)
         # new_seed_node.add_child(old_head, edge_length=length2)
         new_seed_node.add_child(old_head)
         old_head.edge.length = length2
         self.reroot_at_node(new_seed_node,
-                update_bipartitions=update_bipartitions,
+                update_bipartitions=False,
                 suppress_unifurcations=suppress_unifurcations)
+        if update_bipartitions:
+            self._update_bipartitions_on_path(path_nodes,
+                    suppress_unifurcations=suppress_unifurcations)
         return self.seed_node
 
+    def _find_longest_leaf_path(self):
+        """
+        Returns the two leaf nodes farthest apart on this tree, their most
+        recent common ancestor, and the (weighted) distance between them, as
+        found in a single postorder pass: the longest path through each node
+        joins the farthest leaves descending from two of its children.
+        """
+        farthest_leaves = {}
+        longest_path = None
+        for nd in self.postorder_node_iter():
+            if not nd._child_nodes:
+                farthest_leaves[nd] = (0, nd)
+                continue
+            farthest = None
+            for ch in nd._child_nodes:
+                ch_dist, ch_leaf = farthest_leaves.pop(ch)
+                if farthest is not None:
+                    path_length = farthest[0] + ch_dist + ch.edge.length
+                    if longest_path is None or path_length > longest_path[3]:
+                        longest_path = (farthest[1], ch_leaf, nd, path_length)
+                ch_dist += ch.edge.length
+                if farthest is None or ch_dist > farthest[0]:
+                    farthest = (ch_dist, ch_leaf)
+            farthest_leaves[nd] = farthest
+        return longest_path
+
     def reroot_at_midpoint(self, update_bipartitions=False, suppress_unifurcations=True):
         """
         Reroots the tree at the the mid-point of the longest distance between
@@ -4998,33 +5836,19 @@ class Tree(
         operation, it will have an outdegree of one. In this case, unless
         ``suppress_unifurcations`` is False, then it will be
         removed from the tree.
-        """
-        from dendropy.calculate.phylogeneticdistance import PhylogeneticDistanceMatrix
-        pdm = PhylogeneticDistanceMatrix.from_tree(self)
-
-        ## ugly, ugly, ugly code to find two nodes that span the midpoint
-        maxtax1, maxtax2 = pdm.max_pairwise_distance_taxa()
-        spanning_nodes = [None, None]
-        found = 0
-        for nd in self.leaf_node_iter():
-            for tax in (maxtax1, maxtax2):
-                if nd.taxon is tax:
-                    spanning_nodes[found] = nd
-                    found +=1
-                    break
-            if found == 2:
-                break
-        if spanning_nodes[0].distance_from_root() < spanning_nodes[1].distance_from_root():
-            n1 = spanning_nodes[1]
-            n2 = spanning_nodes[0]
+        As with :meth:`reroot_at_node()`, if the bipartitions of the tree are
+        current, then only those of the edges on the path between the old
+        and new root are recalculated.
+        """
+        leaf1, leaf2, mrca_node, max_dist = self._find_longest_leaf_path()
+        if leaf1.distance_from_root() < leaf2.distance_from_root():
+            n1 = leaf2
+            n2 = leaf1
         else:
-            n1 = spanning_nodes[0]
-            n2 = spanning_nodes[1]
+            n1 = leaf1
+            n2 = leaf2
 
-        plen = float(pdm.patristic_distance(maxtax1, maxtax2)) / 2
-        mrca_node = pdm.mrca(n1.taxon, n2.taxon)
-        #assert mrca_node is self.mrca(taxa=[n1.taxon, n2.taxon])
-        #mrca_node = self.mrca(taxa=[n1.taxon, n2.taxon])
+        plen = float(max_dist) / 2
         cur_node = n1
 
         break_on_node = None # populated *iff* midpoint is exactly at an existing node
@@ -5048,12 +5872,16 @@ class Tree(
         assert break_on_node is not None or target_edge is not None
 
         if break_on_node:
+            if update_bipartitions:
+                path_nodes = self._encoded_ancestral_path_nodes(break_on_node)
             self.reseed_at(break_on_node, update_bipartitions=False, suppress_unifurcations=suppress_unifurcations)
             new_seed_node = break_on_node
         else:
             tail_node_edge_len = target_edge.length - head_node_edge_len
             old_head_node = target_edge.head_node
             old_tail_node = target_edge.tail_node
+            if update_bipartitions:
+                path_nodes = self._encoded_ancestral_path_nodes(old_tail_node)
             old_tail_node.remove_child(old_head_node)
             new_seed_node = Node()
             # new_seed_node.add_child(old_head_node, edge_length=head_node_edge_len)
@@ -5065,7 +5893,7 @@ class Tree(
             self.reseed_at(new_seed_node, update_bipartitions=False, suppress_unifurcations=suppress_unifurcations)
         self.is_rooted = True
         if update_bipartitions:
-            self.update_bipartitions(suppress_unifurcations=False)
+            self._update_bipartitions_on_path(path_nodes, suppress_unifurcations=False)
         return self.seed_node
 
     def suppress_unifurcations(self, update_bipartitions=False):
@@ -5078,37 +5906,93 @@ class Tree(
             If |True| then the bipartitions encoding will be calculated.
 
         """
-        if update_bipartitions and self.bipartition_encoding:
-            bipartitions_to_delete = set()
-        else:
-            bipartitions_to_delete = None
+        suppressed_nodes = self._prune_nodes_in_postorder(
+                node_prune_state_fn=None,
+                suppress_unifurcations=True)[1]
+        if suppressed_nodes and update_bipartitions and self.bipartition_encoding:
+            bipartitions_to_delete = set(id(nd.edge.bipartition) for nd in suppressed_nodes)
+            old_encoding = self.bipartition_encoding
+            self.bipartition_encoding = [b for b in old_encoding if id(b) not in bipartitions_to_delete]
+
+    def _prune_nodes_in_postorder(self,
+            node_prune_state_fn,
+            suppress_unifurcations=True):
+        """
+        Removes nodes (with the subtrees descending from them) from this tree
+        and, optionally, suppresses the resulting nodes of outdegree one, in a
+        single postorder pass in which the child list of each node is rebuilt
+        at most once. Removing any number of children from a node thus takes
+        time linear in the number of its children, instead of (as when
+        calling :meth:`Node.remove_child()` for each) quadratic.
+
+        Parameters
+        ----------
+        node_prune_state_fn : function object or |None|
+            If not |None|, a function that takes a |Node| and a list of the
+            prune states of its children (as previously returned by this
+            function for each of them) and returns the prune state of the
+            node: any true value if the node is to be removed, or a false
+            value otherwise. If |None|, no nodes are removed.
+        suppress_unifurcations : bool
+            If |True|, nodes left with outdegree one are deleted, with their
+            edge lengths added to those of their (sole) children.
+
+        Returns
+        -------
+        nds : tuple(list[|Node|], list[|Node|])
+            A tuple of the list of nodes removed, and the list of nodes
+            suppressed.
+        """
+        node_prune_states = {}
+        pruned_nodes = []
+        suppressed_nodes = []
         for nd in self.postorder_node_iter():
             children = nd._child_nodes
-            if len(children) == 1:
-                if nd.edge.length is not None:
-                    if children[0].edge.length is None:
-                        children[0].edge.length = nd.edge.length
-                    else:
-                        children[0].edge.length += nd.edge.length
-                if bipartitions_to_delete is not None:
-                    bipartitions_to_delete.add(id(nd.edge.bipartition))
-                if nd._parent_node is not None:
-                    parent = nd._parent_node
-                    pos = parent._child_nodes.index(nd)
-                    parent.remove_child(nd)
-                    parent.insert_child(index=pos, node=children[0])
-                    # assert children[0]._parent_node is parent
-                    # assert children[0] in parent._child_nodes
-                    # assert children[0].edge.tail_node is parent
-                    # assert children[0].edge.head_node is children[0]
-                    nd._parent_node = None
+            child_prune_states = [node_prune_states.pop(id(ch)) for ch in children]
+            if node_prune_state_fn is not None:
+                prune_state = node_prune_state_fn(nd, child_prune_states)
+            else:
+                prune_state = None
+            node_prune_states[id(nd)] = prune_state
+            if prune_state:
+                pruned_nodes.append(nd)
+                if nd._parent_node is None:
+                    raise error.SeedNodeDeletionException("Attempting to remove seed node or node without parent")
+                continue
+            if not any(child_prune_states) and not (
+                    suppress_unifurcations
+                    and any(len(ch._child_nodes) == 1 for ch in children)):
+                continue
+            new_children = []
+            for ch, ch_prune_state in zip(children, child_prune_states):
+                if ch_prune_state:
+                    ch._parent_node = None
+                    continue
+                if suppress_unifurcations and len(ch._child_nodes) == 1:
+                    gch = ch._child_nodes[0]
+                    if ch.edge.length is not None:
+                        if gch.edge.length is None:
+                            gch.edge.length = ch.edge.length
+                        else:
+                            gch.edge.length += ch.edge.length
+                    gch._parent_node = nd
+                    ch._parent_node = None
+                    suppressed_nodes.append(ch)
+                    ch = gch
+                new_children.append(ch)
+            children[:] = new_children
+            nd._mark_structure_changed()
+        seed_node = self.seed_node
+        if suppress_unifurcations and len(seed_node._child_nodes) == 1:
+            child = seed_node._child_nodes[0]
+            if seed_node.edge.length is not None:
+                if child.edge.length is None:
+                    child.edge.length = seed_node.edge.length
                 else:
-                    # assert nd is self.seed_node
-                    self.seed_node = children[0]
-                    self.seed_node._parent_node = None
-        if bipartitions_to_delete:
-            old_encoding = self.bipartition_encoding
-            self.bipartition_encoding = [b for b in old_encoding if id(b) not in bipartitions_to_delete]
+                    child.edge.length += seed_node.edge.length
+            self.seed_node = child
+            suppressed_nodes.append(seed_node)
+        return pruned_nodes, suppressed_nodes
 
     def delete_outdegree_one_nodes(self):
         deprecate.dendropy_deprecation_warning(
@@ -5238,21 +6122,15 @@ class Tree(
         nds : list[|Node|]
             List of nodes removed.
         """
-        nodes_removed = []
-        while True:
-            is_nodes_deleted = False
-            nodes_to_remove = [nd for nd in self.leaf_node_iter() if not filter_fn(nd)]
-            for nd in nodes_to_remove:
-                if nd.edge.tail_node is None:
-                    raise error.SeedNodeDeletionException("Attempting to remove seed node or node without parent")
-                nd.edge.tail_node.remove_child(nd)
-            if nodes_to_remove:
-                nodes_removed += nodes_to_remove
-                is_nodes_deleted = True
-            if not is_nodes_deleted or not recursive:
-                break
-        if suppress_unifurcations:
-            self.suppress_unifurcations()
+        if recursive:
+            # a node is removed if all its children have been removed (i.e.,
+            # it is, or has become, a leaf) and it fails the filter
+            node_prune_state_fn = lambda nd, child_prune_states: all(child_prune_states) and not filter_fn(nd)
+        else:
+            node_prune_state_fn = lambda nd, child_prune_states: not child_prune_states and not filter_fn(nd)
+        nodes_removed = self._prune_nodes_in_postorder(
+                node_prune_state_fn=node_prune_state_fn,
+                suppress_unifurcations=suppress_unifurcations)[0]
         if update_bipartitions:
             self.update_bipartitions()
         return nodes_removed
@@ -5265,19 +6143,13 @@ class Tree(
         Removes all terminal nodes that have their ``taxon`` attribute set to
         |None|.
         """
-        nodes_removed = []
-        while True:
-            nodes_to_remove = []
-            for nd in self.leaf_node_iter():
-                if nd.taxon is None:
-                    nodes_to_remove.append(nd)
-            for nd in nodes_to_remove:
-                nd.edge.tail_node.remove_child(nd)
-            nodes_removed += nodes_to_remove
-            if not nodes_to_remove or not recursive:
-                break
-        if suppress_unifurcations:
-            self.suppress_unifurcations()
+        if recursive:
+            node_prune_state_fn = lambda nd, child_prune_states: nd.taxon is None and all(child_prune_states)
+        else:
+            node_prune_state_fn = lambda nd, child_prune_states: nd.taxon is None and not child_prune_states
+        nodes_removed = self._prune_nodes_in_postorder(
+                node_prune_state_fn=node_prune_state_fn,
+                suppress_unifurcations=suppress_unifurcations)[0]
         if update_bipartitions:
             self.update_bipartitions()
         return nodes_removed
@@ -5300,17 +6172,31 @@ class Tree(
         """
         Removes terminal nodes associated with Taxon objects given by the container
         ``taxa`` (which can be any iterable, including a TaxonNamespace object) from ``self``.
-        """
-        nodes_to_remove = []
-        for nd in self.postorder_node_iter():
-            if (
-                ((is_apply_filter_to_internal_nodes and nd._child_nodes)
-                or (is_apply_filter_to_leaf_nodes and not nd._child_nodes))
-                and (nd.taxon and nd.taxon in taxa)
-                ):
-                    nd.edge.tail_node.remove_child(nd)
-        self.prune_leaves_without_taxa(update_bipartitions=update_bipartitions,
+
+        Leaves left without a taxon are then removed as well (as by
+        :meth:`prune_leaves_without_taxa()`). All the nodes are removed in a
+        single pass over the tree, so that pruning many taxa, even from
+        large polytomies, takes time linear in the size of the tree.
+        """
+        if not isinstance(taxa, (set, frozenset, taxonmodel.TaxonNamespace)):
+            taxa = set(taxa)
+        def node_prune_state_fn(nd, child_prune_states):
+            # 1: node is associated with one of ``taxa`` (with its children
+            # not so associated still considered to be present); 2: node is
+            # (or has become) a leaf without a taxon
+            if nd.taxon is not None and nd.taxon in taxa:
+                is_internal = any(state != 1 for state in child_prune_states)
+                if ((is_internal and is_apply_filter_to_internal_nodes)
+                        or (not is_internal and is_apply_filter_to_leaf_nodes)):
+                    return 1
+            if nd.taxon is None and all(child_prune_states):
+                return 2
+            return 0
+        self._prune_nodes_in_postorder(
+                node_prune_state_fn=node_prune_state_fn,
                 suppress_unifurcations=suppress_unifurcations)
+        if update_bipartitions:
+            self.update_bipartitions()
 
     def prune_taxa_with_labels(self,
             labels,
@@ -5493,11 +6379,18 @@ class Tree(
     ###########################################################################
     ### Ages, depths, branch lengths etc. (calculation)
 
-    def phylogenetic_distance_matrix(self):
+    def phylogenetic_distance_matrix(self, **kwargs):
         """
         Returns a |PhylogeneticDistanceMatrix| instance based
         on the tree (in its current state).
 
+        Parameters
+        ----------
+        \*\*kwargs : keyword arguments
+            These will be passed directly to
+            :meth:`PhylogeneticDistanceMatrix.from_tree()` (e.g.,
+            ``is_lazy``).
+
         Returns
         -------
         pdc : a |PhylogeneticDistanceMatrix| instance
@@ -5505,7 +6398,7 @@ class Tree(
             tree in its current state.
         """
         from dendropy.calculate.phylogeneticdistance import PhylogeneticDistanceMatrix
-        return PhylogeneticDistanceMatrix.from_tree(tree=self)
+        return PhylogeneticDistanceMatrix.from_tree(tree=self, **kwargs)
 
     def node_distance_matrix(self):
         from dendropy.calculate.phylogeneticdistance import NodeDistanceMatrix
@@ -5744,7 +6637,8 @@ class Tree(
             suppress_unifurcations=True,
             collapse_unrooted_basal_bifurcation=True,
             suppress_storage=False,
-            is_bipartitions_mutable=False):
+            is_bipartitions_mutable=False,
+            taxon_bitmask_map=None):
         """
         Calculates the bipartitions of this tree.
 
@@ -5766,6 +6660,12 @@ class Tree(
             or frozen, allowing their use in hashing containers such as
             dictionary (keys) and sets. To allow modification of values, the
             ``is_mutable`` attribute must be set to |True|.
+        taxon_bitmask_map : dict or |None|
+            A dictionary mapping |Taxon| objects to their bitmasks, as
+            returned by :meth:`TaxonNamespace.taxon_bitmask_map()`. When
+            encoding many trees on the same taxon namespace, passing in the
+            same dictionary avoids looking up the bitmask of each leaf in the
+            namespace. If |None|, the bitmasks are looked up in the namespace.
 
         Returns
         -------
@@ -5795,6 +6695,8 @@ class Tree(
             # exist in the graph -- it is not a true link connecting
             # two nodes).
             self.collapse_basal_bifurcation()
+        if taxon_bitmask_map is None:
+            taxon_bitmask_map = {}
         tree_edges = []
         for edge in self.postorder_edge_iter():
             leafset_bitmask = 0
@@ -5803,31 +6705,21 @@ class Tree(
             num_children = len(child_nodes)
             if num_children == 1 and suppress_unifurcations:
                 # collapsing node: remove, and do not process/add edge
-                if head_node.edge.length is not None:
-                    if child_nodes[0].edge.length is None:
-                        child_nodes[0].edge.length = head_node.edge.length
-                    else:
-                        child_nodes[0].edge.length += head_node.edge.length
-                if head_node._parent_node is not None:
-                    parent = head_node._parent_node
-                    pos = parent._child_nodes.index(head_node)
-                    parent.remove_child(head_node)
-                    parent.insert_child(index=pos, node=child_nodes[0])
-                    head_node._parent_node = None
-                else:
-                    self.seed_node = child_nodes[0]
-                    self.seed_node._parent_node = None
+                self._suppress_unifurcation_on_encoding(head_node)
             else:
                 if num_children == 0:
                     tree_edges.append(edge)
                     taxon = edge._head_node.taxon
                     if taxon:
-                        leafset_bitmask = taxon_namespace.taxon_bitmask(taxon)
+                        try:
+                            leafset_bitmask = taxon_bitmask_map[taxon]
+                        except KeyError:
+                            leafset_bitmask = taxon_bitmask_map[taxon] = taxon_namespace.taxon_bitmask(taxon)
                 else:
                     tree_edges.append(edge)
                     for child in child_nodes:
                         leafset_bitmask |= child.edge.bipartition._leafset_bitmask
-                edge.bipartition = Bipartition(compile_bipartition=False, is_mutable=True)
+                edge.bipartition = edge.bipartition_factory(compile_bipartition=False, is_mutable=True)
                 edge.bipartition._leafset_bitmask = leafset_bitmask
                 edge.bipartition._is_rooted = self._is_rooted
         # Create normalized bitmasks, where the full (self) bipartition mask is *not*
@@ -5840,13 +6732,259 @@ class Tree(
             _compile_bipartition = self._compile_immutable_bipartition_for_edge
         if suppress_storage:
             self.bipartition_encoding = None
+            self._bipartition_encoding_state = None
             for x in map(_compile_bipartition, tree_edges):
                 pass
         else:
             # self.bipartition_encoding = dict(zip(map(self._compile_bipartition_for_edge, tree_edges), tree_edges))
             self.bipartition_encoding = list(map(_compile_bipartition, tree_edges))
+            self._bipartition_encoding_state = self._get_bipartition_encoding_state()
         return self.bipartition_encoding
 
+    def _suppress_unifurcation_on_encoding(self, head_node):
+        child_node = head_node._child_nodes[0]
+        if head_node.edge.length is not None:
+            if child_node.edge.length is None:
+                child_node.edge.length = head_node.edge.length
+            else:
+                child_node.edge.length += head_node.edge.length
+        if head_node._parent_node is not None:
+            # replace in place: a single scan of the child list of the parent
+            parent = head_node._parent_node
+            parent._mark_structure_changed()
+            parent._child_nodes[parent._child_nodes.index(head_node)] = child_node
+            child_node._parent_node = parent
+            head_node._parent_node = None
+        else:
+            self.seed_node = child_node
+            self.seed_node._parent_node = None
+
+    def _get_bipartition_encoding_state(self):
+        return (self._seed_node,
+                self._stamp_structure(),
+                self._taxon_namespace,
+                len(self._taxon_namespace))
+
+    def _is_bipartition_encoding_current(self):
+        """
+        Returns |True| if the stored bipartition encoding was calculated by
+        :meth:`encode_bipartitions()` and the tree has not been restructured
+        since through the methods of |Node|, |Edge| or |Tree|, and its taxon
+        namespace has not been changed. As with |TreeStructureIndex|, the (re)assignment of
+        taxa to nodes is not tracked.
+        """
+        state = getattr(self, "_bipartition_encoding_state", None)
+        if state is None or not self.bipartition_encoding:
+            return False
+        return (state[0] is self._seed_node
+                and state[1] == self._get_structure_stamp()
+                and state[2] is self._taxon_namespace
+                and state[3] == len(self._taxon_namespace))
+
+    def _get_structure_stamp(self):
+        """
+        Returns the structure stamp of the seed node, which is |None| if the
+        tree has been restructured since it was last stamped by
+        :meth:`_stamp_structure()`.
+        """
+        if self._seed_node is None:
+            return None
+        return self._seed_node._structure_stamp
+
+    def _stamp_structure(self):
+        """
+        Returns a stamp identifying the current structure of this tree, which
+        is unchanged until the tree is restructured through the methods of
+        |Node|, |Edge| or |Tree|, so that state derived from the structure
+        (e.g., the bipartition encoding or a |TreeStructureIndex|) can be
+        checked for staleness. Changes to the structure of other trees do
+        not affect it.
+
+        Changing the children of a node clears the stamps of the node and its
+        ancestors, so that the nodes with cleared stamps always form a subtree
+        at the seed node: a new stamp only needs to be assigned to these.
+        """
+        seed_node = self._seed_node
+        if seed_node is None:
+            return None
+        if seed_node._structure_stamp is not None:
+            return seed_node._structure_stamp
+        Tree._structure_stamp_count += 1
+        stamp = Tree._structure_stamp_count
+        to_visit = [seed_node]
+        while to_visit:
+            nd = to_visit.pop()
+            nd._structure_stamp = stamp
+            for ch in nd._child_nodes:
+                if ch._structure_stamp is None:
+                    to_visit.append(ch)
+        return stamp
+
+    def _encoded_ancestral_path_nodes(self, node):
+        """
+        Returns a set of ``node`` and its ancestors, i.e., the nodes whose
+        leafsets are changed by rerooting the tree at (or on the edge
+        subtending) ``node``, if the stored bipartition encoding is current,
+        or |None| otherwise. To be called *before* restructuring the tree,
+        and passed to :meth:`_update_bipartitions_on_path()` after.
+        """
+        if not self._is_bipartition_encoding_current():
+            return None
+        path_nodes = set()
+        while node is not None:
+            path_nodes.add(node)
+            node = node._parent_node
+        return path_nodes
+
+    def _update_bipartitions_on_path(self,
+            path_nodes,
+            suppress_unifurcations=True,
+            collapse_unrooted_basal_bifurcation=True):
+        """
+        Updates the bipartition encoding of this tree after it has been
+        rerooted, recalculating the bipartitions of only the edges subtending
+        ``path_nodes`` (as given by :meth:`_encoded_ancestral_path_nodes()`)
+        and the seed node: the leafsets of all other edges are unchanged by
+        rerooting, so their (immutable) bipartitions are reused. The result
+        is the same as that of calling :meth:`encode_bipartitions()`, which
+        is done instead if ``path_nodes`` is |None|, if the stored
+        bipartitions are mutable, if the rooting state of the tree has
+        changed, or if the leafset of the tree has changed (as when rerooting
+        at a leaf).
+        """
+        if path_nodes is None:
+            return self.encode_bipartitions(
+                    suppress_unifurcations=suppress_unifurcations,
+                    collapse_unrooted_basal_bifurcation=collapse_unrooted_basal_bifurcation)
+        # the bipartition of the (old) seed node, last in postorder
+        seed_bipartition = self.bipartition_encoding[-1]
+        if seed_bipartition.is_mutable or seed_bipartition._is_rooted != self._is_rooted:
+            return self.encode_bipartitions(
+                    suppress_unifurcations=suppress_unifurcations,
+                    collapse_unrooted_basal_bifurcation=collapse_unrooted_basal_bifurcation)
+        if (collapse_unrooted_basal_bifurcation
+                and not self._is_rooted
+                and len(self.seed_node._child_nodes) == 2):
+            self.collapse_basal_bifurcation()
+        self._bipartition_edge_map = None
+        taxon_namespace = self._taxon_namespace
+        seed_node = self.seed_node
+        tree_edges = []
+        updated_edges = []
+        for edge in self.postorder_edge_iter():
+            head_node = edge._head_node
+            child_nodes = head_node._child_nodes
+            if len(child_nodes) == 1 and suppress_unifurcations:
+                self._suppress_unifurcation_on_encoding(head_node)
+                continue
+            tree_edges.append(edge)
+            if head_node not in path_nodes and head_node is not seed_node:
+                continue
+            leafset_bitmask = 0
+            if child_nodes:
+                for child in child_nodes:
+                    leafset_bitmask |= child.edge.bipartition._leafset_bitmask
+            elif head_node.taxon:
+                leafset_bitmask = taxon_namespace.taxon_bitmask(head_node.taxon)
+            edge.bipartition = edge.bipartition_factory(compile_bipartition=False, is_mutable=True)
+            edge.bipartition._leafset_bitmask = leafset_bitmask
+            edge.bipartition._is_rooted = self._is_rooted
+            updated_edges.append(edge)
+        if self.seed_node.edge.bipartition._leafset_bitmask != seed_bipartition._leafset_bitmask:
+            # the basal bifurcation has already been collapsed (if requested)
+            return self.encode_bipartitions(
+                    suppress_unifurcations=suppress_unifurcations,
+                    collapse_unrooted_basal_bifurcation=False)
+        for edge in updated_edges:
+            self._compile_immutable_bipartition_for_edge(edge)
+        self.bipartition_encoding = [edge.bipartition for edge in tree_edges]
+        self._bipartition_encoding_state = self._get_bipartition_encoding_state()
+        return self.bipartition_encoding
+
+    def encode_split_bitmasks(self,
+            suppress_unifurcations=True,
+            collapse_unrooted_basal_bifurcation=True,
+            taxon_bitmask_map=None):
+        """
+        Calculates the split bitmasks of this tree, without creating (or
+        storing) |Bipartition| objects.
+
+        The tree is processed exactly as by :meth:`encode_bipartitions()`
+        (including the suppression of unifurcations and collapsing of the
+        basal bifurcation of unrooted trees, if requested), and the split
+        bitmasks returned are the same, and in the same order, as those of
+        the bipartitions it would encode. This is a faster alternative for
+        when only the bitmasks are needed, as when counting splits over many
+        trees.
+
+        Parameters
+        ----------
+        suppress_unifurcations : bool
+            If |True|, nodes of outdegree 1 will be deleted as they are
+            encountered.
+        collapse_unrooted_basal_bifurcation: bool
+            If |True|, then a basal bifurcation on an unrooted tree will be
+            collapsed to a trifurcation.
+        taxon_bitmask_map : dict or |None|
+            A dictionary mapping |Taxon| objects to their bitmasks, as
+            returned by :meth:`TaxonNamespace.taxon_bitmask_map()`. If
+            |None|, the bitmasks are looked up in the namespace.
+
+        Returns
+        -------
+        split_bitmasks : list[int]
+            The split bitmasks of the tree.
+        edges : list[|Edge|]
+            The edges of the tree corresponding to each of the split bitmasks.
+        tree_leafset_bitmask : int
+            The leafset bitmask of the root edge of the tree (i.e., the
+            bitmask of all the taxa on the tree).
+        """
+        taxon_namespace = self._taxon_namespace
+        seed_node = self.seed_node
+        if not seed_node:
+            return [], [], 0
+        if (collapse_unrooted_basal_bifurcation
+                and not self._is_rooted
+                and len(seed_node._child_nodes) == 2):
+            self.collapse_basal_bifurcation()
+        if taxon_bitmask_map is None:
+            taxon_bitmask_map = {}
+        edges = []
+        leafset_bitmasks = []
+        node_leafset_bitmasks = {}
+        for edge in self.postorder_edge_iter():
+            head_node = edge._head_node
+            child_nodes = head_node._child_nodes
+            num_children = len(child_nodes)
+            if num_children == 1 and suppress_unifurcations:
+                self._suppress_unifurcation_on_encoding(head_node)
+                continue
+            leafset_bitmask = 0
+            if num_children == 0:
+                taxon = head_node.taxon
+                if taxon:
+                    try:
+                        leafset_bitmask = taxon_bitmask_map[taxon]
+                    except KeyError:
+                        leafset_bitmask = taxon_bitmask_map[taxon] = taxon_namespace.taxon_bitmask(taxon)
+            else:
+                for child in child_nodes:
+                    leafset_bitmask |= node_leafset_bitmasks.pop(child)
+            node_leafset_bitmasks[head_node] = leafset_bitmask
+            edges.append(edge)
+            leafset_bitmasks.append(leafset_bitmask)
+        tree_leafset_bitmask = node_leafset_bitmasks[self.seed_node]
+        if not tree_leafset_bitmask:
+            split_bitmasks = [None] * len(leafset_bitmasks)
+        elif self._is_rooted:
+            split_bitmasks = leafset_bitmasks
+        else:
+            lowest_relevant_bit = bitprocessing.least_significant_set_bit(tree_leafset_bitmask)
+            split_bitmasks = [((~m) & tree_leafset_bitmask) if (m & lowest_relevant_bit) else m
+                    for m in leafset_bitmasks]
+        return split_bitmasks, edges, tree_leafset_bitmask
+
     def update_bipartitions(self, *args, **kwargs):
         """
         Recalculates bipartition hashes for tree.
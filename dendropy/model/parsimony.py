@@ -24,6 +24,14 @@ from functools import reduce
 import operator
 import dendropy
 from dendropy.utility.error import TaxonNamespaceIdentityError
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("NumPy is required for packed state sets, but could not be imported")
 
 class _NodeStateSetMap(dict):
     def __init__(self, taxon_state_sets_map=None):
@@ -47,6 +55,251 @@ def _retrieve_state_sets_from_attr(n, state_sets_attr_name, taxon_state_sets_map
         setattr(n, state_sets_attr_name, v)
         return v
 
+class PackedStateSets(object):
+    """
+    A bit-packed, pattern-compressed representation of a taxon-to-state-sets
+    map, for fast Fitch parsimony scoring.
+
+    Each state set is packed into an unsigned integer, with bit ``i`` set if
+    fundamental state ``i`` is in the set, and identical site patterns
+    (columns) are collapsed into a single pattern. The state sets of each taxon
+    are then held as a NumPy array with one element per distinct pattern, so
+    that the intersections and unions of the Fitch algorithm run across all
+    patterns at once.
+
+    Instances can be passed as the ``taxon_state_sets_map`` argument of
+    :func:`fitch_down_pass`. As the packing is done only once, this is the
+    recommended way to score many trees against the same data::
+
+        packed = PackedStateSets.from_char_matrix(chars, gaps_as_missing=True)
+        for tree in trees:
+            score = fitch_down_pass(
+                    tree.postorder_node_iter(),
+                    state_sets_attr_name=None,
+                    taxon_state_sets_map=packed)
+
+    Requires NumPy.
+    """
+
+    @classmethod
+    def from_char_matrix(cls, chars, gaps_as_missing=True):
+        """
+        Creates and returns the packed state sets of the data in ``chars``.
+
+        Parameters
+        ----------
+        chars : a |DiscreteCharacterMatrix| instance
+            The character data to pack.
+        gaps_as_missing : bool
+            If |True| [default], then gaps will be treated as missing data.
+            If |False|, then gaps will be treated as a new/additional state.
+
+        Returns
+        -------
+        p : |PackedStateSets|
+            The packed state sets.
+        """
+        return cls(chars.taxon_state_sets_map(gaps_as_missing=gaps_as_missing))
+
+    def __init__(self, taxon_state_sets_map):
+        """
+        Parameters
+        ----------
+        taxon_state_sets_map : dict[taxon] = state sets
+            A dictionary that takes a taxon object as a key and returns a
+            state set list as a value, as given by, e.g.,
+            :meth:`DiscreteCharacterMatrix.taxon_state_sets_map()`.
+        """
+        _require_numpy()
+        taxa = list(taxon_state_sets_map.keys())
+        rows = []
+        num_characters = None
+        max_bits = 0
+        for taxon in taxa:
+            row = []
+            for ss in taxon_state_sets_map[taxon]:
+                bits = 0
+                for state_index in ss:
+                    bits |= 1 << state_index
+                row.append(bits)
+                if bits > max_bits:
+                    max_bits = bits
+            if num_characters is None:
+                num_characters = len(row)
+            elif len(row) != num_characters:
+                raise ValueError("Taxon '{}' has {} characters, but expecting {}".format(taxon, len(row), num_characters))
+            rows.append(row)
+        if num_characters is None:
+            num_characters = 0
+        self._num_states = max_bits.bit_length()
+        if self._num_states <= 8:
+            self._dtype = numpy.uint8
+        elif self._num_states <= 16:
+            self._dtype = numpy.uint16
+        elif self._num_states <= 32:
+            self._dtype = numpy.uint32
+        elif self._num_states <= 64:
+            self._dtype = numpy.uint64
+        else:
+            # too wide for a machine integer: fall back to Python integers
+            self._dtype = object
+        pattern_indexes = {}
+        patterns = []
+        character_patterns = []
+        for column in zip(*rows):
+            try:
+                pattern_index = pattern_indexes[column]
+            except KeyError:
+                pattern_index = len(patterns)
+                pattern_indexes[column] = pattern_index
+                patterns.append(column)
+            character_patterns.append(pattern_index)
+        self._character_patterns = numpy.array(character_patterns, dtype=numpy.intp)
+        self._pattern_counts = numpy.bincount(self._character_patterns, minlength=len(patterns))
+        self._taxon_packed_state_sets = {}
+        for row_idx, taxon in enumerate(taxa):
+            v = numpy.empty(len(patterns), dtype=self._dtype)
+            for pattern_index, column in enumerate(patterns):
+                v[pattern_index] = column[row_idx]
+            self._taxon_packed_state_sets[taxon] = v
+        self._state_set_decodings = {}
+
+    def _get_num_characters(self):
+        return len(self._character_patterns)
+    num_characters = property(_get_num_characters)
+
+    def _get_num_patterns(self):
+        return len(self._pattern_counts)
+    num_patterns = property(_get_num_patterns)
+
+    def _get_num_states(self):
+        return self._num_states
+    num_states = property(_get_num_states)
+
+    def _get_character_patterns(self):
+        return self._character_patterns
+    character_patterns = property(_get_character_patterns,
+            doc="Array giving, for each character, the index of its pattern.")
+
+    def _get_pattern_counts(self):
+        return self._pattern_counts
+    pattern_counts = property(_get_pattern_counts,
+            doc="Array giving, for each pattern, the number of characters that share it.")
+
+    def __len__(self):
+        return len(self._taxon_packed_state_sets)
+
+    def __iter__(self):
+        return iter(self._taxon_packed_state_sets)
+
+    def __contains__(self, taxon):
+        return taxon in self._taxon_packed_state_sets
+
+    def __getitem__(self, taxon):
+        """
+        Returns the packed state sets of ``taxon``, as an array with one
+        element per pattern.
+        """
+        return self._taxon_packed_state_sets[taxon]
+
+    def unpack(self, packed_state_sets):
+        """
+        Expands an array of packed state sets (one element per pattern) back
+        to a list of state sets (one per character), as used by
+        :func:`fitch_down_pass` and :func:`fitch_up_pass`.
+        """
+        decodings = self._state_set_decodings
+        result = []
+        for bits in packed_state_sets[self._character_patterns].tolist():
+            try:
+                state_indexes = decodings[bits]
+            except KeyError:
+                state_indexes = tuple(i for i in range(bits.bit_length()) if (bits >> i) & 1)
+                decodings[bits] = state_indexes
+            result.append(set(state_indexes))
+        return result
+
+    def taxon_state_sets(self, taxon):
+        """
+        Returns the list of state sets (one per character) of ``taxon``.
+        """
+        return self.unpack(self._taxon_packed_state_sets[taxon])
+
+    def down_pass(self, postorder_nodes, node_packed_state_sets=None):
+        """
+        Runs the first pass of Fitch's (1971) algorithm over the nodes in
+        ``postorder_nodes`` using the packed state sets.
+
+        Parameters
+        ----------
+        postorder_nodes : iterable of/over |Node| objects
+            An iterable of |Node| objects in in order of post-order
+            traversal of the tree.
+        node_packed_state_sets : dict or None
+            If not |None|, a dictionary which will be populated with the
+            packed state sets of each node in ``postorder_nodes``.
+
+        Returns
+        -------
+        c : NumPy array
+            The (unweighted) number of changes required by each pattern.
+        """
+        if node_packed_state_sets is None:
+            node_packed_state_sets = {}
+        taxon_packed_state_sets = self._taxon_packed_state_sets
+        changes = numpy.zeros(len(self._pattern_counts), dtype=numpy.int64)
+        for nd in postorder_nodes:
+            c = nd.child_nodes()
+            if not c:
+                node_packed_state_sets[nd] = taxon_packed_state_sets[nd.taxon]
+                continue
+            result = node_packed_state_sets[c[0]]
+            for ch in c[1:]:
+                right = node_packed_state_sets[ch]
+                inter = result & right
+                empty = inter == 0
+                changes += empty
+                result = numpy.where(empty, result | right, inter)
+            node_packed_state_sets[nd] = result
+        return changes
+
+    def score(self, tree):
+        """
+        Returns the (unweighted) Fitch parsimony score of ``tree``.
+        """
+        changes = self.down_pass(tree.postorder_node_iter())
+        return int(numpy.dot(changes, self._pattern_counts))
+
+def _packed_fitch_down_pass(
+        postorder_nodes,
+        state_sets_attr_name,
+        packed_state_sets,
+        weights,
+        score_by_character_list):
+    if state_sets_attr_name is None:
+        changes = packed_state_sets.down_pass(postorder_nodes)
+    else:
+        node_packed_state_sets = {}
+        postorder_nodes = list(postorder_nodes)
+        changes = packed_state_sets.down_pass(postorder_nodes, node_packed_state_sets)
+        for nd in postorder_nodes:
+            if nd.is_leaf():
+                if not hasattr(nd, state_sets_attr_name):
+                    setattr(nd, state_sets_attr_name, packed_state_sets.taxon_state_sets(nd.taxon))
+            else:
+                setattr(nd, state_sets_attr_name, packed_state_sets.unpack(node_packed_state_sets[nd]))
+    if weights is None and score_by_character_list is None:
+        return int(numpy.dot(changes, packed_state_sets.pattern_counts))
+    character_changes = changes[packed_state_sets.character_patterns].tolist()
+    if weights is None:
+        character_scores = character_changes
+    else:
+        character_scores = [weights[n] * ct if ct else 0 for n, ct in enumerate(character_changes)]
+    if score_by_character_list is not None:
+        assert len(score_by_character_list) == 0
+        score_by_character_list.extend(character_scores)
+    return sum(character_scores)
+
 def fitch_down_pass(
         postorder_nodes,
         state_sets_attr_name="state_sets",
@@ -71,7 +324,9 @@ def fitch_down_pass(
         A dictionary that takes a taxon object as a key and returns a state set
         list as a value. This will be used to populate the state set of a node
         that has not yet had its state sets scored and recorded (typically,
-        leaves of a tree that has not yet been processed).
+        leaves of a tree that has not yet been processed). This can also be a
+        |PackedStateSets| instance, in which case the bit-parallel engine
+        is used and the state sets of the leaves are always taken from it.
     weights : iterable
         A list of weights for each pattern.
     score_by_character_list : None or list
@@ -161,7 +416,23 @@ def fitch_down_pass(
                 taxon_state_sets_map=taxon_state_sets_map)
         print(score)
 
+    When scoring many trees against the same data, pack the state sets once
+    with |PackedStateSets| and pass that in instead, which scores all the
+    site patterns at once using bitwise operations::
+
+        packed = PackedStateSets(taxon_state_sets_map)
+        score = fitch_down_pass(tree.postorder_node_iter(),
+                state_sets_attr_name=None,
+                taxon_state_sets_map=packed)
+
     """
+    if isinstance(taxon_state_sets_map, PackedStateSets):
+        return _packed_fitch_down_pass(
+                postorder_nodes=postorder_nodes,
+                state_sets_attr_name=state_sets_attr_name,
+                packed_state_sets=taxon_state_sets_map,
+                weights=weights,
+                score_by_character_list=score_by_character_list)
     if score_by_character_list is not None:
         assert len(score_by_character_list) == 0
         for idx in range(len(list(taxon_state_sets_map.values())[0])): # this is unacceptable!
@@ -389,19 +660,351 @@ def parsimony_score(
     Notes
     -----
 
+    If NumPy is available, the data are packed into a |PackedStateSets|
+    instance and scored with the bit-parallel engine. The state sets of the
+    nodes are not stored on the nodes: call "fitch_down_pass" directly if
+    these are needed.
+
     If the same data is going to be used to score multiple trees or multiple times,
-    it is probably better to generate the 'taxon_state_sets_map' once and call
-    "fitch_down_pass" directly yourself, as this function generates a new map
-    each time.
+    it is probably better to generate the |PackedStateSets| (or
+    'taxon_state_sets_map') once and call "fitch_down_pass" directly yourself,
+    as this function generates a new map each time.
+
+    To score many trees that differ from each other by small rearrangements,
+    see |IncrementalParsimonyScorer|.
 
     """
     if tree.taxon_namespace is not chars.taxon_namespace:
-        raise TaxonNamespaceIdentityError(tree, data)
-    taxon_state_sets_map = chars.taxon_state_sets_map(gaps_as_missing=gaps_as_missing)
+        raise TaxonNamespaceIdentityError(tree, chars)
+    if numpy is None:
+        taxon_state_sets_map = chars.taxon_state_sets_map(gaps_as_missing=gaps_as_missing)
+    else:
+        taxon_state_sets_map = PackedStateSets.from_char_matrix(chars, gaps_as_missing=gaps_as_missing)
     nodes = tree.postorder_node_iter()
     pscore = fitch_down_pass(nodes,
+            state_sets_attr_name=None,
             taxon_state_sets_map=taxon_state_sets_map,
             weights=weights,
             score_by_character_list=score_by_character_list)
     return pscore
 
+class IncrementalParsimonyScorer(object):
+    """
+    Scores a tree under the parsimony model using the Fitch algorithm,
+    caching the state sets of each node so that the tree can be re-scored
+    cheaply after it has been edited, or candidate rearrangements scored
+    without applying them.
+
+    The state sets are packed using |PackedStateSets|, so this requires
+    NumPy.
+
+    Examples
+    --------
+
+    ::
+
+        taxon_namespace = dendropy.TaxonNamespace()
+        chars = dendropy.StandardCharacterMatrix.get(
+                path="apternodus.chars.nexus",
+                schema="nexus",
+                taxon_namespace=taxon_namespace)
+        tree = dendropy.Tree.get(
+                path="apternodus.tre",
+                schema="nexus",
+                taxon_namespace=taxon_namespace)
+        scorer = IncrementalParsimonyScorer(tree,
+                PackedStateSets.from_char_matrix(chars))
+        print(scorer.score)
+
+        # score of pruning the subtree rooted at ``nd1`` and regrafting it
+        # onto the edge subtending ``nd2``, without changing the tree
+        print(scorer.score_spr(nd1, nd2))
+
+        # edit the tree in-place, then bring the scorer up to date
+        nd3.parent_node.remove_child(nd3)
+        nd4.add_child(nd3)
+        print(scorer.update())
+
+    """
+
+    def __init__(self, tree, taxon_state_sets_map, weights=None):
+        """
+        Parameters
+        ----------
+        tree : a |Tree| instance
+            The tree to be scored. The scorer keeps a reference to this tree;
+            if it is edited in-place, call :meth:`update()` to re-score it.
+        taxon_state_sets_map : dict[taxon] = state sets, or |PackedStateSets|
+            The character data, as either a |PackedStateSets| instance or a
+            dictionary mapping taxa to lists of state sets (which will be
+            packed).
+        weights : iterable
+            A list of weights for each character.
+        """
+        _require_numpy()
+        if isinstance(taxon_state_sets_map, PackedStateSets):
+            self._packed_state_sets = taxon_state_sets_map
+        else:
+            self._packed_state_sets = PackedStateSets(taxon_state_sets_map)
+        self.tree = tree
+        character_patterns = self._packed_state_sets.character_patterns
+        if weights is None:
+            self._pattern_weights = self._packed_state_sets.pattern_counts
+        else:
+            weights = numpy.asarray(weights)
+            if len(weights) != len(character_patterns):
+                raise ValueError("Expecting {} weights but found {}".format(len(character_patterns), len(weights)))
+            self._pattern_weights = numpy.zeros(self._packed_state_sets.num_patterns, dtype=weights.dtype)
+            numpy.add.at(self._pattern_weights, character_patterns, weights)
+        self._node_child_nodes = {}
+        self._node_down_state_sets = {}
+        self._node_scores = {}
+        self._node_final_state_sets = None
+        self._score = 0
+        self.update()
+
+    def _get_score(self):
+        return self._score
+    score = property(_get_score,
+            doc="The parsimony score of the tree, as of the last call to :meth:`update()`.")
+
+    def _get_packed_state_sets(self):
+        return self._packed_state_sets
+    packed_state_sets = property(_get_packed_state_sets)
+
+    def _combine(self, child_state_sets):
+        result = child_state_sets[0]
+        cost = 0
+        for right in child_state_sets[1:]:
+            inter = result & right
+            empty = inter == 0
+            cost += self._pattern_weights[empty].sum().item()
+            result = numpy.where(empty, result | right, inter)
+        return result, cost
+
+    def update(self):
+        """
+        Re-scores the tree after it has been edited in-place (e.g., using
+        :meth:`Node.remove_child()`, :meth:`Node.add_child()`, or
+        :meth:`Tree.reroot_at_edge()`). State sets are only recomputed for
+        nodes whose children have changed since the last call, and for their
+        ancestors.
+
+        Returns
+        -------
+        s : int or float
+            The parsimony score of the tree.
+        """
+        node_child_nodes = {}
+        preorder_nodes = []
+        to_recompute = set()
+        for nd in self.tree.preorder_node_iter():
+            children = tuple(nd.child_node_iter())
+            node_child_nodes[nd] = children
+            preorder_nodes.append(nd)
+            if self._node_child_nodes.get(nd) != children:
+                while nd is not None and nd not in to_recompute:
+                    to_recompute.add(nd)
+                    nd = nd.parent_node
+        for nd in reversed(preorder_nodes):
+            if nd not in to_recompute:
+                continue
+            children = node_child_nodes[nd]
+            if children:
+                result, cost = self._combine([self._node_down_state_sets[ch] for ch in children])
+            else:
+                result = self._packed_state_sets[nd.taxon]
+                cost = 0
+            self._node_down_state_sets[nd] = result
+            self._node_scores[nd] = cost
+        for nd in list(self._node_down_state_sets):
+            if nd not in node_child_nodes:
+                del self._node_down_state_sets[nd]
+                del self._node_scores[nd]
+        self._node_child_nodes = node_child_nodes
+        self._node_final_state_sets = None
+        self._score = sum(self._node_scores[nd] for nd in preorder_nodes)
+        return self._score
+
+    def down_pass_state_sets(self, node):
+        """
+        Returns the list of state sets (one per character) assigned to
+        ``node`` by the first (down) pass of the Fitch algorithm.
+        """
+        return self._packed_state_sets.unpack(self._node_down_state_sets[node])
+
+    def final_state_sets(self, node):
+        """
+        Returns the list of state sets (one per character) assigned to
+        ``node`` by the final (up) pass of the Fitch algorithm, as given by
+        :func:`fitch_up_pass`. The up pass is run over the whole tree on the
+        first call after the scorer is updated, and cached.
+
+        Currently this requires a bifurcating tree (except at the root).
+        """
+        if self._node_final_state_sets is None:
+            self._node_final_state_sets = self._up_pass()
+        return self._packed_state_sets.unpack(self._node_final_state_sets[node])
+
+    def _up_pass(self):
+        down = self._node_down_state_sets
+        final = {}
+        for nd in self.tree.preorder_node_iter():
+            p = nd.parent_node
+            c = self._node_child_nodes[nd]
+            if (not c) or (p is None):
+                final[nd] = down[nd]
+                continue
+            if len(c) != 2:
+                raise ValueError("Final state sets require a bifurcating tree")
+            par_ss = final[p]
+            curr_ss = down[nd]
+            left_ss = down[c[0]]
+            right_ss = down[c[1]]
+            down_parup_inter = par_ss & curr_ss
+            final[nd] = numpy.where(down_parup_inter == par_ss,
+                    down_parup_inter,
+                    numpy.where((left_ss & right_ss) == 0,
+                        par_ss | curr_ss,
+                        (par_ss & left_ss) | (par_ss & right_ss) | curr_ss))
+        return final
+
+    def _score_edit(self, node_child_nodes, node_parents, removed_nodes):
+        # Scores the tree given by replacing the children of the nodes in
+        # ``node_child_nodes`` and the parents of the nodes in
+        # ``node_parents``, without ``removed_nodes``. Only these nodes and
+        # their (new) ancestors are recomputed.
+        node_depths = {}
+        for nd in node_child_nodes:
+            if nd in removed_nodes or nd in node_depths:
+                continue
+            path = []
+            while nd is not None:
+                path.append(nd)
+                try:
+                    nd = node_parents[nd]
+                except KeyError:
+                    nd = nd.parent_node
+            for idx, nd in enumerate(path):
+                node_depths[nd] = len(path) - idx - 1
+        score = self._score
+        for nd in removed_nodes:
+            score -= self._node_scores[nd]
+        down = {}
+        for nd in sorted(node_depths, key=node_depths.get, reverse=True):
+            try:
+                children = node_child_nodes[nd]
+            except KeyError:
+                children = self._node_child_nodes[nd]
+            child_state_sets = []
+            for ch in children:
+                try:
+                    child_state_sets.append(down[ch])
+                except KeyError:
+                    child_state_sets.append(self._node_down_state_sets[ch])
+            down[nd], cost = self._combine(child_state_sets)
+            score += cost - self._node_scores.get(nd, 0)
+        return score
+
+    def score_spr(self, prune_node, regraft_node):
+        """
+        Returns the parsimony score of the tree that would result from pruning
+        the subtree rooted at ``prune_node`` and regrafting it onto the edge
+        subtending ``regraft_node`` (or above the root, if ``regraft_node`` is
+        the root), without changing the tree.
+
+        If pruning leaves the parent of ``prune_node`` with a single child,
+        that parent is suppressed. The regrafted subtree is joined to the
+        tree by a new node.
+
+        Parameters
+        ----------
+        prune_node : |Node|
+            The root of the subtree to be moved.
+        regraft_node : |Node|
+            The node subtending the edge onto which the subtree is to be
+            regrafted. Must not be in the subtree rooted at ``prune_node``.
+
+        Returns
+        -------
+        s : int or float
+            The parsimony score of the rearranged tree.
+        """
+        parent = prune_node.parent_node
+        if parent is None:
+            raise ValueError("Cannot prune the root of the tree")
+        nd = regraft_node
+        while nd is not None:
+            if nd is prune_node:
+                raise ValueError("Cannot regraft a subtree onto an edge within itself")
+            nd = nd.parent_node
+        node_child_nodes = {}
+        node_parents = {}
+        removed_nodes = []
+        siblings = [ch for ch in self._node_child_nodes[parent] if ch is not prune_node]
+        if len(siblings) == 1:
+            sibling = siblings[0]
+            grandparent = parent.parent_node
+            removed_nodes.append(parent)
+            node_parents[sibling] = grandparent
+            if grandparent is not None:
+                node_child_nodes[grandparent] = [sibling if ch is parent else ch for ch in self._node_child_nodes[grandparent]]
+            if regraft_node is parent:
+                regraft_node = sibling
+        else:
+            node_child_nodes[parent] = siblings
+        try:
+            regraft_parent = node_parents[regraft_node]
+        except KeyError:
+            regraft_parent = regraft_node.parent_node
+        new_node = object()
+        node_child_nodes[new_node] = [regraft_node, prune_node]
+        node_parents[new_node] = regraft_parent
+        node_parents[regraft_node] = new_node
+        node_parents[prune_node] = new_node
+        if regraft_parent is not None:
+            try:
+                children = node_child_nodes[regraft_parent]
+            except KeyError:
+                children = self._node_child_nodes[regraft_parent]
+            node_child_nodes[regraft_parent] = [new_node if ch is regraft_node else ch for ch in children]
+        return self._score_edit(node_child_nodes, node_parents, removed_nodes)
+
+    def score_swap(self, node1, node2):
+        """
+        Returns the parsimony score of the tree that would result from
+        exchanging the subtrees rooted at ``node1`` and ``node2``, without
+        changing the tree. A nearest-neighbor interchange (NNI) across the
+        edge subtending a node is the exchange of one of its children with
+        its sibling.
+
+        Parameters
+        ----------
+        node1 : |Node|
+            The root of the first subtree.
+        node2 : |Node|
+            The root of the second subtree. Must not be an ancestor or
+            descendent of ``node1``.
+
+        Returns
+        -------
+        s : int or float
+            The parsimony score of the rearranged tree.
+        """
+        for nd1, nd2 in ((node1, node2), (node2, node1)):
+            nd = nd1
+            while nd is not None:
+                if nd is nd2:
+                    raise ValueError("Cannot exchange nested subtrees")
+                nd = nd.parent_node
+        parent1 = node1.parent_node
+        parent2 = node2.parent_node
+        if parent1 is parent2:
+            return self._score
+        node_child_nodes = {
+            parent1: [node2 if ch is node1 else ch for ch in self._node_child_nodes[parent1]],
+            parent2: [node1 if ch is node2 else ch for ch in self._node_child_nodes[parent2]],
+        }
+        node_parents = {node1: parent2, node2: parent1}
+        return self._score_edit(node_child_nodes, node_parents, [])
+
@@ -156,5 +156,52 @@ class NexusTokenizerTestCase(unittest.TestCase):
         self.assertEqual(expected_comments, {})
         self.assertEqual(observed_tokens, expected_tokens)
 
+class NexusTokenizerBufferingTestCase(unittest.TestCase):
+    """
+    Checks that tokenization is independent of the read buffer size.
+    """
+
+    input_str = ("#NEXUS\n[file comment [nested]]\nbegin trees;\n"
+            "  tree 'the tree''s name' = [&R] (a_b:1[x],\t('c d':2e-1, e:3)[y]f:4)g;\n"
+            "end;\n")
+
+    def tokenize(self, buffer_size):
+        src = StringIO(self.input_str)
+        tk = nexusprocessing.NexusTokenizer(src=src, buffer_size=buffer_size)
+        observed = []
+        for token in tk:
+            observed.append((token,
+                tk.is_token_quoted,
+                tk.token_line_num,
+                tk.token_column_num,
+                tk.current_line_num,
+                tk.current_column_num,
+                tk.pull_captured_comments()))
+        return observed
+
+    def test_buffer_sizes(self):
+        expected = self.tokenize(buffer_size=len(self.input_str) + 1)
+        self.assertEqual([t[0] for t in expected], [
+            "#NEXUS", "begin", "trees", ";", "tree", "the tree's name", "=",
+            "(", "a b", ":", "1", ",", "(", "c d", ":", "2e-1", ",", "e", ":", "3", ")",
+            "f", ":", "4", ")", "g", ";", "end", ";"])
+        self.assertEqual(expected[1][6], ["file comment nested"])
+        for buffer_size in (1, 2, 3, 7, 16):
+            self.assertEqual(self.tokenize(buffer_size=buffer_size), expected)
+
+    def test_line_and_column_tracking(self):
+        tokens = self.tokenize(buffer_size=3)
+        tree_token = tokens[4]
+        self.assertEqual(tree_token[0], "tree")
+        self.assertEqual(tree_token[2], 4)
+        self.assertEqual(tree_token[3], 4)
+        self.assertEqual(tokens[-1][2], 5)
+
+    def test_unterminated_quote(self):
+        src = StringIO("a 'b c")
+        tk = nexusprocessing.NexusTokenizer(src=src, buffer_size=2)
+        self.assertEqual(tk.next_token(), "a")
+        self.assertRaises(nexusprocessing.NexusTokenizer.UnterminatedQuoteError, tk.next_token)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,184 @@
+#! /usr/bin/env python
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Tests for indexed (random) access to trees in NEXUS/NEWICK files.
+"""
+
+import os
+import unittest
+import dendropy
+from dendropy.dataio import treeindex
+from dendropy.utility.textprocessing import StringIO
+from dendropy.test.support import pathmap
+
+NEXUS_SRC = """\
+#NEXUS
+[comment; with a semicolon]
+BEGIN TAXA;
+    DIMENSIONS NTAX=4;
+    TAXLABELS A B 'C;c' D;
+END;
+BEGIN TREES;
+    TITLE first;
+    TRANSLATE 1 A, 2 B, 3 'C;c', 4 D;
+    TREE t0 = [&R] ((1,2),(3,4));
+    TREE 't1;x' = [&R] ((1,3),(2,4));
+    TREE t2 = [&R] ((1,4),(2,3));
+    TREE t3 = [&R] (((1,2),3),4);
+    TREE t4 = [&R] (((1,3),2),4);
+END;
+BEGIN TREES;
+    TITLE second;
+    TREE u0 = [&U] (A,B,('C;c',D));
+    TREE u1 = [&U] (A,'C;c',(B,D));
+END;
+"""
+
+NEWICK_SRC = """\
+[&R] ((A,B),(C,D));
+[&R] ((A,C),(B,D));
+[&R] ((A,D),(B,C));
+((A,'B;b'),C,D);
+"""
+
+class TreeOffsetIndexTestCase(unittest.TestCase):
+
+    def write_source(self, src):
+        with pathmap.SandboxedFile() as f:
+            path = f.name
+        with open(path, "w") as dest:
+            dest.write(src)
+        self.paths.append(path)
+        self.paths.append(path + treeindex.TreeOffsetIndex.SIDECAR_SUFFIX)
+        return path
+
+    def setUp(self):
+        self.paths = []
+
+    def tearDown(self):
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def test_nexus_index(self):
+        path = self.write_source(NEXUS_SRC)
+        with treeindex.TreeOffsetIndex.build(path) as tree_index:
+            self.assertTrue(tree_index.is_nexus)
+            self.assertEqual(tree_index.num_trees, 7)
+            self.assertEqual(tree_index.num_collections, 2)
+            self.assertEqual(tree_index.num_trees_in_collection(0), 5)
+            self.assertEqual(tree_index.num_trees_in_collection(1), 2)
+            self.assertEqual(tree_index.tree_statement(1).strip(), "TREE 't1;x' = [&R] ((1,3),(2,4));")
+            self.assertEqual(tree_index.select(), list(range(7)))
+            self.assertEqual(tree_index.select(tree_offset=2), [2, 3, 4])
+            self.assertEqual(tree_index.select(collection_offset=-1), [5, 6])
+            self.assertEqual(tree_index.select(tree_offset=-2), [3, 4])
+            self.assertEqual(tree_index.select(tree_stride=2), [0, 2, 4])
+            self.assertEqual(tree_index.select(collection_offset=1, max_trees=1), [5])
+            self.assertRaises(IndexError, tree_index.select, collection_offset=2)
+            self.assertRaises(IndexError, tree_index.select, tree_offset=5)
+
+    def test_newick_index(self):
+        path = self.write_source(NEWICK_SRC)
+        with treeindex.TreeOffsetIndex.build(path) as tree_index:
+            self.assertFalse(tree_index.is_nexus)
+            self.assertEqual(tree_index.num_trees, 4)
+            self.assertEqual(tree_index.num_collections, 1)
+            self.assertEqual(tree_index.read_text([1]).strip(), "[&R] ((A,C),(B,D));")
+
+    def test_sidecar(self):
+        path = self.write_source(NEWICK_SRC)
+        sidecar_path = path + treeindex.TreeOffsetIndex.SIDECAR_SUFFIX
+        self.assertIsNone(treeindex.TreeOffsetIndex.load(path))
+        treeindex.TreeOffsetIndex.get(path).close()
+        self.assertTrue(os.path.exists(sidecar_path))
+        tree_index = treeindex.TreeOffsetIndex.load(path)
+        self.assertIsNotNone(tree_index)
+        self.assertEqual(tree_index.num_trees, 4)
+        with open(path, "a") as dest:
+            dest.write("(A,(B,(C,D)));\n")
+        self.assertIsNone(treeindex.TreeOffsetIndex.load(path))
+        with treeindex.TreeOffsetIndex.get(path) as tree_index:
+            self.assertEqual(tree_index.num_trees, 5)
+
+    def check_tree_lists(self, path, schema, check_taxon_namespace=True, **kwargs):
+        expected = dendropy.TreeList.get(path=path, schema=schema, **kwargs)
+        observed = dendropy.TreeList.get(path=path, schema=schema, use_tree_index=True, **kwargs)
+        self.assertEqual(
+                [t.as_string("newick") for t in observed],
+                [t.as_string("newick") for t in expected])
+        if check_taxon_namespace:
+            self.assertEqual(
+                    [t.label for t in observed.taxon_namespace],
+                    [t.label for t in expected.taxon_namespace])
+        return observed
+
+    def test_tree_list_get_nexus(self):
+        path = self.write_source(NEXUS_SRC)
+        self.check_tree_lists(path, "nexus")
+        observed = self.check_tree_lists(path, "nexus", tree_offset=1, tree_stride=2)
+        self.assertEqual([t.label for t in observed], ["t1;x", "t3"])
+        observed = self.check_tree_lists(path, "nexus", collection_offset=1)
+        self.assertEqual([t.label for t in observed], ["u0", "u1"])
+        self.assertFalse(observed[0].is_rooted)
+
+    def test_tree_list_get_newick(self):
+        path = self.write_source(NEWICK_SRC)
+        self.check_tree_lists(path, "newick")
+        # NEWICK sources have no taxa block: only taxa in the selected
+        # trees are accessioned
+        observed = self.check_tree_lists(path, "newick",
+                check_taxon_namespace=False,
+                tree_offset=-3,
+                tree_stride=2)
+        self.assertEqual(len(observed.taxon_namespace), 5)
+
+    def test_tree_get(self):
+        path = self.write_source(NEXUS_SRC)
+        for kwargs in (
+                {},
+                {"tree_offset": 3},
+                {"tree_offset": -1},
+                {"collection_offset": 1},
+                {"collection_offset": 1, "tree_offset": 1},
+                ):
+            expected = dendropy.Tree.get(path=path, schema="nexus", **kwargs)
+            observed = dendropy.Tree.get(path=path, schema="nexus", use_tree_index=True, **kwargs)
+            self.assertEqual(observed.label, expected.label)
+            self.assertEqual(observed.as_string("newick"), expected.as_string("newick"))
+
+    def test_unsupported_schema(self):
+        path = self.write_source(NEWICK_SRC)
+        self.assertRaises(ValueError, dendropy.TreeList.get,
+                path=path, schema="nexml", use_tree_index=True)
+
+    def test_unsupported_source(self):
+        for cls in (dendropy.TreeList, dendropy.Tree):
+            self.assertRaises(ValueError, cls.get,
+                    data=NEWICK_SRC, schema="newick", use_tree_index=True)
+            self.assertRaises(ValueError, cls.get,
+                    file=StringIO(NEWICK_SRC), schema="newick", use_tree_index=True)
+            self.assertEqual(
+                    len(cls.get(data=NEWICK_SRC, schema="newick", use_tree_index=False).taxon_namespace),
+                    len(cls.get(data=NEWICK_SRC, schema="newick").taxon_namespace))
+
+if __name__ == "__main__":
+    unittest.main()
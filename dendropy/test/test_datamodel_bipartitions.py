@@ -96,6 +96,49 @@ class BipartitionEncodingTestCase(ExtendedTestCase):
                                 expected_split_bitmask = int(tree_bipartitions_ref[label]["split_bitmask"])
                                 self.assertEqual(bipartition.split_bitmask, expected_split_bitmask)
 
+    def test_split_bitmask_encoding(self):
+        for source_name in self.reference:
+            source_path = pathmap.tree_source_path(source_name)
+            for rooting in self.reference[source_name]:
+                for collapse_unrooted_basal_bifurcation in (True, False):
+                    for suppress_unifurcations in (True, False):
+                        trees_bipartitions_ref = self.reference[source_name][rooting][
+                                "collapse_unrooted_basal_bifurcation={}".format(collapse_unrooted_basal_bifurcation)][
+                                "suppress_unifurcations={}".format(suppress_unifurcations)]
+                        trees = dendropy.TreeList.get_from_path(
+                                source_path,
+                                "nexus",
+                                rooting=rooting,
+                                suppress_leaf_node_taxa=False,
+                                suppress_internal_node_taxa=False,
+                                )
+                        taxon_bitmask_map = trees.taxon_namespace.taxon_bitmask_map()
+                        for tree_idx, tree in enumerate(trees):
+                            tree_bipartitions_ref = trees_bipartitions_ref[str(tree_idx)]
+                            split_bitmasks, edges, tree_leafset_bitmask = tree.encode_split_bitmasks(
+                                    suppress_unifurcations=suppress_unifurcations,
+                                    collapse_unrooted_basal_bifurcation=collapse_unrooted_basal_bifurcation,
+                                    taxon_bitmask_map=taxon_bitmask_map,
+                                    )
+                            self.assertEqual(edges, list(tree.postorder_edge_iter()))
+                            for split_bitmask, edge in zip(split_bitmasks, edges):
+                                label = edge.head_node.taxon.label
+                                self.assertEqual(split_bitmask, int(tree_bipartitions_ref[label]["split_bitmask"]))
+                            self.assertEqual(tree_leafset_bitmask,
+                                    int(tree_bipartitions_ref[tree.seed_node.taxon.label]["leafset_bitmask"]))
+
+    def test_tree_list_encoding(self):
+        trees1 = dendropy.TreeList.get_from_path(
+                pathmap.tree_source_path("dendropy-test-trees-multifurcating-unrooted.nexus"),
+                "nexus")
+        trees2 = dendropy.TreeList.get_from_path(
+                pathmap.tree_source_path("dendropy-test-trees-multifurcating-unrooted.nexus"),
+                "nexus",
+                taxon_namespace=trees1.taxon_namespace)
+        expected = [[b.split_bitmask for b in tree.encode_bipartitions()] for tree in trees1]
+        self.assertEqual([[b.split_bitmask for b in e] for e in trees2.encode_bipartitions()], expected)
+        self.assertEqual(trees2.encode_split_bitmasks(), expected)
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,99 @@
+#! /usr/bin/env python
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Tests for the compact array-backed tree representation.
+"""
+
+import unittest
+import dendropy
+from dendropy.calculate import treemeasure
+from dendropy.test.support import pathmap
+
+class FlatTreeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = dendropy.Tree.get(
+                data="[&R] ((A:1,(B:2,C:3)x:4)y:5,(D:6,E)z:7)r;",
+                schema="newick")
+        self.flat_tree = dendropy.FlatTree.from_tree(self.tree)
+
+    def test_arrays(self):
+        ft = self.flat_tree
+        self.assertEqual(ft.num_nodes, 9)
+        self.assertEqual(list(ft.parent_indices), [-1, 0, 1, 1, 3, 3, 0, 6, 6])
+        self.assertEqual(list(ft.child_offsets), [0, 2, 4, 4, 6, 6, 6, 8, 8, 8])
+        self.assertEqual(list(ft.child_indices), [1, 6, 2, 3, 4, 5, 7, 8])
+        self.assertEqual(list(ft.node_labels), ["r", "y", None, "x", None, None, "z", None, None])
+        self.assertIsNone(ft.edge_length(0))
+        self.assertIsNone(ft.edge_length(8))
+        self.assertEqual(ft.edge_length(3), 4.0)
+        self.assertEqual([ft.taxon(i).label for i in ft.leaf_index_iter()], ["A", "B", "C", "D", "E"])
+        self.assertEqual(ft.length(), 28)
+
+    def test_traversal(self):
+        ft = self.flat_tree
+        self.assertEqual(
+                [nd.label for nd in ft.postorder_node_iter()],
+                [nd.label for nd in self.tree.postorder_node_iter()])
+        self.assertEqual(
+                [nd.taxon for nd in ft.preorder_node_iter()],
+                [nd.taxon for nd in self.tree.preorder_node_iter()])
+        self.assertEqual(
+                [nd.label for nd in ft.node(4).ancestor_iter(inclusive=True)],
+                [None, "x", "y", "r"])
+        self.assertEqual(ft.seed_node, ft.node(0))
+        self.assertIsNone(ft.seed_node.parent_node)
+        self.assertEqual(ft.node(-1).edge.tail_node, ft.node(6))
+
+    def test_bitmasks(self):
+        for rooting in ("[&R]", "[&U]"):
+            tree = dendropy.Tree.get(
+                    data=rooting + " ((A,(B,C)),(D,E),F);",
+                    schema="newick")
+            ft = dendropy.FlatTree.from_tree(tree)
+            tree.encode_bipartitions(suppress_unifurcations=False,
+                    collapse_unrooted_basal_bifurcation=False)
+            self.assertEqual(
+                    list(ft.leafset_bitmasks),
+                    [nd.edge.bipartition.leafset_bitmask for nd in tree.preorder_node_iter()])
+            self.assertEqual(
+                    list(ft.split_bitmasks),
+                    [nd.edge.bipartition.split_bitmask for nd in tree.preorder_node_iter()])
+
+    def test_round_trip(self):
+        for filename in ("pythonidae.mle.nex", "dendropy-test-trees-n33-unrooted-x10a.nexus"):
+            trees = dendropy.TreeList.get(
+                    path=pathmap.tree_source_path(filename),
+                    schema="nexus")
+            for tree in trees:
+                tree2 = dendropy.FlatTree.from_tree(tree).to_tree()
+                self.assertIs(tree2.taxon_namespace, tree.taxon_namespace)
+                self.assertEqual(tree2.is_rooted, tree.is_rooted)
+                self.assertEqual(tree2.as_string("newick"), tree.as_string("newick"))
+
+    def test_treemeasure(self):
+        tree = dendropy.Tree.get(
+                path=pathmap.tree_source_path("pythonidae.mle.nex"),
+                schema="nexus")
+        ft = dendropy.FlatTree.from_tree(tree)
+        for fn in (treemeasure.B1, treemeasure.N_bar, treemeasure.sackin_index, treemeasure.treeness):
+            self.assertAlmostEqual(fn(ft), fn(tree))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+#! /usr/bin/env python
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Tests of persistent split stores.
+"""
+
+import os
+import unittest
+import dendropy
+from dendropy.test.support import pathmap
+
+class SplitStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        with pathmap.SandboxedFile() as f:
+            self.path = f.name
+
+    def tearDown(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def get_trees(self, taxon_namespace=None):
+        return dendropy.TreeList.get_from_path(
+                pathmap.tree_source_path("pythonidae.reference-trees.nexus"),
+                "nexus",
+                taxon_namespace=taxon_namespace)
+
+    def count_in_sessions(self, session_tree_ranges, is_flush=True, **kwargs):
+        for start, stop in session_tree_ranges:
+            with dendropy.SplitStore(self.path) as split_store:
+                tree_array = dendropy.TreeArray(**kwargs)
+                tree_array.attach_split_store(split_store)
+                tree_array.add_trees(self.get_trees(taxon_namespace=tree_array.taxon_namespace)[start:stop])
+                if is_flush:
+                    tree_array.split_distribution.flush_split_store()
+        return tree_array
+
+    def test_counts_accumulate_across_sessions(self):
+        trees = self.get_trees()
+        expected = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace, ignore_node_ages=False)
+        expected.add_trees(trees)
+        expected_sd = expected.split_distribution
+        self.count_in_sessions([(0, 4), (4, 7), (7, len(trees))], ignore_node_ages=False)
+        with dendropy.SplitStore(self.path) as split_store:
+            tree_array = dendropy.TreeArray(ignore_node_ages=False)
+            tree_array.attach_split_store(split_store)
+            self.assertEqual(len(tree_array), 0)
+            self.assertEqual(
+                    [t.label for t in tree_array.taxon_namespace],
+                    [t.label for t in expected.taxon_namespace])
+            self.assertTrue(tree_array.is_rooted_trees is expected.is_rooted_trees)
+            sd = tree_array.split_distribution
+            self.assertEqual(sd.total_trees_counted, expected_sd.total_trees_counted)
+            self.assertEqual(sd.sum_of_tree_weights, expected_sd.sum_of_tree_weights)
+            self.assertEqual(dict(sd.split_counts), dict(expected_sd.split_counts))
+            self.assertEqual(sd.split_frequencies, expected_sd.split_frequencies)
+            self.assertEqual(len(sd.split_edge_lengths), len(expected_sd.split_edge_lengths))
+            for split, values in expected_sd.split_edge_lengths.items():
+                self.assertIn(split, sd.split_edge_lengths)
+                self.assertEqual(sd.split_edge_lengths[split], values)
+            self.assertEqual(dict(sd.split_node_ages.items()), dict(expected_sd.split_node_ages))
+            self.assertEqual(sd.split_edge_length_summaries, expected_sd.split_edge_length_summaries)
+            self.assertEqual(sd.split_node_age_summaries, expected_sd.split_node_age_summaries)
+            self.assertEqual(
+                    tree_array.consensus_tree().as_string("newick"),
+                    expected.consensus_tree().as_string("newick"))
+
+    def test_resume_without_explicit_flush(self):
+        trees = self.get_trees()
+        expected = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace)
+        expected.add_trees(trees)
+        expected_sd = expected.split_distribution
+        self.count_in_sessions([(0, 4), (4, len(trees))], is_flush=False)
+        split_store = dendropy.SplitStore(self.path)
+        tree_array = dendropy.TreeArray()
+        tree_array.attach_split_store(split_store)
+        sd = tree_array.split_distribution
+        self.assertEqual(sd.total_trees_counted, expected_sd.total_trees_counted)
+        self.assertEqual(dict(sd.split_counts), dict(expected_sd.split_counts))
+        self.assertEqual(dict(sd.split_edge_lengths.items()), dict(expected_sd.split_edge_lengths))
+        tree_array.add_trees(self.get_trees(taxon_namespace=tree_array.taxon_namespace)[:2])
+        split_store.close()
+        with dendropy.SplitStore(self.path) as split_store:
+            self.assertEqual(split_store.get_metadata("total_trees_counted"), len(trees) + 2)
+
+    def test_store_attached_to_one_split_distribution(self):
+        with dendropy.SplitStore(self.path) as split_store:
+            tree_array = dendropy.TreeArray()
+            tree_array.attach_split_store(split_store)
+            self.assertRaises(ValueError, dendropy.TreeArray().attach_split_store, split_store)
+
+    def test_values_are_flushed_from_memory(self):
+        with dendropy.SplitStore(self.path) as split_store:
+            tree_array = dendropy.TreeArray()
+            tree_array.attach_split_store(split_store)
+            sd = tree_array.split_distribution
+            sd.SPLIT_STORE_FLUSH_INTERVAL = 3
+            trees = self.get_trees(taxon_namespace=tree_array.taxon_namespace)
+            for tree in trees[:5]:
+                tree_array.add_tree(tree)
+            self.assertEqual(split_store.get_metadata("total_trees_counted"), 3)
+            self.assertEqual(sum(len(v) for v in sd._split_edge_lengths.values()), sum(len(t.encode_bipartitions()) for t in trees[3:5]))
+            self.assertEqual(sum(len(v) for k, v in sd.split_edge_lengths.items()), sum(len(t.encode_bipartitions()) for t in trees[:5]))
+            self.assertEqual(len(sd._split_edge_lengths), 0)
+
+    def test_update_with_stored_values(self):
+        trees = self.get_trees()
+        expected = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace)
+        expected.add_trees(trees)
+        with dendropy.SplitStore(self.path) as split_store:
+            tree_array = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace)
+            tree_array.attach_split_store(split_store)
+            tree_array.add_trees(trees[:5])
+            other = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace)
+            other.add_trees(trees[5:])
+            tree_array.update(other)
+            sd = tree_array.split_distribution
+            self.assertEqual(dict(sd.split_counts), dict(expected.split_distribution.split_counts))
+            self.assertEqual(dict(sd.split_edge_lengths.items()), dict(expected.split_distribution.split_edge_lengths))
+
+    def test_source_tree_offsets(self):
+        with dendropy.SplitStore(self.path) as split_store:
+            split_store.source_tree_offsets["a.trees"] = 10
+        with dendropy.SplitStore(self.path) as split_store:
+            self.assertEqual(split_store.source_tree_offsets, {"a.trees": 10})
+
+    def test_incompatible_taxa(self):
+        self.count_in_sessions([(0, 2)])
+        with dendropy.SplitStore(self.path) as split_store:
+            taxon_namespace = dendropy.TaxonNamespace(["x", "y"])
+            tree_array = dendropy.TreeArray(taxon_namespace=taxon_namespace)
+            self.assertRaises(ValueError, tree_array.attach_split_store, split_store)
+
+    def test_incompatible_configuration(self):
+        self.count_in_sessions([(0, 2)])
+        with dendropy.SplitStore(self.path) as split_store:
+            tree_array = dendropy.TreeArray(ignore_edge_lengths=True)
+            self.assertRaises(ValueError, tree_array.attach_split_store, split_store)
+
+    def test_attach_to_non_empty_distribution(self):
+        with dendropy.SplitStore(self.path) as split_store:
+            tree_array = dendropy.TreeArray()
+            tree_array.add_trees(self.get_trees(taxon_namespace=tree_array.taxon_namespace)[:2])
+            self.assertRaises(ValueError, tree_array.attach_split_store, split_store)
+
+if __name__ == "__main__":
+    unittest.main()
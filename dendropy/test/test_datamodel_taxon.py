@@ -690,6 +690,55 @@ class TaxonNamespaceTaxonManagement(unittest.TestCase):
             x.append(t)
         self.assertEqual(len(x), 0)
 
+    def test_label_lookup_after_changes(self):
+        tns = TaxonNamespace(self.str_labels)
+        self.assertEqual(len(tns.get_taxa(labels=["A"])), 2)
+        t = tns.get_taxon("b")
+        t.label = "Y"
+        self.assertIsNone(tns.get_taxon("b"))
+        self.assertIs(tns.get_taxon("y"), t)
+        self.assertIs(tns.get_taxon("Y", is_case_sensitive=True), t)
+        self.assertIsNone(tns.get_taxon("y", is_case_sensitive=True))
+        tns.remove_taxon(tns.get_taxon("a"))
+        self.assertEqual(len(tns.findall("a")), 1)
+        t2 = Taxon("a")
+        tns.add_taxon(t2)
+        self.assertEqual(tns.findall("a"), [tns[0], t2])
+        tns.reverse()
+        self.assertIs(tns.get_taxon("a"), t2)
+        t3 = Taxon("q")
+        tns._taxa.append(t3)
+        self.assertIs(tns.get_taxon("q"), t3)
+        tns.clear()
+        self.assertIsNone(tns.get_taxon("q"))
+
+    def test_label_index_updated_on_relabel(self):
+        tns1 = TaxonNamespace(["a", "b", "c", "d"])
+        tns2 = TaxonNamespace()
+        a, b, c, d = list(tns1)
+        for t in (d, a, c):
+            tns2.add_taxon(t)
+        self.assertIs(tns1.get_taxon("a"), a)
+        self.assertIs(tns2.get_taxon("a"), a)
+        label_taxa_maps = [(tns._label_taxa_map, tns._lower_cased_label_taxa_map) for tns in (tns1, tns2)]
+        d.label = "C"
+        self.assertEqual(tns1.findall("c"), [c, d])
+        self.assertEqual(tns2.findall("c"), [d, c])
+        self.assertIs(tns1.get_taxon("C", is_case_sensitive=True), d)
+        self.assertIsNone(tns2.get_taxon("d"))
+        a.label = "Q"
+        self.assertIs(tns1.get_taxon("q"), a)
+        self.assertIs(tns2.get_taxon("Q", is_case_sensitive=True), a)
+        self.assertIsNone(tns1.get_taxon("a"))
+        tns2.remove_taxon(a)
+        a.label = "W"
+        self.assertIsNone(tns2.get_taxon("w"))
+        self.assertIs(tns1.get_taxon("w"), a)
+        # updated in place, not rebuilt
+        for tns, maps in zip((tns1, tns2), label_taxa_maps):
+            self.assertIs(tns._label_taxa_map, maps[0])
+            self.assertIs(tns._lower_cased_label_taxa_map, maps[1])
+
 class TaxonNamespaceIdentity(unittest.TestCase):
 
     def setUp(self):
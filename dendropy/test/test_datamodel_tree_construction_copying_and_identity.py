@@ -157,6 +157,62 @@ class TestTreeCopying(
                 compare_tree_annotations=True,
                 compare_taxon_annotations=False)
 
+class TestDeepTreeCopying(unittest.TestCase):
+
+    def get_ladder_tree(self, num_tips):
+        taxon_namespace = dendropy.TaxonNamespace()
+        tree = dendropy.Tree(taxon_namespace=taxon_namespace)
+        nd = tree.seed_node
+        for idx in range(num_tips - 1):
+            nd.new_child(taxon=taxon_namespace.require_taxon("T{}".format(idx)), edge_length=idx)
+            nd = nd.new_child(label="N{}".format(idx), edge_length=1)
+        nd.taxon = taxon_namespace.require_taxon("T{}".format(num_tips - 1))
+        return tree
+
+    def check_copy(self, tree1, tree2):
+        nodes1 = list(tree1.preorder_node_iter())
+        nodes2 = list(tree2.preorder_node_iter())
+        self.assertEqual(len(nodes1), len(nodes2))
+        for nd1, nd2 in zip(nodes1, nodes2):
+            self.assertIsNot(nd1, nd2)
+            self.assertIsNot(nd1.edge, nd2.edge)
+            self.assertIs(nd2.edge.head_node, nd2)
+            self.assertEqual(nd1.label, nd2.label)
+            self.assertEqual(nd1.edge.length, nd2.edge.length)
+            self.assertEqual(len(nd1._child_nodes), len(nd2._child_nodes))
+            for ch in nd2.child_node_iter():
+                self.assertIs(ch.parent_node, nd2)
+
+    def test_deepcopy_ladder_tree(self):
+        # deeper than the generic (recursive) deep-copying can handle
+        tree1 = self.get_ladder_tree(2000)
+        tree1.encode_bipartitions()
+        for tree2 in (tree1.clone(1), tree1.clone(2)):
+            self.check_copy(tree1, tree2)
+            self.assertEqual(tree2.seed_node.comments, [])
+            self.assertIsNot(tree2.seed_node.comments, tree1.seed_node.comments)
+            for nd1, nd2 in zip(tree1.leaf_node_iter(), tree2.leaf_node_iter()):
+                self.assertIs(nd1.taxon is nd2.taxon, tree2.taxon_namespace is tree1.taxon_namespace)
+                self.assertIn(nd2.taxon, tree2.taxon_namespace)
+            self.assertEqual(
+                    set(tree2.bipartition_edge_map.values()),
+                    set(tree2.postorder_edge_iter()))
+
+    def test_extract_ladder_tree(self):
+        tree1 = self.get_ladder_tree(2000)
+        tree2 = tree1.extract_tree()
+        self.check_copy(tree1, tree2)
+        for nd1, nd2 in zip(tree1.preorder_node_iter(), tree2.preorder_node_iter()):
+            self.assertIs(nd2.extraction_source, nd1)
+            self.assertIs(nd2.taxon, nd1.taxon)
+
+    def test_extract_tree_with_unifurcations(self):
+        tree1 = dendropy.Tree.get(data="(((A:1):2,B:3):4,C:5);", schema="newick")
+        tree2 = tree1.extract_tree()
+        self.assertEqual(tree2.as_string("newick"), "((A:3.0,B:3.0):4.0,C:5.0);\n")
+        tree3 = tree1.extract_tree(suppress_unifurcations=False)
+        self.assertEqual(tree3.as_string("newick"), tree1.as_string("newick"))
+
 class TestSpecialTreeConstruction(
         curated_test_tree.CuratedTestTree,
         unittest.TestCase):
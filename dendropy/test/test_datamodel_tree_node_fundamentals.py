@@ -90,14 +90,16 @@ class NodeIdentity(unittest.TestCase):
 
 class NodeCloning(compare_and_validate.Comparator, unittest.TestCase):
 
+    node_type = dendropy.Node
+
     def setUp(self):
         self.taxa = [dendropy.Taxon(label=label) for label in ["a", "b", "c", "d"]]
-        self.n0 = dendropy.Node(label="0", taxon=self.taxa[0])
-        self.c1 = dendropy.Node(label="1", taxon=None)
-        self.c2 = dendropy.Node(label=None, taxon=self.taxa[1])
-        self.c3 = dendropy.Node(label=None, taxon=None)
-        self.c3 = dendropy.Node(label=None, taxon=self.taxa[2])
-        self.p1 = dendropy.Node(label="-1", taxon=self.taxa[3])
+        self.n0 = self.node_type(label="0", taxon=self.taxa[0])
+        self.c1 = self.node_type(label="1", taxon=None)
+        self.c2 = self.node_type(label=None, taxon=self.taxa[1])
+        self.c3 = self.node_type(label=None, taxon=None)
+        self.c3 = self.node_type(label=None, taxon=self.taxa[2])
+        self.p1 = self.node_type(label="-1", taxon=self.taxa[3])
         self.n0.parent_node = self.p1
         self.n0.set_child_nodes([self.c1, self.c2])
         self.c2.set_child_nodes([self.c3])
@@ -318,5 +320,49 @@ class TestNodeSetChildNodes(unittest.TestCase):
         self.assertIs(node.edge, edge2)
         self.assertIs(node.edge.head_node, node)
 
+class SlottedNodeCloning(NodeCloning):
+
+    node_type = dendropy.SlottedNode
+
+class SlottedNodeTestCase(unittest.TestCase):
+
+    def test_slotted_construction(self):
+        taxon = dendropy.Taxon("z")
+        nd = dendropy.SlottedNode(taxon=taxon, label="x", edge_length=1)
+        self.assertTrue(isinstance(nd, dendropy.Node))
+        self.assertTrue(isinstance(nd.edge, dendropy.SlottedEdge))
+        self.assertTrue(isinstance(nd.edge.bipartition, dendropy.SlottedBipartition))
+        self.assertIs(nd.taxon, taxon)
+        self.assertEqual(nd.label, "x")
+        self.assertEqual(nd.edge.length, 1)
+        self.assertFalse(nd.has_annotations)
+        self.assertEqual(nd.__dict__, {})
+        self.assertEqual(nd.comments, [])
+        self.assertEqual(nd.edge.comments, [])
+        nd.comments.append("c")
+        self.assertEqual(nd.comments, ["c"])
+        nd.some_attribute = 1
+        self.assertEqual(nd.some_attribute, 1)
+        self.assertEqual(nd.__dict__, {"some_attribute": 1})
+        with self.assertRaises(TypeError):
+            dendropy.SlottedNode(foo=1)
+
+    def test_slotted_tree(self):
+        class SlottedTree(dendropy.Tree):
+            def node_factory(cls, **kwargs):
+                return dendropy.SlottedNode(**kwargs)
+            node_factory = classmethod(node_factory)
+        s = "[&R] ((A:1,B:2)[&x=1]:3,(C:4,D:5):6);"
+        tree = SlottedTree.get(data=s, schema="newick")
+        for nd in tree:
+            self.assertTrue(isinstance(nd, dendropy.SlottedNode))
+        expected = dendropy.Tree.get(data=s, schema="newick")
+        self.assertEqual(tree.as_string("newick"), expected.as_string("newick"))
+        self.assertEqual(
+                [b.split_bitmask for b in tree.encode_bipartitions()],
+                [b.split_bitmask for b in expected.encode_bipartitions()])
+        tree2 = copy.deepcopy(tree)
+        self.assertEqual(tree2.as_string("newick"), tree.as_string("newick"))
+
 if __name__ == "__main__":
     unittest.main()
@@ -130,6 +130,113 @@ class TestTreeNodeFinders(curated_test_tree.CuratedTestTree, unittest.TestCase):
         node = tree.find_node_with_label("zzz")
         self.assertIs(node, None)
 
+class TestTreeStructureIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = dendropy.Tree.get(
+                data="[&R] (((A,B)i1,(C,(D)i2)i3)i4,((E,F)i5,G)i6)i0;",
+                schema="newick")
+        self.tree.is_structure_indexed = True
+        self.taxa = dict((t.label, t) for t in self.tree.taxon_namespace)
+
+    def get_mrca_label(self, labels):
+        return self.tree.mrca(taxa=[self.taxa[label] for label in labels]).label
+
+    def test_lookups(self):
+        structure_index = self.tree.structure_index
+        self.assertIsNot(structure_index, None)
+        for nd in self.tree.leaf_node_iter():
+            self.assertIs(self.tree.find_node_for_taxon(nd.taxon), nd)
+            self.assertIs(self.tree.find_node_with_taxon_label(nd.taxon.label), nd)
+            self.assertEqual(structure_index.node_depth(nd), nd.level())
+        self.assertIs(self.tree.find_node_with_taxon_label("Z"), None)
+        nodes = dict((nd.label, nd) for nd in self.tree.internal_nodes())
+        for nd in self.tree.leaf_node_iter():
+            nodes[nd.taxon.label] = nd
+        for labels, expected in (
+                (["A", "B"], "i1"),
+                (["A", "C"], "i4"),
+                (["D", "G"], "i0"),
+                (["E", "F", "G"], "i6"),
+                ):
+            self.assertIs(structure_index.mrca_node([nodes[label] for label in labels]), nodes[expected])
+
+    def test_mrca(self):
+        self.assertEqual(self.get_mrca_label(["A", "B"]), "i1")
+        self.assertEqual(self.get_mrca_label(["B", "D"]), "i4")
+        self.assertEqual(self.get_mrca_label(["C", "D"]), "i3")
+        self.assertEqual(self.get_mrca_label(["A", "G"]), "i0")
+        # first node with matching leafset, as when searching bipartitions
+        self.assertEqual(self.get_mrca_label(["D"]), "i2")
+        for labels in (["A", "B"], ["B", "D"], ["C", "D"], ["A", "G"], ["D"], ["E"]):
+            taxa = [self.taxa[label] for label in labels]
+            self.tree.is_structure_indexed = False
+            expected = self.tree.mrca(taxa=taxa)
+            self.tree.is_structure_indexed = True
+            self.assertIs(self.tree.mrca(taxa=taxa), expected)
+
+    def test_updates_after_changes(self):
+        self.assertEqual(self.get_mrca_label(["A", "E"]), "i0")
+        self.tree.prune_taxa([self.taxa["G"]])
+        self.assertEqual(self.get_mrca_label(["E", "F"]), "i5")
+        self.assertEqual(self.tree.structure_index.node_depth(self.tree.find_node_for_taxon(self.taxa["E"])), 2)
+        self.tree.reroot_at_node(self.tree.find_node_with_label("i1"), suppress_unifurcations=False)
+        self.assertEqual(self.get_mrca_label(["A", "B"]), "i1")
+        self.assertEqual(self.get_mrca_label(["A", "C"]), "i1")
+        self.assertEqual(self.get_mrca_label(["C", "E"]), "i4")
+        new_node = self.tree.find_node_with_label("i5").new_child(
+                taxon=self.tree.taxon_namespace.require_taxon("H"))
+        self.assertIs(self.tree.find_node_with_taxon_label("H"), new_node)
+        self.taxa["A"].label = "AA"
+        self.assertIs(self.tree.find_node_with_taxon_label("A"), None)
+        self.assertIs(self.tree.find_node_with_taxon_label("AA").taxon, self.taxa["A"])
+
+    def test_changes_to_other_trees(self):
+        self.assertEqual(self.get_mrca_label(["A", "B"]), "i1")
+        self.tree.encode_bipartitions()
+        structure_index = self.tree.structure_index
+        self.assertTrue(structure_index._is_current())
+        other_trees = [
+                dendropy.Tree.get(data="((A,B),(C,D));", schema="newick"),
+                self.tree.clone(2),
+                ]
+        for other_tree in other_trees:
+            other_tree.is_structure_indexed = True
+            other_tree.encode_bipartitions()
+            other_tree.seed_node.new_child(label="X")
+            other_tree.prune_leaves_without_taxa()
+            other_tree.encode_bipartitions()
+            other_tree.reroot_at_edge(other_tree.leaf_nodes()[0].edge)
+            other_tree.find_node_for_taxon(other_tree.taxon_namespace.get_taxon("D")).taxon.label = "DD"
+            self.assertTrue(structure_index._is_current())
+            self.assertTrue(self.tree._is_bipartition_encoding_current())
+        self.tree.find_node_with_label("i3").new_child(label="X")
+        self.assertFalse(structure_index._is_current())
+        self.assertFalse(self.tree._is_bipartition_encoding_current())
+        self.assertEqual(self.get_mrca_label(["C", "D"]), "i3")
+        self.assertTrue(structure_index._is_current())
+        self.taxa["D"].label = "DD"
+        self.assertTrue(structure_index._is_current())
+        self.assertIs(self.tree.find_node_with_taxon_label("DD").taxon, self.taxa["D"])
+        self.assertIs(self.tree.find_node_with_taxon_label("D"), None)
+
+    def test_taxon_reassignment(self):
+        nd = self.tree.find_node_for_taxon(self.taxa["A"])
+        nd.taxon = None
+        self.assertIs(self.tree.find_node_for_taxon(self.taxa["A"]), None)
+        nd2 = self.tree.find_node_for_taxon(self.taxa["B"])
+        nd2.taxon = self.taxa["A"]
+        self.assertIs(self.tree.find_node_for_taxon(self.taxa["A"]), nd2)
+        self.tree.structure_index.invalidate()
+        self.assertEqual(self.get_mrca_label(["A", "C"]), "i4")
+
+    def test_copy(self):
+        tree2 = self.tree.clone(1)
+        self.assertTrue(tree2.is_structure_indexed)
+        self.assertIs(tree2.structure_index.tree, tree2)
+        self.assertIs(tree2.find_node_for_taxon(self.taxa["A"]).taxon, self.taxa["A"])
+        self.assertIsNot(tree2.find_node_for_taxon(self.taxa["A"]), self.tree.find_node_for_taxon(self.taxa["A"]))
+
 class TestTreeIterators(curated_test_tree.CuratedTestTree, unittest.TestCase):
 
     ### Default Iterator ###
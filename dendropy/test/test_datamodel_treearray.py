@@ -16,9 +16,18 @@
 ##
 ##############################################################################
 
+import os
+import shutil
 import unittest
 from dendropy.test.support import pathmap
+from dendropy.dataio import treeindex
+from dendropy.datamodel import packedsplitmodel
+from dendropy.calculate import treecompare
+from dendropy.calculate import statistics
+from dendropy.utility import messaging
+from dendropy.utility import error
 import dendropy
+_LOG = messaging.get_logger(__name__)
 
 class TreeArrayBasicTreeAccession(unittest.TestCase):
 
@@ -54,6 +63,209 @@ class TreeArrayBasicTreeAccession(unittest.TestCase):
             tree_array.add_tree(tree)
         self.verify_tree_array(tree_array, trees)
 
+    def test_add_trees(self):
+        trees = self.get_trees()
+        tree_array = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace)
+        tree_array.add_trees(trees)
+        self.verify_tree_array(tree_array, trees)
+        expected = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace)
+        for tree in self.get_trees(taxon_namespace=trees.taxon_namespace):
+            expected.add_tree(tree)
+        for idx in range(len(trees)):
+            self.assertEqual(tree_array.get_split_bitmask_and_edge_tuple(idx), expected.get_split_bitmask_and_edge_tuple(idx))
+        self.assertEqual(tree_array._tree_leafset_bitmasks, expected._tree_leafset_bitmasks)
+        self.assertEqual(dict(tree_array.split_distribution.split_counts), dict(expected.split_distribution.split_counts))
+
+class TreeArrayParallelReading(unittest.TestCase):
+
+    def setUp(self):
+        with pathmap.SandboxedFile() as f:
+            self.path = f.name
+        shutil.copy(pathmap.tree_source_path("pythonidae.reference-trees.nexus"), self.path)
+
+    def tearDown(self):
+        for path in (self.path, self.path + treeindex.TreeOffsetIndex.SIDECAR_SUFFIX):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def test_parallel_read_from_path(self):
+        expected = dendropy.TreeArray()
+        expected.read_from_files(
+                files=[self.path],
+                schema="nexus",
+                tree_offset=2)
+        observed = dendropy.TreeArray()
+        num_trees = observed.parallel_read_from_path(
+                path=self.path,
+                schema="nexus",
+                num_processes=2,
+                tree_offset=2,
+                trees_per_task=3)
+        self.assertEqual(num_trees, len(expected))
+        self.assertEqual(len(observed), len(expected))
+        self.assertEqual(
+                [t.label for t in observed.taxon_namespace],
+                [t.label for t in expected.taxon_namespace])
+        for idx in range(len(expected)):
+            self.assertEqual(
+                    observed.get_split_bitmask_and_edge_tuple(idx),
+                    expected.get_split_bitmask_and_edge_tuple(idx))
+        self.assertEqual(
+                dict(observed.split_distribution.split_counts),
+                dict(expected.split_distribution.split_counts))
+        self.assertEqual(
+                observed.split_distribution.total_trees_counted,
+                expected.split_distribution.total_trees_counted)
+
+class TreeArraySplitCountTransfer(unittest.TestCase):
+
+    def test_take_counts(self):
+        trees = dendropy.TreeList.get_from_path(
+                pathmap.tree_source_path("pythonidae.reference-trees.nexus"),
+                "nexus")
+        expected = dendropy.TreeArray.from_tree_list(trees)
+        source = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace)
+        target = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace)
+        for idx, tree in enumerate(trees):
+            source.add_tree(tree)
+            if idx % 3 == 2:
+                split_counts = source.split_distribution.take_counts()
+                source.clear()
+                self.assertEqual(len(source), 0)
+                self.assertEqual(source.split_distribution.total_trees_counted, 0)
+                self.assertEqual(len(source.split_distribution.split_counts), 0)
+                target.update_split_distribution(split_counts)
+        target.update_split_distribution(source.split_distribution.take_counts())
+        self.assertEqual(len(target), 0)
+        self.assertTrue(target.is_rooted_trees is expected.is_rooted_trees)
+        sd = target.split_distribution
+        expected_sd = expected.split_distribution
+        self.assertEqual(sd.total_trees_counted, expected_sd.total_trees_counted)
+        self.assertEqual(sd.sum_of_tree_weights, expected_sd.sum_of_tree_weights)
+        self.assertEqual(dict(sd.split_counts), dict(expected_sd.split_counts))
+        self.assertEqual(dict(sd.split_edge_lengths), dict(expected_sd.split_edge_lengths))
+
+    def test_mixed_rooting(self):
+        tree_array = dendropy.TreeArray(is_rooted_trees=True)
+        other = dendropy.TreeArray(taxon_namespace=tree_array.taxon_namespace)
+        other.add_tree(dendropy.Tree.get(data="[&U] ((a,b),(c,d));", schema="newick",
+                taxon_namespace=tree_array.taxon_namespace))
+        self.assertRaises(error.MixedRootingError,
+                tree_array.update_split_distribution,
+                other.split_distribution.take_counts())
+
+class TreeArrayStreamingSummaries(unittest.TestCase):
+
+    def setUp(self):
+        self.trees = dendropy.TreeList.get_from_path(
+                pathmap.tree_source_path("pythonidae.reference-trees.nexus"),
+                "nexus")
+        self.expected = dendropy.TreeArray.from_tree_list(self.trees)
+
+    def test_exact_summaries(self):
+        tree_array = dendropy.TreeArray.from_tree_list(self.trees, streaming_summaries=True)
+        sd = tree_array.split_distribution
+        self.assertEqual(dict(sd.split_counts), dict(self.expected.split_distribution.split_counts))
+        for split, summary in sd.split_edge_lengths.items():
+            self.assertTrue(isinstance(summary, statistics.StreamingSummary))
+            self.assertEqual(len(summary), len(self.expected.split_distribution.split_edge_lengths[split]))
+        self.assertEqual(sd.split_edge_length_summaries, self.expected.split_distribution.split_edge_length_summaries)
+
+    def test_approximate_summaries(self):
+        tree_array = dendropy.TreeArray.from_tree_list(self.trees[:5],
+                streaming_summaries=True,
+                streaming_summary_sample_size=2)
+        other = dendropy.TreeArray.from_tree_list(self.trees[5:],
+                streaming_summaries=True,
+                streaming_summary_sample_size=2)
+        tree_array.update(other)
+        summaries = tree_array.split_distribution.split_edge_length_summaries
+        expected_summaries = self.expected.split_distribution.split_edge_length_summaries
+        self.assertEqual(set(summaries), set(expected_summaries))
+        for split, expected_summary in expected_summaries.items():
+            summary = summaries[split]
+            self.assertEqual(summary["range"], expected_summary["range"])
+            self.assertAlmostEqual(summary["mean"], expected_summary["mean"])
+            if summary["sd"] != float("inf"):
+                self.assertAlmostEqual(summary["sd"], expected_summary["sd"])
+            self.assertTrue(summary["range"][0] <= summary["median"] <= summary["range"][1])
+
+    def test_split_store_not_supported(self):
+        tree_array = dendropy.TreeArray(streaming_summaries=True)
+        with dendropy.SplitStore(":memory:") as split_store:
+            self.assertRaises(ValueError, tree_array.attach_split_store, split_store)
+
+if not packedsplitmodel.is_available():
+    _LOG.warn("NumPy not available: skipping packed split encoding tests")
+
+    class TreeArrayPackedSplitEncodingUnavailable(unittest.TestCase):
+
+        def test_packed_split_matrix_requires_numpy(self):
+            self.assertRaises(ImportError, dendropy.TreeArray().packed_split_matrix)
+
+else:
+
+    class TreeArrayPackedSplitEncoding(unittest.TestCase):
+
+        def setUp(self):
+            self.trees = dendropy.TreeList.get_from_path(
+                    pathmap.tree_source_path("pythonidae.beast.mcmc.trees"),
+                    "nexus")
+            for tree in self.trees:
+                tree.encode_bipartitions()
+
+        def test_split_counts(self):
+            tree_array = dendropy.TreeArray.from_tree_list(self.trees,
+                    is_bipartitions_updated=True)
+            matrix = tree_array.packed_split_matrix()
+            self.assertEqual(matrix.num_trees, len(self.trees))
+            self.assertEqual(matrix.split_counts(), dict(tree_array.split_distribution.split_counts))
+
+        def test_pack_and_normalize(self):
+            bitmasks = [0, 1, (1 << 64) | 1, (1 << 130) - 2, 0x5A5A << 60]
+            packed = packedsplitmodel.pack_bitmasks(bitmasks)
+            self.assertEqual(packed.shape, (5, 3))
+            self.assertEqual(packedsplitmodel.unpack_bitmasks(packed), bitmasks)
+            fill_bitmask = (1 << 130) - 1
+            for lowest_relevant_bit in (1, 1 << 64):
+                self.assertEqual(
+                        packedsplitmodel.unpack_bitmasks(packedsplitmodel.normalize_packed_bitmasks(
+                            packed, fill_bitmask, lowest_relevant_bit)),
+                        [dendropy.Bipartition.normalize_bitmask(b, fill_bitmask, lowest_relevant_bit) for b in bitmasks])
+
+    class TreeArrayDistanceMatrices(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            cls.tree_sources = []
+            for source_name in ("pythonidae.beast.mcmc.trees", "pythonidae.random.bd0301.tre"):
+                trees = dendropy.TreeList.get_from_path(
+                        pathmap.tree_source_path(source_name),
+                        "nexus")[:20]
+                cls.tree_sources.append(trees)
+
+        def test_distance_matrices(self):
+            for trees in self.tree_sources:
+                tree_array = dendropy.TreeArray.from_tree_list(trees)
+                for method_name, num_processes, distance_fn in (
+                        ("robinson_foulds_distance_matrix", 1, treecompare.symmetric_difference),
+                        ("weighted_robinson_foulds_distance_matrix", 1, treecompare.weighted_robinson_foulds_distance),
+                        ("euclidean_distance_matrix", 2, treecompare.euclidean_distance),
+                        ):
+                    matrix = getattr(tree_array, method_name)(num_processes=num_processes, rows_per_task=3)
+                    self.assertEqual(matrix.shape, (len(trees), len(trees)))
+                    for i, tree1 in enumerate(trees):
+                        for j, tree2 in enumerate(trees):
+                            self.assertAlmostEqual(matrix[i, j],
+                                    distance_fn(tree1, tree2, is_bipartitions_updated=True))
+
+        def test_weighted_distances_require_edge_lengths(self):
+            tree_array = dendropy.TreeArray.from_tree_list(self.tree_sources[0], ignore_edge_lengths=True)
+            self.assertEqual(tree_array.robinson_foulds_distance_matrix().shape, (20, 20))
+            self.assertRaises(ValueError, tree_array.weighted_robinson_foulds_distance_matrix)
+            self.assertRaises(ValueError, tree_array.euclidean_distance_matrix)
 
 if __name__ == "__main__":
     unittest.main()
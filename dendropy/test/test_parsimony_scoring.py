@@ -21,9 +21,13 @@ Tests of parsimony scoring.
 """
 
 import unittest
+import random
 import dendropy
 from dendropy.calculate import treescore
+from dendropy.model import parsimony
 from dendropy.test.support import pathmap
+from dendropy.utility import messaging
+_LOG = messaging.get_logger(__name__)
 
 class ParsimonyScoringTest(unittest.TestCase):
 
@@ -488,6 +492,279 @@ class ParsimonyScoringTest(unittest.TestCase):
                     gaps_as_missing=gaps_as_missing)
             self.assertEqual(pscore, expected_scores[tree_idx])
 
+if parsimony.numpy is None:
+    _LOG.warn("NumPy not available: skipping packed state set tests")
+
+    class PackedStateSetsUnavailableTest(unittest.TestCase):
+
+        def test_packing_requires_numpy(self):
+            self.assertRaises(ImportError, parsimony.PackedStateSets, {})
+
+else:
+
+    class PackedStateSetsTest(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            cls.taxon_namespace = dendropy.TaxonNamespace()
+            cls.chars = dendropy.StandardCharacterMatrix.get(
+                    path=pathmap.char_source_path("apternodus.chars.nexus"),
+                    schema="nexus",
+                    taxon_namespace=cls.taxon_namespace)
+            cls.trees = dendropy.TreeList.get(
+                    path=pathmap.tree_source_path("apternodus.tre"),
+                    schema="nexus",
+                    taxon_namespace=cls.taxon_namespace)
+
+        def get_custom_data(self):
+            taxa = dendropy.TaxonNamespace()
+            taxon_state_sets_map = {}
+            t1 = taxa.require_taxon("A")
+            t2 = taxa.require_taxon("B")
+            t3 = taxa.require_taxon("C")
+            t4 = taxa.require_taxon("D")
+            t5 = taxa.require_taxon("E")
+            taxon_state_sets_map[t1] = [ set([0,1]),  set([0,1]),  set([0]),     set([0]),  set([0,1]) ]
+            taxon_state_sets_map[t2] = [ set([1]),    set([1]),    set([1]),     set([0]),  set([1]) ]
+            taxon_state_sets_map[t3] = [ set([0]),    set([1]),    set([1]),     set([0]),  set([0]) ]
+            taxon_state_sets_map[t4] = [ set([0]),    set([1]),    set([0,1]),   set([1]),  set([0]) ]
+            taxon_state_sets_map[t5] = [ set([1]),    set([0]),    set([1]),     set([1]),  set([1]) ]
+            return taxa, taxon_state_sets_map
+
+        def test_parsimony_score_does_not_unpack_state_sets(self):
+            tree = self.trees[0]
+            packed = parsimony.PackedStateSets.from_char_matrix(self.chars)
+            expected_score = packed.score(tree)
+            unpack = parsimony.PackedStateSets.unpack
+            def _unpack(*args, **kwargs):
+                raise AssertionError("state sets unpacked")
+            parsimony.PackedStateSets.unpack = _unpack
+            try:
+                score = treescore.parsimony_score(tree, self.chars)
+            finally:
+                parsimony.PackedStateSets.unpack = unpack
+            self.assertEqual(score, expected_score)
+            for nd in tree:
+                self.assertFalse(hasattr(nd, "state_sets"))
+
+        def test_pattern_compression(self):
+            taxa, taxon_state_sets_map = self.get_custom_data()
+            packed = parsimony.PackedStateSets(taxon_state_sets_map)
+            self.assertEqual(packed.num_characters, 5)
+            self.assertEqual(packed.num_patterns, 4)
+            self.assertEqual(packed.num_states, 2)
+            self.assertEqual(list(packed.character_patterns), [0, 1, 2, 3, 0])
+            self.assertEqual(list(packed.pattern_counts), [2, 1, 1, 1])
+            self.assertEqual(len(packed), 5)
+            for taxon in taxa:
+                self.assertIn(taxon, packed)
+                self.assertEqual(packed.taxon_state_sets(taxon), taxon_state_sets_map[taxon])
+            self.assertEqual(list(packed[taxa[0]]), [3, 3, 1, 1])
+
+        def test_unequal_lengths(self):
+            taxa, taxon_state_sets_map = self.get_custom_data()
+            taxon_state_sets_map[taxa[2]].append(set([0]))
+            self.assertRaises(ValueError, parsimony.PackedStateSets, taxon_state_sets_map)
+
+        def test_wide_state_sets(self):
+            taxa, taxon_state_sets_map = self.get_custom_data()
+            taxon_state_sets_map[taxa[0]][1] = set([0, 70])
+            taxon_state_sets_map[taxa[3]][1] = set([70])
+            packed = parsimony.PackedStateSets(taxon_state_sets_map)
+            self.assertEqual(packed.num_states, 71)
+            tree = dendropy.Tree.get_from_string(
+                    "(A,(B,(C,(D,E))));", "newick",
+                    taxon_namespace=taxa)
+            expected = parsimony.fitch_down_pass(tree.postorder_node_iter(),
+                    state_sets_attr_name=None,
+                    taxon_state_sets_map=taxon_state_sets_map)
+            self.assertEqual(packed.score(tree), expected)
+            self.assertEqual(packed.taxon_state_sets(taxa[0]), taxon_state_sets_map[taxa[0]])
+
+        def test_multifurcations_and_weights(self):
+            taxa, taxon_state_sets_map = self.get_custom_data()
+            packed = parsimony.PackedStateSets(taxon_state_sets_map)
+            weights = [2, 1, 3, 0.5, 1]
+            for tree_str in ("(A,(B,(C,(D,E))));", "(A,B,(C,D,E));", "(A,B,C,D,E);"):
+                tree = dendropy.Tree.get_from_string(tree_str, "newick", taxon_namespace=taxa)
+                expected_scores = []
+                expected = parsimony.fitch_down_pass(tree.postorder_node_iter(),
+                        state_sets_attr_name="classic_state_sets",
+                        taxon_state_sets_map=taxon_state_sets_map,
+                        weights=weights,
+                        score_by_character_list=expected_scores)
+                observed_scores = []
+                observed = parsimony.fitch_down_pass(tree.postorder_node_iter(),
+                        state_sets_attr_name="packed_state_sets",
+                        taxon_state_sets_map=packed,
+                        weights=weights,
+                        score_by_character_list=observed_scores)
+                self.assertEqual(observed, expected)
+                self.assertEqual(observed_scores, expected_scores)
+                for nd in tree:
+                    self.assertEqual(nd.packed_state_sets, nd.classic_state_sets)
+
+        def test_against_unpacked_down_and_up_passes(self):
+            for gaps_as_missing in (True, False):
+                taxon_state_sets_map = self.chars.taxon_state_sets_map(gaps_as_missing=gaps_as_missing)
+                packed = parsimony.PackedStateSets.from_char_matrix(self.chars, gaps_as_missing=gaps_as_missing)
+                self.assertEqual(packed.num_characters, self.chars.max_sequence_size)
+                self.assertLessEqual(packed.num_patterns, packed.num_characters)
+                for tree in self.trees:
+                    expected_scores = []
+                    expected = parsimony.fitch_down_pass(tree.postorder_node_iter(),
+                            state_sets_attr_name="classic_state_sets",
+                            taxon_state_sets_map=taxon_state_sets_map,
+                            score_by_character_list=expected_scores)
+                    observed_scores = []
+                    observed = parsimony.fitch_down_pass(tree.postorder_node_iter(),
+                            state_sets_attr_name="packed_state_sets",
+                            taxon_state_sets_map=packed,
+                            score_by_character_list=observed_scores)
+                    self.assertEqual(observed, expected)
+                    self.assertEqual(observed_scores, expected_scores)
+                    self.assertEqual(packed.score(tree), expected)
+                    if all(len(nd.child_nodes()) == 2 for nd in tree.preorder_internal_node_iter(exclude_seed_node=True)):
+                        parsimony.fitch_up_pass(tree.preorder_node_iter(),
+                                state_sets_attr_name="classic_state_sets")
+                        parsimony.fitch_up_pass(tree.preorder_node_iter(),
+                                state_sets_attr_name="packed_state_sets")
+                    for nd in tree:
+                        self.assertEqual(nd.packed_state_sets, nd.classic_state_sets)
+                        del nd.packed_state_sets
+                        del nd.classic_state_sets
+
+    class IncrementalParsimonyScorerTest(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            cls.taxon_namespace = dendropy.TaxonNamespace()
+            cls.chars = dendropy.StandardCharacterMatrix.get(
+                    path=pathmap.char_source_path("apternodus.chars.nexus"),
+                    schema="nexus",
+                    taxon_namespace=cls.taxon_namespace)
+            cls.trees = dendropy.TreeList.get(
+                    path=pathmap.tree_source_path("apternodus.tre"),
+                    schema="nexus",
+                    taxon_namespace=cls.taxon_namespace)
+            cls.taxon_state_sets_map = cls.chars.taxon_state_sets_map(gaps_as_missing=True)
+            cls.packed = parsimony.PackedStateSets(cls.taxon_state_sets_map)
+
+        def get_expected_score(self, tree, weights=None):
+            return parsimony.fitch_down_pass(tree.postorder_node_iter(),
+                    state_sets_attr_name=None,
+                    taxon_state_sets_map=self.taxon_state_sets_map,
+                    weights=weights)
+
+        def get_tree_and_node_map(self, tree):
+            tree2 = tree.clone(1)
+            return tree2, dict(zip(tree.preorder_node_iter(), tree2.preorder_node_iter()))
+
+        def test_score(self):
+            for tree in self.trees:
+                scorer = parsimony.IncrementalParsimonyScorer(tree, self.packed)
+                self.assertEqual(scorer.score, self.get_expected_score(tree))
+
+        def test_weighted_score(self):
+            weights = [(idx % 3) + 0.5 for idx in range(self.packed.num_characters)]
+            tree = self.trees[20]
+            scorer = parsimony.IncrementalParsimonyScorer(tree, self.taxon_state_sets_map, weights=weights)
+            self.assertAlmostEqual(scorer.score, self.get_expected_score(tree, weights=weights))
+            self.assertRaises(ValueError, parsimony.IncrementalParsimonyScorer, tree, self.packed, weights=weights[1:])
+
+        def test_update_after_edits(self):
+            rng = random.Random(1)
+            tree = self.trees[20].clone(1)
+            scorer = parsimony.IncrementalParsimonyScorer(tree, self.packed)
+            for idx in range(10):
+                edge = rng.choice([nd for nd in tree.postorder_node_iter() if nd.parent_node is not None]).edge
+                tree.reroot_at_edge(edge, suppress_unifurcations=True)
+                self.assertEqual(scorer.update(), self.get_expected_score(tree))
+                leaf = rng.choice(tree.leaf_nodes())
+                leaf.parent_node.remove_child(leaf)
+                tree.suppress_unifurcations()
+                self.assertEqual(scorer.update(), self.get_expected_score(tree))
+                rng.choice(tree.internal_nodes()).add_child(leaf)
+                self.assertEqual(scorer.update(), self.get_expected_score(tree))
+                self.assertEqual(scorer.score, self.get_expected_score(tree))
+
+        def test_score_spr(self):
+            rng = random.Random(1)
+            tree = self.trees[20]
+            scorer = parsimony.IncrementalParsimonyScorer(tree, self.packed)
+            original_score = scorer.score
+            nodes = list(tree.preorder_node_iter())
+            for idx in range(50):
+                prune_node = rng.choice(nodes[1:])
+                regraft_node = rng.choice([nd for nd in nodes
+                    if nd is not prune_node and prune_node not in nd.ancestor_iter()])
+                score = scorer.score_spr(prune_node, regraft_node)
+                tree2, node_map = self.get_tree_and_node_map(tree)
+                prune_node2 = node_map[prune_node]
+                regraft_node2 = node_map[regraft_node]
+                parent2 = prune_node2.parent_node
+                parent2.remove_child(prune_node2)
+                if parent2.num_child_nodes() == 1:
+                    sibling2 = parent2.child_nodes()[0]
+                    if parent2.parent_node is None:
+                        parent2.remove_child(sibling2)
+                        tree2.seed_node = sibling2
+                    else:
+                        grandparent2 = parent2.parent_node
+                        grandparent2.insert_child(grandparent2.child_nodes().index(parent2), sibling2)
+                        grandparent2.remove_child(parent2)
+                    if regraft_node2 is parent2:
+                        regraft_node2 = sibling2
+                new_node = dendropy.Node()
+                if regraft_node2.parent_node is None:
+                    tree2.seed_node = new_node
+                else:
+                    regraft_parent2 = regraft_node2.parent_node
+                    regraft_parent2.insert_child(regraft_parent2.child_nodes().index(regraft_node2), new_node)
+                    regraft_parent2.remove_child(regraft_node2)
+                new_node.add_child(regraft_node2)
+                new_node.add_child(prune_node2)
+                self.assertEqual(score, self.get_expected_score(tree2))
+            self.assertEqual(scorer.score, original_score)
+            self.assertEqual(scorer.update(), original_score)
+            self.assertRaises(ValueError, scorer.score_spr, tree.seed_node, nodes[1])
+            self.assertRaises(ValueError, scorer.score_spr, nodes[1], nodes[1])
+
+        def test_score_swap(self):
+            rng = random.Random(1)
+            tree = self.trees[20]
+            scorer = parsimony.IncrementalParsimonyScorer(tree, self.packed)
+            nodes = list(tree.preorder_node_iter())
+            for idx in range(50):
+                node1 = rng.choice(nodes[1:])
+                node2 = rng.choice([nd for nd in nodes[1:]
+                    if nd is not node1 and node1 not in nd.ancestor_iter() and nd not in node1.ancestor_iter()])
+                score = scorer.score_swap(node1, node2)
+                tree2, node_map = self.get_tree_and_node_map(tree)
+                node1, node2 = node_map[node1], node_map[node2]
+                parent1, parent2 = node1.parent_node, node2.parent_node
+                if parent1 is not parent2:
+                    idx1 = parent1.child_nodes().index(node1)
+                    idx2 = parent2.child_nodes().index(node2)
+                    parent1.remove_child(node1)
+                    parent2.remove_child(node2)
+                    parent1.insert_child(idx1, node2)
+                    parent2.insert_child(idx2, node1)
+                self.assertEqual(score, self.get_expected_score(tree2))
+            self.assertRaises(ValueError, scorer.score_swap, nodes[1], list(nodes[1].leaf_iter())[0])
+
+        def test_state_sets(self):
+            tree = self.trees[0]
+            scorer = parsimony.IncrementalParsimonyScorer(tree, self.packed)
+            parsimony.fitch_down_pass(tree.postorder_node_iter(),
+                    taxon_state_sets_map=self.taxon_state_sets_map)
+            for nd in tree:
+                self.assertEqual(scorer.down_pass_state_sets(nd), nd.state_sets)
+            parsimony.fitch_up_pass(tree.preorder_node_iter())
+            for nd in tree:
+                self.assertEqual(scorer.final_state_sets(nd), nd.state_sets)
+                del nd.state_sets
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -19,20 +19,31 @@
 import unittest
 import dendropy
 import csv
+import random
+import time
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
 from dendropy.utility import container
 from dendropy.utility.textprocessing import StringIO
 from dendropy.test.support import pathmap
 from dendropy.calculate import treemeasure
 from dendropy.calculate import probability
 from dendropy.calculate import combinatorics
+from dendropy.calculate import phylogeneticdistance
+from dendropy.utility import messaging
+_LOG = messaging.get_logger(__name__)
 
 class PhylogeneticDistanceMatrixCloneTest(unittest.TestCase):
 
+    is_lazy = False
+
     def setUp(self):
         self.tree = dendropy.Tree.get_from_string("(((a:1, b:1):1, c:2):1, (d:2, (e:1,f:1):1):1):0;", schema="newick")
 
     def test_clone(self):
-        pdm0 = self.tree.phylogenetic_distance_matrix()
+        pdm0 = self.tree.phylogenetic_distance_matrix(is_lazy=self.is_lazy)
         pdm1 = pdm0.clone()
         self.assertIsNot(pdm0, pdm1)
         self.assertIs(pdm0.taxon_namespace, pdm1.taxon_namespace)
@@ -56,8 +67,18 @@ class PhylogeneticDistanceMatrixCloneTest(unittest.TestCase):
         self.assertEqual(pdm0.sum_of_distances(), pdm1.sum_of_distances())
         self.assertEqual(pdm0, pdm1)
 
+    def test_missing_edge_length(self):
+        tree = dendropy.Tree.get_from_string("(((a:1, b):1, c:2):1, (d:2, (e:1,f:1)):1);", schema="newick")
+        self.assertRaises(TypeError, tree.phylogenetic_distance_matrix, is_lazy=self.is_lazy)
+
+class LazyPhylogeneticDistanceMatrixCloneTest(PhylogeneticDistanceMatrixCloneTest):
+
+    is_lazy = True
+
 class PhylogeneticDistanceMatrixCompileTest(unittest.TestCase):
 
+        is_lazy = False
+
         def setUp(self):
             # library(ape)
             # tree = read.nexus("data/pythonidae.mle.nex")
@@ -71,7 +92,7 @@ class PhylogeneticDistanceMatrixCompileTest(unittest.TestCase):
                 "pythonidae.mle.nex"),
                 schema="nexus",
                 preserve_underscores=True)
-            self.pdm = self.tree.phylogenetic_distance_matrix()
+            self.pdm = self.tree.phylogenetic_distance_matrix(is_lazy=self.is_lazy)
 
         def test_mapped_taxa(self):
             n1 = len(self.tree.taxon_namespace)
@@ -292,15 +313,48 @@ class PhylogeneticDistanceMatrixCompileTest(unittest.TestCase):
             else:
                 self.fail()
 
+class LazyPhylogeneticDistanceMatrixCompileTest(PhylogeneticDistanceMatrixCompileTest):
+
+        is_lazy = True
+
+        def test_distinct_taxon_pairs_membership(self):
+            eager_pdm = self.tree.phylogenetic_distance_matrix()
+            taxa = list(self.tree.taxon_namespace)
+            for taxon1 in taxa:
+                for taxon2 in taxa:
+                    for pair in (frozenset([taxon1, taxon2]), (taxon1, taxon2)):
+                        self.assertEqual(
+                                pair in self.pdm._all_distinct_mapped_taxa_pairs,
+                                frozenset(pair) in eager_pdm._all_distinct_mapped_taxa_pairs)
+            self.assertNotIn((taxa[0], dendropy.Taxon("x")), self.pdm._all_distinct_mapped_taxa_pairs)
+            self.assertNotIn(tuple(taxa[:3]), self.pdm._all_distinct_mapped_taxa_pairs)
+
+        def test_mrca(self):
+            eager_pdm = self.tree.phylogenetic_distance_matrix()
+            for taxon1 in self.tree.taxon_namespace:
+                for taxon2 in self.tree.taxon_namespace:
+                    self.assertIs(self.pdm.mrca(taxon1, taxon2), eager_pdm.mrca(taxon1, taxon2))
+
+        def test_as_data_table(self):
+            eager_pdm = self.tree.phylogenetic_distance_matrix()
+            for is_weighted_edge_distances in (True, False):
+                obs = self.pdm.as_data_table(is_weighted_edge_distances=is_weighted_edge_distances)
+                exp = eager_pdm.as_data_table(is_weighted_edge_distances=is_weighted_edge_distances)
+                for taxon1 in self.tree.taxon_namespace:
+                    for taxon2 in self.tree.taxon_namespace:
+                        self.assertAlmostEqual(obs[taxon1.label, taxon2.label], exp[taxon1.label, taxon2.label])
+
 class PhylogeneticDistanceMatrixShuffleTest(unittest.TestCase):
 
+    is_lazy = False
+
     def test_shuffle(self):
         tree = dendropy.Tree.get_from_path(
                     src=pathmap.tree_source_path("community.tree.newick"),
                     schema="newick",
                     rooting="force-rooted")
-        pdc0 = tree.phylogenetic_distance_matrix()
-        pdc1 = tree.phylogenetic_distance_matrix()
+        pdc0 = tree.phylogenetic_distance_matrix(is_lazy=self.is_lazy)
+        pdc1 = tree.phylogenetic_distance_matrix(is_lazy=self.is_lazy)
         current_to_shuffled_taxon_map = pdc1.shuffle_taxa()
         keys = set(current_to_shuffled_taxon_map.keys())
         values = set(current_to_shuffled_taxon_map.values())
@@ -311,7 +365,7 @@ class PhylogeneticDistanceMatrixShuffleTest(unittest.TestCase):
         for nd in tree.leaf_node_iter():
             self.assertIn(current_to_shuffled_taxon_map[nd.taxon], tree.taxon_namespace)
             nd.taxon = current_to_shuffled_taxon_map[nd.taxon]
-        pdc2 = tree.phylogenetic_distance_matrix()
+        pdc2 = tree.phylogenetic_distance_matrix(is_lazy=self.is_lazy)
         same_as_before = []
         different = []
         for t1 in tree.taxon_namespace:
@@ -331,6 +385,10 @@ class PhylogeneticDistanceMatrixShuffleTest(unittest.TestCase):
         self.assertEqual(pdc1, pdc2)
         self.assertNotEqual(pdc0, pdc1)
 
+class LazyPhylogeneticDistanceMatrixShuffleTest(PhylogeneticDistanceMatrixShuffleTest):
+
+    is_lazy = True
+
 class TreePatristicDistTest(unittest.TestCase):
 
     def setUp(self):
@@ -366,12 +424,14 @@ class TreePatristicDistTest(unittest.TestCase):
 
 class PhylogeneticEcologyStatsTests(unittest.TestCase):
 
+    is_lazy = False
+
     def setUp(self):
         self.tree = dendropy.Tree.get_from_path(
                 src=pathmap.tree_source_path("community.tree.newick"),
                 schema="newick",
                 rooting="force-rooted")
-        self.pdm = dendropy.PhylogeneticDistanceMatrix.from_tree(self.tree)
+        self.pdm = dendropy.PhylogeneticDistanceMatrix.from_tree(self.tree, is_lazy=self.is_lazy)
         assemblage_data_filepath = pathmap.other_source_path("community.data.tsv")
         with open(assemblage_data_filepath) as src:
             self.data_table = container.DataTable.from_csv(src, default_data_type=int, delimiter="\t")
@@ -507,6 +567,25 @@ class PhylogeneticEcologyStatsTests(unittest.TestCase):
                     expected_results_data_table[expected_result_row_name, "mntd.obs.p"],
                     ))
 
+class LazyPhylogeneticEcologyStatsTests(PhylogeneticEcologyStatsTests):
+
+    is_lazy = True
+
+    def test_unweighted_statistics(self):
+        eager_pdm = dendropy.PhylogeneticDistanceMatrix.from_tree(self.tree)
+        for row_name in self.data_table.row_name_iter():
+            filter_fn = lambda taxon: self.data_table[row_name, taxon.label] > 0
+            for stat_name in ("mean_pairwise_distance", "mean_nearest_taxon_distance"):
+                for is_normalize_by_tree_size in (True, False):
+                    kwargs = {
+                            "filter_fn": filter_fn,
+                            "is_weighted_edge_distances": False,
+                            "is_normalize_by_tree_size": is_normalize_by_tree_size,
+                            }
+                    self.assertAlmostEqual(
+                            getattr(self.pdm, stat_name)(**kwargs),
+                            getattr(eager_pdm, stat_name)(**kwargs))
+
 class PhylogeneticDistanceMatrixReader(unittest.TestCase):
 
     def setUp(self):
@@ -849,6 +928,268 @@ class NodeToNodeDistancesTest(unittest.TestCase):
                     #     obs_mrca.edge.bipartition.leafset_bitmask))
                     self.assertIs(exp_mrca, obs_mrca)
 
+if phylogeneticdistance.numpy is None:
+    _LOG.warn("NumPy not available: skipping dense distance matrix tests")
+
+    class PhylogeneticDistanceMatrixNumpyUnavailable(unittest.TestCase):
+
+        def test_as_numpy_requires_numpy(self):
+            tree = dendropy.Tree.get(data="((a:1,b:2):1,c:3);", schema="newick")
+            pdm = tree.phylogenetic_distance_matrix()
+            self.assertRaises(ImportError, pdm.as_numpy)
+
+else:
+    numpy = phylogeneticdistance.numpy
+
+    class PhylogeneticDistanceMatrixNumpyTest(PdmTreeChecker, unittest.TestCase):
+
+        def setUp(self):
+            self.tree = dendropy.Tree.get(path=pathmap.tree_source_path(
+                "pythonidae.mle.nex"),
+                schema="nexus",
+                preserve_underscores=True)
+            self.pdm = self.tree.phylogenetic_distance_matrix()
+
+        def check_matrix(self, pdm, matrix, is_weighted_edge_distances, is_normalize_by_tree_size, places=7):
+            taxa = pdm.sorted_taxa()
+            self.assertEqual(matrix.shape, (len(taxa), len(taxa)))
+            for i1, t1 in enumerate(taxa):
+                for i2, t2 in enumerate(taxa):
+                    if t1 is t2:
+                        expected = 0.0
+                    else:
+                        expected = self.pdm.distance(t1, t2,
+                                is_weighted_edge_distances=is_weighted_edge_distances,
+                                is_normalize_by_tree_size=is_normalize_by_tree_size)
+                    self.assertAlmostEqual(matrix[i1, i2], expected, places)
+
+        def test_sorted_taxa(self):
+            taxa = self.pdm.sorted_taxa()
+            self.assertEqual(set(taxa), set(self.tree.taxon_namespace))
+            self.assertEqual(taxa, list(self.tree.taxon_namespace))
+
+        def test_as_numpy(self):
+            for is_lazy in (False, True):
+                pdm = self.tree.phylogenetic_distance_matrix(is_lazy=is_lazy)
+                for is_weighted_edge_distances in (True, False):
+                    for is_normalize_by_tree_size in (False, True):
+                        matrix = pdm.as_numpy(
+                                is_weighted_edge_distances=is_weighted_edge_distances,
+                                is_normalize_by_tree_size=is_normalize_by_tree_size)
+                        self.assertEqual(matrix.dtype, numpy.float64)
+                        self.check_matrix(pdm, matrix,
+                                is_weighted_edge_distances=is_weighted_edge_distances,
+                                is_normalize_by_tree_size=is_normalize_by_tree_size)
+
+        def test_as_numpy_after_shuffle(self):
+            pdm = self.tree.phylogenetic_distance_matrix()
+            # filled from the tree rather than from the stored distances
+            pdm._taxon_phylogenetic_distances = None
+            pdm._taxon_phylogenetic_path_steps = None
+            self.check_matrix(self.pdm, pdm.as_numpy(),
+                    is_weighted_edge_distances=True,
+                    is_normalize_by_tree_size=False)
+            for is_weighted_edge_distances in (True, False):
+                pdm = self.tree.phylogenetic_distance_matrix()
+                pdm.shuffle_taxa(
+                        is_shuffle_phylogenetic_distances=is_weighted_edge_distances,
+                        is_shuffle_phylogenetic_path_steps=not is_weighted_edge_distances,
+                        rng=random.Random(1))
+                taxa = pdm.sorted_taxa()
+                for w in (True, False):
+                    matrix = pdm.as_numpy(is_weighted_edge_distances=w)
+                    for i1, t1 in enumerate(taxa):
+                        for i2, t2 in enumerate(taxa):
+                            if t1 is not t2:
+                                self.assertAlmostEqual(matrix[i1, i2],
+                                        pdm.distance(t1, t2, is_weighted_edge_distances=w))
+
+        def test_as_numpy_float32(self):
+            for is_lazy in (False, True):
+                pdm = self.tree.phylogenetic_distance_matrix(is_lazy=is_lazy)
+                matrix = pdm.as_numpy(dtype=numpy.float32)
+                self.assertEqual(matrix.dtype, numpy.float32)
+                self.check_matrix(pdm, matrix,
+                        is_weighted_edge_distances=True,
+                        is_normalize_by_tree_size=False,
+                        places=5)
+
+        def test_from_numpy(self):
+            taxa = self.pdm.sorted_taxa()
+            matrix = self.pdm.as_numpy()
+            for kwargs in ({"taxa": taxa}, {}):
+                pdm = dendropy.PhylogeneticDistanceMatrix.from_numpy(
+                        matrix,
+                        taxon_namespace=self.tree.taxon_namespace,
+                        **kwargs)
+                self.assertEqual(pdm.sorted_taxa(), taxa)
+                self.assertEqual(pdm._mapped_taxa, self.pdm._mapped_taxa)
+                for t1 in taxa:
+                    for t2 in taxa:
+                        self.assertAlmostEqual(pdm(t1, t2), self.pdm(t1, t2))
+                self.assertTrue(numpy.array_equal(pdm.as_numpy(), matrix))
+                self.assertAlmostEqual(pdm.mean_pairwise_distance(), self.pdm.mean_pairwise_distance())
+                self.assertAlmostEqual(pdm.mean_nearest_taxon_distance(), self.pdm.mean_nearest_taxon_distance())
+
+        def test_from_numpy_reordered_taxa(self):
+            taxa = self.pdm.sorted_taxa()
+            taxa.reverse()
+            matrix = numpy.array([[self.pdm(t1, t2) if t1 is not t2 else 0.0 for t2 in taxa] for t1 in taxa])
+            pdm = dendropy.PhylogeneticDistanceMatrix.from_numpy(
+                    numpy.triu(matrix),
+                    taxon_namespace=self.tree.taxon_namespace,
+                    taxa=taxa)
+            self.check_matrix(pdm, pdm.as_numpy(),
+                    is_weighted_edge_distances=True,
+                    is_normalize_by_tree_size=False)
+
+        def test_from_numpy_float32(self):
+            matrix = self.pdm.as_numpy(dtype=numpy.float32)
+            pdm = dendropy.PhylogeneticDistanceMatrix.from_numpy(
+                    matrix,
+                    taxon_namespace=self.tree.taxon_namespace)
+            self.assertTrue(numpy.array_equal(pdm.as_numpy(dtype=numpy.float32), matrix))
+
+        def test_from_numpy_clone_and_shuffle(self):
+            pdm0 = dendropy.PhylogeneticDistanceMatrix.from_numpy(
+                    self.pdm.as_numpy(),
+                    taxon_namespace=self.tree.taxon_namespace)
+            pdm1 = pdm0.clone()
+            self.assertEqual(pdm0, pdm1)
+            pdm1.shuffle_taxa()
+            self.assertNotEqual(pdm0, pdm1)
+            self.assertEqual(pdm0._mapped_taxa, pdm1._mapped_taxa)
+
+        def test_from_numpy_trees(self):
+            pdm = dendropy.PhylogeneticDistanceMatrix.from_numpy(
+                    self.pdm.as_numpy(),
+                    taxon_namespace=self.tree.taxon_namespace)
+            self.check_tree(obs_tree=pdm.nj_tree(), expected_tree=self.pdm.nj_tree())
+            self.check_tree(obs_tree=pdm.upgma_tree(), expected_tree=self.pdm.upgma_tree())
+
+        def test_from_numpy_errors(self):
+            taxa = self.pdm.sorted_taxa()
+            matrix = self.pdm.as_numpy()
+            tns = self.tree.taxon_namespace
+            self.assertRaises(ValueError, dendropy.PhylogeneticDistanceMatrix.from_numpy, matrix[:, :-1], tns, taxa)
+            self.assertRaises(ValueError, dendropy.PhylogeneticDistanceMatrix.from_numpy, matrix, tns, taxa[:-1])
+            self.assertRaises(ValueError, dendropy.PhylogeneticDistanceMatrix.from_numpy, matrix, tns, taxa[:-1] + taxa[:1])
+
+    class PdmVectorizedTreeTest(PdmTreeChecker, unittest.TestCase):
+
+        def get_pdm(self, data_filename):
+            with open(pathmap.other_source_path(data_filename)) as src:
+                return dendropy.PhylogeneticDistanceMatrix.from_csv(
+                        src,
+                        is_first_row_column_names=True,
+                        is_first_column_row_names=True,
+                        is_allow_new_taxa=True,
+                        delimiter=",")
+
+        def test_nj_tree(self):
+            for data_filename in (
+                    "wpnjex.csv",
+                    "saitou_and_nei_1987_table1.csv",
+                    "pythonidae.mle.weighted.pdm.csv",
+                    "laurasiatherian.distances.ml.csv",
+                    ):
+                pdm = self.get_pdm(data_filename)
+                expected_tree = pdm.nj_tree()
+                for algorithm in ("numpy", "rapidnj"):
+                    self.check_tree(
+                            obs_tree=pdm.nj_tree(algorithm=algorithm),
+                            expected_tree=expected_tree)
+
+        def test_nj_tree_from_weighted_and_unweighted_distances(self):
+            tree = dendropy.Tree.get(path=pathmap.tree_source_path(
+                "pythonidae.mle.nex"),
+                schema="nexus",
+                preserve_underscores=True)
+            pdm = tree.phylogenetic_distance_matrix(is_lazy=True)
+            for is_weighted_edge_distances in (True, False):
+                t1 = pdm.nj_tree(is_weighted_edge_distances=is_weighted_edge_distances, algorithm="numpy")
+                t2 = pdm.nj_tree(is_weighted_edge_distances=is_weighted_edge_distances, algorithm="rapidnj")
+                self.assertEqual(t1.as_string("newick"), t2.as_string("newick"))
+                if is_weighted_edge_distances:
+                    self.check_tree(obs_tree=t1, expected_tree=pdm.nj_tree())
+
+        def test_nj_tree_small(self):
+            tns = dendropy.TaxonNamespace(["a", "b"])
+            for taxa in (tns[:1], tns[:2]):
+                pdm = dendropy.PhylogeneticDistanceMatrix.from_numpy(
+                        numpy.full((len(taxa), len(taxa)), 2.0),
+                        taxon_namespace=tns,
+                        taxa=taxa)
+                for algorithm in ("numpy", "rapidnj"):
+                    tree = pdm.nj_tree(algorithm=algorithm)
+                    leaves = tree.leaf_nodes()
+                    self.assertEqual(set(nd.taxon for nd in leaves), set(taxa))
+                    if len(taxa) == 2:
+                        self.assertEqual([nd.edge.length for nd in leaves], [1.0, 1.0])
+
+        def test_upgma_tree(self):
+            for data_filename in (
+                    "wpupgmaex.csv",
+                    "pythonidae.mle.weighted.pdm.csv",
+                    "laurasiatherian.distances.ml.csv",
+                    ):
+                pdm = self.get_pdm(data_filename)
+                self.check_tree(
+                        obs_tree=pdm.upgma_tree(algorithm="nnchain"),
+                        expected_tree=pdm.upgma_tree())
+
+        def test_upgma_tree_nested_clusters(self):
+            # Each join makes the new cluster the closest to every other
+            # cluster: the worst case for tracking the closest cluster of
+            # each cluster.
+            n = 100
+            tns = dendropy.TaxonNamespace(["t{}".format(i) for i in range(n)])
+            indexes = numpy.arange(n, dtype=float)
+            matrix = numpy.maximum.outer(indexes, indexes)
+            numpy.fill_diagonal(matrix, 0.0)
+            pdm = dendropy.PhylogeneticDistanceMatrix.from_numpy(
+                    matrix,
+                    taxon_namespace=tns,
+                    taxa=list(tns))
+            self.check_tree(
+                    obs_tree=pdm.upgma_tree(algorithm="nnchain"),
+                    expected_tree=pdm.upgma_tree())
+
+        @unittest.skipIf(tracemalloc is None, "tracemalloc not available")
+        def test_upgma_tree_large(self):
+            # time and storage should be quadratic in the number of taxa,
+            # i.e., a small multiple of those of the distance matrix itself
+            n = 2000
+            tns = dendropy.TaxonNamespace(["t{}".format(i) for i in range(n)])
+            indexes = numpy.arange(n, dtype=float)
+            matrix = numpy.maximum.outer(indexes, indexes)
+            numpy.fill_diagonal(matrix, 0.0)
+            pdm = dendropy.PhylogeneticDistanceMatrix.from_numpy(
+                    matrix,
+                    taxon_namespace=tns,
+                    taxa=list(tns))
+            tracemalloc.start()
+            try:
+                start_time = time.time()
+                tree = pdm.upgma_tree(algorithm="nnchain")
+                elapsed_time = time.time() - start_time
+                peak_size = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            self.assertLess(elapsed_time, 20.0)
+            self.assertLess(peak_size, 4 * matrix.nbytes)
+            self.assertEqual(len(tree.leaf_nodes()), n)
+            self.assertEqual(len(tree.internal_nodes()), n - 1)
+            nd = tree.find_node_with_taxon_label("t{}".format(n - 1))
+            self.assertIs(nd.parent_node, tree.seed_node)
+            self.assertAlmostEqual(nd.edge.length, (n - 1) / 2.0)
+            self.assertAlmostEqual(min(nd.edge.length for nd in tree.postorder_node_iter() if nd is not tree.seed_node), 0.5)
+
+        def test_unrecognized_algorithm(self):
+            pdm = self.get_pdm("wpnjex.csv")
+            self.assertRaises(ValueError, pdm.nj_tree, algorithm="foo")
+            self.assertRaises(ValueError, pdm.upgma_tree, algorithm="foo")
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -98,6 +98,89 @@ class PopulationPairSummaryStatisticsTests(dendropytest.ExtendedTestCase):
         self.assertAlmostEqual(pp.tajimas_d, 1.65318627677, 4)
         self.assertAlmostEqual(pp.wakeleys_psi, 0.8034976, 2)
 
+if popgenstat.numpy is None:
+    _LOG.warn("NumPy not available: skipping encoded character matrix tests")
+
+    class EncodedCharacterMatrixUnavailableTest(dendropytest.ExtendedTestCase):
+
+        def test_encoding_requires_numpy(self):
+            data = dendropy.DnaCharacterMatrix.get_from_string(">s1\nACGT\n>s2\nACGA\n", "fasta")
+            self.assertRaises(ImportError, popgenstat.EncodedCharacterMatrix.from_char_matrix, data)
+
+else:
+
+    class EncodedCharacterMatrixTest(dendropytest.ExtendedTestCase):
+
+        data = dendropy.DnaCharacterMatrix.get_from_path(pathmap.char_source_path('COII_Apes.nex'), schema="nexus")
+
+        def setUp(self):
+            self.ecm = popgenstat.EncodedCharacterMatrix.from_char_matrix(self.data, ignore_uncertain=True)
+
+        def test_shape(self):
+            self.assertEqual(self.ecm.num_sequences, len(self.data))
+            self.assertEqual(self.ecm.num_sites, self.data.max_sequence_size)
+
+        def test_num_segregating_sites(self):
+            self.assertEqual(self.ecm.num_segregating_sites(), 183)
+
+        def test_average_number_of_pairwise_differences(self):
+            self.assertAlmostEqual(self.ecm.average_number_of_pairwise_differences(), 62.75000, 4)
+
+        def test_nucleotide_diversity(self):
+            self.assertAlmostEqual(self.ecm.nucleotide_diversity(), 0.09174, 4)
+
+        def test_tajimas_d(self):
+            self.assertAlmostEqual(self.ecm.tajimas_d(), 1.12467, 4)
+
+        def test_wattersons_theta(self):
+            self.assertAlmostEqual(self.ecm.wattersons_theta(), 49.00528, 4)
+
+        def test_unfolded_site_frequency_spectrum(self):
+            for pad in (True, False):
+                self.assertEqual(
+                        self.ecm.unfolded_site_frequency_spectrum(pad=pad),
+                        popgenstat.unfolded_site_frequency_spectrum(self.data, ignore_uncertain=True, pad=pad))
+            ancestral_sequence = self.data.sequences()[2]
+            self.assertEqual(
+                    self.ecm.unfolded_site_frequency_spectrum(ancestral_sequence=ancestral_sequence),
+                    popgenstat.unfolded_site_frequency_spectrum(self.data, ancestral_sequence=ancestral_sequence, ignore_uncertain=True))
+
+        def test_uncertain_states(self):
+            s = """\
+                >s1
+                ACGTACGT-ACGTRNACG?TA
+                >s2
+                ACGAACGTTACG-RAACGTTA
+                >s3
+                AC?AACGTTACGTYAACGTTN
+                >s4
+                -CGAACTTTACGTRAACGTTA
+                >s5
+                ACGAACGTTNCGTRAAC-TTA"""
+            data = dendropy.DnaCharacterMatrix.get_from_string(s, 'fasta')
+            sequences = data.sequences()
+            for ignore_uncertain in (True, False):
+                ecm = popgenstat.EncodedCharacterMatrix.from_char_matrix(data, ignore_uncertain=ignore_uncertain)
+                self.assertEqual(
+                        ecm.count_differences(),
+                        popgenstat._count_differences(sequences, data.default_state_alphabet, ignore_uncertain))
+                self.assertEqual(
+                        ecm.num_segregating_sites(max_block_size=7),
+                        popgenstat.num_segregating_sites(data, ignore_uncertain=ignore_uncertain))
+                self.assertEqual(
+                        ecm.unfolded_site_frequency_spectrum(max_block_size=7),
+                        popgenstat.unfolded_site_frequency_spectrum(data, ignore_uncertain=ignore_uncertain))
+                differences, counted = ecm.pairwise_differences(max_block_size=7)
+                self.assertEqual(differences.tolist(), ecm.pairwise_differences()[0].tolist())
+                self.assertEqual(counted.tolist(), ecm.pairwise_differences()[1].tolist())
+
+        def test_unequal_lengths(self):
+            sequences = self.data.sequences()
+            self.assertRaises(Exception,
+                    popgenstat.EncodedCharacterMatrix,
+                    [sequences[0], sequences[1][:-1]],
+                    self.data.default_state_alphabet)
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -20,6 +20,7 @@
 Tests statistical routines.
 """
 
+import random
 import unittest
 from dendropy.test.support import dendropytest
 from dendropy.calculate import statistics
@@ -616,6 +617,64 @@ class TestVarianceCovariance(unittest.TestCase):
             for j, y in enumerate(x):
                 self.assertAlmostEqual(cov[i][j], e[i][j])
 
+class StreamingSummaryTests(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.values = [rng.gauss(10.0, 2.0) for i in range(20000)]
+
+    def testExactForSmallSamples(self):
+        values = self.values[:500]
+        summary = statistics.StreamingSummary()
+        summary.extend(values)
+        self.assertEqual(len(summary), 500)
+        self.assertEqual(summary.summarize(), statistics.summarize(values))
+        summary = statistics.StreamingSummary()
+        summary.extend(values[:200])
+        other = statistics.StreamingSummary()
+        other.extend(values[200:])
+        summary.update(other)
+        self.assertEqual(summary.summarize(), statistics.summarize(values))
+
+    def verify_approximate_summary(self, summary):
+        expected = statistics.summarize(self.values)
+        observed = summary.summarize()
+        self.assertEqual(observed["range"], expected["range"])
+        self.assertAlmostEqual(observed["mean"], expected["mean"])
+        self.assertAlmostEqual(observed["var"], expected["var"])
+        values = sorted(self.values)
+        def rank(v):
+            return float(sum(1 for x in values if x <= v)) / len(values)
+        self.assertAlmostEqual(rank(observed["median"]), 0.5, delta=0.05)
+        self.assertAlmostEqual(rank(observed["quant_5_95"][0]), 0.05, delta=0.05)
+        self.assertAlmostEqual(rank(observed["quant_5_95"][1]), 0.95, delta=0.05)
+        self.assertAlmostEqual(rank(observed["hpd95"][1]) - rank(observed["hpd95"][0]), 0.95, delta=0.05)
+
+    def testStreamingSummary(self):
+        summary = statistics.StreamingSummary(sample_size=500, rng=random.Random(2))
+        summary.extend(self.values)
+        self.assertEqual(len(summary.sample), 500)
+        self.verify_approximate_summary(summary)
+
+    def testCombinedSummaries(self):
+        summary = statistics.StreamingSummary(sample_size=500, rng=random.Random(3))
+        summary.extend(self.values[:15000])
+        other = statistics.StreamingSummary(sample_size=500, rng=random.Random(4))
+        other.extend(self.values[15000:])
+        summary.update(other)
+        self.assertEqual(len(summary), len(self.values))
+        self.assertEqual(len(summary.sample), 500)
+        self.verify_approximate_summary(summary)
+
+    def testP2QuantileEstimator(self):
+        estimator = statistics.P2QuantileEstimator(0.5)
+        for v in [3, 1, 2]:
+            estimator.add(v)
+        self.assertEqual(estimator.value, 2)
+        for v in self.values:
+            estimator.add(v)
+        self.assertAlmostEqual(estimator.value, statistics.median(self.values), delta=0.05)
+
 class FishersExactTests(dendropytest.ExtendedTestCase):
     """
     Fisher's exact test.
@@ -979,6 +979,38 @@ class TreeSymmetricDistTest(unittest.TestCase):
          o_tree = dendropy.Tree.get_from_stream(StringIO("((t1,t2),((t4,(t5,t6)),t3));"), schema="newick", taxon_namespace=taxon_namespace)
          o_tree.encode_bipartitions()
          self.assertEqual(treecompare.symmetric_difference(o_tree, ref), 2)
+         self.assertEqual(treecompare.day_symmetric_difference(o_tree, ref), 2)
+         self.assertEqual(treecompare.unweighted_robinson_foulds_distance(o_tree, ref, algorithm="day"), 2)
+
+class TreeDaySymmetricDistTest(unittest.TestCase):
+
+    def test_matches_bipartition_comparison(self):
+        for source_name in ("pythonidae.beast.mcmc.trees", "pythonidae.random.bd0301.tre"):
+            trees = dendropy.TreeList.get_from_path(
+                    pathmap.tree_source_path(source_name),
+                    "nexus")[:10]
+            for t1 in trees:
+                for t2 in trees:
+                    self.assertEqual(
+                            treecompare.day_symmetric_difference(t1, t2),
+                            treecompare.symmetric_difference(t1, t2))
+
+    def test_polytomies_and_unifurcations(self):
+        tns = dendropy.TaxonNamespace()
+        for rooting, tree_strings in (
+                ("[&R]", ("((a,b,c),((d,(e)),f));", "(((a,b),c),(d,(e,f)));")),
+                ("[&U]", ("(((a,b,c),((d,(e)),f)));", "(a,(b,c),(d,e,f));")),
+                ):
+            trees = [dendropy.Tree.get(data=rooting + s, schema="newick", taxon_namespace=tns) for s in tree_strings]
+            expected = treecompare.symmetric_difference(trees[0].clone(1), trees[1].clone(1))
+            self.assertEqual(treecompare.day_symmetric_difference(trees[0], trees[1]), expected)
+            self.assertEqual(treecompare.day_symmetric_difference(trees[1], trees[0]), expected)
+
+    def test_different_leaf_taxa(self):
+        tns = dendropy.TaxonNamespace()
+        t1 = dendropy.Tree.get(data="((a,b),(c,d));", schema="newick", taxon_namespace=tns)
+        t2 = dendropy.Tree.get(data="((a,b),(c,e));", schema="newick", taxon_namespace=tns)
+        self.assertRaises(ValueError, treecompare.day_symmetric_difference, t1, t2)
 
 class TreeCompareTests(dendropytest.ExtendedTestCase):
 
@@ -29,6 +29,7 @@ from dendropy.test.support import compare_and_validate
 from dendropy.test.support import pathmap
 from dendropy.test.support import dendropytest
 from dendropy.utility import messaging
+from dendropy.utility import error
 from dendropy.test.support.dendropytest import ExtendedTestCase
 from dendropy.test.support.mockrandom import MockRandom
 import dendropy
@@ -213,6 +214,39 @@ class PruneTest(unittest.TestCase):
     def testRetainTaxaRooted(self):
         self.check("Rooted", "prune_rooted", True)
 
+    def testPruneTaxaFromPolytomy(self):
+        taxon_namespace = dendropy.TaxonNamespace(["T{}".format(i) for i in range(5000)])
+        tree = dendropy.Tree(taxon_namespace=taxon_namespace)
+        for taxon in taxon_namespace:
+            tree.seed_node.new_child(taxon=taxon, edge_length=1.0)
+        tree.prune_taxa(taxon_namespace[1::2])
+        self.assertEqual(
+                [nd.taxon for nd in tree.seed_node.child_node_iter()],
+                list(taxon_namespace[::2]))
+        for nd in tree.seed_node.child_node_iter():
+            self.assertIs(nd.parent_node, tree.seed_node)
+
+    def testPruneTaxaWithUnifurcationsAndInternalTaxa(self):
+        tree = dendropy.Tree.get(
+                data="[&R] (((A:1,B:1)X:1,(C:1,D:1):1):1,((E:1):1,F:1):1);",
+                schema="newick",
+                suppress_internal_node_taxa=False)
+        tns = tree.taxon_namespace
+        tree.prune_taxa([tns.get_taxon("B"), tns.get_taxon("C"), tns.get_taxon("F")])
+        self.assertEqual(tree.as_string("newick"), "[&R] ((A:2.0,D:2.0):1.0,E:3.0);\n")
+        tree.prune_taxa([tns.get_taxon("X")], is_apply_filter_to_internal_nodes=True)
+        self.assertEqual(tree.as_string("newick"), "[&R] ((A:2.0,D:2.0):1.0,E:3.0);\n")
+
+    def testPruneAllTaxa(self):
+        tree = dendropy.Tree.get(data="((A,B),(C,D));", schema="newick")
+        self.assertRaises(error.SeedNodeDeletionException,
+                tree.prune_taxa, tree.taxon_namespace)
+
+    def testSuppressUnifurcationsInPolytomy(self):
+        tree = dendropy.Tree.get(data="(((A:1):2):3,((B:1)x:2,(C:1):2,D:1):1);", schema="newick")
+        tree.suppress_unifurcations()
+        self.assertEqual(tree.as_string("newick"), "(A:6.0,(B:3.0,C:3.0,D:1.0):1.0);\n")
+
 class TruncateTree(unittest.TestCase):
 
     def setUp(self):
@@ -286,6 +320,39 @@ class TreeMidpointRootingTest(ExtendedTestCase):
                         expected_tree.bipartition_edge_map[bipartition].length,
                         3)
 
+    def testMidpointRootingOnEdge(self):
+        tree = dendropy.Tree.get(
+                data="((A:1,B:1):1,(C:1,(D:1,E:8):1):1);",
+                schema="newick",
+                rooting="force-rooted")
+        tree.encode_bipartitions()
+        tree.reroot_at_midpoint(update_bipartitions=True)
+        self.assertEqual(tree.as_string("newick"),
+                "[&R] (E:6.0,(D:1.0,(C:1.0,(A:1.0,B:1.0):2.0):1.0):2.0);\n")
+        self.assertEqual([b.split_as_bitstring() for b in tree.bipartition_encoding],
+                ['10000', '01000', '00100', '00001', '00010', '00011', '00111', '01111', '11111'])
+
+    def testMidpointRootingDeepTree(self):
+        # a ladder tree, with the longest path between its two deepest
+        # leaves, with too many leaves to calculate all the pairwise
+        # distances between
+        tree = dendropy.Tree()
+        tree.is_rooted = True
+        nd = tree.seed_node
+        num_tips = 5000
+        for idx in range(num_tips - 1):
+            nd.new_child(label="T{}".format(idx), edge_length=0.5)
+            nd = nd.new_child(label="N{}".format(idx), edge_length=1.0)
+        nd.label = "T{}".format(num_tips - 1)
+        nd.edge.length = 0.75
+        tree.reroot_at_midpoint()
+        self.assertIs(tree.seed_node.label, None)
+        child_edge_lengths = dict((ch.label, ch.edge.length) for ch in tree.seed_node.child_node_iter())
+        self.assertEqual(child_edge_lengths, {
+            "N{}".format(num_tips // 2 - 2): 0.125,
+            "N{}".format(num_tips // 2 - 1): 0.875})
+        self.assertEqual(len(list(tree.leaf_node_iter())), num_tips)
+
 class TreeRerootingTests(dendropytest.ExtendedTestCase):
     #                  a
     #                 / \
@@ -708,6 +775,49 @@ class TreeRerootingTests(dendropytest.ExtendedTestCase):
                             new_length = sum([ref_edge_lengths[clabel] for clabel in updated_edge_lengths[nd.label]])
                             self.assertEqual(nd.edge.length, new_length, "New seed: {}, Current node: {}".format(reseed_at_label, nd.label))
 
+    def test_rerooting_bipartition_updates(self):
+        curated_tree_gen = curated_test_tree.CuratedTestTree()
+        for is_rooted in (True, False):
+            for reroot_at_edge in (False, True):
+                for reroot_at_label in curated_tree_gen.all_labels:
+                    if reroot_at_label == "a":
+                        continue
+                    tree, all_nodes, leaf_nodes, internal_nodes = curated_tree_gen.get_tree(
+                            suppress_internal_node_taxa=True,
+                            suppress_leaf_node_taxa=False)
+                    tree.is_rooted = is_rooted
+                    tree.encode_bipartitions()
+                    old_bipartitions = dict((nd, nd.edge.bipartition) for nd in tree)
+                    new_root = tree.find_node_with_label(reroot_at_label)
+                    if new_root is None:
+                        # collapsed into the basal trifurcation of the unrooted tree
+                        continue
+                    path_nodes = set(new_root.ancestor_iter(inclusive=not reroot_at_edge))
+                    is_leafset_unchanged = reroot_at_edge or new_root.is_internal()
+                    if reroot_at_edge:
+                        tree.reroot_at_edge(new_root.edge,
+                                length1=1.0,
+                                length2=2.0,
+                                update_bipartitions=True)
+                    else:
+                        tree.reroot_at_node(new_root, update_bipartitions=True)
+                    tree._debug_check_tree(
+                            logger_obj=_LOG,
+                            check_bipartitions=True,
+                            unique_bipartition_edge_mapping=True)
+                    expected_tree = tree.clone(1)
+                    expected_tree.encode_bipartitions()
+                    self.assertEqual(
+                            [(b.leafset_bitmask, b.split_bitmask) for b in tree.bipartition_encoding],
+                            [(b.leafset_bitmask, b.split_bitmask) for b in expected_tree.bipartition_encoding])
+                    self.assertEqual(list(tree.bipartition_encoding), [nd.edge.bipartition for nd in tree.postorder_node_iter()])
+                    if is_rooted and is_leafset_unchanged:
+                        # bipartitions of edges off the path between the old
+                        # and new root are reused
+                        for nd in tree:
+                            if nd not in path_nodes and nd is not tree.seed_node:
+                                self.assertIs(nd.edge.bipartition, old_bipartitions[nd])
+
 class ResolvePolytomiesTestCase(dendropytest.ExtendedTestCase):
 
     def verify_resolve_polytomies(self, tree_string, rng):
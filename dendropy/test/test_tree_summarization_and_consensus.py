@@ -26,6 +26,7 @@ import dendropy
 import random
 import itertools
 from dendropy.calculate import treecompare
+from dendropy.calculate import treesum
 from dendropy.test.support import pathmap
 from dendropy.calculate import statistics
 from dendropy.test.support import dendropytest
@@ -99,6 +100,24 @@ class TestBasicCredibilityScoring(unittest.TestCase):
         t1 = ta.maximum_sum_of_split_support_tree()
         self.assertEqual(treecompare.symmetric_difference(t0, t1), 0)
 
+    def test_tree_list_credibility_trees(self):
+        for method_name, tree_idx in (
+                ("maximum_product_of_split_support_tree", 70),
+                ("maximum_sum_of_split_support_tree", 73),
+                ):
+            trees = self.get_trees()
+            tree = getattr(trees, method_name)()
+            self.assertIs(tree, trees[tree_idx])
+            self.assertEqual(len(tree.bipartition_encoding), len(tree.edges()))
+            self.assertTrue(tree._is_bipartition_encoding_current())
+            # the other trees are not encoded
+            self.assertIsNone(trees[0].bipartition_encoding)
+        trees = self.get_trees()
+        trees.consensus()
+        self.assertIsNone(trees[0].bipartition_encoding)
+        trees.encode_bipartitions()
+        self.assertTrue(trees[0]._is_bipartition_encoding_current())
+
     def test_split_distribution_max_sum_of_credibilities(self):
         sd = self.trees.split_distribution(is_bipartitions_updated=False)
         t0 = self.trees[73]
@@ -214,6 +233,72 @@ class TestTreeEdgeSummarization(unittest.TestCase):
             obs_edge = target_tree.bipartition_edge_map[exp_bipartition]
             self.assertAlmostEqual(obs_edge.head_node.age, exp_edge.head_node.age)
 
+class TestTreeSummarizerStreamingSummaries(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.trees = dendropy.TreeList.get_from_path(
+                pathmap.tree_source_path("pythonidae.beast.mcmc.trees"),
+                "nexus")
+        for tree in cls.trees:
+            # the lists of edge lengths cannot be summarized with missing values
+            tree.seed_node.edge.length = 0.0
+        cls.split_distributions = []
+        for streaming_summaries in (False, True):
+            sd = dendropy.SplitDistribution(
+                    taxon_namespace=cls.trees.taxon_namespace,
+                    ignore_node_ages=False,
+                    streaming_summaries=streaming_summaries)
+            for tree in cls.trees:
+                sd.count_splits_on_tree(tree)
+            cls.split_distributions.append(sd)
+        cls.tsum = treesum.TreeSummarizer()
+
+    def get_target_tree(self):
+        tree = self.trees[0].clone(2)
+        tree.encode_bipartitions()
+        return tree
+
+    def check_edge_lengths(self, tree1, tree2):
+        for bipartition in tree1.bipartition_encoding:
+            edge1 = tree1.bipartition_edge_map[bipartition]
+            edge2 = tree2.bipartition_edge_map[bipartition]
+            if edge1.length is None:
+                self.assertIs(edge2.length, None)
+            else:
+                self.assertAlmostEqual(edge1.length, edge2.length)
+
+    def test_tree_from_splits(self):
+        trees = [self.tsum.tree_from_splits(sd) for sd in self.split_distributions]
+        for tree in trees:
+            tree.encode_bipartitions()
+        self.assertEqual(trees[0].bipartition_encoding, trees[1].bipartition_encoding)
+        self.check_edge_lengths(trees[0], trees[1])
+
+    def test_summarize_node_ages_on_tree(self):
+        trees = []
+        for sd in self.split_distributions:
+            tree = self.get_target_tree()
+            self.tsum.summarize_node_ages_on_tree(tree, sd, set_edge_lengths=False)
+            trees.append(tree)
+        for nd1, nd2 in zip(trees[0].preorder_node_iter(), trees[1].preorder_node_iter()):
+            self.assertAlmostEqual(nd1.age, nd2.age)
+
+    def test_summarize_edge_lengths_on_tree(self):
+        trees = []
+        for sd in self.split_distributions:
+            tree = self.get_target_tree()
+            self.tsum.summarize_edge_lengths_on_tree(tree, sd, is_bipartitions_updated=True)
+            trees.append(tree)
+        self.check_edge_lengths(trees[0], trees[1])
+
+    def test_custom_summarization_fn(self):
+        sd = self.split_distributions[1]
+        self.assertRaises(ValueError, self.tsum.summarize_node_ages_on_tree,
+                self.get_target_tree(), sd, summarization_fn=max)
+        self.assertRaises(ValueError, self.tsum.summarize_edge_lengths_on_tree,
+                self.get_target_tree(), sd, summarization_fn=max, is_bipartitions_updated=True)
+
 class TestTopologyCounter(dendropytest.ExtendedTestCase):
 
     def get_regime(self,
@@ -380,5 +465,92 @@ class TestTopologyCounter(dendropytest.ExtendedTestCase):
             b = frozenset(tree.encode_bipartitions())
             self.assertAlmostEqual(tree.frequency, expected_freqs[b])
 
+class TestBoundedTopologyCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.source_trees = dendropy.TreeList.get_from_path(
+                pathmap.tree_source_path("dendropy-test-trees-n14-unrooted-treeshapes.nexus"),
+                "nexus")
+        for tree in self.source_trees:
+            tree.encode_bipartitions()
+        rng = random.Random(1)
+        self.sample = []
+        for idx, tree in enumerate(self.source_trees):
+            self.sample.extend([idx] * int(2000.0 / (idx + 1) ** 1.5))
+        rng.shuffle(self.sample)
+        self.true_counts = collections.Counter(self.sample)
+        self.hash_to_index = {}
+        for idx, tree in enumerate(self.source_trees):
+            self.hash_to_index[treesum.TopologyCounter.hash_topology(tree)] = idx
+
+    def count(self, topology_counter, sample):
+        for idx in sample:
+            topology_counter.count(self.source_trees[idx], is_bipartitions_updated=True)
+
+    def check_bounds(self, topology_counter):
+        for topology_hash, (count, freq) in topology_counter.calc_hash_freqs().items():
+            true_count = self.true_counts[self.hash_to_index[topology_hash]]
+            self.assertLessEqual(true_count, count)
+            self.assertLessEqual(count - topology_counter.count_error(topology_hash), true_count)
+
+    def test_exact_counts(self):
+        tc = treesum.TopologyCounter()
+        self.count(tc, self.sample)
+        hash_freqs = tc.calc_hash_freqs()
+        self.assertEqual(len(hash_freqs), len(self.true_counts))
+        for topology_hash, (count, freq) in hash_freqs.items():
+            self.assertEqual(count, self.true_counts[self.hash_to_index[topology_hash]])
+            self.assertEqual(tc.count_error(topology_hash), 0)
+            self.assertAlmostEqual(freq, float(count) / len(self.sample))
+        tree_freqs = tc.calc_tree_freqs(self.source_trees.taxon_namespace)
+        for tree, (count, freq) in tree_freqs.items():
+            tree.encode_bipartitions()
+            idx = self.hash_to_index[treesum.TopologyCounter.hash_topology(tree)]
+            self.assertEqual(count, self.true_counts[idx])
+            self.assertEqual(
+                    frozenset(b.split_bitmask for b in tree.bipartition_encoding),
+                    frozenset(b.split_bitmask for b in self.source_trees[idx].bipartition_encoding))
+
+    def test_bounded_counts(self):
+        tc = treesum.TopologyCounter(max_topologies=20)
+        self.count(tc, self.sample)
+        self.assertEqual(len(tc), 20)
+        self.assertEqual(tc.total_trees_counted, len(self.sample))
+        self.check_bounds(tc)
+        hash_freqs = tc.calc_hash_freqs()
+        most_common = [self.hash_to_index[h] for h in list(hash_freqs.keys())[:5]]
+        self.assertEqual(most_common, [idx for idx, count in self.true_counts.most_common(5)])
+        self.assertEqual(len(tc.calc_tree_freqs(self.source_trees.taxon_namespace)), 20)
+
+    def test_update(self):
+        for max_topologies in (None, 20):
+            tc1 = treesum.TopologyCounter(max_topologies=max_topologies)
+            tc2 = treesum.TopologyCounter(max_topologies=max_topologies)
+            self.count(tc1, self.sample[::2])
+            self.count(tc2, self.sample[1::2])
+            tc1.update(tc2)
+            self.assertEqual(tc1.total_trees_counted, len(self.sample))
+            if max_topologies is None:
+                self.assertEqual(len(tc1), len(self.true_counts))
+            else:
+                self.assertEqual(len(tc1), max_topologies)
+            self.check_bounds(tc1)
+
+    def test_hash_collision(self):
+        tc = treesum.TopologyCounter()
+        tree = self.source_trees[0]
+        tc.count(tree, is_bipartitions_updated=True)
+        topology_hash = treesum.TopologyCounter.hash_topology(tree)
+        other_encoding = treesum.TopologyCounter.encode_topology(self.source_trees[1])
+        self.assertRaises(ValueError, tc.update_topology_hash_map,
+                {topology_hash: 1},
+                {topology_hash: other_encoding})
+
+    def test_split_bitmask_encoding(self):
+        split_bitmasks = [3, 1, 2**70 + 5, 12]
+        encoding = treesum.TopologyCounter.encode_split_bitmasks(split_bitmasks)
+        self.assertEqual(treesum.TopologyCounter.decode_split_bitmasks(encoding), sorted(split_bitmasks))
+        self.assertEqual(encoding, treesum.TopologyCounter.encode_split_bitmasks(reversed(split_bitmasks)))
+
 if __name__ == "__main__":
     unittest.main()
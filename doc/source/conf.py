@@ -231,9 +231,21 @@ rst_prolog = """
 .. |Node| replace:: :class:`~dendropy.datamodel.treemodel.Node`
 .. |Edge| replace:: :class:`~dendropy.datamodel.treemodel.Edge`
 .. |Bipartition| replace:: :class:`~dendropy.datamodel.treemodel.Bipartition`
+.. |SlottedNode| replace:: :class:`~dendropy.datamodel.treemodel.SlottedNode`
+.. |SlottedEdge| replace:: :class:`~dendropy.datamodel.treemodel.SlottedEdge`
+.. |SlottedBipartition| replace:: :class:`~dendropy.datamodel.treemodel.SlottedBipartition`
+.. |TreeStructureIndex| replace:: :class:`~dendropy.datamodel.treemodel.TreeStructureIndex`
+.. |FlatTree| replace:: :class:`~dendropy.datamodel.flattreemodel.FlatTree`
+.. |FlatNode| replace:: :class:`~dendropy.datamodel.flattreemodel.FlatNode`
 .. |TreeList| replace:: :class:`~dendropy.datamodel.treecollectionmodel.TreeList`
 .. |TreeArray| replace:: :class:`~dendropy.datamodel.treecollectionmodel.TreeArray`
+.. |TreeOffsetIndex| replace:: :class:`~dendropy.dataio.treeindex.TreeOffsetIndex`
 .. |SplitDistribution| replace:: :class:`~dendropy.datamodel.treecollectionmodel.SplitDistribution`
+.. |PackedSplitMatrix| replace:: :class:`~dendropy.datamodel.packedsplitmodel.PackedSplitMatrix`
+.. |SplitIncidenceMatrix| replace:: :class:`~dendropy.datamodel.packedsplitmodel.SplitIncidenceMatrix`
+.. |SplitStore| replace:: :class:`~dendropy.datamodel.splitstoremodel.SplitStore`
+.. |StoredSplitValues| replace:: :class:`~dendropy.datamodel.splitstoremodel.StoredSplitValues`
+.. |StreamingSummary| replace:: :class:`~dendropy.calculate.statistics.StreamingSummary`
 .. |SplitDistributionSummarizer| replace:: :class:`~dendropy.datamodel.treecollectionmodel.SplitDistributionSummarizer`
 .. |DataSet| replace:: :class:`~dendropy.datamodel.datasetmodel.DataSet`
 .. |StateIdentity| replace:: :class:`~dendropy.datamodel.charstatemodel.StateIdentity`
@@ -254,6 +266,10 @@ rst_prolog = """
 .. |AnnotationSet| replace:: :class:`~dendropy.datamodel.basemodel.AnnotationSet`
 .. |Annotable| replace:: :class:`~dendropy.datamodel.basemodel.Annotable`
 .. |PhylogeneticDistanceMatrix| replace:: :class:`~dendropy.calculate.phylogeneticdistance.PhylogeneticDistanceMatrix`
+.. |PatristicDistanceIndex| replace:: :class:`~dendropy.calculate.phylogeneticdistance.PatristicDistanceIndex`
+.. |EncodedCharacterMatrix| replace:: :class:`~dendropy.calculate.popgenstat.EncodedCharacterMatrix`
+.. |PackedStateSets| replace:: :class:`~dendropy.model.parsimony.PackedStateSets`
+.. |IncrementalParsimonyScorer| replace:: :class:`~dendropy.model.parsimony.IncrementalParsimonyScorer`
 
 .. |get| replace::  :py:meth:`get`
 .. |put| replace::  :py:meth:`put`